@@ -0,0 +1,9 @@
+# brain_path.py
+# brain/cv 패키지(cv.*)를 import할 수 있도록 저장소의 brain 폴더를 sys.path 끝에 추가한다.
+# 이 폴더의 모듈 이름이 먼저 잡히도록 앞이 아니라 끝에 붙인다.
+import sys
+from pathlib import Path
+
+BRAIN_DIR = str(Path(__file__).resolve().parent.parent / "brain")
+if BRAIN_DIR not in sys.path:
+    sys.path.append(BRAIN_DIR)
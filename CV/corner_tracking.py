@@ -0,0 +1,51 @@
+# corner_tracking.py — CV 스트림용 초록 마커 코너 추적기
+# 제너레이터마다 매 프레임 전체 화면에 find_green_corners를 돌리던 것을 brain/cv의 CornerTracker로 바꾼다.
+# 한 번 네 코너를 잡으면 다음 프레임부터 직전 코너 주변 창에서만 마커를 찾고, 놓치면 전체 검출로 돌아간다.
+# 추적기는 brain/cv/corner_state.py의 프로세스 공용 CornerStateService 하나가 들고, 스트림들은 track()으로
+# 같은 코너 상태를 본다 (스트림마다 추적기를 두면 각자 처음부터 다시 수렴해 화면마다 보드 위치가 달랐다).
+import itertools
+
+import numpy as np
+
+import brain_path  # noqa: F401  (brain/cv 패키지 경로)
+from cv.corner_state import get_corner_service
+from cv.corner_tracker import CornerTracker
+from cv.marker_validator import TRACKER_AREA_FRACTION, MarkerValidator
+
+from warp_cam_picam2_v2 import find_green_corners, Hmin, Smin, Vmin, Hmax, Smax, Vmax
+
+LOWER = np.array([Hmin, Smin, Vmin], dtype=np.uint8)
+UPPER = np.array([Hmax, Smax, Vmax], dtype=np.uint8)
+MIN_AREA = 60
+
+
+def _detect(frame):
+    return find_green_corners(frame.copy(), LOWER, UPPER, min_area=MIN_AREA)
+
+
+def make_tracker():
+    """CV 초록 범위(warp_cam_picam2_v2)로 전체 검출과 창 검색, 마커 검증을 하는 CornerTracker."""
+    return CornerTracker(detector=_detect, hsv_range=(LOWER, UPPER),
+                         validator=MarkerValidator(LOWER, UPPER, area_fraction=TRACKER_AREA_FRACTION))
+
+
+_seq = itertools.count(1)
+
+
+def corner_service():
+    """CV 초록 범위 추적기를 쓰는 프로세스 공용 CornerStateService."""
+    service = get_corner_service()
+    service.set_tracker_factory(make_tracker)
+    return service
+
+
+def track(cap, frame):
+    """cap에서 읽은 프레임을 공용 서비스에 넘기고 현재 코너를 반환.
+
+    cap이 FrameHub면 허브 시퀀스 번호를 써서 여러 스트림/추적 스레드가 같은 프레임을 한 번만 검출한다
+    (일반 캡처는 호출 순서 번호).
+    """
+    seq = getattr(cap, "seq", None)
+    if seq is None:
+        seq = next(_seq)
+    return corner_service().observe(frame, seq).corners
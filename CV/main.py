@@ -1,44 +1,62 @@
 # main.py
+# 단독 분석 서버. 캡처/와핑/스트림 인코딩은 brain/cv의 FrameHub + StreamService를 그대로 쓴다
+# (캡처 스레드 1개, 프레임당 와핑 1회, 뷰·프레임당 인코딩 1회 - cv_web 서버와 같은 파이프라인).
+# 초록 마커 코너는 코너 상태 서비스의 추적 스레드가 잠근 뒤 작은 창에서만 다시 찾는다.
+# 예전 라우트(/warp, /original, /piece, /edges, /base_board_img)는 서비스 뷰로 연결하고,
+# /stream/<view>, /snapshot/<view>, /streams도 함께 제공한다.
 from flask import Flask, Response, render_template_string
 import cv2
-import threading
 import numpy as np
 import os
-import time
 import pickle
-import math
 from pathlib import Path
 
+import brain_path  # noqa: F401  (brain/cv 패키지 경로)
+
+from cv import cv_manager
+from cv.capture_sources import CAPTURE_SOURCE_ENV, open_capture
+from cv.cv_manager import coord_to_chess_notation, piece_to_fen
+from cv.frame_hub import FrameHub
+from cv.rate_governor import get_governor
+from cv.stream_encoder import MJPEG_MIMETYPE
+from cv.stream_server import StreamService, run_wsgi
+
 # 내부 모듈
-from video_streams import gen_warped_frames, gen_original_frames, gen_edges_frames
+from corner_tracking import corner_service
 from piece_auto_update import update_chess_pieces
-# find_green_corners 시그니처가 버전에 따라 다를 수 있으므로 HSV 범위도 함께 import
-from warp_cam_picam2_v2 import find_green_corners, warp_chessboard, Hmin, Hmax, Smin, Smax, Vmin, Vmax
 
 # ==== 경로(절대) ====
 BASE_DIR = Path(__file__).resolve().parent
 NPPATH = str(BASE_DIR / "init_board_values.npy")
 PKLPATH = str(BASE_DIR / "chess_pieces.pkl")
 
+WARP_SIZE = 400
+
 # =======================
 # 전역 상태
 # =======================
 USE_PICAM2 = True  # CSI 카메라인 경우 True
 
-if USE_PICAM2:
-    from piece_recognition import PiCam2Capture
-    cap = PiCam2Capture()
-else:
-    cap = cv2.VideoCapture(0, cv2.CAP_V4L2)
 
-latest_frame = None
+def _open_camera():
+    """CHESS_CAPTURE_SOURCE가 있으면 그 소스, 없으면 USE_PICAM2에 따라 CSI/USB 카메라."""
+    spec = os.environ.get(CAPTURE_SOURCE_ENV)
+    if spec:
+        return open_capture(spec)
+    if USE_PICAM2:
+        return open_capture("picam")
+    return open_capture("usb", rotate_180=False)
+
+
+# 캡처는 FrameHub 스레드 하나가 소유하고, 라우트는 허브의 최신 프레임/공용 WarpStage만 본다.
+# 보는 클라이언트가 없으면 governor가 캡처를 유휴 속도로 낮춘다 (턴 전환 동안은 최대 속도).
+governor = get_governor()
+hub = FrameHub(_open_camera(), start=False, governor=governor)
 
 # 기준/턴/보드 상태
 init_board_values = None
-reload_base_board = False
 turn_color = 'white'
 prev_turn_color = 'white'
-player_color = None   # 'white' or 'black' (카메라 아랫변 쪽 플레이어)
 
 # 체스 기물 배열 (행: 0~7, 열: 0~7)
 chess_pieces = [
@@ -52,121 +70,19 @@ chess_pieces = [
     ['WR', 'WN', 'WB', 'WQ', 'WK', 'WB', 'WN', 'WR'],
 ]
 
-prev_board_values = None
-prev_warp = None
 move_history = []
 
-def _order_corners_tl_tr_br_bl(pts):
-    """
-    4점(pts)을 (Top-Left, Top-Right, Bottom-Right, Bottom-Left) 순서로 정렬해서 반환.
-    pts: iterable of 4 points [[x,y], ...] or np.array shape (4,2)
-    """
-    import numpy as np
-    pts = np.array(pts, dtype=np.float32).reshape(4, 2)
-
-    # 합/차를 이용한 고전적 정렬 방식
-    s = pts.sum(axis=1)          # x + y
-    d = np.diff(pts, axis=1)     # y - x (주의: np.diff along axis=1 returns shape (4,1))
-
-    tl = pts[np.argmin(s)]       # 합이 가장 작음
-    br = pts[np.argmax(s)]       # 합이 가장 큼
-    tr = pts[np.argmin(d)]       # (y-x)가 가장 작음 -> x가 크고 y가 작을 가능성 → 우상단
-    bl = pts[np.argmax(d)]       # (y-x)가 가장 큼  -> x가 작고 y가 클 가능성 → 좌하단
-
-    ordered = np.array([tl, tr, br, bl], dtype=np.float32)
-    return ordered
-
-# =======================
-# 유틸: 좌표 표기/색 판별
-# =======================
-def coord_to_chess_notation(i, j):
-    """(0,0)=a8, (7,7)=h1 체스 표기"""
-    file = chr(ord('a') + j)
-    rank = str(8 - i)
-    return file + rank
-
-def piece_to_fen(piece):
-    if not piece or len(piece) < 2:
-        return ''
-    color, kind = piece[0], piece[1]
-    kind_map = {'K': 'K', 'Q': 'Q', 'R': 'R', 'B': 'B', 'N': 'N', 'P': 'P'}
-    fen = kind_map.get(kind.upper(), '?')
-    return fen.upper() if color == 'W' else fen.lower() if color == 'B' else '?'
+# 모든 스트림 뷰를 한 파이프라인에서 (piece/base 뷰는 현재 기준/기물 배열을 읽는다)
+service = StreamService(
+    hub,
+    reference_fn=lambda: init_board_values,
+    pieces_fn=lambda: chess_pieces,
+    warp_size=WARP_SIZE,
+)
 
 def _is_color_piece(code, color):  # code: 'WP','BP',..., color: 'white'/'black'
     return bool(code) and ((color == 'white' and code[0] == 'W') or (color == 'black' and code[0] == 'B'))
 
-# =======================
-# 노이즈 억제 도우미 (LAB + 다중 프레임 평균)
-# =======================
-def _mean_lab_board_from_warp(warp):
-    """와핑된 400x400 보드에서 8x8 칸 평균을 LAB 공간(mean)으로 반환 (float32, shape=(8,8,3))"""
-    h, w = warp.shape[:2]
-    cell_h = h // 8
-    cell_w = w // 8
-    lab = cv2.cvtColor(warp, cv2.COLOR_BGR2LAB)
-    out = np.zeros((8, 8, 3), np.float32)
-    for i in range(8):
-        for j in range(8):
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-            cell = lab[y1:y2, x1:x2]
-            out[i, j] = cell.reshape(-1, 3).mean(axis=0)
-    return out
-
-def _safe_find_corners(frame):
-    """
-    find_green_corners 시그니처 차이를 흡수하고,
-    반환된 4점을 TL, TR, BR, BL 순서로 강제 정렬해서 돌려준다.
-    """
-    import numpy as np
-
-    corners = None
-    try:
-        lower = np.array([Hmin, Smin, Vmin], dtype=np.uint8)
-        upper = np.array([Hmax, Smax, Vmax], dtype=np.uint8)
-        # 일부 버전은 (frame, lower, upper, min_area=...) 시그니처
-        corners = find_green_corners(frame, lower, upper, min_area=60)
-    except TypeError:
-        # 다른 버전은 (frame)만 받는 시그니처
-        corners = find_green_corners(frame)
-
-    if corners is not None and len(corners) == 4:
-        try:
-            corners = _order_corners_tl_tr_br_bl(corners)
-        except Exception:
-            # 혹시라도 형상 문제 등으로 정렬 실패 시 원본 유지
-            pass
-
-    return corners
-
-def _capture_avg_lab_board(cap, n_frames=8, sleep_sec=0.02):
-    """짧은 시간 n_frames 프레임을 평균해서 LAB 보드값을 안정적으로 산출"""
-    acc = np.zeros((8, 8, 3), np.float32)
-    cnt = 0
-    last_warp = None
-
-    for _ in range(n_frames):
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        corners = _safe_find_corners(frame)
-
-        if corners is not None and len(corners) == 4:
-            warp = warp_chessboard(frame, corners, size=400)
-        else:
-            warp = cv2.resize(frame, (400, 400))
-
-        last_warp = warp
-        acc += _mean_lab_board_from_warp(warp)
-        cnt += 1
-        time.sleep(sleep_sec)
-
-    if cnt == 0:
-        return None, None
-    return acc / cnt, last_warp
-
 # =======================
 # 부팅 시 보드/기준 로드
 # =======================
@@ -203,49 +119,29 @@ def _startup_load_state():
         except Exception as e:
             print(f'[BOOT] chess_pieces.pkl 생성 실패: {e}')
 
-# =======================
-# 프레임 읽기 스레드
-# =======================
-def frame_reader():
-    global latest_frame
-    while True:
-        ret, frame = cap.read()
-        if ret:
-            latest_frame = frame
-        time.sleep(0.01)
-
 # =======================
 # Flask 앱
 # =======================
 app = Flask(__name__)
-hsv_values_global = []
-
-def gen_original_frames_with_hsv():
-    global hsv_values_global
-    for frame_bytes, hsv_values in gen_original_frames(cap):
-        hsv_values_global = hsv_values
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+app.register_blueprint(service.blueprint())
 
-# ---------- 스트림 라우트 ----------
+# ---------- 스트림 라우트 (서비스 뷰) ----------
 @app.route('/warp')
 def warp_feed():
-    return Response(gen_warped_frames(cap), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return Response(service.stream('warp'), mimetype=MJPEG_MIMETYPE)
 
 @app.route('/original')
 def original_feed():
-    return Response(gen_original_frames_with_hsv(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return Response(service.stream('original'), mimetype=MJPEG_MIMETYPE)
 
 @app.route('/edges')
 def edges_feed():
-    return Response(gen_edges_frames(cap), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return Response(service.stream('edges'), mimetype=MJPEG_MIMETYPE)
 
-# 차이 시각화: threshold 완화(40 → 15) + 절대경로 사용
+# 차이 시각화: 기준 대비 변화 상위 2칸
 @app.route('/piece')
 def piece_feed():
-    from piece_recognition import gen_edges_frames as gen_diff_frames
-    return Response(gen_diff_frames(cap, base_board_path=NPPATH, threshold=15,top_k=2),
-                    mimetype='multipart/x-mixed-replace; boundary=frame')
+    return Response(service.stream('piece'), mimetype=MJPEG_MIMETYPE)
 
 # ---------- 상태 라우트 ----------
 @app.route('/turn_status')
@@ -255,109 +151,22 @@ def turn_status():
 # ---------- 보드/기준 시각화 ----------
 @app.route('/base_board_img')
 def base_board_img():
-    global latest_frame, init_board_values, chess_pieces
-    h, w = 400, 400
-    cell_h = h // 8
-    cell_w = w // 8
-
-    if not (isinstance(chess_pieces, list) and len(chess_pieces) == 8 and all(isinstance(row, list) and len(row) == 8 for row in chess_pieces)):
-        print('chess_pieces가 8x8 배열이 아님! 기본값으로 대체')
-        chess_pieces = [[''] * 8 for _ in range(8)]
-
-    base_img = np.ones((h, w, 3), dtype=np.uint8) * 220
-    for i in range(8):
-        for j in range(8):
-            chess_i = i  # 시각화 좌표계를 와핑/업데이트와 동일하게 유지
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-
-            # 보드 칠하기
-            if (i + j) % 2 == 0:
-                cv2.rectangle(base_img, (x1, y1), (x2, y2), (180, 180, 180), -1)
-            else:
-                cv2.rectangle(base_img, (x1, y1), (x2, y2), (240, 240, 240), -1)
-
-            # 기물 텍스트
-            piece = chess_pieces[chess_i][j]
-            if piece:
-                color = (255, 255, 255) if piece[0] == 'W' else (0, 0, 0) if piece[0] == 'B' else (0, 0, 255)
-                cv2.putText(base_img, piece, (x1 + 8, y1 + cell_h // 2 + 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2, cv2.LINE_AA)
-
-    # diff 수치/상위 박스
-    if latest_frame is not None and init_board_values is not None:
-        frame = latest_frame.copy()
-        corners = _safe_find_corners(frame)
-
-        if corners is not None and len(corners) == 4:
-            warp = warp_chessboard(frame, corners, size=400)
-        else:
-            warp = cv2.resize(frame, (400, 400))
-
-        diff_vals = np.zeros((8, 8), dtype=np.float32)
-        diff_list = []
-        for i in range(8):
-            for j in range(8):
-                y1, y2 = i * cell_h, (i + 1) * cell_h
-                x1, x2 = j * cell_w, (j + 1) * cell_w
-                cell = warp[y1:y2, x1:x2]
-                mean_bgr = np.mean(cell.reshape(-1, 3), axis=0)
-                diff = np.linalg.norm(mean_bgr - init_board_values[i, j])
-                diff_vals[i, j] = diff
-                diff_list.append((diff, i, j))
-
-        # 숫자(굵게)
-        for i in range(8):
-            for j in range(8):
-                y1 = i * cell_h
-                x1 = j * cell_w
-                text = f"{int(diff_vals[i, j])}"
-                cv2.putText(base_img, text, (x1 + 4, y1 + cell_h // 2 + 6),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 200), 2, cv2.LINE_AA)
-
-        # 상위 2칸 박스(두께 3)
-        diff_list.sort(reverse=True)
-        shown = 0
-        used = set()
-        for diff, i, j in diff_list:
-            if (i, j) in used:
-                continue
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-            cv2.rectangle(base_img, (x1, y1), (x2, y2), (0, 0, 255), 3)
-            used.add((i, j))
-            shown += 1
-            if shown == 2:
-                break
-
-    _, buffer = cv2.imencode('.jpg', base_img)
-    return Response(buffer.tobytes(), mimetype='image/jpeg')
+    data = service.snapshot('base')
+    if data is None:
+        return '프레임 없음', 500
+    return Response(data, mimetype='image/jpeg')
 
 # ---------- 기준값 저장 ----------
 @app.route('/set_init_board', methods=['POST'])
 def set_init_board():
     """현재 프레임을 와핑 후 8x8 평균 BGR을 기준으로 저장"""
-    global init_board_values, latest_frame
+    global init_board_values
 
-    if latest_frame is None:
+    wf = service.call(hub.warp_stage(WARP_SIZE).latest)
+    if wf is None:
         return '프레임 없음', 400
 
-    frame = latest_frame.copy()
-    corners = _safe_find_corners(frame)
-
-    warp = warp_chessboard(frame, corners, size=400) if corners is not None else cv2.resize(frame, (400, 400))
-
-    h, w = warp.shape[:2]
-    cell_h = h // 8
-    cell_w = w // 8
-    board_vals = np.zeros((8, 8, 3), dtype=np.float32)
-    for i in range(8):
-        for j in range(8):
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-            cell = warp[y1:y2, x1:x2]
-            board_vals[i, j] = np.mean(cell.reshape(-1, 3), axis=0)
-
+    board_vals = wf.bgr_means.copy()
     np.save(NPPATH, board_vals)
     init_board_values = board_vals
     print(f"완전 초기상태 저장: {NPPATH}")
@@ -367,8 +176,7 @@ def set_init_board():
 @app.route('/next_turn', methods=['POST'])
 def next_turn():
     """이동 추정(노이즈 억제 + LAB 비교 + 적응 임계 + 방향 보정) + 턴 전환 + 새 기준 저장"""
-    global init_board_values, latest_frame, reload_base_board, turn_color, prev_turn_color
-    global prev_board_values, prev_warp, chess_pieces, move_history
+    global init_board_values, turn_color, prev_turn_color, chess_pieces
 
     # 턴 토글
     prev_turn_color = turn_color
@@ -382,26 +190,19 @@ def next_turn():
     except Exception as e:
         print(f'[WARN] chess_pieces.pkl 저장 실패(사전): {e}')
 
-    if latest_frame is None:
-        return '프레임 없음', 400
-
     # 이전 기준(BGR 평균)
     prev_board_values = np.load(NPPATH) if os.path.exists(NPPATH) else None
 
-    # ---------- 여러 프레임 평균 + LAB 공간으로 현재 보드 추정 ----------
-    curr_lab, warp = _capture_avg_lab_board(cap, n_frames=8, sleep_sec=0.02)
+    # ---------- 여러 프레임 평균 + LAB 공간으로 현재 보드 추정 (공용 WarpStage) ----------
+    with governor.active("detect"):
+        curr_lab, warp = service.call(cv_manager.capture_avg_lab_board, hub, 8, 0.02, WARP_SIZE)
     if curr_lab is None:
         return '현재 보드 캡처 실패', 500
-    prev_warp = warp.copy()
 
     # prev_board_values(BGR평균) -> LAB로 변환
-    prev_lab = np.zeros((8, 8, 3), np.float32)
     if prev_board_values is not None:
-        for i in range(8):
-            for j in range(8):
-                bgr = np.array(prev_board_values[i, j], dtype=np.uint8)[None, None, :]
-                lab = cv2.cvtColor(bgr, cv2.COLOR_BGR2LAB).astype(np.float32)
-                prev_lab[i, j] = lab[0, 0]
+        bgr = np.asarray(prev_board_values).astype(np.uint8).reshape(8, 8, 3)
+        prev_lab = cv2.cvtColor(bgr, cv2.COLOR_BGR2LAB).astype(np.float32)
     else:
         prev_lab = curr_lab.copy()
 
@@ -471,16 +272,7 @@ def next_turn():
         print(f"[DEBUG] adaptive pick src={src} dst={dst} thr={adaptive_thr:.2f}")
 
     # --- board_vals(BGR) 생성: 다음 턴 기준 저장용 ---
-    h, w = warp.shape[:2]
-    cell_h = h // 8
-    cell_w = w // 8
-    board_vals = np.zeros((8, 8, 3), np.float32)
-    for i in range(8):
-        for j in range(8):
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-            cell = warp[y1:y2, x1:x2]
-            board_vals[i, j] = cell.reshape(-1, 3).mean(axis=0)
+    board_vals = cv_manager.compute_board_means_bgr(warp)
 
     # ---- 이동 반영 ----
     try:
@@ -528,7 +320,6 @@ def next_turn():
         init_board_values = board_vals
         print(f'[WARN] 새 기준 재로드 실패: {e}')
     print(f"새 기준값 저장: {NPPATH}")
-    reload_base_board = True
 
     return '턴 기록 및 전환 완료', 200
 
@@ -619,5 +410,12 @@ def index():
 # =======================
 if __name__ == '__main__':
     _startup_load_state()
-    threading.Thread(target=frame_reader, daemon=True).start()
-    app.run(host='0.0.0.0', port=5001, debug=False, use_reloader=False)
+    # 이 서버는 초록 마커 자동 코너 전용: cv_manager가 읽어 온 저장 코너를 풀고 추적 스레드 시작
+    corner_service().clear()
+    hub.start()
+    corner_service().start(hub)
+    try:
+        run_wsgi(app, host='0.0.0.0', port=5001, service=service)
+    finally:
+        corner_service().stop()
+        hub.release()
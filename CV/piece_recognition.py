@@ -8,18 +8,22 @@ import cv2
 import numpy as np
 import os
 
+import brain_path  # noqa: F401  (brain/cv 패키지 경로)
+from cv.capture_sources import Picamera2Source
+from cv.jpeg_codec import get_codec
+
+from corner_tracking import track as track_corners
 from warp_cam_picam2_v2 import (
-    find_green_corners,
     warp_chessboard,
     FRAME_SIZE, FPS, HFLIP, VFLIP,
     USE_AUTO_EXPOSURE, EXPOSURE_TIME, ANALOG_GAIN,
-    Hmin, Hmax, Smin, Smax, Vmin, Vmax
 )
 
 # ===================== CONFIG =====================
 GRID = 8
 WARP_SIZE = 400
 CELL_MARGIN_RATIO = 0.08
+JPEG_QUALITY = 80     # 스트리밍 JPEG 품질
 
 # 단독 실행용 파라미터 (LAB 기반 EMA 스무딩)
 THRESHOLD = 12.0      # 차이값 문턱
@@ -67,43 +71,19 @@ def compute_board_means_LAB(image_bgr, grid=GRID, margin_ratio=CELL_MARGIN_RATIO
 
 
 # -------------------- 단독 실행용 --------------------
-class PiCam2Capture:
-    """Picamera2 캡처 래퍼 (단독 실행에만 사용)"""
-    def __init__(self):
-        from picamera2 import Picamera2
-        self.picam2 = Picamera2()
-        cfg = self.picam2.create_preview_configuration(
-            main={"size": FRAME_SIZE, "format": "RGB888"},
-            controls={"FrameRate": FPS}
-        )
-        self.picam2.configure(cfg)
-        self.picam2.start()
-        if not USE_AUTO_EXPOSURE:
-            self.picam2.set_controls({"AeEnable": False, "AwbEnable": False})
-            self.picam2.set_controls({"ExposureTime": EXPOSURE_TIME, "AnalogueGain": ANALOG_GAIN})
-
-    def read(self):
-        rgb = self.picam2.capture_array()
-        frame = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
-        if HFLIP:
-            frame = cv2.flip(frame, 1)
-        if VFLIP:
-            frame = cv2.flip(frame, 0)
-        return True, frame
-
-    def release(self):
-        try:
-            self.picam2.stop()
-        except Exception:
-            pass
+def _open_camera():
+    """단독 실행용 Picamera2 캡처 (warp_cam_picam2_v2의 해상도/FPS/뒤집기/노출 설정)."""
+    controls = None
+    if not USE_AUTO_EXPOSURE:
+        controls = {"AeEnable": False, "AwbEnable": False,
+                    "ExposureTime": EXPOSURE_TIME, "AnalogueGain": ANALOG_GAIN}
+    return Picamera2Source(size=FRAME_SIZE, fps=FPS, hflip=HFLIP, vflip=VFLIP,
+                           rotate_portrait=False, warmup_sec=0, controls=controls)
 
 
 def run():
     """단독 실행: 화면 창에 warp+diff 표시, 'b'로 기준 설정/갱신"""
-    cap = PiCam2Capture()
-
-    lower = np.array([Hmin, Smin, Vmin], dtype=np.uint8)
-    upper = np.array([Hmax, Smax, Vmax], dtype=np.uint8)
+    cap = _open_camera()
 
     base_board_values = None     # (LAB) 메모리 기준값
     prev_warp = None
@@ -118,7 +98,7 @@ def run():
             if not ret:
                 break
 
-            corners = find_green_corners(frame.copy(), lower, upper, min_area=60)
+            corners = track_corners(cap, frame)
 
             # 와핑 (코너 없으면 이전 warp 유지)
             if corners is not None:
@@ -236,8 +216,6 @@ def gen_edges_frames(cap, base_board_path='init_board_values.npy', threshold=12.
         print(f"[piece_recognition] 기준값 파일 없음: {base_board_path}")
 
     prev_warp = None
-    lower = np.array([Hmin, Smin, Vmin], dtype=np.uint8)
-    upper = np.array([Hmax, Smax, Vmax], dtype=np.uint8)
 
     while True:
         ret, frame = cap.read()
@@ -245,7 +223,7 @@ def gen_edges_frames(cap, base_board_path='init_board_values.npy', threshold=12.
             break
 
         # 코너 검출 & 와핑
-        corners = find_green_corners(frame.copy(), lower, upper, min_area=60)
+        corners = track_corners(cap, frame)
         if corners is not None:
             warp = warp_chessboard(frame, corners, size=WARP_SIZE)
             prev_warp = warp
@@ -287,9 +265,9 @@ def gen_edges_frames(cap, base_board_path='init_board_values.npy', threshold=12.
                         (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2, cv2.LINE_AA)
 
         # JPEG로 인코딩하여 MJPEG 스트리밍
-        _, buffer = cv2.imencode('.jpg', vis)
+        jpeg = get_codec().encode(vis, JPEG_QUALITY)
         yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+               b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
 
 
 # -------------------- 엔트리 --------------------
@@ -3,9 +3,13 @@ import cv2
 import numpy as np
 import os, time
 
-# v2 모듈에서 코너/와핑 및 HSV 임계값 재사용
+import brain_path  # noqa: F401  (brain/cv 패키지 경로)
+from cv.jpeg_codec import get_codec
+
+from corner_tracking import track as track_corners
+# v2 모듈에서 와핑 및 HSV 임계값 재사용
 from warp_cam_picam2_v2 import (
-    find_green_corners, warp_chessboard,
+    warp_chessboard,
     Hmin, Hmax, Smin, Smax, Vmin, Vmax
 )
 
@@ -20,9 +24,8 @@ DIFF_EMA = 0.5       # diff 부드럽게(지터 완화)
 # ===============
 
 def _jpeg_bytes(img):
-    ok, buf = cv2.imencode('.jpg', img, [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY])
-    if not ok: ok, buf = cv2.imencode('.jpg', img)
-    return buf.tobytes()
+    # brain/cv 공용 코덱 (TurboJPEG이 있으면 사용, 없으면 OpenCV)
+    return get_codec().encode(img, JPEG_QUALITY)
 
 def _draw_grid(vis):
     h, w = vis.shape[:2]
@@ -101,10 +104,6 @@ def gen_warped_frames(cap, base_board_path='init_board_values.npy'):
     - ⚠️ 화살표/번호 라벨(#1,#2) 제거
     - 코너 실패 시 이전 warp 폴백(없으면 원본)
     """
-    lower = np.array([Hmin, Smin, Vmin], dtype=np.uint8)
-    upper = np.array([Hmax, Hmax, Vmax], dtype=np.uint8)
-    upper[0] = Hmax
-
     prev_warp = None
     prev_diffs = None
 
@@ -130,11 +129,8 @@ def gen_warped_frames(cap, base_board_path='init_board_values.npy'):
             base_vals = None
             last_mtime = None
 
-        # 코너 → 와핑 (시그니처 차이 안전)
-        try:
-            corners = find_green_corners(frame.copy(), lower, upper, min_area=60)
-        except TypeError:
-            corners = find_green_corners(frame.copy())
+        # 코너 → 와핑 (잡은 뒤에는 직전 코너 주변 창만 검사)
+        corners = track_corners(cap, frame)
 
         if corners is not None and len(corners) == 4:
             warp = warp_chessboard(frame, corners, size=WARP_SIZE)
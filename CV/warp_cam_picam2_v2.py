@@ -100,14 +100,58 @@ def sort_corners_by_position(pts):
     bot = sorted(pts[2:], key=lambda p: p[0])
     return np.array([top[0], top[1], bot[1], bot[0]], dtype=np.float32)
 
-def find_green_corners(frame, lower, upper, min_area=60):
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-    mask = cv2.inRange(hsv, lower, upper)
-    
+# 마커는 큰 덩어리라 1/DETECT_SCALE 축소 영상에서 후보를 찾고, 원본 해상도 패치에서 중심/면적을 다시 계산한다
+DETECT_SCALE = 4
+
+def _clean_mask(mask):
     # 모폴로지 연산으로 노이즈 제거
     k = np.ones((3,3), np.uint8)  # 더 작은 커널
     mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, k)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, k)
+    return cv2.morphologyEx(mask, cv2.MORPH_CLOSE, k)
+
+def _refine_marker(frame, x0, y0, x1, y1, lower, upper):
+    """원본 해상도 패치에서 가장 큰 마커 윤곽의 (cx, cy, area). 없으면 None."""
+    patch = frame[y0:y1, x0:x1]
+    if patch.size == 0:
+        return None
+    mask = _clean_mask(cv2.inRange(cv2.cvtColor(patch, cv2.COLOR_BGR2HSV), lower, upper))
+    cnts, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not cnts:
+        return None
+    c = max(cnts, key=cv2.contourArea)
+    M = cv2.moments(c)
+    if M["m00"] == 0:
+        return None
+    return x0 + M["m10"]/M["m00"], y0 + M["m01"]/M["m00"], cv2.contourArea(c)
+
+def _marker_candidates(frame, lower, upper, min_area, scale=DETECT_SCALE):
+    """마커 후보 [(cx, cy, area)] (원본 좌표, 면적 큰 순 최대 10개).
+
+    축소 영상에서 4개 미만이면 작은 마커를 놓쳤을 수 있으므로 원본 해상도 전체 검출로 한 번 더 찾는다.
+    """
+    h, w = frame.shape[:2]
+    if scale > 1 and w >= 8 * scale and h >= 8 * scale:
+        # INTER_AREA는 원본 픽셀을 모두 읽어 HSV 변환만큼 비싸므로 LINEAR 샘플링으로 축소.
+        # 축소 마스크에는 모폴로지를 하지 않는다 (3x3 커널이 원본 기준 12x12라 작은 마커가 지워짐)
+        small = cv2.resize(frame, (w // scale, h // scale), interpolation=cv2.INTER_LINEAR)
+        mask = cv2.inRange(cv2.cvtColor(small, cv2.COLOR_BGR2HSV), lower, upper)
+        cnts, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        cnts = sorted(cnts, key=cv2.contourArea, reverse=True)[:10]
+        coarse_min = 0.5 * min_area / (scale * scale)
+        pad = 2 * scale
+        found = []
+        for c in cnts:
+            if cv2.contourArea(c) < coarse_min:
+                continue
+            x, y, bw, bh = cv2.boundingRect(c)
+            r = _refine_marker(frame, max(0, x*scale - pad), max(0, y*scale - pad),
+                               min(w, (x+bw)*scale + pad), min(h, (y+bh)*scale + pad), lower, upper)
+            if r is not None and r[2] >= min_area:
+                found.append(r)
+        if len(found) >= 4:
+            return sorted(found, key=lambda r: r[2], reverse=True)
+
+    mask = _clean_mask(cv2.inRange(cv2.cvtColor(frame, cv2.COLOR_BGR2HSV), lower, upper))
 
     # 마스크 정보 출력
     mask_fill = mask.mean()/255.0
@@ -117,28 +161,38 @@ def find_green_corners(frame, lower, upper, min_area=60):
     # 윤곽선 찾기
     cnts, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     cnts = sorted(cnts, key=cv2.contourArea, reverse=True)[:10]  # 더 많은 윤곽선 검사
-
-    centers = []
-    for i, c in enumerate(cnts):
+    found = []
+    for c in cnts:
         area = cv2.contourArea(c)
         if area < min_area:
             continue
         M = cv2.moments(c)
         if M["m00"] == 0:
             continue
-        cx = int(M["m10"]/M["m00"])
-        cy = int(M["m01"]/M["m00"])
+        found.append((M["m10"]/M["m00"], M["m01"]/M["m00"], area))
+    return found
+
+def find_green_corners(frame, lower, upper, min_area=60, scale=DETECT_SCALE):
+    candidates = _marker_candidates(frame, lower, upper, min_area, scale)
+
+    centers = []
+    areas = []
+    for i, (cx, cy, area) in enumerate(candidates):
         centers.append([cx, cy])
+        areas.append(area)
         
         if VERBOSE and int(time.time()*3)%3==0:
-            print(f"[DBG] contour {i}: area={area:.1f}, center=({cx},{cy})")
+            print(f"[DBG] contour {i}: area={area:.1f}, center=({cx:.1f},{cy:.1f})")
 
     # 근접 중복 제거 (거리 임계값을 더 작게)
     dedup = []
-    for c in centers:
+    dedup_areas = []
+    for c, area in zip(centers, areas):
         if all(np.hypot(c[0]-d[0], c[1]-d[1]) > 8 for d in dedup):  # 8픽셀로 줄임
             dedup.append(c)
+            dedup_areas.append(area)
     centers = dedup
+    areas = dedup_areas
 
     if VERBOSE and int(time.time()*3)%3==0:
         print(f"[DBG] final centers={len(centers)}: {centers}")
@@ -152,16 +206,7 @@ def find_green_corners(frame, lower, upper, min_area=60):
         # 4개보다 많으면 가장 큰 4개만 선택
         if VERBOSE:
             print(f"[DBG] too many centers ({len(centers)}), selecting largest 4")
-        # 면적으로 정렬하여 가장 큰 4개 선택
-        areas = []
-        for c in centers:
-            # 해당 중심점 근처의 마스크 픽셀 수 계산
-            x, y = int(c[0]), int(c[1])
-            area = np.sum(mask[max(0,y-10):min(mask.shape[0],y+10), 
-                             max(0,x-10):min(mask.shape[1],x+10)]) / 255
-            areas.append(area)
-        
-        # 면적으로 정렬하여 상위 4개 선택
+        # 윤곽 면적으로 정렬하여 상위 4개 선택
         sorted_indices = np.argsort(areas)[::-1][:4]
         selected_centers = [centers[i] for i in sorted_indices]
         sorted_corners = sort_corners_by_position(selected_centers)
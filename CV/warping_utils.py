@@ -1,6 +1,9 @@
 import cv2
 import numpy as np
 
+import brain_path  # noqa: F401  (brain/cv 패키지 경로)
+from cv.remap_warp import RemapWarper
+
 # 마우스로 HSV 확인용
 def mouse_callback(event, x, y, flags, param):
     if event == cv2.EVENT_LBUTTONDOWN:
@@ -49,20 +52,18 @@ def find_green_corners(frame):
     return None
 
 # 투시 변환 (와핑)
+_warpers = {}
+
 def warp_chessboard(frame, corners, size=400):
     corners = np.array(corners, dtype=np.float32)
     if corners is None or corners.shape != (4,2):
         print(f"[warp_chessboard] corners shape 오류: {corners.shape if corners is not None else None}, 원본 반환")
         return frame.copy()
-    dst = np.array([
-        [0, 0],
-        [size-1, 0],
-        [size-1, size-1],
-        [0, size-1]
-    ], dtype="float32")
-    M = cv2.getPerspectiveTransform(corners, dst)
-    warp = cv2.warpPerspective(frame, M, (size, size))
-    return warp
+    # 같은 코너가 2번 연속 오면 remap 맵을 만들어 재사용 (출력 크기별 엔진)
+    warper = _warpers.get(size)
+    if warper is None:
+        warper = _warpers.setdefault(size, RemapWarper(size, min_repeats=2))
+    return warper.warp(frame, corners)
 
 # 메인 루프
 def main():
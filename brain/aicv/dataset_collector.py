@@ -9,6 +9,7 @@ from __future__ import annotations
 
 import os
 import sys
+import csv
 import json
 import threading
 import time
@@ -23,8 +24,13 @@ from flask import Flask, Response, render_template_string, request, jsonify
 # brain 모듈 경로 추가
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from cv.cv_web import USBCapture, ThreadSafeCapture, _encode_jpeg, _resize_for_preview
-from cv.picam_stable import warp_chessboard, find_green_corners
+from cv.cv_web import USBCapture, _encode_jpeg, _resize_for_preview
+from cv.frame_hub import FrameHub
+from cv.warp_stage import WarpStage
+from cv.corner_tracker import CornerTracker
+from cv.marker_validator import TRACKER_AREA_FRACTION, MarkerValidator
+from cv.picam_stable import warp_chessboard
+from aicv.inference_worker import InferenceWorker, start_inference_worker
 
 # ML 모델 import (선택적)
 try:
@@ -86,16 +92,16 @@ class DatasetCollector:
         return filename
     
     def save_labels(self, labels: np.ndarray, frame_idx: int) -> str:
-        """라벨을 CSV 파일로 저장합니다."""
-        import pandas as pd
-        
+        """라벨을 CSV 파일로 저장합니다. (8x8뿐이라 pandas 없이 csv 모듈로 작성)"""
         filename = f"frame{frame_idx:02d}.csv"
         path = self.labels_dir / filename
         
-        # DataFrame 생성 (첫 열에 a~h)
-        df = pd.DataFrame(labels, columns=RANKS)
-        df.insert(0, "", FILES)
-        df.to_csv(path, index=False)
+        # 헤더: ",1,...,8" / 각 행: 첫 열에 a~h
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([""] + RANKS)
+            for file_name, row in zip(FILES, np.asarray(labels, dtype=int)):
+                writer.writerow([file_name] + [int(v) for v in row])
         
         return filename
     
@@ -106,9 +112,9 @@ class DatasetCollector:
             return None
         
         try:
-            import pandas as pd
-            df = pd.read_csv(path)
-            arr = df.iloc[:, 1:].astype(int).values  # 첫 열(file) 제외
+            with open(path, newline="") as f:
+                rows = list(csv.reader(f))[1:]  # 헤더 제외
+            arr = np.array([[int(v) for v in row[1:]] for row in rows if row], dtype=int)  # 첫 열(file) 제외
             if arr.shape == (8, 8):
                 return arr
         except Exception as e:
@@ -121,26 +127,27 @@ class DatasetCollector:
 
 
 def build_dataset_collector_app(
-    cap: ThreadSafeCapture,
+    cap: FrameHub,
     collector: DatasetCollector,
-    ml_detector: Optional[ChessPieceMLDetector] = None,
+    ml_detector: Optional[ChessPieceMLDetector | InferenceWorker] = None,
     port: int = 5004
 ) -> Flask:
     """데이터셋 수집 웹 앱을 생성합니다."""
     app = Flask(__name__)
     
+    # 수동 와핑 포인트가 있을 때 쓰는 공용 와핑 단계 (포인트가 바뀔 때만 호모그래피 재계산)
+    warp_stage = WarpStage(cap, WARP_SIZE, corners_fn=lambda: manual_corners)
+    # 자동 모드 코너: 한 번 잡으면 직전 코너 주변 창만 검사 (요청 단위로 호출되므로 안정화 없이 원시 코너)
+    # 마커 검증(기하/색상/크기)을 통과한 코너만 lock한다
+    corner_tracker = CornerTracker(stabilize=False, validator=MarkerValidator(area_fraction=TRACKER_AREA_FRACTION))
+
     def capture_frame() -> Optional[np.ndarray]:
-        """최신 프레임을 캡처합니다. (최적화: 버퍼 비우기 최소화)"""
+        """프레임 허브의 최신 프레임을 반환합니다. (버퍼 비우기 없이 O(1))"""
         try:
-            # 버퍼를 비우기 위해 2번만 읽기 (4번 -> 2번으로 감소)
-            last_frame = None
-            for _ in range(2):
-                ret, frame = cap.read()
-                if ret and frame is not None:
-                    last_frame = frame
-            if last_frame is None:
+            frame = cap.latest_image()
+            if frame is None:
                 print("[WARNING] capture_frame: 유효한 프레임을 읽지 못했습니다")
-            return last_frame
+            return frame
         except Exception as e:
             print(f"[ERROR] capture_frame 오류: {e}")
             return None
@@ -654,20 +661,24 @@ def build_dataset_collector_app(
     def stream_warped():
         """와핑된 체스판 스트림"""
         global manual_corners
-        frame = capture_frame()
-        if frame is None:
-            return "카메라 오류", 500
-        
-        # 수동 와핑 모드 확인
-        corners = None
         if manual_corners is not None:
-            corners = np.array(manual_corners, dtype=np.float32)
+            # 수동 와핑 모드: 공용 와핑 단계 결과 사용
+            warped = warp_stage.latest()
+            if warped is None:
+                return "카메라 오류", 500
+            frame = warped.image
+            warp = warped.warp
         else:
+            frame = capture_frame()
+            if frame is None:
+                return "카메라 오류", 500
             # 자동 감지
-            corners = find_green_corners(frame.copy()) 
+            corners = corner_tracker.update(frame)
+            warp = None
+            if corners is not None and len(corners) == 4:
+                warp = warp_chessboard(frame, corners, size=WARP_SIZE)
         
-        if corners is not None and len(corners) == 4:
-            warp = warp_chessboard(frame, corners, size=WARP_SIZE)
+        if warp is not None:
             img = _resize_for_preview(warp, max_width=240)
         else:
             img = _resize_for_preview(frame, max_width=240)
@@ -683,19 +694,23 @@ def build_dataset_collector_app(
     def capture():
         """프레임 캡처 및 ML 예측"""
         global manual_corners
-        frame = capture_frame()
-        if frame is None:
-            return jsonify({"success": False, "error": "카메라 프레임을 읽을 수 없습니다"})
-        
-        # 와핑된 이미지 저장
-        corners = None
         if manual_corners is not None:
-            corners = np.array(manual_corners, dtype=np.float32)
+            warped = warp_stage.latest()
+            if warped is None:
+                return jsonify({"success": False, "error": "카메라 프레임을 읽을 수 없습니다"})
+            frame = warped.image
+            warp = warped.warp
         else:
-            corners = find_green_corners(frame.copy())
+            frame = capture_frame()
+            if frame is None:
+                return jsonify({"success": False, "error": "카메라 프레임을 읽을 수 없습니다"})
+            corners = corner_tracker.update(frame)
+            warp = None
+            if corners is not None and len(corners) == 4:
+                warp = warp_chessboard(frame, corners, size=WARP_SIZE)
         
-        if corners is not None and len(corners) == 4:
-            warp = warp_chessboard(frame, corners, size=WARP_SIZE)
+        # 와핑된 이미지 저장
+        if warp is not None:
             filename = collector.save_frame(warp)
             warped_img = warp
         else:
@@ -1177,6 +1192,7 @@ def main():
     parser.add_argument("--labels-dir", type=str, default="labels", help="라벨 저장 디렉토리")
     parser.add_argument("--camera-index", type=int, default=None, help="카메라 인덱스 (기본값: 자동)")
     parser.add_argument("--model-path", type=str, default="models/chess_piece_model.pt", help="ML 모델 경로 (.pt 파일, 기본값: models/chess_piece_model.pt)")
+    parser.add_argument("--inline-ml", action="store_true", help="추론 워커 프로세스 대신 웹 서버 프로세스 안에서 직접 ML 추론")
     
     args = parser.parse_args()
     
@@ -1190,9 +1206,10 @@ def main():
             index=args.camera_index,
             rotate_180=True,
             rotate_90_cw=False,
-            rotate_90_ccw=False
+            rotate_90_ccw=False,
+            decode_on_demand=True,
         )
-        cap_wrapper = ThreadSafeCapture(cap)
+        cap_wrapper = FrameHub(cap)
         print(f"[✓] 카메라 초기화 완료: /dev/video{cap.index}")
         
         # 카메라 연결 테스트
@@ -1235,7 +1252,13 @@ def main():
                 try:
                     print(f"[ML] 모델 파일 경로: {model_path}")
                     print(f"[ML] 모델 파일 크기: {model_path.stat().st_size / (1024*1024):.2f} MB")
-                    ml_detector = ChessPieceMLDetector(str(model_path))
+                    if not args.inline_ml:
+                        # 별도 프로세스에서 모델을 로드해 Flask 스레드와 GIL 경쟁을 피함
+                        ml_detector = start_inference_worker(str(model_path))
+                        if ml_detector is None:
+                            print("[ML WARNING] 추론 워커 시작 실패 - 인라인 추론으로 대체합니다.")
+                    if ml_detector is None:
+                        ml_detector = ChessPieceMLDetector(str(model_path))
                     print(f"[✓] ML 모델 로드 완료: {model_path}")
                     print(f"[ML] 모델 디바이스: {ml_detector.device}")
                 except Exception as e:
@@ -1276,6 +1299,9 @@ def main():
     finally:
         cap_wrapper.release()
         print("[✓] 카메라 해제 완료")
+        if isinstance(ml_detector, InferenceWorker):
+            ml_detector.stop()
+            print("[✓] ML 추론 워커 종료 완료")
     
     return 0
 
@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-
+"""
+ML 기물 인식 전용 워커 프로세스
+
+게임 루프, cv_web의 /ml_prediction, 데이터셋 수집기의 /capture가 같은 torch 모델을
+각자의 스레드에서 직접 호출하면 GIL과 모델을 두고 서로 경쟁한다.
+이 모듈은 모델을 별도 프로세스에서 한 번만 로드하고, 와핑된 프레임은
+multiprocessing.shared_memory 링 슬롯으로 넘기며, 결과(그리드/확률)는 요청 ID와 함께
+결과 큐로 돌려받는다.
+
+부모 프로세스에서는 torch를 import하지 않으므로 Flask/시리얼 스레드와
+torch의 메모리/스레드가 분리된다.
+
+사용 예::
+
+    worker = InferenceWorker("models/chess_piece_model.pt")
+    worker.start()
+    grid = worker.predict_frame(warped)                       # ChessPieceMLDetector와 동일
+    grid, probs = worker.predict_frames(frames, tta=True)     # 배치 + 평균 softmax
+    grid, probs = worker.predict_frames([warped], background=True)  # 대시보드용 (혼잡하면 InferenceBusy)
+    worker.stop()
+"""
+
+from __future__ import annotations
+
+import atexit
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+# 슬롯 하나의 최대 프레임 크기 (H, W, C). 기본 추론 target_size(640x480)와 같아서
+# 이보다 큰 프레임은 어차피 추론 전에 축소되므로 미리 줄여 보내도 손실이 거의 없다.
+DEFAULT_SLOT_SHAPE = (480, 640, 3)
+DEFAULT_NUM_SLOTS = 8
+DEFAULT_TIMEOUT_SEC = 30.0
+
+
+class InferenceBusy(RuntimeError):
+    """백그라운드(대시보드) 요청이 이미 처리 중이라 새 요청을 받지 않을 때 발생."""
+
+
+def _worker_main(
+    model_path: str,
+    device: Optional[str],
+    shm_name: str,
+    slot_shape: Tuple[int, int, int],
+    num_slots: int,
+    urgent_q,
+    background_q,
+    result_q,
+    ready_event,
+    torch_threads: Optional[int],
+) -> None:
+    """워커 프로세스 진입점. 모델을 한 번 로드하고 요청을 순서대로 처리한다."""
+    try:
+        import torch
+        from aicv.ml_piece_detector import ChessPieceMLDetector
+
+        if torch_threads:
+            torch.set_num_threads(torch_threads)
+        detector = ChessPieceMLDetector(model_path, device)
+        if detector.model is None:
+            raise RuntimeError(f"모델 로드 실패: {model_path}")
+        shm = shared_memory.SharedMemory(name=shm_name)
+    except Exception as exc:
+        result_q.put((None, None, None, f"워커 초기화 실패: {exc}"))
+        return
+
+    slots = np.ndarray((num_slots,) + tuple(slot_shape), dtype=np.uint8, buffer=shm.buf)
+    ready_event.set()
+
+    try:
+        while True:
+            # 게임(긴급) 요청을 항상 먼저 처리하고, 없을 때만 백그라운드 요청을 본다
+            try:
+                req = urgent_q.get_nowait()
+            except queue.Empty:
+                try:
+                    req = background_q.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+            if req is None:
+                break
+
+            req_id, slot_ids, shapes, kwargs = req
+            try:
+                frames = [slots[s, :h, :w] for s, (h, w) in zip(slot_ids, shapes)]
+                grid, probs = detector.predict_frames(frames, **kwargs)
+                result_q.put((req_id, grid, probs, None))
+            except Exception as exc:
+                result_q.put((req_id, None, None, str(exc)))
+    finally:
+        del slots
+        shm.close()
+
+
+class InferenceWorker:
+    """ChessPieceMLDetector와 같은 predict_frame/predict_frames/print_grid 인터페이스를 가진 워커 클라이언트."""
+
+    def __init__(
+        self,
+        model_path: str,
+        device: Optional[str] = None,
+        *,
+        num_slots: int = DEFAULT_NUM_SLOTS,
+        slot_shape: Tuple[int, int, int] = DEFAULT_SLOT_SHAPE,
+        torch_threads: Optional[int] = None,
+    ):
+        """
+        Args:
+            model_path: 학습된 모델 가중치 파일 경로 (.pt 파일)
+            device: 워커에서 사용할 디바이스 ('cuda' 또는 'cpu'). None이면 자동 선택
+            num_slots: 공유 메모리 링 슬롯 개수 (동시에 보낼 수 있는 최대 프레임 수)
+            slot_shape: 슬롯 하나의 최대 프레임 크기 (H, W, C)
+            torch_threads: 워커의 torch 스레드 수 (None이면 torch 기본값)
+        """
+        self.model_path = model_path
+        self.device = device or "worker"
+        self._device_arg = device
+        self._num_slots = num_slots
+        self._slot_shape = tuple(slot_shape)
+        self._torch_threads = torch_threads
+
+        self._ctx = mp.get_context("spawn")
+        self._proc = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._slots: Optional[np.ndarray] = None
+        self._urgent_q = None
+        self._background_q = None
+        self._result_q = None
+
+        self._ids = itertools.count(1)
+        self._free_slots: List[int] = []
+        self._slot_cond = threading.Condition()
+        self._pending: Dict[int, Tuple[Future, List[int], bool]] = {}
+        self._pending_lock = threading.Lock()
+        self._background_busy = False
+        self._dispatcher: Optional[threading.Thread] = None
+        self._stopping = False
+        # submit()의 슬롯 쓰기와 stop()의 공유 메모리 해제가 겹치지 않도록
+        self._shm_lock = threading.Lock()
+        self._atexit_registered = False
+
+    # ------------------------------------------------------------------
+    # 수명 주기
+    # ------------------------------------------------------------------
+    @property
+    def is_alive(self) -> bool:
+        return self._proc is not None and self._proc.is_alive()
+
+    def start(self, timeout: float = 60.0) -> bool:
+        """워커 프로세스를 띄우고 모델 로드가 끝날 때까지 기다린다."""
+        if self.is_alive:
+            return True
+
+        start_time = time.time()
+        slot_bytes = int(np.prod(self._slot_shape))
+        self._shm = shared_memory.SharedMemory(create=True, size=slot_bytes * self._num_slots)
+        self._slots = np.ndarray(
+            (self._num_slots,) + self._slot_shape, dtype=np.uint8, buffer=self._shm.buf
+        )
+        self._free_slots = list(range(self._num_slots))
+
+        self._urgent_q = self._ctx.Queue()
+        self._background_q = self._ctx.Queue()
+        self._result_q = self._ctx.Queue()
+        ready = self._ctx.Event()
+
+        self._proc = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                self.model_path,
+                self._device_arg,
+                self._shm.name,
+                self._slot_shape,
+                self._num_slots,
+                self._urgent_q,
+                self._background_q,
+                self._result_q,
+                ready,
+                self._torch_threads,
+            ),
+            name="ml-inference-worker",
+            daemon=True,
+        )
+        self._proc.start()
+
+        deadline = start_time + timeout
+        while not ready.wait(0.1):
+            error = self._poll_startup_error()
+            if error is not None or not self._proc.is_alive() or time.time() > deadline:
+                print(f"[InferenceWorker] 워커 시작 실패: {error or '시간 초과 또는 프로세스 종료'}")
+                self.stop()
+                return False
+
+        self._stopping = False
+        self._dispatcher = threading.Thread(target=self._dispatch_results, daemon=True)
+        self._dispatcher.start()
+        if not self._atexit_registered:
+            atexit.register(self.stop)
+            self._atexit_registered = True
+        print(
+            f"[InferenceWorker] 워커 프로세스 시작 (pid={self._proc.pid}, "
+            f"slots={self._num_slots}, {(time.time() - start_time) * 1000:.0f}ms)"
+        )
+        return True
+
+    def _poll_startup_error(self) -> Optional[str]:
+        try:
+            req_id, _, _, error = self._result_q.get_nowait()
+        except queue.Empty:
+            return None
+        return error if req_id is None else None
+
+    def stop(self, timeout: float = 3.0) -> None:
+        """워커 프로세스를 종료하고 공유 메모리를 해제한다."""
+        self._stopping = True
+        if self._proc is not None:
+            try:
+                self._urgent_q.put(None)
+                self._proc.join(timeout)
+            except Exception:
+                pass
+            if self._proc.is_alive():
+                self._proc.terminate()
+                self._proc.join(1.0)
+            self._proc = None
+
+        with self._pending_lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._background_busy = False
+        for future, _, _ in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("추론 워커가 종료되었습니다."))
+
+        with self._shm_lock:
+            if self._shm is not None:
+                self._slots = None
+                try:
+                    self._shm.close()
+                    self._shm.unlink()
+                except Exception:
+                    pass
+                self._shm = None
+
+    # ------------------------------------------------------------------
+    # 요청/결과
+    # ------------------------------------------------------------------
+    def _acquire_slots(self, n: int, timeout: float) -> List[int]:
+        if n > self._num_slots:
+            raise ValueError(f"한 번에 보낼 수 있는 프레임은 최대 {self._num_slots}개입니다.")
+        deadline = time.time() + timeout
+        with self._slot_cond:
+            while len(self._free_slots) < n:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self._slot_cond.wait(remaining):
+                    raise TimeoutError("공유 메모리 슬롯을 확보하지 못했습니다.")
+            taken = self._free_slots[:n]
+            del self._free_slots[:n]
+            return taken
+
+    def _release_slots(self, slot_ids: List[int]) -> None:
+        with self._slot_cond:
+            self._free_slots.extend(slot_ids)
+            self._slot_cond.notify_all()
+
+    def _abandon(self, future: Future) -> None:
+        """시간 초과로 포기한 요청의 슬롯/백그라운드 표시를 반납한다 (늦게 온 결과는 무시된다).
+
+        워커는 슬롯을 읽기만 하므로 반납한 슬롯에 다른 요청이 써도 포기한 요청의 결과만 틀어진다.
+        """
+        with self._pending_lock:
+            req_id = next((k for k, v in self._pending.items() if v[0] is future), None)
+            entry = None if req_id is None else self._pending.pop(req_id)
+            if entry is not None and entry[2]:
+                self._background_busy = False
+        if entry is not None:
+            self._release_slots(entry[1])
+
+    def _write_slot(self, slot_id: int, frame: np.ndarray) -> Tuple[int, int]:
+        max_h, max_w = self._slot_shape[:2]
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        h, w = frame.shape[:2]
+        if h > max_h or w > max_w:
+            scale = min(max_h / float(h), max_w / float(w))
+            frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+            h, w = frame.shape[:2]
+        self._slots[slot_id, :h, :w] = frame
+        return h, w
+
+    def submit(
+        self,
+        frames: Sequence[np.ndarray],
+        *,
+        background: bool = False,
+        timeout: float = DEFAULT_TIMEOUT_SEC,
+        **predict_kwargs: Any,
+    ) -> Future:
+        """
+        프레임을 공유 메모리 슬롯에 쓰고 요청을 보낸 뒤 Future를 반환한다.
+
+        background=True 요청(대시보드 폴링 등)은 한 번에 하나만 처리하며,
+        이미 처리 중이면 기다리지 않고 InferenceBusy를 발생시킨다.
+        """
+        if not self.is_alive:
+            raise RuntimeError("추론 워커가 실행 중이 아닙니다. start()를 먼저 호출하세요.")
+        frames = [f for f in frames if f is not None]
+        if not frames:
+            raise ValueError("예측할 프레임이 없습니다.")
+
+        if background:
+            with self._pending_lock:
+                if self._background_busy:
+                    raise InferenceBusy("이전 백그라운드 추론이 아직 처리 중입니다.")
+                self._background_busy = True
+
+        try:
+            slot_ids = self._acquire_slots(len(frames), timeout)
+        except Exception:
+            if background:
+                with self._pending_lock:
+                    self._background_busy = False
+            raise
+
+        req_id = next(self._ids)
+        future: Future = Future()
+        try:
+            with self._shm_lock:
+                if self._slots is None:
+                    raise RuntimeError("추론 워커가 종료되었습니다.")
+                shapes = [self._write_slot(s, f) for s, f in zip(slot_ids, frames)]
+                with self._pending_lock:
+                    self._pending[req_id] = (future, slot_ids, background)
+                target_q = self._background_q if background else self._urgent_q
+                target_q.put((req_id, slot_ids, shapes, predict_kwargs))
+        except Exception:
+            with self._pending_lock:
+                self._pending.pop(req_id, None)
+                if background:
+                    self._background_busy = False
+            self._release_slots(slot_ids)
+            raise
+        return future
+
+    def _dispatch_results(self) -> None:
+        """결과 큐를 읽어 요청 ID에 맞는 Future를 완료시키고 슬롯을 반납한다."""
+        while not self._stopping:
+            try:
+                req_id, grid, probs, error = self._result_q.get(timeout=0.2)
+            except queue.Empty:
+                if self._proc is not None and not self._proc.is_alive():
+                    print("[InferenceWorker] 워커 프로세스가 예기치 않게 종료되었습니다.")
+                    self.stop()
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+
+            with self._pending_lock:
+                entry = self._pending.pop(req_id, None)
+                if entry is not None and entry[2]:
+                    self._background_busy = False
+            if entry is None:
+                continue
+
+            future, slot_ids, _ = entry
+            self._release_slots(slot_ids)
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result((grid, probs))
+
+    # ------------------------------------------------------------------
+    # ChessPieceMLDetector 호환 인터페이스
+    # ------------------------------------------------------------------
+    def predict_frames(
+        self,
+        frames: Sequence[np.ndarray],
+        target_size: Tuple[int, int] = (640, 480),
+        tta: Union[bool, Sequence[str]] = False,
+        max_batch: int = 256,
+        *,
+        background: bool = False,
+        timeout: float = DEFAULT_TIMEOUT_SEC,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """워커에서 배치 추론을 수행하고 (grid, probs)를 반환한다. (ChessPieceMLDetector.predict_frames 참고)"""
+        if not isinstance(tta, bool):
+            tta = tuple(tta)
+        future = self.submit(
+            frames,
+            background=background,
+            timeout=timeout,
+            target_size=tuple(target_size),
+            tta=tta,
+            max_batch=max_batch,
+        )
+        try:
+            return future.result(timeout)
+        finally:
+            if not future.done():
+                self._abandon(future)
+
+    def predict_frame(self, img_bgr: np.ndarray, target_size: Tuple[int, int] = (640, 480)) -> np.ndarray:
+        grid, _ = self.predict_frames([img_bgr], target_size)
+        return grid
+
+    def print_grid(self, grid: np.ndarray, title: str = "ML 예측 결과") -> None:
+        print_grid(grid, title)
+
+
+def print_grid(grid: np.ndarray, title: str = "ML 예측 결과") -> None:
+    """8x8 예측 그리드를 콘솔에 출력 (ChessPieceMLDetector.print_grid와 동일한 형식, torch 불필요)."""
+    symbols = {0: ".", 1: "W", 2: "B"}
+    print(f"\n[{title}]")
+    print("  " + " ".join(['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h']))
+    for r in range(8):
+        row = " ".join(symbols.get(int(v), "?") for v in grid[r])
+        print(f"{8 - r} {row} ")
+    print()
+
+
+def start_inference_worker(model_path: str, device: Optional[str] = None, **kwargs: Any) -> Optional[InferenceWorker]:
+    """워커를 생성/시작한다. 실패하면 None을 반환하므로 호출 측에서 인라인 추론으로 대체할 수 있다."""
+    try:
+        worker = InferenceWorker(model_path, device, **kwargs)
+    except Exception as exc:
+        print(f"[InferenceWorker] 워커 생성 실패: {exc}")
+        return None
+    return worker if worker.start() else None
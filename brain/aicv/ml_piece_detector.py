@@ -8,21 +8,57 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Sequence, Tuple, Union
 
 import cv2
 import numpy as np
 
-try:
-    import torch
-    import torch.nn as nn
-    import torchvision
-    import torchvision.transforms as T
-    TORCH_AVAILABLE = True
-except ImportError:
-    TORCH_AVAILABLE = False
+from startup.lazy_imports import is_available, lazy_import
+
+# torch/torchvision은 import에 수 초가 걸리므로 실제로 모델을 만들 때 import한다
+# (startup.lazy_imports.preload로 백그라운드에서 미리 불러올 수 있음)
+torch = lazy_import("torch")
+nn = lazy_import("torch.nn")
+torchvision = lazy_import("torchvision")
+T = lazy_import("torchvision.transforms")
+TORCH_AVAILABLE = is_available("torch") and is_available("torchvision")
+if not TORCH_AVAILABLE:
     print("[WARNING] PyTorch가 설치되지 않았습니다. ML 기물 인식 기능을 사용할 수 없습니다.")
 
+IMAGENET_MEAN = [0.485, 0.456, 0.406]
+IMAGENET_STD = [0.229, 0.224, 0.225]
+
+# 테스트 타임 증강(TTA) 종류와 shift 크기(리사이즈된 이미지 기준 픽셀)
+TTA_DEFAULT = ("hflip", "vflip", "shift")
+TTA_SHIFT_PX = 4
+
+
+def _to_chess_orientation(arr: np.ndarray) -> np.ndarray:
+    """
+    이미지 칸 좌표 [r][c] 배열을 체스 좌표 배열로 변환합니다.
+
+    - 이미지: img[r][c]는 위에서 아래(r=0~7), 왼쪽에서 오른쪽(c=0~7)
+    - 체스 좌표: grid[chess_r][chess_c]
+      - chess_r: rank 8~1 (0=rank 8, 7=rank 1)
+      - chess_c: file a~h (0=file a, 7=file h)
+
+    dataset_collector의 CSV 형식:
+    - labels[r][c]: row=file(a~h), col=rank(1~8)
+    - labels[0][0] = a1, labels[0][7] = a8
+    - labels[7][0] = h1, labels[7][7] = h8
+
+    변환 공식:
+    - labels[r][c] = (file=a+r, rank=c+1)
+    - chess_grid[8-rank][file] = chess_grid[8-(c+1)][r] = chess_grid[7-c][r]
+    - 즉: chess_grid[7-c][r] = labels[r][c]
+
+    카메라가 rotate_180=True로 설정되어 있어 이미지가 이미 180도 회전된 상태이므로
+    img[r][c] → labels[r][c] (동일 좌표)입니다.
+    뒤쪽 축(확률 등)은 그대로 유지됩니다.
+    """
+    # chess_grid[7-c][r] = img[r][c]  <=>  전치 후 위아래 뒤집기
+    return np.ascontiguousarray(np.swapaxes(arr, 0, 1)[::-1])
+
 
 class ChessPieceMLDetector:
     """머신러닝 기반 체스 기물 인식기"""
@@ -44,7 +80,7 @@ class ChessPieceMLDetector:
         self.infer_transform = T.Compose([
             T.ToPILImage(),
             T.ToTensor(),
-            T.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+            T.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD),
         ])
         
         if model_path:
@@ -80,6 +116,114 @@ class ChessPieceMLDetector:
             print(f"[ERROR] 모델 로드 실패: {e}")
             return False
     
+    def _extract_cells(
+        self,
+        img_bgr: np.ndarray,
+        target_size: Tuple[int, int],
+        shift: Tuple[int, int] = (0, 0),
+    ) -> np.ndarray:
+        """
+        체스판 이미지를 8x8 칸으로 잘라 (64, 64, 64, 3) RGB uint8 배열로 반환합니다.
+
+        shift=(dx, dy)를 주면 칸 경계를 해당 픽셀만큼 이동해서 자릅니다 (TTA용).
+        이미지 밖으로 나가는 부분은 가장자리 픽셀로 채웁니다.
+        """
+        img_resized = cv2.resize(img_bgr, target_size, interpolation=cv2.INTER_AREA)
+        H, W = img_resized.shape[:2]
+        cell_h, cell_w = H // 8, W // 8
+
+        dx, dy = shift
+        pad = max(abs(dx), abs(dy))
+        if pad:
+            img_resized = cv2.copyMakeBorder(img_resized, pad, pad, pad, pad, cv2.BORDER_REPLICATE)
+
+        cells = np.empty((64, 64, 64, 3), dtype=np.uint8)
+        for r in range(8):  # 이미지 위에서 아래
+            for c in range(8):  # 이미지 왼쪽에서 오른쪽
+                y0 = r * cell_h + pad + dy
+                x0 = c * cell_w + pad + dx
+                cell = img_resized[y0:y0 + cell_h, x0:x0 + cell_w]
+                cells[r * 8 + c] = cv2.resize(cell, (64, 64), interpolation=cv2.INTER_AREA)
+
+        # BGR -> RGB
+        return cells[..., ::-1]
+
+    def _cells_to_batch(self, cells_rgb: np.ndarray) -> "torch.Tensor":
+        """(N, 64, 64, 3) uint8 배열을 정규화된 (N, 3, 64, 64) 텐서로 변환 (infer_transform과 동일)."""
+        batch = torch.from_numpy(np.ascontiguousarray(cells_rgb)).permute(0, 3, 1, 2).float().div_(255.0)
+        mean = torch.tensor(IMAGENET_MEAN, dtype=batch.dtype).view(1, 3, 1, 1)
+        std = torch.tensor(IMAGENET_STD, dtype=batch.dtype).view(1, 3, 1, 1)
+        return (batch - mean) / std
+
+    def predict_frames(
+        self,
+        frames: Sequence[np.ndarray],
+        target_size: Tuple[int, int] = (640, 480),
+        tta: Union[bool, Sequence[str]] = False,
+        max_batch: int = 256,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        최근 K개의 체스판 이미지를 한 번의 배치 추론으로 예측하고 칸별 softmax를 평균합니다.
+
+        Args:
+            frames: BGR 체스판 이미지 목록 (와핑된 프레임 K개)
+            target_size: 이미지를 리사이즈할 크기 (width, height)
+            tta: 테스트 타임 증강. True면 TTA_DEFAULT 전체, 문자열 목록이면 해당 증강만 사용
+                 ("hflip", "vflip", "shift")
+            max_batch: 한 번의 forward에 넣을 최대 칸 수 (메모리 제한용)
+
+        Returns:
+            (grid, probs)
+            - grid: 8x8 numpy 배열 (0=empty, 1=white, 2=black), predict_frame과 같은 좌표계
+            - probs: 8x8x3 평균 softmax 확률
+        """
+        if self.model is None:
+            raise RuntimeError("모델이 로드되지 않았습니다. load_model()을 먼저 호출하세요.")
+
+        frames = [f for f in frames if f is not None]
+        if not frames:
+            raise ValueError("예측할 프레임이 없습니다.")
+
+        if tta is True:
+            augments = TTA_DEFAULT
+        elif not tta:
+            augments = ()
+        else:
+            augments = tuple(tta)
+        unknown = set(augments) - set(TTA_DEFAULT)
+        if unknown:
+            raise ValueError(f"지원하지 않는 TTA 종류: {sorted(unknown)}")
+
+        # 모든 프레임/증강의 칸을 한 배열로 모은다: (K*A*64, 64, 64, 3)
+        views = []
+        for frame in frames:
+            views.append(self._extract_cells(frame, target_size))
+            if "shift" in augments:
+                s = TTA_SHIFT_PX
+                for shift in ((s, 0), (-s, 0), (0, s), (0, -s)):
+                    views.append(self._extract_cells(frame, target_size, shift=shift))
+        base_views = list(views)
+        if "hflip" in augments:
+            views.extend(v[:, :, ::-1] for v in base_views)
+        if "vflip" in augments:
+            views.extend(v[:, ::-1, :] for v in base_views)
+        all_cells = np.concatenate(views, axis=0)
+
+        probs_sum = torch.zeros((64, 3), dtype=torch.float32)
+        with torch.no_grad():
+            for start in range(0, len(all_cells), max_batch):
+                chunk = all_cells[start:start + max_batch]
+                batch = self._cells_to_batch(chunk).to(self.device)
+                probs = torch.softmax(self.model(batch), dim=1).cpu()
+                # 배치 안의 칸 번호 = 전체 인덱스 % 64
+                idx = torch.arange(start, start + len(chunk)) % 64
+                probs_sum.index_add_(0, idx, probs)
+
+        probs = (probs_sum / (len(all_cells) // 64)).numpy().reshape(8, 8, 3)
+        probs = _to_chess_orientation(probs)
+        grid = probs.argmax(axis=2).astype(int)
+        return grid, probs
+
     def predict_frame(self, img_bgr: np.ndarray, target_size: Tuple[int, int] = (640, 480)) -> np.ndarray:
         """
         체스판 이미지에서 각 칸의 기물을 예측합니다.
@@ -94,70 +238,8 @@ class ChessPieceMLDetector:
             - col: file a~h (0=file a, 7=file h)
             즉, grid[0, 0] = a8, grid[0, 7] = h8, grid[7, 0] = a1, grid[7, 7] = h1
         """
-        if self.model is None:
-            raise RuntimeError("모델이 로드되지 않았습니다. load_model()을 먼저 호출하세요.")
-        
-        # 이미지 리사이즈
-        img_resized = cv2.resize(img_bgr, target_size, interpolation=cv2.INTER_AREA)
-        H, W = img_resized.shape[:2]
-        cell_h, cell_w = H // 8, W // 8
-        
-        # 각 칸을 추출하여 배치로 만들기
-        cells = []
-        coords = []
-        
-        for r in range(8):  # a~h (위에서 아래)
-            for c in range(8):  # 1~8 (왼쪽에서 오른쪽)
-                y0, y1 = r * cell_h, (r + 1) * cell_h
-                x0, x1 = c * cell_w, (c + 1) * cell_w
-                
-                cell = img_resized[y0:y1, x0:x1]
-                cell = cv2.resize(cell, (64, 64), interpolation=cv2.INTER_AREA)
-                cell = cv2.cvtColor(cell, cv2.COLOR_BGR2RGB)
-                
-                # 전처리 적용
-                x = self.infer_transform(cell)
-                cells.append(x)
-                coords.append((r, c))
-        
-        # 배치로 변환하여 예측
-        batch = torch.stack(cells, dim=0).to(self.device)  # (64, 3, 64, 64)
-        
-        with torch.no_grad():
-            preds = self.model(batch).argmax(dim=1).cpu().numpy()
-        
-        # 8x8 그리드로 변환
-        grid = np.zeros((8, 8), dtype=int)
-        for (r, c), pred in zip(coords, preds):
-            grid[r, c] = int(pred)
-        
-        # 좌표 변환:
-        # - 이미지: img[r][c]는 위에서 아래(r=0~7), 왼쪽에서 오른쪽(c=0~7)
-        # - 체스 좌표: grid[chess_r][chess_c]
-        #   - chess_r: rank 8~1 (0=rank 8, 7=rank 1)  
-        #   - chess_c: file a~h (0=file a, 7=file h)
-        #
-        # dataset_collector의 CSV 형식:
-        # - labels[r][c]: row=file(a~h), col=rank(1~8)
-        # - labels[0][0] = a1, labels[0][7] = a8
-        # - labels[7][0] = h1, labels[7][7] = h8
-        #
-        # 변환 공식:
-        # - labels[r][c] = (file=a+r, rank=c+1)
-        # - chess_grid[8-rank][file] = chess_grid[8-(c+1)][r] = chess_grid[7-c][r]
-        # - 즉: chess_grid[7-c][r] = labels[r][c]
-        #
-        # 그런데 이미지를 읽을 때 카메라가 rotate_180=True로 설정되어 있으므로
-        # 이미지가 이미 180도 회전된 상태입니다.
-        # 따라서: img[r][c] → labels[r][c] (동일 좌표)
-        
-        corrected_grid = np.zeros((8, 8), dtype=int)
-        for r in range(8):  
-            for c in range(8):  
-                # labels[r][c] → chess_grid[7-c][r]
-                corrected_grid[7 - c, r] = grid[r, c]
-        
-        return corrected_grid
+        grid, _ = self.predict_frames([img_bgr], target_size)
+        return grid
     
     def print_grid(self, grid: np.ndarray, title: str = "ML 예측 결과") -> None:
         """
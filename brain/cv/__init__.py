@@ -1,12 +1,28 @@
 """CV 관련 하위 모듈 패키지."""
 
 __all__ = [
+    "board_calibration",
+    "buffer_pool",
+    "capture_sources",
+    "corner_state",
+    "corner_tracker",
     "cv_detection",
     "cv_manager",
     "cv_web",
+    "frame_hub",
+    "jpeg_codec",
+    "lighting",
+    "marker_validator",
+    "multi_camera",
     "picam_stable",
     "piece_auto_update",
     "piece_detector",
     "player_input",
+    "prediction_cache",
+    "rate_governor",
+    "socket_events",
+    "square_sampling",
+    "stream_encoder",
+    "stream_server",
 ]
 
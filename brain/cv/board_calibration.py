@@ -0,0 +1,469 @@
+"""체스판 자동 위치 보정 + 보정 프로필 + 드리프트 감시.
+
+지금까지는 웹 UI에서 코너 4점을 직접 찍어 manual_corners.npy에 저장하거나, 베이지 칸 두 개의
+거리에 1.414를 곱하는 추정에 기대야 했다. 카메라가 밀리면 게임을 멈추고 다시 찍어야 했다.
+
+- 시작 시 한 번만 정밀 검출: 여러 프레임에서 원본 해상도로 초록 마커를 찾아 중앙값을 쓰고,
+  마커가 없으면 findChessboardCornersSB로 7x7 내부 코너를 찾아 호모그래피를 맞춘 뒤 바깥 코너로 외삽한다.
+- 결과는 이름 있는 보정 프로필(calibration_profiles/<name>.npz)로 저장: 코너, 프레임 크기,
+  카메라 내부 파라미터(있으면), 드리프트 기준 영상, 주 카메라 대비 보드 방향(rotation, 다중 카메라용).
+- DriftMonitor가 백그라운드에서 가끔(기본 2초) 최신 프레임 하나만 싸게 검사한다
+  (마커 프로필: 코너 주변 창 4개, 그 외: 축소 그레이 영상 위상 상관). 일정 이상 어긋난 검사가
+  연속되면 그때만 다시 보정하고 cv_manager 코너를 갱신한다. 프레임마다 하는 코너 작업은 없다.
+
+사용 예::
+
+    profile = calibrate_at_startup(hub)           # 프로필 로드/검증 또는 새로 보정 → cv_manager 코너 적용
+    monitor = DriftMonitor(hub, profile).start()  # 카메라가 밀리면 자동 재보정
+    monitor.stats                                 # checks / drift / recalibrated / failed
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from cv import picam_stable
+from cv.corner_state import SOURCE_CALIBRATION
+from cv.corner_tracker import find_markers_in_windows
+from cv.picam_stable import find_green_corners, is_valid_quad, sort_corners_by_position
+from cv.square_sampling import default_camera_matrix
+from cv.warp_stage import compute_homography
+
+BASE_DIR = Path(__file__).resolve().parent
+PROFILE_DIR = BASE_DIR / "calibration_profiles"
+DEFAULT_PROFILE = "default"
+
+BOARD_PATTERN = (7, 7)          # 8x8 보드의 내부 코너 수
+LOCALIZE_FRAMES = 8             # 시작 보정에 쓰는 프레임 수
+CHESSBOARD_TRIES = 2            # findChessboardCornersSB는 프레임당 수백 ms라 마지막 몇 장만 시도
+MAX_MARKER_SPREAD_PX = 4.0      # 프레임 간 마커 중앙값 편차가 이보다 크면 보정 실패 (흔들림/가림)
+DRIFT_CHECK_SEC = 2.0
+DRIFT_THRESHOLD_PX = 6.0
+DRIFT_CONFIRM_CHECKS = 3        # 연속으로 어긋나야 재보정 (손/기물로 잠깐 가린 경우 무시)
+DRIFT_WINDOW = 48               # 마커 드리프트 검사 창 반지름
+REFERENCE_WIDTH = 160           # 위상 상관 기준 영상 폭
+MIN_PHASE_RESPONSE = 0.1
+
+METHOD_MARKERS = "markers"
+METHOD_CHESSBOARD = "chessboard"
+METHOD_MANUAL = "manual"
+
+
+@dataclass
+class CalibrationProfile:
+    """보드 코너(TL, TR, BR, BL)와 그 코너를 얻은 카메라 상태."""
+
+    name: str
+    corners: np.ndarray
+    frame_size: Tuple[int, int]                    # (w, h)
+    method: str
+    camera_matrix: Optional[np.ndarray] = None
+    dist_coeffs: Optional[np.ndarray] = None
+    error_px: float = 0.0                          # 마커: 프레임 간 편차, 체스보드: 호모그래피 재투영 오차
+    created: float = field(default_factory=time.time)
+    reference: Optional[np.ndarray] = None         # 드리프트 기준 축소 그레이 영상 (float32)
+    # 이 카메라의 칸 격자를 주 카메라 방향으로 맞추는 np.rot90 횟수 (0~3, 모르면 None → 융합 시 추정)
+    rotation: Optional[int] = None
+
+    def homography(self, size: int = 400) -> np.ndarray:
+        return compute_homography(self.corners, size)
+
+    def intrinsics(self) -> np.ndarray:
+        """저장된 내부 파라미터, 없으면 프레임 크기로 만든 근사 핀홀 행렬."""
+        if self.camera_matrix is not None:
+            return self.camera_matrix
+        return default_camera_matrix(self.frame_size)
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            "name": self.name,
+            "method": self.method,
+            "frame_size": list(self.frame_size),
+            "corners": self.corners.tolist(),
+            "error_px": round(self.error_px, 3),
+            "intrinsics": self.camera_matrix is not None,
+            "created": self.created,
+            "rotation": self.rotation,
+        }
+
+    def save(self, directory: Optional[Path] = None) -> Path:
+        directory = Path(directory) if directory is not None else PROFILE_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{self.name}.npz"
+        arrays = {"corners": np.asarray(self.corners, dtype=np.float32)}
+        for key in ("camera_matrix", "dist_coeffs", "reference"):
+            value = getattr(self, key)
+            if value is not None:
+                arrays[key] = value
+        meta = {
+            "frame_size": list(self.frame_size),
+            "method": self.method,
+            "error_px": float(self.error_px),
+            "created": float(self.created),
+            "rotation": self.rotation,
+        }
+        # np.savez는 확장자를 붙이므로 임시 파일도 .npz로 만든 뒤 교체
+        tmp = directory / f".{self.name}.tmp.npz"
+        np.savez(tmp, meta=np.array(json.dumps(meta)), **arrays)
+        tmp.replace(path)
+        return path
+
+
+def profile_path(name: str = DEFAULT_PROFILE, directory: Optional[Path] = None) -> Path:
+    return (Path(directory) if directory is not None else PROFILE_DIR) / f"{name}.npz"
+
+
+def load_profile(name: str = DEFAULT_PROFILE, directory: Optional[Path] = None) -> Optional[CalibrationProfile]:
+    path = profile_path(name, directory)
+    if not path.exists():
+        return None
+    try:
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            return CalibrationProfile(
+                name=name,
+                corners=np.asarray(data["corners"], dtype=np.float32).reshape(4, 2),
+                frame_size=tuple(meta["frame_size"]),
+                method=meta["method"],
+                camera_matrix=data["camera_matrix"] if "camera_matrix" in data else None,
+                dist_coeffs=data["dist_coeffs"] if "dist_coeffs" in data else None,
+                error_px=meta.get("error_px", 0.0),
+                created=meta.get("created", 0.0),
+                reference=data["reference"] if "reference" in data else None,
+                rotation=meta.get("rotation"),
+            )
+    except Exception as e:
+        print(f"[calib] 프로필 로드 실패 ({path}): {e}")
+        return None
+
+
+def list_profiles(directory: Optional[Path] = None) -> List[str]:
+    directory = Path(directory) if directory is not None else PROFILE_DIR
+    if not directory.exists():
+        return []
+    return sorted(p.stem for p in directory.glob("*.npz") if not p.name.startswith("."))
+
+
+# ---------------------------------------------------------------------------
+# 일회성 정밀 검출
+# ---------------------------------------------------------------------------
+def reference_image(frame: np.ndarray, width: int = REFERENCE_WIDTH) -> np.ndarray:
+    """위상 상관용 축소 그레이 영상 (float32)."""
+    h, w = frame.shape[:2]
+    small = cv2.resize(frame, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small.astype(np.float32)
+
+
+def localize_markers(frames: Sequence[np.ndarray]) -> Optional[Tuple[np.ndarray, float]]:
+    """원본 해상도 마커 검출의 프레임별 중앙값 코너와 편차 (절반 이상 프레임에서 찾아야 성공)."""
+    found = []
+    for frame in frames:
+        pts = find_green_corners(frame, scale=1)
+        if pts is not None and is_valid_quad(pts)[0]:
+            found.append(pts)
+    if len(found) < max(1, (len(frames) + 1) // 2):
+        return None
+    stack = np.stack(found)
+    corners = np.median(stack, axis=0).astype(np.float32)
+    spread = float(np.linalg.norm(stack - corners, axis=2).mean())
+    if spread > MAX_MARKER_SPREAD_PX:
+        print(f"[calib] 마커 위치가 프레임마다 흔들림 ({spread:.1f}px)")
+        return None
+    return corners, spread
+
+
+def _pattern_grid(pattern: Tuple[int, int]) -> np.ndarray:
+    """findChessboardCorners 순서(행 우선)의 내부 코너 칸 좌표 (1..n)."""
+    cols, rows = pattern
+    return (np.mgrid[1:cols + 1, 1:rows + 1].T.reshape(-1, 2)).astype(np.float32)
+
+
+def find_board_pattern(frame: np.ndarray, pattern: Tuple[int, int] = BOARD_PATTERN) -> Optional[np.ndarray]:
+    """findChessboardCornersSB 내부 코너 (N, 2). 못 찾으면 None."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    flags = cv2.CALIB_CB_NORMALIZE_IMAGE | cv2.CALIB_CB_ACCURACY
+    ok, pts = cv2.findChessboardCornersSB(gray, pattern, flags=flags)
+    return pts.reshape(-1, 2) if ok else None
+
+
+def localize_chessboard(
+    frame: np.ndarray, pattern: Tuple[int, int] = BOARD_PATTERN
+) -> Optional[Tuple[np.ndarray, float]]:
+    """내부 코너에 호모그래피를 맞춰 보드 바깥 코너를 구한다 (코너, 재투영 RMS)."""
+    pts = find_board_pattern(frame, pattern)
+    if pts is None:
+        return None
+    grid = _pattern_grid(pattern)
+    H, _ = cv2.findHomography(grid, pts, 0)
+    if H is None:
+        return None
+    proj = cv2.perspectiveTransform(grid.reshape(-1, 1, 2), H).reshape(-1, 2)
+    rms = float(np.sqrt(((proj - pts) ** 2).sum(axis=1).mean()))
+    nx, ny = pattern[0] + 1, pattern[1] + 1
+    outer = np.array([[0, 0], [nx, 0], [nx, ny], [0, ny]], dtype=np.float32).reshape(-1, 1, 2)
+    corners = cv2.perspectiveTransform(outer, H).reshape(4, 2)
+    return sort_corners_by_position(corners), rms
+
+
+def calibrate_intrinsics(
+    frames: Sequence[np.ndarray], pattern: Tuple[int, int] = BOARD_PATTERN, square: float = 1.0
+) -> Optional[Tuple[np.ndarray, np.ndarray, float]]:
+    """빈 보드를 여러 각도에서 찍은 프레임으로 카메라 내부 파라미터 (K, dist, RMS). 3장 미만이면 None."""
+    obj = np.zeros((pattern[0] * pattern[1], 3), dtype=np.float32)
+    obj[:, :2] = _pattern_grid(pattern) * square
+    obj_pts, img_pts = [], []
+    size = None
+    for frame in frames:
+        pts = find_board_pattern(frame, pattern)
+        if pts is None:
+            continue
+        size = (frame.shape[1], frame.shape[0])
+        obj_pts.append(obj)
+        img_pts.append(pts.reshape(-1, 1, 2).astype(np.float32))
+    if len(obj_pts) < 3:
+        return None
+    rms, K, dist, _, _ = cv2.calibrateCamera(obj_pts, img_pts, size, None, None)
+    return K, dist, float(rms)
+
+
+def _grab_frames(source, count: int) -> List[np.ndarray]:
+    frames = []
+    for _ in range(count * 2):
+        ret, frame = source.read()
+        if ret and frame is not None:
+            frames.append(frame)
+            if len(frames) >= count:
+                break
+    return frames
+
+
+def localize_board(
+    source,
+    name: str = DEFAULT_PROFILE,
+    frames: Optional[Sequence[np.ndarray]] = None,
+    pattern: Tuple[int, int] = BOARD_PATTERN,
+    base: Optional[CalibrationProfile] = None,
+) -> Optional[CalibrationProfile]:
+    """마커 → 체스보드 패턴 순으로 보드를 찾아 프로필을 만든다 (source는 read()가 있는 캡처/FrameHub).
+
+    base 프로필의 내부 파라미터는 새 프로필로 그대로 옮긴다.
+    """
+    if frames is None:
+        frames = _grab_frames(source, LOCALIZE_FRAMES)
+    if not frames:
+        print("[calib] 보정용 프레임을 읽지 못했습니다")
+        return None
+    h, w = frames[-1].shape[:2]
+    method, result = METHOD_MARKERS, localize_markers(frames)
+    if result is None:
+        method = METHOD_CHESSBOARD
+        for frame in list(frames)[-CHESSBOARD_TRIES:][::-1]:
+            result = localize_chessboard(frame, pattern)
+            if result is not None and is_valid_quad(result[0])[0]:
+                break
+            result = None
+    if result is None:
+        print("[calib] 마커/체스보드 패턴을 찾지 못했습니다")
+        return None
+    corners, error = result
+    profile = CalibrationProfile(
+        name=name, corners=corners, frame_size=(w, h), method=method, error_px=error,
+        camera_matrix=None if base is None else base.camera_matrix,
+        dist_coeffs=None if base is None else base.dist_coeffs,
+        reference=reference_image(frames[-1]),
+        rotation=None if base is None else base.rotation,    # 같은 자리에서 다시 잡은 보드는 방향이 같다
+    )
+    print(f"[calib] 보드 위치 보정 완료: {method}, 오차 {error:.2f}px")
+    return profile
+
+
+# ---------------------------------------------------------------------------
+# 드리프트 측정
+# ---------------------------------------------------------------------------
+def measure_drift(profile: CalibrationProfile, frame: np.ndarray) -> Optional[float]:
+    """프로필 코너 대비 현재 프레임의 어긋남 (픽셀). 판단할 수 없으면(가림 등) None."""
+    h, w = frame.shape[:2]
+    if (w, h) != tuple(profile.frame_size):
+        return float("inf")
+    if profile.method == METHOD_MARKERS:
+        lower = np.array([picam_stable.Hmin, picam_stable.Smin, picam_stable.Vmin])
+        upper = np.array([picam_stable.Hmax, picam_stable.Smax, picam_stable.Vmax])
+        found = find_markers_in_windows(frame, profile.corners, DRIFT_WINDOW, lower, upper)
+        shifts = [np.hypot(p[0] - c[0], p[1] - c[1]) for p, c in zip(found, profile.corners) if p is not None]
+        if len(shifts) >= 3:
+            return float(np.median(shifts))
+        # 마커가 창 밖으로 나갔으면 크게 밀린 것, 가려졌으면 알 수 없음 → 위상 상관으로 판단
+    if profile.reference is None:
+        return None
+    cur = reference_image(frame, profile.reference.shape[1])
+    if cur.shape != profile.reference.shape:
+        return None
+    (dx, dy), response = cv2.phaseCorrelate(profile.reference, cur)
+    if response < MIN_PHASE_RESPONSE:
+        return None
+    return float(np.hypot(dx, dy) * w / cur.shape[1])
+
+
+def apply_profile(profile: CalibrationProfile) -> None:
+    """프로필 코너/카메라 모델을 cv_manager 와핑 코너와 칸 샘플러에 적용 (manual_corners.npy는 건드리지 않음)."""
+    from cv import cv_manager
+
+    cv_manager.set_camera_model(profile.frame_size, profile.camera_matrix, profile.dist_coeffs)
+    # 재투영 오차(px)가 클수록 낮은 신뢰도로 코너 상태 서비스에 내보낸다
+    confidence = 1.0 / (1.0 + float(profile.error_px or 0.0))
+    cv_manager.set_manual_corners(profile.corners, persist=False, source=SOURCE_CALIBRATION, confidence=confidence)
+
+
+def calibrate_at_startup(
+    hub, name: str = DEFAULT_PROFILE, directory: Optional[Path] = None, apply: bool = True
+) -> Optional[CalibrationProfile]:
+    """저장된 프로필을 현재 프레임으로 검증해 쓰고, 어긋났거나 없으면 새로 보정해 저장/적용한다.
+
+    자동 보정이 모두 실패하면 기존 수동 코너가 있을 때 그것으로 프로필을 만든다.
+    apply=False(보조 카메라)면 cv_manager에 적용하지 않고 수동 코너로 대신하지도 않는다.
+    """
+    frames = _grab_frames(hub, LOCALIZE_FRAMES)
+    if not frames:
+        print("[calib] 카메라 프레임이 없어 보정을 건너뜁니다")
+        return None
+    saved = load_profile(name, directory)
+    if saved is not None:
+        drift = measure_drift(saved, frames[-1])
+        if drift is not None and drift <= DRIFT_THRESHOLD_PX:
+            print(f"[calib] 저장된 프로필 '{name}' 사용 ({saved.method}, 어긋남 {drift:.1f}px)")
+            if apply:
+                apply_profile(saved)
+            return saved
+        print(f"[calib] 저장된 프로필 '{name}'이 현재 화면과 맞지 않음 → 재보정")
+    profile = localize_board(hub, name, frames=frames, base=saved)
+    if profile is None and not apply:
+        return None
+    if profile is None:
+        from cv import cv_manager
+
+        manual = cv_manager.get_manual_corners()
+        if manual is None:
+            return None
+        h, w = frames[-1].shape[:2]
+        profile = CalibrationProfile(
+            name=name, corners=manual, frame_size=(w, h), method=METHOD_MANUAL,
+            camera_matrix=None if saved is None else saved.camera_matrix,
+            dist_coeffs=None if saved is None else saved.dist_coeffs,
+            reference=reference_image(frames[-1]),
+            rotation=None if saved is None else saved.rotation,
+        )
+        print("[calib] 자동 보정 실패 - 기존 수동 코너로 프로필 생성")
+    path = profile.save(directory)
+    print(f"[calib] 프로필 저장: {path}")
+    if apply:
+        apply_profile(profile)
+    return profile
+
+
+# ---------------------------------------------------------------------------
+# 백그라운드 드리프트 감시
+# ---------------------------------------------------------------------------
+class DriftMonitor:
+    """FrameHub 최신 프레임을 가끔 검사하다가 보드가 밀린 것이 확인되면 재보정하는 스레드.
+
+    허브의 peek()을 쓰므로 감시 자체는 캡처 속도를 올리지 않는다 (재보정할 때만 프레임을 읽는다).
+    """
+
+    def __init__(
+        self,
+        hub,
+        profile: CalibrationProfile,
+        interval: float = DRIFT_CHECK_SEC,
+        threshold: float = DRIFT_THRESHOLD_PX,
+        confirm: int = DRIFT_CONFIRM_CHECKS,
+        directory: Optional[Path] = None,
+        on_recalibrated: Optional[Callable[[CalibrationProfile], None]] = None,
+        apply: bool = True,
+    ):
+        self.hub = hub
+        self.profile = profile
+        self.interval = interval
+        self.threshold = threshold
+        self.confirm = confirm
+        self.directory = directory
+        self.on_recalibrated = on_recalibrated
+        self.apply = apply
+        self.last_drift: Optional[float] = None
+        self.stats: Dict[str, int] = {"checks": 0, "drift": 0, "recalibrated": 0, "failed": 0}
+        self._strikes = 0
+        self._last_seq = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "DriftMonitor":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+
+    def check(self, frame: np.ndarray) -> bool:
+        """프레임 하나를 검사하고, 연속 어긋남이 confirm회에 이르면 재보정한다. 재보정했으면 True."""
+        self.stats["checks"] += 1
+        drift = measure_drift(self.profile, frame)
+        self.last_drift = drift
+        if drift is None or drift <= self.threshold:
+            # 가림 등으로 판단할 수 없는 검사는 누적을 유지하지도 늘리지도 않는다
+            if drift is not None:
+                self._strikes = 0
+            return False
+        self._strikes += 1
+        if self._strikes < self.confirm:
+            return False
+        self._strikes = 0
+        self.stats["drift"] += 1
+        print(f"[calib] 보드 드리프트 감지 ({drift:.1f}px) → 재보정")
+        return self.recalibrate()
+
+    def recalibrate(self) -> bool:
+        profile = localize_board(self.hub, self.profile.name, base=self.profile)
+        if profile is None:
+            self.stats["failed"] += 1
+            return False
+        profile.save(self.directory)
+        if self.apply:
+            apply_profile(profile)
+        self.profile = profile
+        self.stats["recalibrated"] += 1
+        if self.on_recalibrated is not None:
+            self.on_recalibrated(profile)
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = self.hub.peek()
+            if frame is None or frame.seq == self._last_seq:
+                continue
+            self._last_seq = frame.seq
+            image = frame.image
+            if image is None:
+                continue
+            try:
+                self.check(image)
+            except Exception as e:
+                print(f"[calib] 드리프트 검사 오류: {e}")
+
+    def describe(self) -> Dict[str, object]:
+        info = self.profile.describe()
+        info.update(self.stats)
+        info["last_drift_px"] = None if self.last_drift is None else round(self.last_drift, 2)
+        return info
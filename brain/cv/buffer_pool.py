@@ -0,0 +1,139 @@
+"""프레임 단위 중간 이미지용 버퍼 풀.
+
+캡처 → 와핑 → 칸 통계 → 인코딩 경로는 프레임마다 HSV/마스크/적분/그레이 같은 중간 배열을 새로
+할당했다. 30fps에서 프레임당 수 MB씩 할당/해제가 반복되면 1GB Pi에서 힙이 조각나고 캐시 적중률도
+떨어진다. BufferPool은 (모양, dtype)별로 배열을 몇 개 들고 있다가 OpenCV 호출의 dst= 인자로 다시 쓴다.
+
+- 소유권은 명시적으로 주고받는다. borrow(shape, dtype)는 with 블록 동안만 버퍼를 빌려주고 블록이
+  끝나면 풀로 돌려받는다 (acquire()/release() 쌍과 같다). 반납 전까지는 다른 스레드에 나가지 않는다.
+- 빌린 버퍼는 함수 안의 중간 결과에만 쓴다. 함수가 돌려주는 배열(캡처 프레임, 와핑 결과, 오버레이,
+  LAB 캐시 등)은 풀 버퍼가 아닌 새 배열이어야 한다 (반납 뒤 다른 호출이 덮어쓰므로 뷰도 내보내지 않는다).
+- 내용은 이전 사용 값이 남아 있으므로 dst로 전부 덮어쓰는 곳에서만 쓴다 (부분만 쓰면 fill 먼저).
+- 키마다 slots개까지만 보관하고, 넘치는 반납 버퍼는 버린다 (overflow로 집계).
+- tick(): 프레임 하나가 끝났음을 알린다 (FrameHub 캡처 루프가 호출). describe()의 allocs_per_frame은
+  최근 프레임들의 프레임당 풀 새 할당 수로, 정상 상태에서는 0에 가까워야 한다.
+- 환경 변수 CHESS_BUFFER_POOL=0이면 매번 새로 할당한다 (집계는 그대로, 비교용).
+
+사용 예::
+
+    pool = get_pool()
+    with pool.borrow_like(warp) as lab:
+        cv2.cvtColor(warp, cv2.COLOR_BGR2LAB, dst=lab)
+        means = cell_means(lab)      # lab은 블록 밖으로 내보내지 않는다
+    pool.describe()    # {"allocations": ..., "reuses": ..., "allocs_per_frame": ...}
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+BUFFER_POOL_ENV = "CHESS_BUFFER_POOL"
+DEFAULT_SLOTS = 4           # 키당 보관 수 (동시에 빌려 가는 스레드 수만큼이면 충분)
+STATS_WINDOW = 30           # allocs_per_frame 집계 프레임 수
+
+
+class BufferPool:
+    """(모양, dtype)별 재사용 배열 풀 (스레드 안전)."""
+
+    def __init__(self, name: str = "frames", slots: int = DEFAULT_SLOTS, enabled: Optional[bool] = None):
+        self.name = name
+        self.slots = max(1, slots)
+        if enabled is None:
+            enabled = os.environ.get(BUFFER_POOL_ENV, "1") != "0"
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._buffers: Dict[Tuple[Tuple[int, ...], str], List[np.ndarray]] = {}
+        self._frame_allocs = 0
+        self._window: Deque[int] = deque(maxlen=STATS_WINDOW)
+        self.stats: Dict[str, int] = {"requests": 0, "reuses": 0, "allocations": 0, "overflow": 0, "frames": 0}
+
+    @staticmethod
+    def _key(shape, dtype) -> Tuple[Tuple[int, ...], str]:
+        return tuple(int(s) for s in shape), np.dtype(dtype).str
+
+    def acquire(self, shape, dtype=np.uint8) -> np.ndarray:
+        """shape/dtype 배열을 꺼낸다 (내용은 정해지지 않음). 다 쓰면 release()로 돌려준다."""
+        key = self._key(shape, dtype)
+        with self._lock:
+            self.stats["requests"] += 1
+            free = self._buffers.get(key)
+            if self.enabled and free:
+                self.stats["reuses"] += 1
+                return free.pop()
+            self.stats["allocations"] += 1
+            self._frame_allocs += 1
+        return np.empty(key[0], np.dtype(key[1]))
+
+    def release(self, buf: np.ndarray) -> None:
+        """acquire()로 꺼낸 배열을 돌려준다. 이후 호출자는 buf(와 그 뷰)를 쓰지 않는다."""
+        if not self.enabled:
+            return
+        key = self._key(buf.shape, buf.dtype)
+        with self._lock:
+            free = self._buffers.setdefault(key, [])
+            if len(free) < self.slots:
+                free.append(buf)
+            else:
+                self.stats["overflow"] += 1
+
+    @contextmanager
+    def borrow(self, shape, dtype=np.uint8) -> Iterator[np.ndarray]:
+        """with 블록 동안만 쓰는 shape/dtype 버퍼."""
+        buf = self.acquire(shape, dtype)
+        try:
+            yield buf
+        finally:
+            self.release(buf)
+
+    def borrow_like(self, img: np.ndarray):
+        """img와 같은 모양/dtype 버퍼를 빌린다 (borrow와 같다)."""
+        return self.borrow(img.shape, img.dtype)
+
+    def tick(self) -> None:
+        """프레임 하나 처리 끝 (프레임당 할당 수 집계)."""
+        with self._lock:
+            self.stats["frames"] += 1
+            self._window.append(self._frame_allocs)
+            self._frame_allocs = 0
+
+    def clear(self) -> None:
+        """보관 중인 버퍼를 모두 버린다 (해상도가 바뀐 뒤 예전 크기 버퍼 정리용)."""
+        with self._lock:
+            self._buffers.clear()
+
+    @property
+    def bytes_held(self) -> int:
+        with self._lock:
+            return sum(b.nbytes for bufs in self._buffers.values() for b in bufs)
+
+    def describe(self) -> Dict[str, object]:
+        with self._lock:
+            info: Dict[str, object] = dict(self.stats)
+            window = list(self._window)
+            info["buffers"] = sum(len(bufs) for bufs in self._buffers.values())
+            info["keys"] = len(self._buffers)
+        info["name"] = self.name
+        info["enabled"] = self.enabled
+        info["bytes_held"] = self.bytes_held
+        info["allocs_per_frame"] = round(sum(window) / len(window), 2) if window else None
+        return info
+
+
+_pool: Optional[BufferPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> BufferPool:
+    """프로세스 공용 BufferPool."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BufferPool()
+    return _pool
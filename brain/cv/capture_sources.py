@@ -0,0 +1,676 @@
+"""캡처 소스 모음.
+
+FrameHub와 CV 코드는 `read() -> (ret, image)`와 `release()`만 있는 객체를 캡처로 쓴다.
+이 모듈은 그 인터페이스를 따르는 소스들을 한곳에 모은다.
+
+- USBCapture: V4L2 USB 카메라 (MJPG 협상, decode_on_demand)
+- Picamera2Source: 라즈베리파이 카메라 (picamera2 필요)
+- VideoFileSource: 녹화된 영상 파일
+- FrameDirSource: 프레임 이미지 디렉터리 (timestamps.csv가 있으면 원래 시각대로 재생)
+- SyntheticBoardSource: 지정한 국면을 그린 가상 체스판 (카메라 없는 환경/CI용)
+
+재생 소스(영상/디렉터리/가상)는 realtime=True면 원래 타임스탬프 간격대로, False면 최대 속도로
+프레임을 내보낸다. 끝에 도달하면 loop=True가 아닌 한 (False, None)을 돌려주고 finished가 True가 된다.
+FrameRecorder로 허브/카메라 프레임을 디렉터리에 녹화해 두면 FrameDirSource로 그대로 재생할 수 있다.
+
+사용 예::
+
+    cap = open_capture("dir:recordings/game1", realtime=False)   # 또는 CHESS_CAPTURE_SOURCE 환경 변수
+    hub = FrameHub(cap)
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from cv.jpeg_codec import get_codec
+
+# open_capture(None)이 읽는 환경 변수 (예: "usb:1", "picam", "video:game.mp4", "dir:frames/", "synthetic")
+CAPTURE_SOURCE_ENV = "CHESS_CAPTURE_SOURCE"
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp")
+TIMESTAMPS_FILE = "timestamps.csv"
+
+
+# 해상도 후보 (작은 것부터 시도). 보드가 화면 높이의 board_fraction 정도를 차지한다고 보고
+# 와핑 크기를 업샘플링 없이 채울 수 있는 가장 작은 해상도를 고른다.
+CAPTURE_RESOLUTIONS = ((640, 480), (800, 600), (1280, 720), (1920, 1080))
+DEFAULT_BOARD_FRACTION = 0.6
+
+
+def select_capture_size(
+    warp_size: int = 400,
+    board_fraction: float = DEFAULT_BOARD_FRACTION,
+    candidates: Iterable[Tuple[int, int]] = CAPTURE_RESOLUTIONS,
+) -> Tuple[int, int]:
+    """warp_size 와핑에 충분한 가장 작은 캡처 해상도 (없으면 가장 큰 후보)."""
+    ordered = sorted(candidates, key=lambda wh: wh[0] * wh[1])
+    need = warp_size / max(board_fraction, 1e-3)
+    for w, h in ordered:
+        if min(w, h) >= need:
+            return (w, h)
+    return ordered[-1]
+
+
+def _fourcc_to_str(value: float) -> str:
+    code = int(value)
+    chars = "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+    return chars if chars.isprintable() and code else "?"
+
+
+def _is_encoded_jpeg(buf: Optional[np.ndarray]) -> bool:
+    """CAP_PROP_CONVERT_RGB=0일 때 V4L2 백엔드가 돌려주는 1행짜리 MJPG 원본 버퍼인지 확인."""
+    if buf is None or buf.dtype != np.uint8 or buf.size < 4:
+        return False
+    if buf.ndim == 3 and buf.shape[2] > 1:
+        return False
+    flat = buf.reshape(-1)
+    return flat[0] == 0xFF and flat[1] == 0xD8
+
+
+class USBCapture:
+    """USB 카메라를 위한 간단 래퍼 (cv2.VideoCapture 기반).
+
+    rotate_180=True 이면 영상이 뒤집혀 있을 때 180도 회전 보정.
+    기본값은 True (현재 세팅에서는 카메라가 180도 뒤집혀 있다고 가정).
+
+    MJPG 포맷과 BUFFERSIZE=1을 요청하고, 실제로 협상된 포맷/해상도/fps를 `negotiated`에 기록한다.
+    decode_on_demand=True이면 카메라의 JPEG 원본을 그대로 받아 두고(read_frame),
+    픽셀이 필요할 때만 decode()한다.
+    """
+
+    def __init__(
+        self,
+        index: int | Iterable[int] | None = None,
+        size: Optional[Tuple[int, int]] = None,
+        fps: int = 30,
+        rotate_180: bool = True,
+        rotate_90_ccw: bool = False,
+        rotate_90_cw: bool = False,
+        *,
+        fourcc: Optional[str] = "MJPG",
+        buffer_size: int = 1,
+        warp_size: int = 400,
+        board_fraction: float = DEFAULT_BOARD_FRACTION,
+        decode_on_demand: bool = False,
+    ):
+        """
+        index가 None이면 0~5 범위를 순회하며 첫 번째로 열리는 장치를 사용한다.
+        index에 정수 대신 반복가능 객체를 주면 해당 후보들을 순차적으로 시도한다.
+        size가 None이면 warp_size/board_fraction을 만족하는 가장 작은 해상도를 고른다.
+        """
+        if index is None:
+            candidates: Iterable[int] = range(0, 6)
+        elif isinstance(index, Iterable) and not isinstance(index, (str, bytes)):
+            candidates = index
+        else:
+            candidates = (index,)
+
+        candidates = list(candidates)
+        self._cap = None
+        self.index = None
+        self._rotate_180 = rotate_180
+        self._rotate_90_ccw = rotate_90_ccw
+        self._rotate_90_cw = rotate_90_cw
+        self.decode_on_demand = decode_on_demand
+        self.negotiated: Dict[str, Any] = {}
+        self._last_read_at: Optional[float] = None
+        self._fps_ema: Optional[float] = None
+
+        for idx in candidates:
+            cap = cv2.VideoCapture(idx, cv2.CAP_V4L2)
+            if cap is not None and cap.isOpened():
+                self._cap = cap
+                self.index = idx
+                break
+            cap.release()
+
+        if self._cap is None or self.index is None:
+            raise RuntimeError(f"[USBCapture] 사용 가능한 카메라를 찾을 수 없습니다. 후보: {candidates}")
+
+        if size is None:
+            size = select_capture_size(warp_size, board_fraction)
+
+        try:
+            # V4L2는 FOURCC를 해상도보다 먼저 설정해야 MJPG 모드로 협상된다
+            if fourcc:
+                self._cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+            self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+            self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+            self._cap.set(cv2.CAP_PROP_FPS, fps)
+            # 드라이버 큐에 쌓인 오래된 프레임 대신 항상 최신 프레임을 받도록
+            self._cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+            if decode_on_demand:
+                self._cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        except Exception as e:
+            print(f"[USBCapture] 카메라 속성 설정 실패: {e}")
+
+        self.negotiated = {
+            "fourcc": _fourcc_to_str(self._cap.get(cv2.CAP_PROP_FOURCC)),
+            "size": (int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))),
+            "fps": float(self._cap.get(cv2.CAP_PROP_FPS)),
+            "buffer_size": int(self._cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+        }
+        if fourcc and self.negotiated["fourcc"] != fourcc and self.decode_on_demand:
+            print(f"[USBCapture] {fourcc} 협상 실패({self.negotiated['fourcc']}) - 즉시 디코딩 모드로 동작")
+            self.decode_on_demand = False
+            self._cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+        n = self.negotiated
+        print(
+            f"[USBCapture] /dev/video{self.index} 사용 중 "
+            f"(요청 {size[0]}x{size[1]} {fourcc or '-'}@{fps} → "
+            f"협상 {n['size'][0]}x{n['size'][1]} {n['fourcc']}@{n['fps']:.1f}fps, "
+            f"buffer={n['buffer_size']}, decode_on_demand={self.decode_on_demand})"
+        )
+
+    @property
+    def jpeg_rotation(self) -> int:
+        """카메라 JPEG 원본을 화면 방향으로 보여주려면 필요한 시계방향 회전 각도."""
+        deg = 180 if self._rotate_180 else 0
+        if self._rotate_90_ccw:
+            deg += 270
+        elif self._rotate_90_cw:
+            deg += 90
+        return deg % 360
+
+    @property
+    def measured_fps(self) -> Optional[float]:
+        """read() 간격으로 측정한 실제 fps (EMA)."""
+        return self._fps_ema
+
+    def describe(self) -> Dict[str, Any]:
+        info = dict(self.negotiated)
+        info["index"] = self.index
+        info["measured_fps"] = None if self._fps_ema is None else round(self._fps_ema, 1)
+        info["decode_on_demand"] = self.decode_on_demand
+        return info
+
+    def _mark_read(self) -> None:
+        now = time.perf_counter()
+        if self._last_read_at is not None:
+            dt = now - self._last_read_at
+            if dt > 0:
+                inst = 1.0 / dt
+                self._fps_ema = inst if self._fps_ema is None else 0.9 * self._fps_ema + 0.1 * inst
+        self._last_read_at = now
+
+    def _orient(self, frame: np.ndarray) -> np.ndarray:
+        # 카메라가 180도 뒤집혀 있을 때 보정
+        if self._rotate_180:
+            frame = cv2.rotate(frame, cv2.ROTATE_180)
+        if self._rotate_90_ccw:
+            frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        elif self._rotate_90_cw:
+            frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+        return frame
+
+    def decode(self, jpeg: bytes) -> Optional[np.ndarray]:
+        """read_frame()이 돌려준 JPEG 원본을 회전 보정까지 적용한 BGR 이미지로 디코딩."""
+        frame = get_codec().decode(jpeg)
+        if frame is None:
+            return None
+        return self._orient(frame)
+
+    def read_frame(self) -> Tuple[bool, Optional[np.ndarray], Optional[bytes]]:
+        """(ret, image, jpeg). decode_on_demand 모드에서는 image=None, jpeg=카메라 원본."""
+        ret, buf = self._cap.read()
+        if not ret or buf is None:
+            print("[USBCapture] frame read 실패")
+            return False, None, None
+        self._mark_read()
+        if self.decode_on_demand:
+            if _is_encoded_jpeg(buf):
+                return True, None, buf.tobytes()
+            # 백엔드가 원본 JPEG을 주지 않으면 일반 모드로 전환
+            print("[USBCapture] 백엔드가 JPEG 원본을 제공하지 않아 즉시 디코딩 모드로 전환")
+            self.decode_on_demand = False
+            self._cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+            if buf.ndim != 3:
+                return False, None, None
+        return True, self._orient(buf), None
+
+    def read(self):
+        ret, image, jpeg = self.read_frame()
+        if not ret:
+            return False, None
+        if image is None:
+            image = self.decode(jpeg)
+            if image is None:
+                return False, None
+        return True, image
+
+    def release(self):
+        if self._cap is not None:
+            try:
+                self._cap.release()
+            except Exception:
+                pass
+
+
+class Picamera2Source:
+    """Picamera2 캡처 (RGB888 → BGR).
+
+    rotate_portrait=True면 세로로 들어온 프레임을 시계방향으로 돌려 가로로 맞춘다.
+    controls를 주면 시작 직후 set_controls로 적용한다 (예: 수동 노출 {"AeEnable": False, "ExposureTime": ...}).
+    """
+
+    def __init__(
+        self,
+        size: Tuple[int, int] = (1280, 720),
+        fps: int = 30,
+        hflip: bool = False,
+        vflip: bool = False,
+        *,
+        rotate_portrait: bool = True,
+        warmup_sec: float = 0.7,
+        controls: Optional[Dict[str, Any]] = None,
+    ):
+        from picamera2 import Picamera2
+
+        self.hflip = hflip
+        self.vflip = vflip
+        self.rotate_portrait = rotate_portrait
+        self.picam2 = Picamera2()
+        cfg = self.picam2.create_preview_configuration(
+            main={"size": size, "format": "RGB888"},
+            controls={"FrameRate": fps},
+        )
+        self.picam2.configure(cfg)
+        self.picam2.start()
+        if controls:
+            self.picam2.set_controls(dict(controls))
+        if warmup_sec > 0:
+            time.sleep(warmup_sec)
+
+    def read(self):
+        try:
+            rgb = self.picam2.capture_array()
+        except Exception as e:
+            print(f"[Picamera2Source] 프레임 읽기 실패: {e}")
+            return False, None
+        bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+        if self.rotate_portrait and bgr.shape[0] > bgr.shape[1]:
+            bgr = cv2.rotate(bgr, cv2.ROTATE_90_CLOCKWISE)
+        if self.hflip:
+            bgr = cv2.flip(bgr, 1)
+        if self.vflip:
+            bgr = cv2.flip(bgr, 0)
+        return True, bgr
+
+    def release(self):
+        try:
+            self.picam2.stop()
+        except Exception:
+            pass
+
+
+class _ReplayClock:
+    """소스 타임스탬프(초)를 벽시계에 맞춰 재생. realtime=False면 기다리지 않는다."""
+
+    def __init__(self, realtime: bool = True, speed: float = 1.0):
+        self.realtime = realtime
+        self.speed = speed if speed > 0 else 1.0
+        self._origin: Optional[Tuple[float, float]] = None
+
+    def reset(self) -> None:
+        self._origin = None
+
+    def wait(self, ts: float) -> None:
+        if not self.realtime:
+            return
+        now = time.monotonic()
+        if self._origin is None:
+            self._origin = (now, ts)
+            return
+        wall0, ts0 = self._origin
+        delay = wall0 + (ts - ts0) / self.speed - now
+        if delay > 0:
+            time.sleep(delay)
+        elif delay < -1.0:
+            # 소비가 크게 밀렸으면 (디버거 정지 등) 기준점을 다시 잡아 한꺼번에 몰아내지 않는다
+            self._origin = (now, ts)
+
+
+class _ReplaySource:
+    """재생 소스 공통 부분 (timestamp/finished/loop 처리)."""
+
+    def __init__(self, realtime: bool = True, loop: bool = False, speed: float = 1.0):
+        self.loop = loop
+        self.clock = _ReplayClock(realtime, speed)
+        self.timestamp: Optional[float] = None  # 마지막으로 내보낸 프레임의 소스 시각 (초)
+        self.frames_read = 0
+        self.finished = False
+
+    def _next(self) -> Optional[Tuple[float, np.ndarray]]:
+        raise NotImplementedError
+
+    def _rewind(self) -> bool:
+        return False
+
+    def read(self):
+        if self.finished:
+            return False, None
+        item = self._next()
+        if item is None and self.loop and self._rewind():
+            self.clock.reset()
+            item = self._next()
+        if item is None:
+            self.finished = True
+            return False, None
+        ts, image = item
+        self.clock.wait(ts)
+        self.timestamp = ts
+        self.frames_read += 1
+        return True, image
+
+    def release(self):
+        pass
+
+
+class VideoFileSource(_ReplaySource):
+    """녹화된 영상 파일 재생 (타임스탬프는 컨테이너의 재생 위치)."""
+
+    def __init__(self, path: str | os.PathLike, realtime: bool = True, loop: bool = False, speed: float = 1.0):
+        super().__init__(realtime, loop, speed)
+        self.path = str(path)
+        self._cap = cv2.VideoCapture(self.path)
+        if not self._cap.isOpened():
+            raise RuntimeError(f"[VideoFileSource] 영상을 열 수 없습니다: {self.path}")
+        fps = self._cap.get(cv2.CAP_PROP_FPS)
+        self._fps = fps if fps and fps > 0 else 30.0
+        self._index = 0
+
+    def _next(self):
+        ret, image = self._cap.read()
+        if not ret or image is None:
+            return None
+        pos_ms = self._cap.get(cv2.CAP_PROP_POS_MSEC)
+        ts = pos_ms / 1000.0 if pos_ms and pos_ms > 0 else self._index / self._fps
+        self._index += 1
+        return ts, image
+
+    def _rewind(self) -> bool:
+        self._index = 0
+        return bool(self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0))
+
+    def release(self):
+        self._cap.release()
+
+
+class FrameDirSource(_ReplaySource):
+    """프레임 이미지 디렉터리 재생.
+
+    timestamps.csv(파일명,시각)가 있으면 그 시각대로, 없으면 파일명 순서로 fps 간격으로 재생한다.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        realtime: bool = True,
+        loop: bool = False,
+        speed: float = 1.0,
+        fps: float = 30.0,
+    ):
+        super().__init__(realtime, loop, speed)
+        self.path = Path(path)
+        if not self.path.is_dir():
+            raise RuntimeError(f"[FrameDirSource] 디렉터리가 없습니다: {self.path}")
+        self._items = self._load_index(fps)
+        if not self._items:
+            raise RuntimeError(f"[FrameDirSource] 프레임 이미지가 없습니다: {self.path}")
+        self._pos = 0
+
+    def _load_index(self, fps: float) -> List[Tuple[float, Path]]:
+        index_path = self.path / TIMESTAMPS_FILE
+        if index_path.exists():
+            items = []
+            with open(index_path, newline="") as f:
+                for row in csv.reader(f):
+                    if len(row) < 2 or row[0] == "filename":
+                        continue
+                    items.append((float(row[1]), self.path / row[0]))
+            return items
+        files = sorted(p for p in self.path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        return [(i / fps, p) for i, p in enumerate(files)]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _next(self):
+        while self._pos < len(self._items):
+            ts, file_path = self._items[self._pos]
+            self._pos += 1
+            image = cv2.imread(str(file_path), cv2.IMREAD_COLOR)
+            if image is not None:
+                return ts, image
+            print(f"[FrameDirSource] 이미지 읽기 실패, 건너뜀: {file_path.name}")
+        return None
+
+    def _rewind(self) -> bool:
+        self._pos = 0
+        return True
+
+
+# 가상 체스판 색 (BGR)
+_LIGHT_SQUARE = (181, 217, 240)
+_DARK_SQUARE = (99, 136, 181)
+_WHITE_PIECE = (235, 235, 235)
+_BLACK_PIECE = (35, 35, 35)
+_MARKER_GREEN = (60, 200, 60)
+_TABLE = (70, 80, 90)
+
+
+def _board_grid(board: Any) -> List[List[str]]:
+    """chess.Board / FEN 문자열 / 8x8 기물 배열("WP", "BK", "" ...)을 8x8 배열로 (0행 = 8랭크)."""
+    if isinstance(board, (list, tuple)):
+        return [list(row) for row in board]
+    import chess
+
+    if isinstance(board, str):
+        board = chess.Board(board)
+    grid = [["" for _ in range(8)] for _ in range(8)]
+    for square, piece in board.piece_map().items():
+        row = 7 - chess.square_rank(square)
+        col = chess.square_file(square)
+        grid[row][col] = ("W" if piece.color == chess.WHITE else "B") + piece.symbol().upper()
+    return grid
+
+
+def _default_grid() -> List[List[str]]:
+    back = ["R", "N", "B", "Q", "K", "B", "N", "R"]
+    return (
+        [["B" + p for p in back], ["BP"] * 8]
+        + [[""] * 8 for _ in range(4)]
+        + [["WP"] * 8, ["W" + p for p in back]]
+    )
+
+
+class SyntheticBoardSource(_ReplaySource):
+    """지정한 국면을 그린 가상 체스판을 원근 변환해서 카메라 프레임처럼 내보낸다.
+
+    기물은 칸 중앙의 원(흰/검)과 기물 글자로 그리고, 네 귀퉁이에 초록 마커를 둔다.
+    corners(좌상, 우상, 우하, 좌하)는 프레임 안의 보드 꼭짓점이라 cv_manager 수동 코너로 그대로 쓸 수 있다.
+    noise_sigma > 0이면 seed로 고정된 가우시안 노이즈를 더해 결과가 실행마다 같다.
+    """
+
+    def __init__(
+        self,
+        board: Any = None,
+        frame_size: Tuple[int, int] = (640, 480),
+        corners: Optional[Sequence[Tuple[float, float]]] = None,
+        fps: float = 30.0,
+        realtime: bool = True,
+        noise_sigma: float = 2.0,
+        seed: int = 0,
+        max_frames: Optional[int] = None,
+        board_px: int = 400,
+    ):
+        super().__init__(realtime, loop=False)
+        w, h = frame_size
+        self.frame_size = (w, h)
+        self.fps = fps
+        self.noise_sigma = noise_sigma
+        self.max_frames = max_frames
+        self.board_px = board_px
+        self._rng = np.random.default_rng(seed)
+        if corners is None:
+            # 화면 가운데에 살짝 사다리꼴로 놓인 보드 (위쪽이 조금 좁게)
+            side = 0.8 * min(w, h)
+            cx, cy = w / 2.0, h / 2.0
+            top, bottom = side * 0.46, side * 0.5
+            corners = [
+                (cx - top, cy - side / 2), (cx + top, cy - side / 2),
+                (cx + bottom, cy + side / 2), (cx - bottom, cy + side / 2),
+            ]
+        self.corners = np.asarray(corners, dtype=np.float32).reshape(4, 2)
+        self._index = 0
+        self._frame: Optional[np.ndarray] = None
+        self.set_board(board if board is not None else _default_grid())
+
+    def set_board(self, board: Any) -> None:
+        """보여줄 국면 변경 (다음 read()부터 반영)."""
+        self.grid = _board_grid(board)
+        self._frame = self._render()
+
+    def _render_topdown(self) -> np.ndarray:
+        n = self.board_px
+        cell = n // 8
+        img = np.empty((cell * 8, cell * 8, 3), np.uint8)
+        for r in range(8):
+            for c in range(8):
+                color = _LIGHT_SQUARE if (r + c) % 2 == 0 else _DARK_SQUARE
+                img[r * cell:(r + 1) * cell, c * cell:(c + 1) * cell] = color
+                piece = self.grid[r][c]
+                if not piece:
+                    continue
+                center = (c * cell + cell // 2, r * cell + cell // 2)
+                white = piece[0] == "W"
+                fill, ink = (_WHITE_PIECE, _BLACK_PIECE) if white else (_BLACK_PIECE, _WHITE_PIECE)
+                cv2.circle(img, center, int(cell * 0.36), fill, -1, cv2.LINE_AA)
+                cv2.circle(img, center, int(cell * 0.36), ink, 1, cv2.LINE_AA)
+                label = piece[1:]
+                (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, cell / 80.0, 1)
+                cv2.putText(img, label, (center[0] - tw // 2, center[1] + th // 2),
+                            cv2.FONT_HERSHEY_SIMPLEX, cell / 80.0, ink, 1, cv2.LINE_AA)
+        return img
+
+    def _render(self) -> np.ndarray:
+        top = self._render_topdown()
+        n = top.shape[0]
+        w, h = self.frame_size
+        src = np.float32([[0, 0], [n, 0], [n, n], [0, n]])
+        M = cv2.getPerspectiveTransform(src, self.corners)
+        frame = cv2.warpPerspective(top, M, (w, h), borderMode=cv2.BORDER_CONSTANT, borderValue=_TABLE)
+        radius = max(4, int(0.02 * min(w, h)))
+        for x, y in self.corners:
+            cv2.circle(frame, (int(round(x)), int(round(y))), radius, _MARKER_GREEN, -1, cv2.LINE_AA)
+        return frame
+
+    def _next(self):
+        if self.max_frames is not None and self._index >= self.max_frames:
+            return None
+        ts = self._index / self.fps if self.fps > 0 else 0.0
+        self._index += 1
+        frame = self._frame
+        if self.noise_sigma > 0:
+            noise = self._rng.normal(0.0, self.noise_sigma, frame.shape)
+            frame = np.clip(frame.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+        else:
+            frame = frame.copy()
+        return ts, frame
+
+
+class FrameRecorder:
+    """프레임을 JPEG + timestamps.csv로 녹화 (FrameDirSource로 재생 가능)."""
+
+    def __init__(self, path: str | os.PathLike, quality: int = 90):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.quality = quality
+        self.count = 0
+        self._t0: Optional[float] = None
+        self._index = open(self.path / TIMESTAMPS_FILE, "w", newline="")
+        self._writer = csv.writer(self._index)
+        self._writer.writerow(["filename", "timestamp"])
+
+    def write(self, image: np.ndarray, timestamp: Optional[float] = None) -> None:
+        """image를 저장. timestamp(초, 기본은 현재 시각)는 첫 프레임 기준 상대 시각으로 기록."""
+        ts = time.time() if timestamp is None else timestamp
+        if self._t0 is None:
+            self._t0 = ts
+        name = f"frame_{self.count:06d}.jpg"
+        with open(self.path / name, "wb") as f:
+            f.write(get_codec().encode(image, self.quality, "444"))
+        self._writer.writerow([name, f"{ts - self._t0:.6f}"])
+        self.count += 1
+
+    def record(self, hub, seconds: float) -> int:
+        """FrameHub의 새 프레임을 seconds 동안 녹화하고 녹화한 장수를 반환."""
+        deadline = time.monotonic() + seconds
+        for frame in hub.iter_frames(timeout=1.0):
+            image = frame.image
+            if image is not None:
+                self.write(image, frame.timestamp)
+            if time.monotonic() >= deadline:
+                break
+        self._index.flush()
+        return self.count
+
+    def close(self) -> None:
+        self._index.close()
+
+
+def open_capture(spec: Optional[str] = None, **kwargs: Any):
+    """문자열 설정으로 캡처 소스를 만든다 (spec이 None이면 CHESS_CAPTURE_SOURCE 환경 변수, 기본 "usb").
+
+    - "usb" / "usb:1": USBCapture (기본: rotate_180=True, decode_on_demand=True)
+    - "picam": Picamera2Source
+    - "video:<경로>" / "dir:<경로>" / 경로만: 영상 파일 또는 프레임 디렉터리 재생
+    - "synthetic" / "synthetic:<FEN>": 가상 체스판
+    kwargs는 해당 소스 생성자에 그대로 전달한다 (예: realtime=False, loop=True).
+    """
+    if spec is None:
+        spec = os.environ.get(CAPTURE_SOURCE_ENV) or "usb"
+    kind, _, arg = spec.partition(":")
+    kind = kind.strip().lower()
+
+    if kind in ("usb", "v4l2"):
+        options: Dict[str, Any] = {"rotate_180": True, "decode_on_demand": True}
+        options.update(kwargs)
+        if arg:
+            options["index"] = int(arg)
+        return USBCapture(**options)
+    if kind in ("picam", "picamera2"):
+        return Picamera2Source(**kwargs)
+    if kind == "synthetic":
+        if arg:
+            kwargs.setdefault("board", arg)
+        return SyntheticBoardSource(**kwargs)
+    if kind == "video":
+        return VideoFileSource(arg, **kwargs)
+    if kind == "dir":
+        return FrameDirSource(arg, **kwargs)
+
+    path = Path(spec)
+    if path.is_dir():
+        return FrameDirSource(path, **kwargs)
+    if path.exists():
+        return VideoFileSource(path, **kwargs)
+    raise ValueError(f"알 수 없는 캡처 소스: {spec!r}")
+
+
+def describe_source(cap) -> str:
+    """로그용 캡처 소스 설명."""
+    index = getattr(cap, "index", None)
+    if index is not None:
+        return f"/dev/video{index}"
+    path = getattr(cap, "path", None)
+    name = type(cap).__name__
+    return f"{name}({path})" if path is not None else name
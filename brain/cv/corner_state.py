@@ -0,0 +1,272 @@
+"""보드 코너 상태 서비스.
+
+코너는 지금까지 쓰는 곳마다 따로 들고 있었다 (cv_manager 수동 코너 전역, 보정 프로필,
+스트림 제너레이터마다 CornerStabilizer + _last_good_corners/_hold_counter). 스트림마다
+같은 프레임에서 검출을 다시 돌리고 안정화도 처음부터 다시 수렴해서, 화면마다 보드 위치가 조금씩 달랐다.
+
+CornerStateService는 프로세스 안에서 코너를 한 곳에만 둔다.
+
+- publish(): 수동 지정/보정 프로필이 코너를 정한다 (고정, 자동 추적보다 우선)
+- observe(frame, seq): 고정 코너가 없을 때 CornerTracker로 프레임 하나를 처리한다.
+  같은 seq는 한 번만 검출하고, 놓친 프레임은 마지막 코너를 hold_frames까지 신뢰도를 낮춰 유지.
+  신뢰도는 추적기의 confidence (원시/안정화 코너 차이와 가림 상태)
+- tracker_factory / set_tracker_factory(): 다른 검출기를 쓰는 앱(레거시 CV/mjpg)은 update(frame) /
+  reset() / confidence가 있는 추적기를 만드는 함수를 넘긴다 (기본: 초록 마커 CornerTracker)
+- 코너가 MIN_CHANGE_PX 이상 바뀔 때만 version이 올라간다 (EMA 떨림으로 호모그래피/샘플러 캐시가
+  매 프레임 무효화되지 않도록)
+- subscribe(callback): 새 추정값(CornerEstimate)이 나올 때마다 호출 (cv_manager가 event_bus로 중계)
+- start(hub): 고정 코너가 없는 동안 허브 최신 프레임을 추적하는 스레드 (peek만 써서 캡처 속도는 그대로)
+
+사용 예::
+
+    service = get_corner_service()
+    service.publish(corners, source=SOURCE_CALIBRATION)
+    est = service.latest()        # est.corners, est.version, est.confidence
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+SOURCE_NONE = "none"
+SOURCE_MANUAL = "manual"
+SOURCE_CALIBRATION = "calibration"
+SOURCE_TRACKER = "tracker"
+
+HOLD_LAST_FRAMES = 20           # 추적이 끊긴 뒤 마지막 코너를 유지하는 프레임 수
+HOLD_DECAY = 0.9                # 유지 프레임마다 곱하는 신뢰도
+MIN_CHANGE_PX = 0.5             # 이보다 작게 움직인 추적 결과는 새 버전으로 내보내지 않는다
+TRACK_INTERVAL_SEC = 0.05
+
+
+@dataclass(frozen=True)
+class CornerEstimate:
+    """버전이 붙은 코너 추정값. corners는 읽기 전용 (4, 2) float32 (TL, TR, BR, BL) 또는 None."""
+
+    corners: Optional[np.ndarray]
+    version: int
+    confidence: float
+    source: str = SOURCE_NONE
+    seq: int = 0
+    timestamp: float = field(default_factory=time.time)
+    held: int = 0
+
+    @property
+    def valid(self) -> bool:
+        return self.corners is not None
+
+    @property
+    def pinned(self) -> bool:
+        return self.source in (SOURCE_MANUAL, SOURCE_CALIBRATION)
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            "points": None if self.corners is None else self.corners.tolist(),
+            "version": self.version,
+            "confidence": round(self.confidence, 3),
+            "source": self.source,
+            "seq": self.seq,
+            "held": self.held,
+        }
+
+
+def _frozen(corners) -> np.ndarray:
+    arr = np.array(corners, dtype=np.float32).reshape(4, 2)
+    arr.setflags(write=False)
+    return arr
+
+
+class CornerStateService:
+    """프로세스 공용 코너 상태 (스레드 안전)."""
+
+    def __init__(self, tracker_factory: Optional[Callable[[], object]] = None, hold_frames: int = HOLD_LAST_FRAMES):
+        self._tracker_factory = tracker_factory
+        self._tracker = None
+        self.hold_frames = hold_frames
+        self._estimate = CornerEstimate(None, 0, 0.0)
+        self._cond = threading.Condition()
+        self._subscribers: List[Callable[[CornerEstimate], None]] = []
+        self._observed_seq = -1
+        self._held = 0
+        self.stats: Dict[str, int] = {"observed": 0, "detected": 0, "held_frames": 0, "lost": 0, "published": 0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # 조회 / 구독
+    # ------------------------------------------------------------------
+    def latest(self) -> CornerEstimate:
+        return self._estimate
+
+    @property
+    def version(self) -> int:
+        return self._estimate.version
+
+    def corners(self, copy: bool = True) -> Optional[np.ndarray]:
+        corners = self._estimate.corners
+        if corners is None:
+            return None
+        return corners.copy() if copy else corners
+
+    def subscribe(self, callback: Callable[[CornerEstimate], None]) -> Callable[[], None]:
+        """새 추정값마다 callback(estimate)를 부른다. 반환값을 호출하면 구독 해제."""
+        with self._cond:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._cond:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def wait_newer(self, version: int, timeout: Optional[float] = None) -> Optional[CornerEstimate]:
+        """version보다 새 추정값이 나올 때까지 기다린다 (시간 초과 시 None)."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._estimate.version > version, timeout):
+                return None
+            return self._estimate
+
+    # ------------------------------------------------------------------
+    # 갱신
+    # ------------------------------------------------------------------
+    def _set(self, corners, confidence: float, source: str, seq: int = 0, held: int = 0, bump: bool = True) -> CornerEstimate:
+        with self._cond:
+            prev = self._estimate
+            version = prev.version + 1 if bump else prev.version
+            est = CornerEstimate(
+                None if corners is None else _frozen(corners),
+                version, float(confidence), source if corners is not None else SOURCE_NONE, seq, time.time(), held,
+            )
+            self._estimate = est
+            subscribers = list(self._subscribers) if bump else []
+            if bump:
+                self.stats["published"] += 1
+                self._cond.notify_all()
+        for callback in subscribers:
+            try:
+                callback(est)
+            except Exception as e:
+                print(f"[corners] 구독자 오류: {e}")
+        return est
+
+    def publish(self, corners, confidence: float = 1.0, source: str = SOURCE_MANUAL) -> CornerEstimate:
+        """수동 지정/보정 코너를 고정 코너로 내보낸다. 추적 이력은 버린다."""
+        self._reset_tracking()
+        return self._set(corners, confidence, source)
+
+    def clear(self) -> CornerEstimate:
+        """코너를 지운다 (이후 observe()가 자동 추적을 다시 시작)."""
+        self._reset_tracking()
+        return self._set(None, 0.0, SOURCE_NONE)
+
+    def _reset_tracking(self) -> None:
+        tracker = self._tracker
+        if tracker is not None:
+            tracker.reset()
+        self._held = 0
+
+    def set_tracker_factory(self, tracker_factory: Optional[Callable[[], object]]) -> None:
+        """자동 추적기를 만드는 함수를 바꾼다 (같은 함수면 그대로, 바꾸면 추적 이력을 버린다)."""
+        with self._cond:
+            if tracker_factory is self._tracker_factory:
+                return
+            self._tracker_factory = tracker_factory
+            self._tracker = None
+            self._held = 0
+
+    def _get_tracker(self):
+        if self._tracker is None:
+            if self._tracker_factory is None:
+                from cv.corner_tracker import CornerTracker
+                from cv.marker_validator import TRACKER_AREA_FRACTION, MarkerValidator
+
+                self._tracker = CornerTracker(validator=MarkerValidator(area_fraction=TRACKER_AREA_FRACTION))
+            else:
+                self._tracker = self._tracker_factory()
+        return self._tracker
+
+    def observe(self, frame: Optional[np.ndarray], seq: int) -> CornerEstimate:
+        """프레임 하나로 자동 추적 코너를 갱신한다. 고정 코너가 있거나 이미 본 seq면 그대로 반환."""
+        est = self._estimate
+        if frame is None or est.pinned:
+            return est
+        with self._cond:
+            if seq <= self._observed_seq:
+                return self._estimate
+            self._observed_seq = seq
+        self.stats["observed"] += 1
+        stable = self._get_tracker().update(frame)
+        est = self._estimate
+        if est.pinned:   # 추적하는 동안 고정 코너가 들어왔으면 버린다
+            return est
+        if stable is not None:
+            self._held = 0
+            self.stats["detected"] += 1
+            moved = est.corners is None or float(np.abs(stable - est.corners).max()) >= MIN_CHANGE_PX
+            confidence = float(getattr(self._tracker, "confidence", 1.0))
+            return self._set(stable if moved else est.corners, confidence, SOURCE_TRACKER, seq, bump=moved)
+        if est.corners is not None and self._held < self.hold_frames:
+            self._held += 1
+            self.stats["held_frames"] += 1
+            return self._set(est.corners, est.confidence * HOLD_DECAY, SOURCE_TRACKER, seq, self._held, bump=False)
+        if est.corners is not None:
+            self.stats["lost"] += 1
+            return self._set(None, 0.0, SOURCE_NONE, seq)
+        return est
+
+    # ------------------------------------------------------------------
+    # 허브 추적 스레드
+    # ------------------------------------------------------------------
+    def start(self, hub, interval: float = TRACK_INTERVAL_SEC) -> "CornerStateService":
+        """고정 코너가 없는 동안 hub 최신 프레임을 추적하는 스레드를 띄운다."""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(hub, interval), daemon=True, name="corner-state")
+        self._thread.start()
+        print("[corners] 자동 코너 추적 시작")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _run(self, hub, interval: float) -> None:
+        while not self._stop.wait(interval):
+            if self._estimate.pinned:
+                continue
+            frame = hub.peek()
+            if frame is None or frame.seq <= self._observed_seq:
+                continue
+            try:
+                self.observe(frame.image, frame.seq)
+            except Exception as e:
+                print(f"[corners] 코너 추적 오류: {e}")
+
+    def describe(self) -> Dict[str, object]:
+        info = self._estimate.describe()
+        info.update(self.stats)
+        info["tracking"] = self._thread is not None and self._thread.is_alive()
+        return info
+
+
+_service: Optional[CornerStateService] = None
+_service_lock = threading.Lock()
+
+
+def get_corner_service() -> CornerStateService:
+    """프로세스 공용 CornerStateService."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = CornerStateService()
+    return _service
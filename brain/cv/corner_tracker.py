@@ -0,0 +1,218 @@
+"""초록 코너 마커 추적기.
+
+find_green_corners는 매 프레임 전체 화면을 HSV로 바꾸고 findContours를 돌린다 (1280x720이면 92만 픽셀).
+CornerTracker는 한 번 네 코너를 잡으면(lock) 다음 프레임부터 직전 코너 주변의 작은 창(기본 96x96)
+네 개만 검사한다. 창에서 마커를 못 찾거나 사각형 검사에 실패하면 그때만 전체 화면 검출로 돌아간다.
+
+- 마커 하나가 손에 가려진 프레임은 나머지 세 코너의 이동량으로 그 코너를 추정하고 (max_occluded 프레임까지),
+  둘 이상 사라지면 lock을 잃는다.
+- 결과는 기존처럼 CornerStabilizer(중앙값 + EMA)로 안정화한다 (stabilizer=None이면 원시 코너).
+- confidence: 마지막 update()의 신뢰도 (원시 코너와 안정화 코너의 차이, 가려진 코너 추정 여부로 계산).
+- validator(cv.marker_validator.MarkerValidator)를 주면 검출/추적한 코너가 check()를 통과할 때만 받아들인다.
+- hsv_range=(lower, upper)로 창 검색 HSV 범위를 바꿀 수 있다 (기본: picam_stable 초록 범위).
+  detector와 같은 범위를 써야 전체 검출과 창 검출이 같은 마커를 본다.
+
+사용 예::
+
+    tracker = CornerTracker()
+    for frame in frames:
+        corners = tracker.update(frame)      # 안정화된 (4, 2) 코너 또는 None
+    tracker.stats                            # 전체 검출/창 검출 횟수
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from cv import picam_stable
+from cv.buffer_pool import get_pool
+from cv.picam_stable import CornerStabilizer, find_green_corners, is_valid_quad, sort_corners_by_position
+
+Detector = Callable[[np.ndarray], Optional[np.ndarray]]
+
+DEFAULT_WINDOW = 48          # 창 반지름 (픽셀)
+MIN_MARKER_AREA = 60         # 창 안 마커 윤곽 최소 면적 (창 경계에 잘린 마커도 잡도록 전체 검출보다 작게)
+MAX_OCCLUDED_FRAMES = 5
+OCCLUDED_CONFIDENCE = 0.5    # 코너 하나를 추정으로 채운 프레임에 곱하는 신뢰도
+RESIDUAL_SCALE_PX = 2.0      # 원시 코너가 안정화 코너에서 이만큼 떨어지면 신뢰도 절반
+
+
+def corner_confidence(raw, stable, occluded: bool = False) -> float:
+    """코너 추정 신뢰도 (0~1).
+
+    이번 프레임 원시 코너와 안정화(EMA) 코너의 최대 거리가 클수록 낮다 (보드가 움직이는 중이거나
+    검출이 흔들리면 EMA가 뒤처진다). occluded면 OCCLUDED_CONFIDENCE를 곱하고, 코너가 없으면 0.
+    """
+    if raw is None or stable is None:
+        return 0.0
+    diff = np.asarray(raw, dtype=np.float32).reshape(4, 2) - np.asarray(stable, dtype=np.float32).reshape(4, 2)
+    confidence = 1.0 / (1.0 + float(np.linalg.norm(diff, axis=1).max()) / RESIDUAL_SCALE_PX)
+    return confidence * OCCLUDED_CONFIDENCE if occluded else confidence
+
+
+def find_markers_in_windows(frame: np.ndarray, centers, radius: int, hsv_lower, hsv_upper):
+    """각 center 주변 창에서 가장 큰 마커 윤곽의 중심 (프레임 좌표, 없으면 None) 목록.
+
+    창들을 1픽셀 간격을 두고 가로로 이어 붙인 작은 타일 이미지 하나로 HSV 변환/inRange/findContours를
+    한 번씩만 호출한다 (창마다 호출하면 작은 이미지의 호출 오버헤드가 픽셀 비용보다 크다).
+    """
+    h, w = frame.shape[:2]
+    side = 2 * radius
+    stride = side + 1
+    pool = get_pool()
+    shape = (side, stride * len(centers), 3)
+    with pool.borrow(shape, frame.dtype) as tiles, pool.borrow(shape, frame.dtype) as hsv, \
+            pool.borrow(shape[:2]) as mask:
+        tiles.fill(0)
+        origins = []
+        for k, (x, y) in enumerate(centers):
+            x0, y0 = int(round(x)) - radius, int(round(y)) - radius
+            fx0, fy0 = max(0, x0), max(0, y0)
+            fx1, fy1 = min(w, x0 + side), min(h, y0 + side)
+            origins.append((x0 - k * stride, y0))
+            if fx1 > fx0 and fy1 > fy0:
+                tx, ty = k * stride + fx0 - x0, fy0 - y0
+                tiles[ty:ty + fy1 - fy0, tx:tx + fx1 - fx0] = frame[fy0:fy1, fx0:fx1]
+        hsv = cv2.cvtColor(tiles, cv2.COLOR_BGR2HSV, dst=hsv)
+        mask = cv2.inRange(hsv, hsv_lower, hsv_upper, dst=mask)
+        mask[:, side::stride] = 0
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    found = [None] * len(centers)
+    best_area = [MIN_MARKER_AREA] * len(centers)
+    for c in contours:
+        area = cv2.contourArea(c)
+        M = cv2.moments(c)
+        if M["m00"] == 0:
+            continue
+        tx, ty = M["m10"] / M["m00"], M["m01"] / M["m00"]
+        k = min(len(centers) - 1, int(tx // stride))
+        if area < best_area[k]:
+            continue
+        best_area[k] = area
+        found[k] = (tx + origins[k][0], ty + origins[k][1])
+    return found
+
+
+class CornerTracker:
+    """lock 상태에서는 직전 코너 주변 창만 검사하는 코너 추적기 (스레드 안전)."""
+
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        detector: Detector = find_green_corners,
+        stabilizer: Optional[CornerStabilizer] = None,
+        stabilize: bool = True,
+        max_occluded: int = MAX_OCCLUDED_FRAMES,
+        max_jump: Optional[float] = None,
+        validator=None,
+        hsv_range: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ):
+        self.window = window
+        self.detector = detector
+        self.stabilizer = stabilizer if stabilizer is not None else (CornerStabilizer() if stabilize else None)
+        self.max_occluded = max_occluded
+        # 한 프레임에 창 반지름 이상 움직인 코너는 창 검출로 믿지 않는다
+        self.max_jump = float(window) if max_jump is None else max_jump
+        self.validator = validator
+        self.hsv_range = hsv_range
+        self._corners: Optional[np.ndarray] = None   # 마지막으로 추적된 원시 코너 (TL, TR, BR, BL)
+        self._occluded_run = 0
+        self.confidence = 0.0
+        self.stats: Dict[str, int] = {"full": 0, "window": 0, "occluded": 0, "lost": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def locked(self) -> bool:
+        return self._corners is not None
+
+    @property
+    def raw_corners(self) -> Optional[np.ndarray]:
+        return None if self._corners is None else self._corners.copy()
+
+    def reset(self) -> None:
+        """lock과 안정화 이력을 버린다 (카메라/보드를 옮겼을 때)."""
+        with self._lock:
+            self._corners = None
+            self._occluded_run = 0
+            self.confidence = 0.0
+            if self.stabilizer is not None:
+                self.stabilizer = CornerStabilizer(
+                    hist_len=self.stabilizer.hist.maxlen, ema_alpha=self.stabilizer.alpha,
+                    max_jump=self.stabilizer.max_jump, need_good=self.stabilizer.need_good,
+                )
+
+    def _track(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        if self.hsv_range is not None:
+            lower, upper = self.hsv_range
+        else:
+            lower = np.array([picam_stable.Hmin, picam_stable.Smin, picam_stable.Vmin])
+            upper = np.array([picam_stable.Hmax, picam_stable.Smax, picam_stable.Vmax])
+        prev = self._corners
+        found = find_markers_in_windows(frame, prev, self.window, lower, upper)
+        missing = [i for i, p in enumerate(found) if p is None]
+        if len(missing) > 1:
+            return None
+        pts = prev.copy()
+        for i, p in enumerate(found):
+            if p is not None:
+                pts[i] = p
+        if missing:
+            if self._occluded_run >= self.max_occluded:
+                return None
+            # 가려진 코너는 보이는 세 코너의 평균 이동량만큼 옮긴다
+            seen = [i for i in range(4) if i not in missing]
+            pts[missing[0]] = prev[missing[0]] + (pts[seen] - prev[seen]).mean(axis=0)
+        if np.linalg.norm(pts - prev, axis=1).max() > self.max_jump:
+            return None
+        if not is_valid_quad(pts)[0]:
+            return None
+        self._occluded_run = self._occluded_run + 1 if missing else 0
+        self.stats["occluded" if missing else "window"] += 1
+        return pts
+
+    def detect(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """안정화 전 원시 코너 (lock이면 창 검출, 아니면 전체 검출)."""
+        if frame is None:
+            return None
+        with self._lock:
+            return self._detect_locked(frame)
+
+    def _accept(self, frame: np.ndarray, pts: np.ndarray) -> bool:
+        if self.validator is None or self.validator.check(frame, pts):
+            return True
+        self.stats["rejected"] += 1
+        return False
+
+    def _detect_locked(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        if self._corners is not None:
+            pts = self._track(frame)
+            # 가려진 코너가 있는 프레임은 추정한 코너 주변에 마커가 없으므로 검증기를 건너뛴다
+            if pts is not None and (self._occluded_run > 0 or self._accept(frame, pts)):
+                self._corners = pts
+                return pts
+            self._corners = None
+            self.stats["lost"] += 1
+        self.stats["full"] += 1
+        pts = self.detector(frame)
+        if pts is None:
+            return None
+        pts = sort_corners_by_position(np.asarray(pts, dtype=np.float32))
+        if not self._accept(frame, pts):
+            return None
+        self._corners = pts
+        self._occluded_run = 0
+        return pts
+
+    def update(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """프레임 하나를 처리하고 (안정화된) 코너를 반환."""
+        if frame is None:
+            return None
+        with self._lock:
+            pts = self._detect_locked(frame)
+            stable = pts if self.stabilizer is None else self.stabilizer.update(pts)
+            self.confidence = corner_confidence(pts, stable, self._occluded_run > 0)
+            return stable
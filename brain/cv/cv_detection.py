@@ -1,24 +1,44 @@
 from __future__ import annotations
 
 import pickle
+import time
+from contextlib import contextmanager
 from typing import Any, Optional
 
 import chess
 import numpy as np
 
-from game import game_state
+from game import event_bus, game_state
 from cv.cv_manager import (
     coord_to_chess_notation,
     process_turn_transition,
     save_initial_board_from_capture,
 )
 
-try:
-    from aicv.ml_piece_detector import ChessPieceMLDetector
-    ML_DETECTOR_AVAILABLE = True
-except ImportError:
-    ML_DETECTOR_AVAILABLE = False
-    ChessPieceMLDetector = None
+# ML 배치 추론 설정: 최근 K개 프레임을 한 번에 추론하고 softmax 평균
+ML_BATCH_FRAMES = 3
+ML_FRAME_INTERVAL_SEC = 0.1
+ML_TTA: bool | tuple[str, ...] = False
+ML_LOW_CONFIDENCE = 0.6
+# 다중 카메라: 두 카메라 모두 가린 칸이 있으면 잠깐 뒤 다시 캡처
+MULTI_CAMERA_RETRIES = 3
+MULTI_CAMERA_RETRY_SEC = 0.3
+
+
+@contextmanager
+def _capture_active(capture, reason: str):
+    """프레임 허브에 속도 조절기가 있으면 with 블록 동안 최대 캡처 속도를 유지.
+
+    유휴 속도로 찍힌 마지막 프레임은 오래됐을 수 있으므로, 블록에 들어가기 전에 활성 전환 후
+    새로 올라온 프레임을 한 장 기다린다.
+    """
+    governor = getattr(capture, "governor", None)
+    if governor is None:
+        yield
+        return
+    with governor.active(reason):
+        capture.wait_newer(capture.seq, capture.read_timeout)
+        yield
 
 
 def default_chess_pieces() -> list[list[str]]:
@@ -57,13 +77,14 @@ def detect_move_via_cv() -> Optional[chess.Move]:
         game_state.chess_pieces_state = load_chess_pieces()
 
     try:
-        result = process_turn_transition(
-            game_state.cv_capture_wrapper,
-            str(game_state.BOARD_VALUES_PATH),
-            str(game_state.CHESS_PIECES_PATH),
-            game_state.chess_pieces_state,
-            game_state.cv_turn_color,
-        )
+        with _capture_active(game_state.cv_capture_wrapper, "detect"):
+            result = process_turn_transition(
+                game_state.cv_capture_wrapper,
+                str(game_state.BOARD_VALUES_PATH),
+                str(game_state.CHESS_PIECES_PATH),
+                game_state.chess_pieces_state,
+                game_state.cv_turn_color,
+            )
     except Exception as exc:
         print(f"[CV] 턴 전환 처리 실패: {exc}")
         return None
@@ -104,11 +125,85 @@ def initialize_board_reference() -> Optional[Any]:
     return game_state.init_board_values
 
 
-def detect_move_via_ml_capture() -> Optional[chess.Move]:
+def capture_warped_frames(
+    n_frames: int = ML_BATCH_FRAMES,
+    interval_sec: float = ML_FRAME_INTERVAL_SEC,
+    warp_size: int = 400,
+) -> list[np.ndarray]:
+    """캡처 장치에서 최근 프레임 n_frames개를 읽어 와핑된 이미지 목록으로 반환."""
+    from cv.cv_manager import warp_with_manual_corners
+
+    warped_frames: list[np.ndarray] = []
+    if game_state.cv_capture_wrapper is None:
+        return warped_frames
+
+    # 프레임 허브면 공용 와핑 단계를 사용 (웹 UI 등과 같은 프레임이면 와핑 결과 공유)
+    capture = game_state.cv_capture_wrapper
+    stage = capture.warp_stage(warp_size) if hasattr(capture, "warp_stage") else None
+
+    with _capture_active(capture, "detect"):
+        for i in range(n_frames):
+            if stage is not None:
+                ret, wf = stage.read()
+                warped = wf.warp if ret else None
+            else:
+                ret, frame = capture.read()
+                warped = warp_with_manual_corners(frame, size=warp_size) if ret and frame is not None else None
+            if not ret:
+                print(f"[ML] ⚠️ 프레임 {i+1}/{n_frames} 읽기 실패")
+                continue
+            if warped is not None:
+                warped_frames.append(warped)
+            if i < n_frames - 1 and interval_sec > 0:
+                time.sleep(interval_sec)
+    return warped_frames
+
+
+def predict_multi_camera(
+    n_frames: int = ML_BATCH_FRAMES,
+    tta: bool | tuple[str, ...] = ML_TTA,
+) -> Optional[tuple[np.ndarray, np.ndarray]]:
+    """카메라별로 배치 추론한 칸 확률을 가시성 가중치로 융합한 (grid, probs).
+
+    모든 카메라에서 가려진 칸이 남으면 MULTI_CAMERA_RETRIES번까지 다시 캡처하고,
+    그래도 남으면 그 칸은 현재 보드 상태로 둔다.
+    """
+    fusion = game_state.multi_camera
+    expected = board_to_grid(game_state.current_board)
+    fused = None
+    for attempt in range(MULTI_CAMERA_RETRIES):
+        warped = fusion.capture_warped(n_frames, ML_FRAME_INTERVAL_SEC)
+        probs = [
+            game_state.ml_detector.predict_frames(frames, tta=tta)[1] if frames else None
+            for frames in warped
+        ]
+        if all(p is None for p in probs):
+            print("[ML] ❌ 어느 카메라에서도 와핑 프레임을 얻지 못했습니다.")
+            return None
+        fused = fusion.fuse_probs(probs, expected)
+        for view, occ in zip(fusion.views, fused.occluded):
+            if occ.any():
+                print(f"[ML]   {view.name}: 가린 칸 {int(occ.sum())}개 제외")
+        if fused.hidden_squares == 0:
+            break
+        print(f"[ML] ⚠️ 모든 카메라에서 가린 칸 {fused.hidden_squares}개 - 재캡처 ({attempt + 1}/{MULTI_CAMERA_RETRIES})")
+        time.sleep(MULTI_CAMERA_RETRY_SEC)
+    return fused.grid, fused.probs
+
+
+def detect_move_via_ml_capture(
+    n_frames: int = ML_BATCH_FRAMES,
+    tta: bool | tuple[str, ...] = ML_TTA,
+) -> Optional[chess.Move]:
     """
     ML 모델을 사용하여 캡처에서 직접 기물 변화를 감지합니다.
-    와핑된 체스판 이미지를 ML 모델에 전달합니다.
+    최근 n_frames개의 와핑된 체스판 이미지를 한 번의 배치 추론으로 예측하고
+    칸별 softmax를 평균한 결과를 사용합니다.
     
+    Args:
+        n_frames: 배치로 묶을 프레임 수
+        tta: 테스트 타임 증강 (ChessPieceMLDetector.predict_frames 참고)
+
     Returns:
         chess.Move 또는 None
     """
@@ -123,53 +218,48 @@ def detect_move_via_ml_capture() -> Optional[chess.Move]:
         return None
     
     try:
-        print("[ML] 프레임 읽기 시도 중...")
-        # 프레임 읽기
-        ret, frame = game_state.cv_capture_wrapper.read()
-        if not ret or frame is None:
-            print("[ML] ❌ 프레임을 읽을 수 없습니다.")
-            return None
-        
-        print(f"[ML] ✓ 프레임 읽기 성공: {frame.shape}")
-        
-        # 와핑된 이미지 얻기
-        print("[ML] 와핑 시도 중...")
-        from cv.cv_manager import warp_with_manual_corners
-        warped_frame = warp_with_manual_corners(frame, size=400)
-        
-        if warped_frame is None:
-            print("[ML] ❌ 와핑 실패")
-            return None
-        
-        print(f"[ML] ✓ 와핑 성공: {warped_frame.shape}")
-        
-        # 와핑된 이미지를 ML 모델에 전달하여 예측
-        print("[ML] ML 모델 예측 시작...")
-        current_grid = game_state.ml_detector.predict_frame(warped_frame)
-        
-        if current_grid is None:
-            print("[ML] ❌ 예측 실패 (None 반환)")
-            return None
+        if game_state.multi_camera is not None:
+            print(f"[ML] 카메라 {game_state.multi_camera.camera_count}대 프레임 {n_frames}개씩 융합 예측 중...")
+            result = predict_multi_camera(n_frames, tta)
+            if result is None:
+                return None
+            current_grid, probs = result
+        else:
+            print(f"[ML] 프레임 {n_frames}개 읽기 및 와핑 중...")
+            warped_frames = capture_warped_frames(n_frames)
+            if not warped_frames:
+                print("[ML] ❌ 유효한 와핑 프레임이 없습니다.")
+                return None
+
+            print(f"[ML] ✓ 와핑 프레임 {len(warped_frames)}개 확보: {warped_frames[0].shape}")
+
+            # 와핑된 이미지들을 한 번의 배치로 ML 모델에 전달하여 예측
+            print(f"[ML] ML 배치 예측 시작... (TTA: {tta or '없음'})")
+            current_grid, probs = game_state.ml_detector.predict_frames(warped_frames, tta=tta)
         
-        print(f"[ML] ✓ ML 예측 완료: {current_grid.shape}")
+        confidence = probs.max(axis=2)
+        print(
+            f"[ML] ✓ ML 예측 완료: {current_grid.shape}, "
+            f"최저 신뢰도 {float(confidence.min()):.2f}"
+        )
+        for r, c in zip(*np.where(confidence < ML_LOW_CONFIDENCE)):
+            print(f"[ML]   ⚠️ 낮은 신뢰도: {coord_to_chess_notation(r, c)} ({float(confidence[r, c]):.2f})")
         
         # ML 예측 결과 출력 (디버깅용)
         game_state.ml_detector.print_grid(current_grid, "ML 현재 상태 예측")
+        event_bus.publish(
+            event_bus.ML_GRID,
+            grid=current_grid.tolist(),
+            source="game",
+            min_confidence=round(float(confidence.min()), 3),
+        )
         
         # 변화 감지
         print("[ML] 변화 감지 시작...")
         move = detect_move_via_ml(current_grid)
         
         if move is None:
-            # None이 반환되는 경우는 두 가지:
-            # 1. 첫 번째 호출 (기준 상태 저장)
-            # 2. 변화 감지 실패 또는 합법적인 이동을 찾지 못함
-            if game_state.ml_previous_grid is not None:
-                # 기준 상태가 이미 있으면 변화 감지 실패
-                print("[ML] ❌ 변화 감지 실패 또는 이동을 찾지 못함")
-            else:
-                # 기준 상태가 없으면 첫 번째 호출 (정상)
-                print("[ML] ✓ 기준 상태 저장 완료 (정상 동작)")
+            print("[ML] ❌ 변화 감지 실패 또는 이동을 찾지 못함")
         else:
             print(f"[ML] ✓ 변화 감지 성공: {move.uci()}")
         
@@ -15,8 +15,13 @@ from typing import Iterable, List, Optional, Tuple, Callable, Dict, Any
 import cv2
 import numpy as np
 
-from cv.picam_stable import warp_chessboard
+from cv.corner_state import SOURCE_MANUAL, CornerEstimate, get_corner_service
+from cv.lighting import BoardReference, bgr_grid_to_lab
 from cv.piece_auto_update import update_chess_pieces
+from cv.remap_warp import RemapWarper
+from cv.square_sampling import SquareSampler, cell_means
+from cv.warp_stage import HomographyCache, warp_frame
+from game import event_bus
 
 try:
     from piece_recognition import _pair_moves as default_pair_moves_fn
@@ -70,7 +75,13 @@ if default_pair_moves_fn is None:
 BASE_DIR = Path(__file__).resolve().parent
 MANUAL_CORNERS_PATH = BASE_DIR / "manual_corners.npy"
 
-_manual_corners: Optional[np.ndarray] = None  # TL, TR, BR, BL
+# 코너(TL, TR, BR, BL)와 버전은 프로세스 공용 코너 상태 서비스에 둔다 (스트림/게임/보정이 같은 값을 봄).
+# 버전은 코너가 바뀔 때마다 증가 (호모그래피 캐시 무효화용)
+_corners = get_corner_service()
+
+# 칸 샘플링 마스크용 카메라 모델 (frame_size=(w, h), camera_matrix, dist_coeffs)
+_camera_model: Tuple[Optional[Tuple[int, int]], Optional[np.ndarray], Optional[np.ndarray]] = (None, None, None)
+_samplers: Dict[tuple, SquareSampler] = {}
 
 
 # ---------------------------------------------------------------------------
@@ -88,14 +99,23 @@ def _order_corners_tl_tr_br_bl(pts: Iterable[Iterable[float]]) -> np.ndarray:
     return ordered
 
 
-def set_manual_corners(points: Iterable[Iterable[float]]) -> None:
-    """수동 코너(TL,TR,BR,BL 순)가 지정되면 이후 와핑 시 사용."""
-    global _manual_corners
+def set_manual_corners(
+    points: Iterable[Iterable[float]],
+    persist: bool = True,
+    source: str = SOURCE_MANUAL,
+    confidence: float = 1.0,
+) -> None:
+    """수동 코너(TL,TR,BR,BL 순)가 지정되면 이후 와핑 시 사용.
+
+    persist=False면 manual_corners.npy에 저장하지 않는다 (보정 프로필이 코너를 따로 저장하는 경우).
+    """
     ordered = _order_corners_tl_tr_br_bl(points)
-    _manual_corners = ordered
+    _corners.publish(ordered, confidence=confidence, source=source)
     print(f"[cv_manager] manual corners set: {ordered.tolist()}")
+    if not persist:
+        return
     try:
-        np.save(MANUAL_CORNERS_PATH, _manual_corners)
+        np.save(MANUAL_CORNERS_PATH, ordered)
         print(f"[cv_manager] manual corners saved to {MANUAL_CORNERS_PATH}")
     except Exception as e:
         print(f"[cv_manager] failed to save manual corners: {e}")
@@ -103,8 +123,7 @@ def set_manual_corners(points: Iterable[Iterable[float]]) -> None:
 
 def clear_manual_corners() -> None:
     """수동 코너를 해제."""
-    global _manual_corners
-    _manual_corners = None
+    _corners.clear()
     print("[cv_manager] manual corners cleared")
     try:
         if MANUAL_CORNERS_PATH.exists():
@@ -115,28 +134,91 @@ def clear_manual_corners() -> None:
 
 
 def get_manual_corners(copy: bool = True) -> Optional[np.ndarray]:
-    if _manual_corners is None:
-        return None
-    return _manual_corners.copy() if copy else _manual_corners
+    """현재 코너 (수동/보정/자동 추적 중 코너 상태 서비스의 최신값). copy=False면 읽기 전용 배열."""
+    return _corners.corners(copy=copy)
 
 
 def manual_mode_enabled() -> bool:
-    return _manual_corners is not None
+    return _corners.latest().valid
+
+
+def _publish_corners(estimate: CornerEstimate) -> None:
+    corners = estimate.corners
+    event_bus.publish(
+        event_bus.CORNERS,
+        manual_mode=corners is not None,
+        points=corners.tolist() if corners is not None else None,
+        version=estimate.version,
+        confidence=round(estimate.confidence, 3),
+        source=estimate.source,
+    )
+
+
+_corners.subscribe(_publish_corners)
+
+
+def get_corners_version() -> int:
+    """코너가 바뀔 때마다 증가하는 버전 번호."""
+    return _corners.version
+
+
+def set_camera_model(
+    frame_size: Tuple[int, int],
+    camera_matrix: Optional[np.ndarray] = None,
+    dist_coeffs: Optional[np.ndarray] = None,
+) -> None:
+    """칸 샘플링 마스크가 기물 기울기를 계산할 카메라 모델 (보정 프로필이 설정)."""
+    global _camera_model
+    _camera_model = (tuple(frame_size), camera_matrix, dist_coeffs)
+    _samplers.clear()
+
+
+def get_square_sampler(size: int, frame_size: Optional[Tuple[int, int]] = None) -> Optional[SquareSampler]:
+    """현재 코너/카메라 모델의 size x size 와핑용 칸 샘플러 (코너가 바뀔 때만 다시 계산).
+
+    카메라 모델이 아직 없으면 frame_size(원본 프레임 (w, h))로 근사 모델을 만든다.
+    """
+    if _camera_model[0] is None and frame_size is not None:
+        set_camera_model(frame_size)
+    estimate = _corners.latest()
+    corners = estimate.corners
+    frame_size, camera_matrix, dist_coeffs = _camera_model
+    if corners is None or frame_size is None:
+        return None
+    key = (estimate.version, size)
+    sampler = _samplers.get(key)
+    if sampler is None:
+        try:
+            sampler = SquareSampler.from_corners(corners, frame_size, size, camera_matrix, dist_coeffs)
+        except Exception as e:
+            print(f"[cv_manager] square sampler failed, fallback full cells: {e}")
+            return None
+        if len(_samplers) >= 8:
+            _samplers.clear()
+        _samplers[key] = sampler
+    return sampler
+
+
+def board_means(img: np.ndarray) -> np.ndarray:
+    """와핑 이미지의 칸별 평균 (8, 8, C). 샘플러가 있으면 기울기를 제외한 칸 영역만 평균."""
+    h, w = img.shape[:2]
+    sampler = get_square_sampler(h) if h == w else None
+    if sampler is not None:
+        return sampler.means(img)
+    return cell_means(img)
 
 
 def _load_manual_corners_from_file() -> None:
     """프로그램 시작 시 이전에 저장한 수동 코너를 자동 로드."""
-    global _manual_corners
     if not MANUAL_CORNERS_PATH.exists():
         return
     try:
         arr = np.load(MANUAL_CORNERS_PATH)
         arr = np.asarray(arr, dtype=np.float32).reshape(4, 2)
-        _manual_corners = arr
+        _corners.publish(arr, source=SOURCE_MANUAL)
         print(f"[cv_manager] manual corners loaded from {MANUAL_CORNERS_PATH}: {arr.tolist()}")
     except Exception as e:
         print(f"[cv_manager] failed to load manual corners: {e}")
-        _manual_corners = None
 
 
 # 모듈 임포트 시 자동으로 이전 수동 코너 로드
@@ -146,12 +228,30 @@ _load_manual_corners_from_file()
 # ---------------------------------------------------------------------------
 # 와핑 & 보드 평균 계산
 # ---------------------------------------------------------------------------
+# 수동 코너가 바뀔 때만 호모그래피와 remap 맵을 다시 계산
+_homography = HomographyCache(lambda: get_manual_corners(copy=False), get_corners_version)
+_warpers: Dict[int, RemapWarper] = {}
+
+
+def _warper_for(size: int) -> RemapWarper:
+    warper = _warpers.get(size)
+    if warper is None:
+        warper = _warpers.setdefault(size, RemapWarper(size))
+    return warper
+
+
 def warp_with_manual_corners(frame: np.ndarray, size: int = 400) -> np.ndarray:
     """수동 코너가 있으면 와핑, 없으면 리사이즈."""
-    corners = get_manual_corners(copy=False)
-    if corners is not None and corners.shape == (4, 2):
+    if _camera_model[0] is None and frame is not None:
+        set_camera_model((frame.shape[1], frame.shape[0]))  # 칸 샘플러 근사 카메라 모델
+    try:
+        M = _homography.matrix(size)
+    except Exception as e:
+        print(f"[cv_manager] homography failed, fallback resize: {e}")
+        M = None
+    if M is not None:
         try:
-            return warp_chessboard(frame, corners, size=size)
+            return warp_frame(frame, M, size, _warper_for(size))
         except Exception as e:
             print(f"[cv_manager] warp failed, fallback resize: {e}")
     try:
@@ -161,58 +261,70 @@ def warp_with_manual_corners(frame: np.ndarray, size: int = 400) -> np.ndarray:
 
 
 def _mean_lab_board_from_warp(warp: np.ndarray) -> np.ndarray:
-    h, w = warp.shape[:2]
-    cell_h = h // 8
-    cell_w = w // 8
-    lab = cv2.cvtColor(warp, cv2.COLOR_BGR2LAB)
-    out = np.zeros((8, 8, 3), np.float32)
-    for i in range(8):
-        for j in range(8):
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-            cell = lab[y1:y2, x1:x2]
-            out[i, j] = cell.reshape(-1, 3).mean(axis=0)
-    return out
+    return board_means(cv2.cvtColor(warp, cv2.COLOR_BGR2LAB))
 
 
 def capture_avg_lab_board(cap,
                           n_frames: int = 8,
                           sleep_sec: float = 0.02,
-                          warp_size: int = 400
+                          warp_size: int = 400,
+                          reference_bgr: Optional[np.ndarray] = None,
+                          pieces: Optional[List[List[str]]] = None
                           ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
-    """다중 프레임을 캡처해 LAB 평균과 마지막 와프 이미지를 반환."""
+    """다중 프레임을 캡처해 LAB 평균과 마지막 와프 이미지를 반환.
+
+    cap이 FrameHub이면 공용 WarpStage의 와핑/LAB 결과를 재사용한다.
+    reference_bgr(기준 보드 칸별 BGR 평균)를 주면 프레임마다 기준 조명으로 보정한 LAB을 평균한다
+    (허브면 WarpStage 기준으로 등록해 WarpedFrame이 한 번 계산한 값을 스트림 뷰와 같이 쓴다).
+    """
     acc = np.zeros((8, 8, 3), np.float32)
     cnt = 0
     last_warp = None
-
-    for _ in range(n_frames):
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        warp = warp_with_manual_corners(frame, size=warp_size)
-        last_warp = warp
-        acc += _mean_lab_board_from_warp(warp)
-        cnt += 1
-        time.sleep(sleep_sec)
+    gain = None
+
+    if hasattr(cap, "warp_stage"):
+        stage = cap.warp_stage(warp_size)
+        if reference_bgr is not None:
+            stage.set_reference(reference_bgr, pieces)
+        for _ in range(n_frames):
+            ret, wf = stage.read()
+            if not ret:
+                break
+            last_warp = wf.warp
+            means = wf.normalized_lab_means if reference_bgr is not None else None
+            if means is None:
+                acc += wf.lab_means
+            else:
+                acc += means
+                gain = wf.lighting_gain("lab")
+            cnt += 1
+            time.sleep(sleep_sec)
+    else:
+        reference = BoardReference(reference_bgr, pieces) if reference_bgr is not None else None
+        for _ in range(n_frames):
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            warp = warp_with_manual_corners(frame, size=warp_size)
+            last_warp = warp
+            means = _mean_lab_board_from_warp(warp)
+            if reference is not None:
+                gain = reference.lab.estimate(means)
+                means = gain.apply(means)
+            acc += means
+            cnt += 1
+            time.sleep(sleep_sec)
 
     if cnt == 0:
         return None, None
+    if gain is not None:
+        print(f"[cv_manager] lighting gain={gain.gain.round(3).tolist()} offset={gain.offset.round(1).tolist()}")
     return acc / cnt, last_warp
 
 
 def compute_board_means_bgr(warp: np.ndarray) -> np.ndarray:
-    h, w = warp.shape[:2]
-    cell_h = h // 8
-    cell_w = w // 8
-    board_vals = np.zeros((8, 8, 3), np.float32)
-    for i in range(8):
-        for j in range(8):
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-            cell = warp[y1:y2, x1:x2]
-            board_vals[i, j] = np.mean(cell.reshape(-1, 3), axis=0)
-    return board_vals
+    return board_means(warp)
 
 
 # ---------------------------------------------------------------------------
@@ -221,6 +333,10 @@ def compute_board_means_bgr(warp: np.ndarray) -> np.ndarray:
 def save_initial_board_from_frame(frame: np.ndarray, np_path: str, warp_size: int = 400) -> np.ndarray:
     """프레임을 와핑하여 초기 기준을 저장하고 값을 반환."""
     warp = warp_with_manual_corners(frame, size=warp_size)
+    return _save_initial_board_from_warp(warp, np_path)
+
+
+def _save_initial_board_from_warp(warp: np.ndarray, np_path: str) -> np.ndarray:
     board_vals = compute_board_means_bgr(warp)
     np.save(np_path, board_vals)
     print(f"[cv_manager] initial board saved to {np_path}")
@@ -253,8 +369,8 @@ def save_initial_board_from_capture(
         print("[cv_manager] failed to read frame for initial board (no valid frame)")
         return None, None
 
-    board_vals = save_initial_board_from_frame(frame, np_path, warp_size=warp_size)
     warp = warp_with_manual_corners(frame, size=warp_size)
+    board_vals = _save_initial_board_from_warp(warp, np_path)
     return board_vals, warp
 
 
@@ -281,13 +397,7 @@ def piece_to_fen(piece: str) -> str:
 
 
 def _bgr_to_lab_grid(board_vals: np.ndarray) -> np.ndarray:
-    prev_lab = np.zeros((8, 8, 3), np.float32)
-    for i in range(8):
-        for j in range(8):
-            bgr = np.array(board_vals[i, j], dtype=np.uint8)[None, None, :]
-            lab = cv2.cvtColor(bgr, cv2.COLOR_BGR2LAB).astype(np.float32)
-            prev_lab[i, j] = lab[0, 0]
-    return prev_lab
+    return bgr_grid_to_lab(board_vals)
 
 
 # ---------------------------------------------------------------------------
@@ -333,15 +443,14 @@ def process_turn_transition(
 
     prev_board_values = np.load(np_path) if os.path.exists(np_path) else None
 
-    curr_lab, warp = capture_avg_lab_board(cap, n_frames=n_frames, sleep_sec=sleep_sec, warp_size=warp_size)
+    # 조명 보정(빈 칸 기준 L gain/offset, a/b offset)은 캡처 단계에서 프레임마다 한 번 (WarpStage 공유)
+    curr_lab, warp = capture_avg_lab_board(cap, n_frames=n_frames, sleep_sec=sleep_sec, warp_size=warp_size,
+                                           reference_bgr=prev_board_values, pieces=chess_pieces)
     if curr_lab is None or warp is None:
         raise RuntimeError("현재 보드를 캡처할 수 없습니다.")
 
     prev_lab = _bgr_to_lab_grid(prev_board_values) if prev_board_values is not None else curr_lab.copy()
-
     deltas = curr_lab - prev_lab
-    mean_shift = deltas.reshape(-1, 3).mean(axis=0, dtype=np.float32)
-    deltas = deltas - mean_shift
     norms = np.linalg.norm(deltas, axis=2).astype(np.float32)
 
     pairs = pair_moves_fn(deltas.reshape(-1, 3), norms.reshape(-1), threshold=threshold)
@@ -415,6 +524,10 @@ __all__ = [
     'clear_manual_corners',
     'get_manual_corners',
     'manual_mode_enabled',
+    'get_corners_version',
+    'set_camera_model',
+    'get_square_sampler',
+    'board_means',
     'warp_with_manual_corners',
     'capture_avg_lab_board',
     'compute_board_means_bgr',
@@ -15,97 +15,36 @@ import threading
 import time
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any, Iterable, Tuple
+from typing import TYPE_CHECKING, Optional, Dict, Any
 import pickle
 
-import cv2
 import numpy as np
-from flask import Flask, Response, render_template_string, request, jsonify
 
 from cv import cv_manager
+from cv.capture_sources import USBCapture, open_capture  # noqa: F401  (USBCapture: 기존 import 경로 호환)
+from cv.frame_hub import FrameHub
+from cv.rate_governor import get_governor
+from cv.stream_encoder import SharedEncoder, encode_jpeg, resize_to_width
+from cv.socket_events import SOCKETIO_CLIENT_URL, attach_socketio
+from cv.stream_server import StreamService, resolve_async_mode, run_wsgi
+from game import event_bus
+from cv.prediction_cache import DEFAULT_CHANGE_THRESHOLD, DEFAULT_TTL_SEC, PredictionCache
+from aicv.inference_worker import InferenceBusy, InferenceWorker
+
+if TYPE_CHECKING:
+    from flask import Flask
 
 BASE_DIR = Path(__file__).resolve().parent
 
-
-class USBCapture:
-    """USB 카메라를 위한 간단 래퍼 (cv2.VideoCapture 기반).
-
-    rotate_180=True 이면 영상이 뒤집혀 있을 때 180도 회전 보정.
-    기본값은 True (현재 세팅에서는 카메라가 180도 뒤집혀 있다고 가정).
-    """
-
-    def __init__(
-        self,
-        index: int | Iterable[int] | None = None,
-        size=(1280, 720),
-        fps: int = 30,
-        rotate_180: bool = True,
-        rotate_90_ccw: bool = False,
-        rotate_90_cw: bool = False,
-    ):
-        """
-        index가 None이면 0~5 범위를 순회하며 첫 번째로 열리는 장치를 사용한다.
-        index에 정수 대신 반복가능 객체를 주면 해당 후보들을 순차적으로 시도한다.
-        """
-        if index is None:
-            candidates: Iterable[int] = range(0, 6)
-        elif isinstance(index, Iterable) and not isinstance(index, (str, bytes)):
-            candidates = index
-        else:
-            candidates = (index,)
-
-        candidates = list(candidates)
-        self._cap = None
-        self.index = None
-        self._rotate_180 = rotate_180
-        self._rotate_90_ccw = rotate_90_ccw
-        self._rotate_90_cw = rotate_90_cw
-
-        for idx in candidates:
-            cap = cv2.VideoCapture(idx, cv2.CAP_V4L2)
-            if cap is not None and cap.isOpened():
-                self._cap = cap
-                self.index = idx
-                break
-            cap.release()
-
-        if self._cap is None or self.index is None:
-            raise RuntimeError(f"[USBCapture] 사용 가능한 카메라를 찾을 수 없습니다. 후보: {candidates}")
-
-        try:
-            self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
-            self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
-            self._cap.set(cv2.CAP_PROP_FPS, fps)
-            print(f"[USBCapture] /dev/video{self.index} 사용 중 (size={size}, fps={fps})")
-        except Exception as e:
-            print(f"[USBCapture] 카메라 속성 설정 실패: {e}")
-
-    def read(self):
-        ret, frame = self._cap.read()
-        if not ret or frame is None:
-            print("[USBCapture] frame read 실패")
-            return ret, frame
-
-        # 카메라가 180도 뒤집혀 있을 때 보정
-        if self._rotate_180:
-            frame = cv2.rotate(frame, cv2.ROTATE_180)
-        if self._rotate_90_ccw:
-            frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
-        elif self._rotate_90_cw:
-            frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-
-        return True, frame
-
-    def release(self):
-        if self._cap is not None:
-            try:
-                self._cap.release()
-            except Exception:
-                pass
+# Socket.IO 접속 클라이언트가 있을 때 서버가 ML 그리드를 다시 예측/발행하는 주기 (초)
+ML_PUSH_INTERVAL_SEC = 1.0
 
 
 class ThreadSafeCapture:
-    """멀티스레드 환경에서 안전하게 read()를 보장하는 래퍼."""
+    """멀티스레드 환경에서 안전하게 read()를 보장하는 래퍼.
+
+    여러 소비자가 같은 카메라를 쓰는 경우에는 cv.frame_hub.FrameHub를 사용한다.
+    """
 
     def __init__(self, cap):
         self._cap = cap
@@ -122,22 +61,11 @@ class ThreadSafeCapture:
 
 
 def _encode_jpeg(img: np.ndarray, quality: int = 60) -> bytes:
-    quality = int(np.clip(quality, 10, 95))
-    ok, buf = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
-    if not ok:
-        raise RuntimeError("JPEG 인코딩 실패")
-    return buf.tobytes()
+    return encode_jpeg(img, quality)
 
 
 def _resize_for_preview(img: np.ndarray, max_width: int = 480) -> np.ndarray:
-    if img is None or img.size == 0:
-        return img
-    h, w = img.shape[:2]
-    if w <= max_width:
-        return img
-    scale = max_width / float(w)
-    new_size = (int(w * scale), int(h * scale))
-    return cv2.resize(img, new_size, interpolation=cv2.INTER_AREA)
+    return resize_to_width(img, max_width)
 
 
 def _default_board() -> list:
@@ -153,38 +81,55 @@ def _default_board() -> list:
     ]
 
 
-def build_app(state: Dict[str, Any]) -> Flask:
+def build_app(state: Dict[str, Any]) -> "Flask":
+    # Flask는 import 비용이 커서 웹 서버를 실제로 만들 때 import (게임 시작 시 카메라/시리얼 초기화를 막지 않음)
+    from flask import Flask, Response, render_template_string, request, jsonify
+
     app = Flask(__name__)
     logging.getLogger("werkzeug").setLevel(logging.ERROR)
 
-    cap: ThreadSafeCapture = state["cap"]
+    cap: FrameHub = state["cap"]
     np_path: Path = state["np_path"]
     pkl_path: Path = state["pkl_path"]
+    ml_cache: PredictionCache = state.get("ml_cache") or PredictionCache()
+    # 모든 스트림/스냅샷 뷰는 같은 프레임 허브에서 뷰·프레임당 한 번만 렌더링/인코딩해서 공유
+    streams: StreamService = state.get("streams") or StreamService(
+        cap,
+        reference_fn=lambda: state.get("init_board_values"),
+        pieces_fn=lambda: state.get("chess_pieces"),
+        encoder=state.get("encoder") or SharedEncoder(cap),
+    )
+    state["streams"] = streams
+    app.register_blueprint(streams.blueprint())
+    # 게임 상태/ML 그리드를 WebSocket으로 푸시 (flask-socketio가 없으면 None → 대시보드가 폴링)
+    socket = attach_socketio(app, async_mode=state.get("async_mode", "threading")) \
+        if state.get("use_socketio", True) else None
+    state["socket"] = socket
 
     def capture_frame() -> Optional[np.ndarray]:
-        """항상 가능한 한 최신 프레임을 반환하도록 버퍼를 조금 비운 뒤 마지막 프레임을 사용."""
-        last_frame: Optional[np.ndarray] = None
-        # 짧은 시간 동안 여러 번 read() 해서 버퍼에 쌓인 이전 프레임은 버리고 마지막 것만 사용
-        for _ in range(4):
-            ret, frame = cap.read()
-            if not ret or frame is None:
-                continue
-            last_frame = frame
-        
-        if last_frame is None:
+        """프레임 허브의 최신 프레임을 반환 (장치를 직접 읽거나 버퍼를 비우지 않음)."""
+        frame = cap.latest_image()
+        if frame is None:
             print("[cv_web] capture_frame: 유효한 프레임을 읽지 못했습니다")
-            return None
-        
-        return last_frame
+        return frame
 
     @app.route("/")
     def index():
         move_str = " -> ".join(state["move_history"])
         return render_template_string('''
+        {% if socket_enabled %}<script src="{{ socketio_url }}"></script>{% endif %}
         <h1>체스판 CV 도우미</h1>
         <div id="turn-info" style="margin-bottom:10px; font-size:18px;">
-          <b>현재 턴:</b> {{turn_color}}<br>
-          <b>이전 턴:</b> {{prev_turn_color if prev_turn_color else '없음'}}
+          <b>현재 턴:</b> <span id="turn-current">{{turn_color}}</span><br>
+          <b>이전 턴:</b> <span id="turn-previous">{{prev_turn_color if prev_turn_color else '없음'}}</span>
+        </div>
+        <div id="live-state" style="margin-bottom:10px; font-family: monospace; font-size:13px; color:#333;">
+          <div><b>연결:</b> <span id="live-conn">폴링</span></div>
+          <div><b>FEN:</b> <span id="live-fen">-</span></div>
+          <div><b>마지막 수:</b> <span id="live-move">-</span></div>
+          <div><b>평가:</b> <span id="live-eval">-</span></div>
+          <div><b>타이머:</b> <span id="live-timer">-</span></div>
+          <div><b>로봇:</b> <span id="live-robot">-</span></div>
         </div>
         <button onclick="setInitialBoard()">완전 초기상태 저장</button>
         <button onclick="nextTurn()">턴 기록 및 전환</button>
@@ -195,18 +140,18 @@ def build_app(state: Dict[str, Any]) -> Flask:
 
         <div style="margin-top:20px; font-size:16px; color:#222;">
           <b>기물 이동 내역:</b><br>
-          {{ move_str }}
+          <span id="move-history">{{ move_str }}</span>
         </div>
 
         <div style="margin-top:24px;">
-          <h3>실시간 체스판 + diff 상위 2칸</h3>
-          <p style="font-size:13px; color:#555;">(매 1초마다 최신 프레임 기준으로 두 칸을 빨간 박스로 표시합니다.)</p>
-          <img id="board-img" src="/snapshot_board?ts=" style="max-width:420px; border:1px solid #ccc" />
+          <h3>실시간 체스판</h3>
+          <p style="font-size:13px; color:#555;">(새 프레임이 캡처될 때마다 서버가 와핑된 체스판을 MJPEG 스트림으로 보냅니다.)</p>
+          <img id="board-img" src="/stream/warp" style="max-width:420px; border:1px solid #ccc" />
         </div>
 
         <div style="margin-top:24px;">
           <h3>ML 예측 결과</h3>
-          <p style="font-size:13px; color:#555;">(매 1초마다 ML 모델이 예측한 기물 배치를 표시합니다.)</p>
+          <p style="font-size:13px; color:#555;">(보드가 바뀌면 서버가 WebSocket으로 새 예측을 보냅니다. 연결이 없으면 1초마다 조회합니다.)</p>
           <button onclick="refreshMLPrediction()">🔄 ML 예측 새로고침</button>
           <div id="ml-prediction" style="margin-top:10px; font-family: monospace; font-size:14px; background:#f5f5f5; padding:10px; border:1px solid #ccc; max-width:300px;">
             로딩 중...
@@ -234,103 +179,167 @@ def build_app(state: Dict[str, Any]) -> Flask:
             })
             .catch(e => setStatus('오류: '+e, false));
         }
-        function refreshBoard(){
-          const img = document.getElementById('board-img');
-          if(img){
-            img.src = '/snapshot_board?ts=' + Date.now();
+        function renderGrid(grid){
+          const div = document.getElementById('ml-prediction');
+          let html = '<table style="border-collapse: collapse; margin: 0 auto;">';
+          html += '<tr><th></th>';
+          // 열 헤더: a b c d e f g h
+          const files = ['a','b','c','d','e','f','g','h'];
+          for(let i=0; i<8; i++) html += '<th style="padding:2px 5px;">' + files[i] + '</th>';
+          html += '</tr>';
+          // 행 레이블: 8 7 6 5 4 3 2 1 (세로축)
+          for(let r=0; r<8; r++){
+            const rank = 8 - r; // row 0 = rank 8
+            html += '<tr><th style="padding:2px 5px;">' + rank + '</th>';
+            for(let c=0; c<8; c++){
+              const val = grid[r][c];
+              let cell = '';
+              let bg = '#fff';
+              if(val === 0){ cell = '.'; bg = '#f0f0f0'; }
+              else if(val === 1){ cell = 'W'; bg = '#fff'; }
+              else if(val === 2){ cell = 'B'; bg = '#000'; }
+              html += '<td style="border:1px solid #ccc; padding:5px; text-align:center; background:' + bg + '; color:' + (val===2 ? '#fff' : '#000') + ';">' + cell + '</td>';
+            }
+            html += '</tr>';
           }
+          html += '</table>';
+          html += '<p style="margin-top:10px; font-size:12px;">0=빈칸, 1=흰색, 2=검은색</p>';
+          div.innerHTML = html;
         }
         function refreshMLPrediction(){
           fetch('/ml_prediction')
             .then(r => r.json())
             .then(data => {
-              const div = document.getElementById('ml-prediction');
               if(data.success && data.grid){
-                let html = '<table style="border-collapse: collapse; margin: 0 auto;">';
-                html += '<tr><th></th>';
-                // 열 헤더: a b c d e f g h
-                const files = ['a','b','c','d','e','f','g','h'];
-                for(let i=0; i<8; i++) html += '<th style="padding:2px 5px;">' + files[i] + '</th>';
-                html += '</tr>';
-                // 행 레이블: 8 7 6 5 4 3 2 1 (세로축)
-                for(let r=0; r<8; r++){
-                  const rank = 8 - r; // row 0 = rank 8
-                  html += '<tr><th style="padding:2px 5px;">' + rank + '</th>';
-                  for(let c=0; c<8; c++){
-                    const val = data.grid[r][c];
-                    let cell = '';
-                    let bg = '#fff';
-                    if(val === 0){ cell = '.'; bg = '#f0f0f0'; }
-                    else if(val === 1){ cell = 'W'; bg = '#fff'; }
-                    else if(val === 2){ cell = 'B'; bg = '#000'; }
-                    html += '<td style="border:1px solid #ccc; padding:5px; text-align:center; background:' + bg + '; color:' + (val===2 ? '#fff' : '#000') + ';">' + cell + '</td>';
-                  }
-                  html += '</tr>';
-                }
-                html += '</table>';
-                html += '<p style="margin-top:10px; font-size:12px;">0=빈칸, 1=흰색, 2=검은색</p>';
-                div.innerHTML = html;
+                renderGrid(data.grid);
+              } else if (data.busy) {
+                // 이전 예측이 아직 처리 중이면 기존 표시 유지
               } else {
-                div.innerHTML = '<span style="color:#888;">ML 모델이 없거나 예측 실패</span>';
+                document.getElementById('ml-prediction').innerHTML = '<span style="color:#888;">ML 모델이 없거나 예측 실패</span>';
               }
             })
             .catch(e => {
               document.getElementById('ml-prediction').innerHTML = '<span style="color:red;">오류: ' + e + '</span>';
             });
         }
-        // 페이지 로드 후 주기적으로 보드 이미지 갱신
-        setInterval(refreshBoard, 1000);
-        setInterval(refreshMLPrediction, 1000);
-        refreshBoard();
+
+        // 이벤트 버스 상태 (토픽별 {키: 값}); 서버는 접속 시 전체 상태, 이후 바뀐 키만 보낸다
+        const live = {};
+        function setText(id, text){ document.getElementById(id).textContent = text; }
+        function renderLive(topic){
+          const d = live[topic] || {};
+          if(topic === 'board'){ setText('live-fen', d.fen || '-'); }
+          else if(topic === 'move'){ setText('live-move', d.uci ? (d.san + ' (' + d.uci + ')' + (d.special ? ' ' + d.special : '')) : '-'); }
+          else if(topic === 'eval'){
+            const score = d.mate != null ? ('M' + d.mate) : (d.cp != null ? (d.cp / 100).toFixed(2) : '?');
+            const prob = d.win_prob_white != null ? (' 백 승률 ' + Math.round(d.win_prob_white * 100) + '%') : '';
+            setText('live-eval', score + prob + (d.best_move_san ? ' 추천 ' + d.best_move_san : ''));
+          }
+          else if(topic === 'timer'){ setText('live-timer', '백 ' + d.white + 's / 흑 ' + d.black + 's' + (d.active ? ' (' + d.active + ' 진행)' : '')); }
+          else if(topic === 'robot'){ setText('live-robot', (d.connection || '-') + ' / ' + (d.status || '-')); }
+          else if(topic === 'ml_grid' && d.grid){ renderGrid(d.grid); }
+          else if(topic === 'turn'){
+            if(d.current) setText('turn-current', d.current);
+            if(d.previous) setText('turn-previous', d.previous);
+            if(d.move_history) setText('move-history', d.move_history.join(' -> '));
+          }
+        }
+        function applyState(topic, data){
+          live[topic] = Object.assign(live[topic] || {}, data);
+          renderLive(topic);
+        }
+
+        let mlTimer = null;
+        function startPolling(){
+          if(mlTimer === null){ mlTimer = setInterval(refreshMLPrediction, 1000); }
+          setText('live-conn', '폴링');
+        }
+        function stopPolling(){
+          if(mlTimer !== null){ clearInterval(mlTimer); mlTimer = null; }
+        }
+
         refreshMLPrediction();
+        if(window.io && {{ socket_enabled|tojson }}){
+          const socket = io();
+          socket.on('connect', () => { stopPolling(); setText('live-conn', 'WebSocket'); });
+          socket.on('disconnect', startPolling);
+          socket.on('snapshot', snap => {
+            for(const topic in snap.state){ applyState(topic, snap.state[topic]); }
+          });
+          socket.on('state', ev => applyState(ev.topic, ev.data));
+          startPolling();  // 연결되기 전까지는 폴링
+        } else {
+          startPolling();
+        }
         </script>
-        ''', turn_color=state["turn_color"], prev_turn_color=state["prev_turn_color"], move_str=move_str)
+        ''', turn_color=state["turn_color"], prev_turn_color=state["prev_turn_color"], move_str=move_str,
+            socket_enabled=socket is not None, socketio_url=SOCKETIO_CLIENT_URL)
 
     @app.route("/snapshot_original")
     def snapshot_original():
-        frame = capture_frame()
-        if frame is None:
+        data = streams.snapshot("original", manual=request.args.get("manual") == "1")
+        if data is None:
             return "카메라 프레임 없음", 500
+        return Response(data, mimetype="image/jpeg")
 
-        manual_mode = request.args.get("manual") == "1"
-        if manual_mode:
-            img = frame
-            quality = 60
-        else:
-            img = _resize_for_preview(frame, max_width=480)
-            quality = 45
-        return Response(_encode_jpeg(img, quality=quality), mimetype="image/jpeg")
-
-    @app.route("/ml_prediction")
-    def ml_prediction():
-        """ML 모델의 예측 결과를 JSON으로 반환 (와핑된 이미지 사용)"""
+    def predict_ml_grid() -> Dict[str, Any]:
+        """최신 와핑 프레임의 ML 예측 결과. 성공하면 이벤트 버스에 ml_grid로 발행한다."""
         try:
             from game import game_state
-            from cv.cv_manager import warp_with_manual_corners
-            
+
             if game_state.ml_detector is None or game_state.cv_capture_wrapper is None:
-                return jsonify({"success": False, "error": "ML detector 또는 캡처 장치가 없습니다"})
-            
-            # 프레임 읽기
-            ret, frame = game_state.cv_capture_wrapper.read()
-            if not ret or frame is None:
-                return jsonify({"success": False, "error": "프레임을 읽을 수 없습니다"})
-            
-            # 와핑된 이미지 얻기
-            warped_frame = warp_with_manual_corners(frame, size=400)
+                return {"success": False, "error": "ML detector 또는 캡처 장치가 없습니다"}
+
+            # 최신 프레임의 와핑 결과 (공용 와핑 단계에서 프레임당 한 번만 계산)
+            warped = cap.warp_stage(400).latest()
+            if warped is None:
+                return {"success": False, "error": "프레임을 읽을 수 없습니다"}
+            warped_frame = warped.warp
             if warped_frame is None:
-                return jsonify({"success": False, "error": "와핑 실패"})
-            
+                return {"success": False, "error": "와핑 실패"}
+
+            # 보드가 바뀌지 않았으면 (지문 차이가 임계값 이하) 캐시된 그리드를 그대로 사용
+            fingerprint = ml_cache.fingerprint(warped_frame)
+            cached_grid = ml_cache.lookup(fingerprint)
+            if cached_grid is not None:
+                return {"success": True, "grid": cached_grid, "cached": True}
+
             # 와핑된 이미지를 ML 모델에 전달하여 예측
-            grid = game_state.ml_detector.predict_frame(warped_frame)
+            # 추론 워커를 쓰는 경우 대시보드 요청은 백그라운드 우선순위로 보내 게임 감지를 막지 않는다
+            detector = game_state.ml_detector
+            if isinstance(detector, InferenceWorker):
+                try:
+                    grid, _ = detector.predict_frames([warped_frame], background=True)
+                except InferenceBusy:
+                    return {"success": False, "busy": True, "error": "이전 예측 처리 중"}
+            else:
+                grid = detector.predict_frame(warped_frame)
             if grid is None:
-                return jsonify({"success": False, "error": "예측 실패"})
-            
+                return {"success": False, "error": "예측 실패"}
+
             # numpy 배열을 리스트로 변환
             grid_list = grid.tolist()
-            return jsonify({"success": True, "grid": grid_list})
+            ml_cache.store(fingerprint, grid_list)
+            event_bus.publish(event_bus.ML_GRID, grid=grid_list, source="dashboard")
+            return {"success": True, "grid": grid_list, "cached": False}
         except Exception as e:
-            return jsonify({"success": False, "error": str(e)})
+            return {"success": False, "error": str(e)}
+
+    @app.route("/ml_prediction")
+    def ml_prediction():
+        """ML 모델의 예측 결과를 JSON으로 반환 (와핑된 이미지 사용)"""
+        return jsonify(predict_ml_grid())
+
+    if socket is not None:
+        # 접속한 대시보드가 있을 때만 서버 한 곳에서 주기적으로 예측해서 푸시 (탭마다 폴링하지 않음).
+        # 보드가 그대로면 PredictionCache가 추론을 건너뛰고, 그리드가 같으면 버스가 이벤트를 보내지 않는다.
+        def ml_publisher():
+            while True:
+                socket.socketio.sleep(ML_PUSH_INTERVAL_SEC)
+                if socket.clients:
+                    streams.call(predict_ml_grid)
+
+        socket.socketio.start_background_task(ml_publisher)
 
     @app.route("/snapshot_board")
     def snapshot_board():
@@ -420,6 +429,12 @@ def build_app(state: Dict[str, Any]) -> Flask:
         state["init_board_values"] = result["init_board_values"]
         state["chess_pieces"] = result["chess_pieces"]
         state["move_history"].append(result["move_str"])
+        event_bus.publish(
+            event_bus.TURN,
+            current=state["turn_color"],
+            previous=state["prev_turn_color"],
+            move_history=list(state["move_history"]),
+        )
 
         return f"턴 전환 완료: {result['move_str']}", 200
 
@@ -448,6 +463,15 @@ def build_app(state: Dict[str, Any]) -> Flask:
             "points": corners.tolist() if corners is not None else None
         })
 
+    @app.route("/camera_info")
+    def camera_info():
+        """협상된 캡처 포맷/해상도/fps와 실제 측정 fps."""
+        describe = getattr(cap.capture, "describe", None)
+        info = describe() if describe is not None else {}
+        info["hub_seq"] = cap.seq
+        info["read_failures"] = cap.read_failures
+        return jsonify(info)
+
     @app.route("/manual")
     def manual():
         return render_template_string('''
@@ -623,9 +647,19 @@ def start_cv_web_server(
         host: str = "0.0.0.0",
         port: int = 5001,
         use_thread: bool = True,
-        cap = None
+        cap = None,
+        ml_cache_ttl: float = DEFAULT_TTL_SEC,
+        ml_cache_threshold: float = DEFAULT_CHANGE_THRESHOLD,
+        async_mode: Optional[str] = None,
 ) -> threading.Thread | None:
-    """Flask CV 웹 서버를 시작한다. use_thread=True이면 데몬 스레드로 실행."""
+    """Flask CV 웹 서버를 시작한다. use_thread=True이면 데몬 스레드로 실행.
+
+    ml_cache_ttl / ml_cache_threshold는 /ml_prediction 결과 캐시의 유효 시간(초)과
+    프레임 지문 변화 임계값이다. 임계값은 축소 그레이 이미지에서 전체 밝기 변화(평균 차이)를 뺀 뒤
+    픽셀별 최대 절대 차이(0~255)와 비교한다 (prediction_cache.fingerprint_distance).
+    async_mode는 stream_server.run_wsgi에 전달된다. 기본값은 게임 프로세스에 붙는
+    스레드 실행이면 "threading", 단독 실행이면 "auto"(eventlet이 있으면 사용)이다.
+    """
     start_time = time.time()
     print(f"[cv_web] 서버 초기화 시작... (포트: {port})")
     
@@ -634,12 +668,12 @@ def start_cv_web_server(
     if pkl_path is None:
         pkl_path = str(BASE_DIR / "chess_pieces.pkl")
 
-    # 카메라 래퍼 생성
+    # 프레임 허브 생성 (게임에서 이미 만든 허브를 넘기면 그대로 공유)
     step_start = time.time()
     if cap is None:
-        cap = USBCapture(rotate_90_cw=False, rotate_90_ccw=False, rotate_180=True)
-    safe_cap = ThreadSafeCapture(cap)
-    print(f"[cv_web] ├─ 카메라 래퍼 생성: {(time.time() - step_start)*1000:.1f}ms")
+        cap = open_capture()
+    safe_cap = cap if isinstance(cap, FrameHub) else FrameHub(cap, governor=get_governor())
+    print(f"[cv_web] ├─ 프레임 허브 생성: {(time.time() - step_start)*1000:.1f}ms")
 
     # .npy 파일 로드
     step_start = time.time()
@@ -667,6 +701,9 @@ def start_cv_web_server(
         "turn_color": "white",
         "prev_turn_color": "white",
         "move_history": [],
+        "ml_cache": PredictionCache(ttl_sec=ml_cache_ttl, change_threshold=ml_cache_threshold),
+        # Socket.IO 서버 모드는 앱을 만들 때 정해야 하므로 먼저 결정
+        "async_mode": resolve_async_mode(async_mode or ("threading" if use_thread else "auto")),
     }
 
     # Flask 앱 빌드
@@ -674,9 +711,12 @@ def start_cv_web_server(
     app = build_app(state)
     print(f"[cv_web] ├─ Flask 앱 빌드: {(time.time() - step_start)*1000:.1f}ms")
 
+    socket = state["socket"]
+
     def run_app():
         try:
-            app.run(host=host, port=port, debug=False, use_reloader=False)
+            run_wsgi(app, host, port, state["streams"], state["async_mode"],
+                     socketio=socket.socketio if socket is not None else None)
         finally:
             safe_cap.release()
 
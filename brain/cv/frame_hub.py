@@ -0,0 +1,271 @@
+"""단일 생산자 프레임 허브.
+
+캡처 스레드 하나가 장치를 독점해서 계속 read()하고, 읽은 프레임을 시퀀스 번호/타임스탬프와
+함께 작은 링 버퍼에 올린다. 게임 루프, 웹 UI, ML 라우트 같은 소비자는 장치를 직접 건드리지 않고
+`latest()`, `wait_newer(seq)`, `iter_frames()`로 가장 최근 프레임을 O(1)에 가져간다.
+그래서 오래된 버퍼를 비우려고 read()를 여러 번 호출하거나 락을 잡고 기다릴 필요가 없다.
+
+프레임 배열은 소비자들이 공유하므로 읽기 전용으로 다루고, 수정하려면 먼저 copy()한다.
+
+사용 예::
+
+    hub = FrameHub(USBCapture(rotate_180=True))
+    frame = hub.latest()                    # Frame(seq, timestamp, image) 또는 None
+    newer = hub.wait_newer(frame.seq, 1.0)  # 다음 프레임까지 대기
+    ret, img = hub.read()                   # 기존 cap.read() 호환 (스레드별로 새 프레임 보장)
+    hub.release()
+
+governor(cv.rate_governor.RateGovernor)를 주면 소비자가 없을 때 캡처 스레드가 유휴 속도로 내려가고,
+latest/wait_newer/read 호출이 있으면 자동으로 최대 속도로 돌아온다.
+프레임을 하나 올릴 때마다 공용 버퍼 풀(cv.buffer_pool)에 tick()해서 프레임당 할당 수를 집계한다.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Iterator, Optional, Tuple
+
+import numpy as np
+
+from cv.buffer_pool import get_pool
+
+DEFAULT_RING_SIZE = 4
+DEFAULT_READ_TIMEOUT_SEC = 2.0
+
+
+class Frame:
+    """허브에 게시된 프레임 하나.
+
+    캡처가 JPEG 원본을 주는 경우(USBCapture decode_on_demand) image는 처음 접근할 때
+    한 번만 디코딩되고, jpeg에는 카메라 원본이 그대로 남는다 (jpeg_rotation: 화면 방향으로
+    보여주려면 필요한 시계방향 회전 각도).
+    """
+
+    __slots__ = ("seq", "timestamp", "jpeg", "jpeg_rotation", "_image", "_decode", "_lock")
+
+    def __init__(
+        self,
+        seq: int,
+        timestamp: float,
+        image: Optional[np.ndarray] = None,
+        jpeg: Optional[bytes] = None,
+        decode: Optional[Callable[[bytes], Optional[np.ndarray]]] = None,
+        jpeg_rotation: int = 0,
+    ):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.jpeg = jpeg
+        self.jpeg_rotation = jpeg_rotation
+        self._image = image
+        self._decode = decode
+        self._lock = threading.Lock()
+
+    @property
+    def image(self) -> Optional[np.ndarray]:
+        if self._image is None and self.jpeg is not None:
+            with self._lock:
+                if self._image is None:
+                    self._image = self._decode(self.jpeg)
+        return self._image
+
+    @property
+    def decoded(self) -> bool:
+        return self._image is not None
+
+
+class FrameHub:
+    """캡처 장치를 소유하는 단일 캡처 스레드 + 최신 프레임 링 버퍼."""
+
+    def __init__(
+        self,
+        cap,
+        *,
+        ring_size: int = DEFAULT_RING_SIZE,
+        read_timeout: float = DEFAULT_READ_TIMEOUT_SEC,
+        start: bool = True,
+        governor=None,
+    ):
+        self._cap = cap
+        self._governor = governor
+        self._ring: Deque[Frame] = deque(maxlen=max(1, ring_size))
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._local = threading.local()
+        self._warp_stages: dict = {}
+        self._pool = get_pool()
+        self.read_timeout = read_timeout
+        self.read_failures = 0
+        if start:
+            self.start()
+
+    @property
+    def index(self):
+        """내부 캡처 장치 번호 (USBCapture.index와 동일)."""
+        return getattr(self._cap, "index", None)
+
+    @property
+    def capture(self):
+        return self._cap
+
+    # ------------------------------------------------------------------
+    # 생산자
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="frame-hub", daemon=True)
+        self._thread.start()
+
+    def _capture_loop(self) -> None:
+        consecutive_failures = 0
+        # USBCapture.read_frame()이 있으면 JPEG 원본을 받아 두고 디코딩은 소비자가 필요할 때만
+        read_frame = getattr(self._cap, "read_frame", None)
+        decode = getattr(self._cap, "decode", None)
+        last_capture = 0.0
+        while self._running:
+            if self._governor is not None and self._governor.throttle(last_capture) and self._running:
+                # 유휴 대기에서 깨어남: 장치 버퍼에 남아 있던 오래된 프레임 한 장은 버린다
+                try:
+                    if read_frame is not None:
+                        read_frame()
+                    else:
+                        self._cap.read()
+                except Exception:
+                    pass
+            last_capture = time.monotonic()
+            jpeg = None
+            try:
+                if read_frame is not None:
+                    ret, image, jpeg = read_frame()
+                else:
+                    ret, image = self._cap.read()
+            except Exception as exc:
+                ret, image = False, None
+                if consecutive_failures == 0:
+                    print(f"[FrameHub] read 예외: {exc}")
+            if not self._running:
+                break
+            if not ret or (image is None and jpeg is None):
+                consecutive_failures += 1
+                self.read_failures += 1
+                # 장치가 잠시 프레임을 못 줄 때 바쁜 루프를 피한다 (최대 0.5초 백오프)
+                time.sleep(min(0.5, 0.01 * consecutive_failures))
+                continue
+            consecutive_failures = 0
+            with self._cond:
+                self._seq += 1
+                self._ring.append(Frame(
+                    self._seq, time.time(), image, jpeg, decode,
+                    getattr(self._cap, "jpeg_rotation", 0),
+                ))
+                self._cond.notify_all()
+            self._pool.tick()
+
+    def release(self) -> None:
+        """캡처 스레드를 멈추고 장치를 해제."""
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        if hasattr(self._cap, "release"):
+            self._cap.release()
+
+    # ------------------------------------------------------------------
+    # 소비자
+    # ------------------------------------------------------------------
+    @property
+    def seq(self) -> int:
+        """지금까지 게시된 마지막 프레임의 시퀀스 번호 (없으면 0)."""
+        return self._seq
+
+    @property
+    def governor(self):
+        return self._governor
+
+    @property
+    def running(self) -> bool:
+        """캡처 스레드가 돌고 있는지 (release() 후 False)."""
+        return self._running
+
+    def _touch(self) -> None:
+        if self._governor is not None:
+            self._governor.touch()
+
+    def latest(self) -> Optional[Frame]:
+        """가장 최근 프레임. 아직 한 장도 없으면 None."""
+        self._touch()
+        with self._cond:
+            return self._ring[-1] if self._ring else None
+
+    def peek(self) -> Optional[Frame]:
+        """latest()와 같지만 governor를 깨우지 않는다 (유휴 속도로 충분한 백그라운드 감시용)."""
+        with self._cond:
+            return self._ring[-1] if self._ring else None
+
+    def wait_newer(self, seq: int = 0, timeout: Optional[float] = None) -> Optional[Frame]:
+        """시퀀스 번호가 seq보다 큰 프레임이 올 때까지 기다려 가장 최근 것을 반환 (시간 초과 시 None)."""
+        self._touch()
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > seq or not self._running, timeout):
+                return None
+            if self._seq <= seq:
+                return None
+            return self._ring[-1]
+
+    def first_seq_after(self, timestamp: float) -> Optional[int]:
+        """링에 남은 프레임 중 timestamp(time.time()) 이후에 게시된 가장 오래된 프레임의 seq (없으면 None)."""
+        with self._cond:
+            for frame in self._ring:
+                if frame.timestamp > timestamp:
+                    return frame.seq
+        return None
+
+    def latest_image(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """최신 프레임 이미지. 아직 프레임이 없으면 첫 프레임을 timeout까지 기다린다."""
+        frame = self.latest()
+        if frame is None:
+            frame = self.wait_newer(0, self.read_timeout if timeout is None else timeout)
+        return None if frame is None else frame.image
+
+    def iter_frames(self, timeout: Optional[float] = None) -> Iterator[Frame]:
+        """새 프레임이 올 때마다 최신 프레임을 내보낸다. 소비가 느리면 중간 프레임은 건너뛴다.
+
+        timeout 동안 새 프레임이 없거나 허브가 해제되면 종료.
+        """
+        seq = 0
+        while self._running:
+            frame = self.wait_newer(seq, timeout)
+            if frame is None:
+                return
+            seq = frame.seq
+            yield frame
+
+    def warp_stage(self, size: int = 400):
+        """cv_manager 수동 코너로 와핑하는 공용 WarpStage (크기별로 하나씩 공유)."""
+        stage = self._warp_stages.get(size)
+        if stage is None:
+            from cv.warp_stage import WarpStage
+
+            with self._cond:
+                stage = self._warp_stages.setdefault(size, WarpStage(self, size))
+        return stage
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """cv2.VideoCapture.read() 호환 인터페이스.
+
+        같은 스레드에서 연속으로 호출하면 매번 이전에 받은 것보다 새 프레임을 돌려준다
+        (여러 프레임 평균처럼 서로 다른 프레임이 필요한 기존 코드용).
+        """
+        last_seq = getattr(self._local, "seq", 0)
+        frame = self.wait_newer(last_seq, self.read_timeout)
+        if frame is None:
+            return False, None
+        self._local.seq = frame.seq
+        image = frame.image
+        return image is not None, image
@@ -0,0 +1,121 @@
+"""JPEG 인코딩/디코딩 백엔드.
+
+PyTurboJPEG(libjpeg-turbo)가 설치되어 있으면 그것을, 없으면 cv2.imencode/imdecode를 쓴다.
+- 크로마 서브샘플링 선택: "444" | "422" | "420" | "gray"
+- 1채널(그레이) 이미지는 그레이 JPEG으로 바로 인코딩 (색 변환/크로마 평면 없음)
+- decode(scale=...): TurboJPEG이면 DCT 단계에서 1/2, 1/4, 1/8로 줄여서 디코딩
+
+사용 예::
+
+    codec = get_codec()                 # 프로세스 공용 (백엔드 자동 선택)
+    data = codec.encode(img, quality=60, subsampling="420")
+    codec.backend                       # "turbojpeg" 또는 "opencv"
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from cv.buffer_pool import get_pool
+
+SUBSAMPLINGS = ("444", "422", "420", "gray")
+DEFAULT_SUBSAMPLING = "420"
+
+_CV2_SAMPLING = {
+    "444": getattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR_444", None),
+    "422": getattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR_422", None),
+    "420": getattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR_420", None),
+}
+
+
+def _clip_quality(quality: int) -> int:
+    return int(np.clip(quality, 10, 95))
+
+
+class JpegCodec:
+    """TurboJPEG 또는 OpenCV 기반 JPEG 코덱 (스레드 안전)."""
+
+    def __init__(self, prefer_turbo: bool = True, lib_path: Optional[str] = None):
+        self._turbo = None
+        self._tj = None
+        if prefer_turbo:
+            try:
+                import turbojpeg
+
+                self._turbo = turbojpeg.TurboJPEG(lib_path) if lib_path else turbojpeg.TurboJPEG()
+                self._tj = turbojpeg
+            except Exception:
+                # 파이썬 패키지나 libturbojpeg 공유 라이브러리가 없으면 OpenCV로 동작
+                self._turbo = None
+        self.backend = "turbojpeg" if self._turbo is not None else "opencv"
+
+    # ------------------------------------------------------------------
+    # 인코딩
+    # ------------------------------------------------------------------
+    def encode(self, img: np.ndarray, quality: int = 60, subsampling: str = DEFAULT_SUBSAMPLING) -> bytes:
+        """BGR(3채널) 또는 그레이(2차원/1채널) 이미지를 JPEG으로 인코딩."""
+        quality = _clip_quality(quality)
+        gray = img.ndim == 2 or img.shape[2] == 1
+        if gray:
+            subsampling = "gray"
+        elif subsampling == "gray":
+            # 그레이 변환 이미지는 인코딩하는 동안만 풀에서 빌린다
+            with get_pool().borrow(img.shape[:2]) as buf:
+                return self._encode(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=buf), quality, subsampling, True)
+        return self._encode(img, quality, subsampling, gray)
+
+    def _encode(self, img: np.ndarray, quality: int, subsampling: str, gray: bool) -> bytes:
+        if self._turbo is not None:
+            tj = self._tj
+            samp = {"444": tj.TJSAMP_444, "422": tj.TJSAMP_422, "420": tj.TJSAMP_420, "gray": tj.TJSAMP_GRAY}
+            if gray and img.ndim == 2:
+                img = img[:, :, None]
+            return self._turbo.encode(
+                np.ascontiguousarray(img),
+                quality=quality,
+                pixel_format=tj.TJPF_GRAY if gray else tj.TJPF_BGR,
+                jpeg_subsample=samp.get(subsampling, tj.TJSAMP_420),
+            )
+
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        factor = _CV2_SAMPLING.get(subsampling)
+        if factor is not None and not gray:
+            params += [int(cv2.IMWRITE_JPEG_SAMPLING_FACTOR), int(factor)]
+        ok, buf = cv2.imencode(".jpg", img, params)
+        if not ok:
+            raise RuntimeError("JPEG 인코딩 실패")
+        return buf.tobytes()
+
+    # ------------------------------------------------------------------
+    # 디코딩
+    # ------------------------------------------------------------------
+    def decode(self, data: bytes, scale: int = 1) -> Optional[np.ndarray]:
+        """JPEG → BGR. scale(1, 2, 4, 8)만큼 줄여서 디코딩 (TurboJPEG이면 DCT 단계에서 축소)."""
+        if self._turbo is not None:
+            try:
+                factor = None if scale <= 1 else (1, int(scale))
+                return self._turbo.decode(data, scaling_factor=factor)
+            except Exception:
+                return None
+        flags = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}.get(int(scale), cv2.IMREAD_COLOR)
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+
+
+_codec: Optional[JpegCodec] = None
+_codec_lock = threading.Lock()
+
+
+def get_codec() -> JpegCodec:
+    """프로세스 공용 코덱 (처음 호출할 때 백엔드를 선택)."""
+    global _codec
+    if _codec is None:
+        with _codec_lock:
+            if _codec is None:
+                _codec = JpegCodec()
+                print(f"[jpeg] 인코딩 백엔드: {_codec.backend}")
+    return _codec
@@ -0,0 +1,210 @@
+"""조명 정규화 단계.
+
+수 감지는 지금까지 칸별 변화량에서 전체 평균 이동(mean_shift)만 빼서 조명 변화를 보정했다.
+밝기가 곱으로 변하면(구름, 조명 켜짐, 자동 노출) 밝은 칸과 어두운 칸의 변화량이 달라서
+평균 이동만으로는 남는 차이가 생기고, 그게 가짜 변화 칸이 되어 재시도/수동 입력으로 이어졌다.
+
+- LightingNormalizer: 기준 보드의 빈 칸 통계를 캐시해 두고, 현재 칸 평균에서 채널별
+  current ≈ gain * reference + offset을 빈 칸만으로 맞춘다 (이상치 칸은 MAD로 한 번 걸러 다시 맞춤).
+  빈 칸은 밝은 칸/어두운 칸이 섞여 있어 gain과 offset을 함께 추정할 수 있다.
+  normalize()는 현재 값을 기준 조명으로 되돌린 값을 돌려준다.
+- correct_image(): 추정한 gain/offset을 채널별 LUT로 만들어 (같은 값이면 재사용) 이미지 전체에 적용.
+- BoardReference: 기준 보드 하나의 BGR/LAB 정규화기 묶음. WarpStage.set_reference()로 붙여 두면
+  WarpedFrame이 프레임마다 한 번만 보정하고 스트림 뷰/턴 전환이 그 결과를 같이 쓴다.
+- get_clahe(): 스레드별로 재사용하는 CLAHE 객체 (호출마다 createCLAHE하지 않음).
+
+사용 예::
+
+    normalizer = LightingNormalizer(gain_channels=(0,))   # LAB: L만 곱, a/b는 이동만
+    normalizer.set_reference(prev_lab, chess_pieces)       # 같은 기준이면 다시 계산하지 않음
+    deltas = normalizer.normalize(curr_lab) - prev_lab
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+CLAHE_CLIP = 2.0
+CLAHE_TILES = (8, 8)
+MIN_EMPTY_SQUARES = 8           # 이보다 빈 칸이 적으면 전체 칸으로 맞춤 (이상치 제거는 동일)
+MIN_REFERENCE_STD = 2.0         # 기준값 분산이 이보다 작은 채널은 gain 없이 offset만
+GAIN_RANGE = (0.5, 2.0)
+OUTLIER_MAD = 3.0
+SATURATION = (5.0, 250.0)       # 빈 칸 값이 이 범위 밖이면 클리핑된 것으로 보고 평균 이동만
+
+_local = threading.local()
+
+
+def get_clahe(clip: float = CLAHE_CLIP, tiles: Tuple[int, int] = CLAHE_TILES):
+    """(clip, tiles)별로 만들어 재사용하는 CLAHE 객체 (스레드마다 하나)."""
+    cache: Dict[tuple, object] = getattr(_local, "clahe", None)
+    if cache is None:
+        cache = _local.clahe = {}
+    key = (float(clip), tuple(tiles))
+    clahe = cache.get(key)
+    if clahe is None:
+        clahe = cache[key] = cv2.createCLAHE(clipLimit=clip, tileGridSize=tuple(tiles))
+    return clahe
+
+
+def equalize(
+    gray: np.ndarray, clip: float = CLAHE_CLIP, tiles: Tuple[int, int] = CLAHE_TILES, dst: Optional[np.ndarray] = None
+) -> np.ndarray:
+    return get_clahe(clip, tiles).apply(gray, dst=dst)
+
+
+def empty_mask(pieces) -> Optional[np.ndarray]:
+    """chess_pieces(8x8, 빈 칸은 '')에서 빈 칸 (8, 8) bool. 배열이 아니면 None."""
+    if not isinstance(pieces, (list, tuple)) or len(pieces) != 8:
+        return None
+    try:
+        return np.array([[not cell for cell in row] for row in pieces], dtype=bool).reshape(8, 8)
+    except ValueError:
+        return None
+
+
+@dataclass
+class LightingGain:
+    """채널별 current ≈ gain * reference + offset."""
+
+    gain: np.ndarray
+    offset: np.ndarray
+    samples: int
+
+    def apply(self, values: np.ndarray) -> np.ndarray:
+        """현재 조명의 값을 기준 조명으로 되돌린다."""
+        return ((np.asarray(values, dtype=np.float32) - self.offset) / self.gain).astype(np.float32)
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            "gain": [round(float(g), 3) for g in self.gain],
+            "offset": [round(float(o), 2) for o in self.offset],
+            "samples": self.samples,
+        }
+
+
+def _fit_channel(x: np.ndarray, y: np.ndarray, fit_gain: bool) -> Tuple[float, float]:
+    if fit_gain:
+        mx, my = x.mean(), y.mean()
+        dx = x - mx
+        var = float(np.dot(dx, dx))
+        if var > 0:
+            g = float(np.clip(np.dot(dx, y - my) / var, *GAIN_RANGE))
+            return g, float(my - g * mx)
+    return 1.0, float(np.median(y - x))
+
+
+class LightingNormalizer:
+    """기준 보드 빈 칸 통계를 캐시하고 현재 칸 평균의 조명 gain/offset을 추정."""
+
+    def __init__(self, gain_channels: Sequence[int] = (0, 1, 2), min_samples: int = MIN_EMPTY_SQUARES):
+        self.gain_channels = tuple(gain_channels)
+        self.min_samples = min_samples
+        self.last_gain: Optional[LightingGain] = None
+        # (key, 기준 (64, C), 빈 칸 (64,), 빈 칸 기준 (N, C), 채널별 gain 추정 여부)를 한 번에 교체 (스레드 안전)
+        self._state: Optional[tuple] = None
+        self._luts: Dict[tuple, np.ndarray] = {}
+
+    def set_reference(self, reference: np.ndarray, pieces=None) -> None:
+        """기준 칸 평균 (8, 8, C)과 기물 배열. 같은 기준/빈 칸이면 캐시를 그대로 쓴다."""
+        ref = np.asarray(reference, dtype=np.float32)
+        mask = empty_mask(pieces)
+        if mask is None:
+            mask = np.ones(ref.shape[:2], dtype=bool)
+        key = ref.tobytes() + mask.tobytes()
+        if self._state is not None and self._state[0] == key:
+            return
+        ref = ref.reshape(-1, ref.shape[-1])
+        mask = mask.reshape(-1)
+        if int(mask.sum()) < self.min_samples:
+            mask = np.ones_like(mask)
+        ref_fit = ref[mask]
+        std = ref_fit.std(axis=0)
+        fit_gain = tuple(c in self.gain_channels and float(std[c]) >= MIN_REFERENCE_STD for c in range(ref.shape[1]))
+        self._state = (key, ref, mask, ref_fit, fit_gain)
+
+    def estimate(self, current: np.ndarray) -> LightingGain:
+        """빈 칸으로 채널별 gain/offset을 맞추고, 잔차가 큰 칸(움직인 기물, 손)을 빼고 한 번 더 맞춘다."""
+        state = self._state
+        if state is None:
+            raise RuntimeError("set_reference()를 먼저 호출해야 합니다")
+        _, full_ref, mask, ref, fit_gain = state
+        cur_full = np.asarray(current, dtype=np.float32).reshape(full_ref.shape)
+        cur = cur_full[mask]
+        channels = ref.shape[1]
+        gain = np.ones(channels, dtype=np.float32)
+        offset = np.zeros(channels, dtype=np.float32)
+        keep = np.ones(len(ref), dtype=bool)
+        for c in range(channels):
+            x, y = ref[:, c], cur[:, c]
+            if ((x <= SATURATION[0]) | (x >= SATURATION[1]) | (y <= SATURATION[0]) | (y >= SATURATION[1])).any():
+                # 포화된 칸이 있으면 선형 관계가 깨지므로 기존 방식(전체 칸 평균 이동)으로
+                offset[c] = float((cur_full[:, c] - full_ref[:, c]).mean())
+                continue
+            g, o = _fit_channel(x, y, fit_gain[c])
+            resid = y - (g * x + o)
+            mad = float(np.median(np.abs(resid - np.median(resid))))
+            inliers = np.abs(resid) <= OUTLIER_MAD * 1.4826 * mad + 1.0
+            if inliers.sum() >= max(2, len(x) // 2) and not inliers.all():
+                g, o = _fit_channel(x[inliers], y[inliers], fit_gain[c])
+            keep &= inliers
+            gain[c], offset[c] = g, o
+        self.last_gain = LightingGain(gain, offset, int(keep.sum()))
+        return self.last_gain
+
+    def normalize(self, current: np.ndarray) -> np.ndarray:
+        """current를 기준 조명으로 되돌린 값 (current와 같은 shape)."""
+        return self.estimate(current).apply(current)
+
+    def correct_image(self, image: np.ndarray, gain: Optional[LightingGain] = None) -> np.ndarray:
+        """gain(기본은 마지막 추정값)을 채널별 LUT로 이미지에 적용 (BGR 기준값으로 추정한 경우)."""
+        gain = gain if gain is not None else self.last_gain
+        if gain is None:
+            return image
+        key = tuple(np.round(gain.gain, 3)) + tuple(np.round(gain.offset, 1))
+        lut = self._luts.get(key)
+        if lut is None:
+            v = np.arange(256, dtype=np.float32)[:, None]
+            lut = np.clip((v - gain.offset) / gain.gain + 0.5, 0, 255).astype(np.uint8)
+            lut = lut.reshape(1, 256, -1)
+            if len(self._luts) >= 16:
+                self._luts.clear()
+            self._luts[key] = lut
+        if image.ndim == 2 or lut.shape[2] != image.shape[2]:
+            return image
+        return cv2.LUT(image, lut)
+
+
+def bgr_grid_to_lab(values: np.ndarray) -> np.ndarray:
+    """칸별 BGR 평균 (8, 8, 3)을 LAB으로 ((8, 8) 이미지 한 번 변환, uint8 반올림 규칙은 기존과 같음)."""
+    bgr = np.asarray(values).astype(np.uint8).reshape(8, 8, 3)
+    return cv2.cvtColor(bgr, cv2.COLOR_BGR2LAB).astype(np.float32)
+
+
+def reference_key(reference: np.ndarray, pieces=None) -> bytes:
+    """기준값과 빈 칸 배치가 같은지 비교하는 키."""
+    mask = empty_mask(pieces)
+    return np.asarray(reference, dtype=np.float32).tobytes() + (b"" if mask is None else mask.tobytes())
+
+
+class BoardReference:
+    """기준 보드 칸 평균(BGR)과 기물 배열 하나에 대한 BGR/LAB 정규화기.
+
+    - bgr: 채널별 gain + offset (스트림 diff 뷰)
+    - lab: L만 gain + offset, a/b(색온도)는 offset만 (턴 전환)
+    """
+
+    def __init__(self, reference_bgr: np.ndarray, pieces=None, generation: int = 0):
+        self.values = np.array(reference_bgr, dtype=np.float32).reshape(8, 8, 3)
+        self.key = reference_key(self.values, pieces)
+        self.generation = generation
+        self.lab_values = bgr_grid_to_lab(self.values)
+        self.bgr = LightingNormalizer()
+        self.bgr.set_reference(self.values, pieces)
+        self.lab = LightingNormalizer(gain_channels=(0,))
+        self.lab.set_reference(self.lab_values, pieces)
@@ -0,0 +1,377 @@
+"""초록 코너 마커 검증기.
+
+mjpg/marker_validator.py(단독 Picamera2 도구)의 검증 항목을 어떤 캡처 파이프라인에서든 부를 수 있게 만든 모듈.
+
+- 기하: 대변 길이 차이, 내각의 90도 오차, 면적을 (4, 2) 배열 연산으로 한 번에 계산
+- 색상/크기: 네 마커 주변 패치만 잘라 한 번의 HSV 변환으로 평균 색상과 마커 픽셀 수를 구한다
+  (전체 프레임을 두 번 HSV로 바꾸던 것을 패치 4개로 줄임)
+- 크기 추세: 마커 평균 크기를 Welford 누적 평균/분산으로 추적해 갑자기 작아지면(손에 가려짐 등) 실패
+- 위치 안정성: 최근 window 프레임 최대 이동량의 링 버퍼 합으로 O(1) 안정성 점수 계산
+- 이력은 고정 길이 deque, 통과/전체 프레임 수는 카운터로만 유지 (무한히 쌓이는 리스트 없음)
+
+CornerTracker(validator=...)에 넘기면 검출/추적된 코너가 기하/색상/크기 검사를 통과할 때만 lock한다.
+
+사용 예::
+
+    validator = MarkerValidator()
+    result = validator.validate(frame, corners)   # {"geometric": (ok, msg), ..., "overall": (ok, msg), "score": 0~1}
+    validator.is_stable                           # required_stable_frames 연속 통과 여부
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from cv import picam_stable
+
+Check = Tuple[bool, str]
+
+PATCH_HALF = 10                 # 마커 중심 주변 패치 반지름 (20x20, 원본 도구와 같음)
+COLOR_PATCH_HALF = 5            # 색상 평균용 안쪽 패치 반지름 (10x10)
+MAX_OPPOSITE_DIFF = 0.1         # 대변 길이 차이 비율
+MAX_ANGLE_ERROR = 15.0          # 내각의 90도 오차 (도)
+# 원본 도구의 픽셀 한계(1280x720에서 10000 ~ 200000 px)를 프레임 면적 비율로 (약 0.011 ~ 0.217)
+MIN_AREA_FRACTION = 10000 / (1280 * 720)
+MAX_AREA_FRACTION = 200000 / (1280 * 720)
+# CornerTracker 게이트용 상한: 게임/데이터셋 카메라는 보드가 화면을 꽉 채우게 달기 때문에
+# (640x480에 보드 약 46%, capture_sources.SyntheticBoardSource 기본 배치도 같음) 원본 한계로는
+# 실제 보드를 거절한다. 화면 전체를 덮는 잘못된 사각형만 막도록 0.6으로 둔다.
+TRACKER_AREA_FRACTION = (MIN_AREA_FRACTION, 0.6)
+MAX_HSV_STD = (10.0, 30.0, 30.0)
+MAX_SIZE_CV = 0.3               # 마커 크기 변동계수
+SIZE_DROP_RATIO = 0.5           # 누적 평균 대비 이만큼 이하로 작아지면 실패
+MAX_MOVE_PX = 20.0              # 프레임 간 최대 이동량
+STABILITY_WINDOW = 15
+REQUIRED_STABLE_FRAMES = 10
+HISTORY_LEN = 50
+
+_NEXT = np.array([1, 2, 3, 0])   # 꼭짓점 i 다음 꼭짓점 (np.roll보다 인덱싱이 빠름)
+
+
+def quad_metrics(corners) -> Dict[str, Any]:
+    """(4, 2) 코너(TL, TR, BR, BL)의 변 길이, 대변 차이, 내각, 면적."""
+    pts = np.asarray(corners, dtype=np.float64).reshape(4, 2)
+    edges = pts[_NEXT] - pts                               # p[i] → p[i+1]
+    sides = np.hypot(edges[:, 0], edges[:, 1])
+    opposite = np.abs(sides[:2] - sides[2:]) / np.maximum(np.maximum(sides[:2], sides[2:]), 1e-9)
+    # 꼭짓점 i+1의 내각: (p[i] - p[i+1])와 (p[i+2] - p[i+1]) 사이
+    v1 = -edges
+    v2 = edges[_NEXT]
+    cos = np.einsum("ij,ij->i", v1, v2) / np.maximum(sides * sides[_NEXT], 1e-9)
+    angles = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+    x, y = pts[:, 0], pts[:, 1]
+    area = 0.5 * abs(np.dot(x, y[_NEXT]) - np.dot(y, x[_NEXT]))
+    return {"sides": sides, "opposite_diff": opposite, "angles": angles, "area": float(area)}
+
+
+def marker_patches(frame: np.ndarray, corners, half: int = PATCH_HALF) -> np.ndarray:
+    """네 코너 주변 (2*half)x(2*half) 패치를 (4, 2*half, 2*half, 3)으로 (프레임 밖은 가장자리 픽셀로 채움)."""
+    h, w = frame.shape[:2]
+    c = np.rint(np.asarray(corners, dtype=np.float64).reshape(4, 2)).astype(np.intp)
+    offs = np.arange(-half, half)
+    ys = np.clip(c[:, 1, None] + offs, 0, h - 1)           # (4, n)
+    xs = np.clip(c[:, 0, None] + offs, 0, w - 1)
+    return frame[ys[:, :, None], xs[:, None, :]]
+
+
+class RunningStats:
+    """Welford 누적 평균/분산 (O(1) 갱신)."""
+
+    __slots__ = ("count", "mean", "_m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def reset(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+
+class RingMean:
+    """최근 size개 값의 평균 (링 버퍼 + 누적 합, O(1))."""
+
+    def __init__(self, size: int):
+        self._buf = np.zeros(max(1, size), dtype=np.float64)
+        self._pos = 0
+        self._len = 0
+        self._sum = 0.0
+
+    def push(self, value: float) -> None:
+        if self._len == len(self._buf):
+            self._sum -= self._buf[self._pos]
+        else:
+            self._len += 1
+        self._buf[self._pos] = value
+        self._sum += value
+        self._pos = (self._pos + 1) % len(self._buf)
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self._len if self._len else 0.0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def reset(self) -> None:
+        self._pos = self._len = 0
+        self._sum = 0.0
+
+
+class MarkerValidator:
+    """코너 4점이 실제 보드 마커인지 검증하고 프레임 간 안정성을 추적 (스레드 하나에서 사용)."""
+
+    def __init__(
+        self,
+        lower=None,
+        upper=None,
+        *,
+        max_opposite_diff: float = MAX_OPPOSITE_DIFF,
+        max_angle_error: float = MAX_ANGLE_ERROR,
+        area_fraction: Tuple[float, float] = (MIN_AREA_FRACTION, MAX_AREA_FRACTION),
+        max_hsv_std: Tuple[float, float, float] = MAX_HSV_STD,
+        max_size_cv: float = MAX_SIZE_CV,
+        max_move: float = MAX_MOVE_PX,
+        stability_window: int = STABILITY_WINDOW,
+        required_stable_frames: int = REQUIRED_STABLE_FRAMES,
+        history_len: int = HISTORY_LEN,
+    ):
+        self.lower = np.array(lower if lower is not None else
+                              [picam_stable.Hmin, picam_stable.Smin, picam_stable.Vmin], dtype=np.uint8)
+        self.upper = np.array(upper if upper is not None else
+                              [picam_stable.Hmax, picam_stable.Smax, picam_stable.Vmax], dtype=np.uint8)
+        self.max_opposite_diff = max_opposite_diff
+        self.max_angle_error = max_angle_error
+        self.area_fraction = area_fraction
+        self.max_hsv_std = np.asarray(max_hsv_std, dtype=np.float64)
+        self.max_size_cv = max_size_cv
+        self.max_move = max_move
+        self.required_stable_frames = required_stable_frames
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history_len)
+        self.size_stats = RunningStats()
+        self.motion = RingMean(stability_window)
+        self._prev: Optional[np.ndarray] = None
+        self.stable_count = 0
+        self.total_frames = 0
+        self.valid_frames = 0
+
+    # ------------------------------------------------------------------
+    # 개별 검사 (상태 없음)
+    # ------------------------------------------------------------------
+    def geometric_validation(self, corners, frame_shape=None) -> Check:
+        m = quad_metrics(corners)
+        if (m["opposite_diff"] > self.max_opposite_diff).any():
+            d = m["opposite_diff"]
+            return False, f"대변 길이 차이: {d[0]:.2f}, {d[1]:.2f}"
+        angle_error = float(np.abs(m["angles"] - 90.0).max())
+        if angle_error > self.max_angle_error:
+            return False, f"각도 오차: {angle_error:.1f}도"
+        area = m["area"]
+        if frame_shape is not None:
+            frame_area = float(frame_shape[0] * frame_shape[1])
+            lo, hi = self.area_fraction
+            if not (lo * frame_area <= area <= hi * frame_area):
+                return False, f"면적 부적절: {area:.0f}"
+        return True, f"기하학적 검증 통과 (면적: {area:.0f})"
+
+    def _patch_checks(self, frame: np.ndarray, corners) -> Tuple[Check, Check, float]:
+        """(색상 결과, 크기 결과, 평균 마커 크기). 패치 4개를 한 번에 HSV 변환."""
+        patches = marker_patches(frame, corners, PATCH_HALF)                 # (4, n, n, 3)
+        n = patches.shape[1]
+        hsv = cv2.cvtColor(patches.reshape(4 * n, n, 3), cv2.COLOR_BGR2HSV).reshape(4, n, n, 3)
+
+        inner = slice(PATCH_HALF - COLOR_PATCH_HALF, PATCH_HALF + COLOR_PATCH_HALF)
+        colors = hsv[:, inner, inner].reshape(4, -1, 3).mean(axis=1)          # (4, 3)
+        hsv_std = colors.std(axis=0)
+        if (hsv_std > self.max_hsv_std).any():
+            color = (False, f"색상 불일치: H={hsv_std[0]:.1f}, S={hsv_std[1]:.1f}, V={hsv_std[2]:.1f}")
+        else:
+            color = (True, f"색상 일관성 통과 (H={hsv_std[0]:.1f}, S={hsv_std[1]:.1f}, V={hsv_std[2]:.1f})")
+
+        in_range = ((hsv >= self.lower) & (hsv <= self.upper)).all(axis=3)   # (4, n, n)
+        sizes = in_range.reshape(4, -1).sum(axis=1).astype(np.float64)
+        size_mean = float(sizes.mean())
+        cv = float(sizes.std() / size_mean) if size_mean > 0 else 1.0
+        if cv > self.max_size_cv:
+            size = (False, f"크기 불일치: CV={cv:.2f} (평균={size_mean:.0f})")
+        elif (self.size_stats.count >= self.required_stable_frames
+              and size_mean < SIZE_DROP_RATIO * self.size_stats.mean):
+            size = (False, f"마커 크기 감소: 평균={size_mean:.0f} (누적 {self.size_stats.mean:.0f})")
+        else:
+            size = (True, f"크기 일관성 통과 (CV={cv:.2f}, 평균={size_mean:.0f})")
+        return color, size, size_mean
+
+    def check(self, frame: np.ndarray, corners) -> bool:
+        """기하/색상/크기만 보는 빠른 판정 (상태를 바꾸지 않음, CornerTracker 게이트용)."""
+        if corners is None or np.asarray(corners).size != 8:
+            return False
+        if not self.geometric_validation(corners, frame.shape)[0]:
+            return False
+        color, size, _ = self._patch_checks(frame, corners)
+        return color[0] and size[0]
+
+    # ------------------------------------------------------------------
+    # 프레임 단위 검증 (상태 갱신)
+    # ------------------------------------------------------------------
+    @property
+    def is_stable(self) -> bool:
+        return self.stable_count >= self.required_stable_frames
+
+    @property
+    def stability_score(self) -> float:
+        """0~1. 최근 프레임들의 평균 최대 이동량이 0이면 1, max_move 이상이면 0."""
+        if not len(self.motion):
+            return 0.0
+        return max(0.0, 1.0 - self.motion.mean / self.max_move)
+
+    def _stability(self, pts: Optional[np.ndarray]) -> Check:
+        if pts is None:
+            return False, "4개 점이 아님"
+        if self._prev is None:
+            return True, "첫 번째 프레임"
+        moves = np.hypot(*(pts - self._prev).T)
+        max_move = float(moves.max())
+        self.motion.push(max_move)
+        if max_move > self.max_move:
+            return False, f"위치 불안정: 최대이동={max_move:.1f}px"
+        return True, f"위치 안정: 평균이동={float(moves.mean()):.1f}px"
+
+    def validate(self, frame: np.ndarray, corners) -> Dict[str, Any]:
+        """전체 검증. 원본 도구와 같은 키({"geometric", "color", "size", "stability", "overall"})에
+        "corners", "timestamp", "score"를 더한 딕셔너리를 반환한다."""
+        pts = None
+        if corners is not None and np.asarray(corners).size == 8:
+            pts = np.asarray(corners, dtype=np.float32).reshape(4, 2)
+
+        if pts is None:
+            missing = (False, "4개 점이 아님")
+            geometric = color = size = missing
+            size_mean = None
+        else:
+            geometric = self.geometric_validation(pts, frame.shape)
+            color, size, size_mean = self._patch_checks(frame, pts)
+        stability = self._stability(pts)
+
+        passed = geometric[0] and color[0] and size[0] and stability[0]
+        self.total_frames += 1
+        if passed:
+            self.valid_frames += 1
+            self.stable_count += 1
+            self.size_stats.push(size_mean)
+        else:
+            self.stable_count = 0
+        self._prev = pts
+
+        result = {
+            "corners": pts,
+            "timestamp": time.time(),
+            "geometric": geometric,
+            "color": color,
+            "size": size,
+            "stability": stability,
+            "overall": (passed, "전체 검증 통과" if passed else "일부 검증 실패"),
+            "score": self.stability_score if passed else 0.0,
+        }
+        self.history.append(result)
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "frames": self.total_frames,
+            "valid": self.valid_frames,
+            "stable": self.is_stable,
+            "score": round(self.stability_score, 3),
+            "marker_size": round(self.size_stats.mean, 1),
+        }
+
+    def reset(self) -> None:
+        self.history.clear()
+        self.size_stats.reset()
+        self.motion.reset()
+        self._prev = None
+        self.stable_count = 0
+
+
+def draw_validation(frame: np.ndarray, validator: MarkerValidator, result: Dict[str, Any]) -> np.ndarray:
+    """검증 결과를 프레임에 그린다 (원본 도구의 화면과 같은 배치, 제자리 수정)."""
+    corners = result["corners"]
+    if corners is not None:
+        colors = [(0, 0, 255), (0, 255, 0), (255, 0, 0), (255, 255, 0)]
+        for (x, y), color, label in zip(corners, colors, ("TL", "TR", "BR", "BL")):
+            x, y = int(x), int(y)
+            cv2.circle(frame, (x, y), 15, color, -1)
+            cv2.circle(frame, (x, y), 20, (255, 255, 255), 2)
+            cv2.putText(frame, label, (x - 10, y - 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+        cv2.polylines(frame, [corners.reshape(-1, 1, 2).astype(np.int32)], True, (255, 255, 255), 2)
+
+    y = 30
+    for key in ("geometric", "color", "size", "stability", "overall"):
+        passed, message = result[key]
+        color = (0, 255, 0) if passed else (0, 0, 255)
+        cv2.putText(frame, f"{'OK' if passed else 'NG'} {key.upper()}: {message}", (10, y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        y += 25
+    stable_color = (0, 255, 0) if validator.is_stable else (0, 255, 255)
+    cv2.putText(frame, f"stable {validator.stable_count}/{validator.required_stable_frames} "
+                f"score={validator.stability_score:.2f}", (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, stable_color, 2)
+    return frame
+
+
+def main(source: Optional[str] = None) -> None:
+    """단독 실행: 캡처 소스(기본 CHESS_CAPTURE_SOURCE 또는 USB)에서 마커를 찾아 검증 결과를 화면에 표시.
+
+    키: q 종료, r 리셋, s 현재 코너 출력
+    """
+    from cv.capture_sources import open_capture
+    from cv.corner_tracker import CornerTracker
+
+    cap = open_capture(source)
+    validator = MarkerValidator()
+    tracker = CornerTracker(stabilize=False, validator=MarkerValidator(area_fraction=TRACKER_AREA_FRACTION))
+    print("[marker] 초록색 마커 검증 시작 (q: 종료, r: 리셋, s: 현재 코너 출력)")
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            result = validator.validate(frame, tracker.update(frame))
+            cv2.imshow("Marker Validator", draw_validation(frame, validator, result))
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord("q"):
+                break
+            if key == ord("r"):
+                validator.reset()
+                tracker.reset()
+                print("[marker] 검증 이력 리셋")
+            elif key == ord("s") and result["corners"] is not None:
+                print(f"[marker] 코너: {result['corners'].tolist()} / {result['overall'][1]}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cap.release()
+        cv2.destroyAllWindows()
+        s = validator.summary()
+        if s["frames"]:
+            print(f"[marker] {s['valid']}/{s['frames']} 프레임 검증 통과 ({s['valid'] / s['frames'] * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
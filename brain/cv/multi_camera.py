@@ -0,0 +1,319 @@
+"""다중 카메라 융합.
+
+카메라 하나로는 로봇팔/손이 보드 일부를 가리는 동안 그 칸을 볼 수 없어서, 로봇 수 뒤에는
+팔이 시야에서 빠질 때까지 기다렸다가 감지해야 했다. 보조 카메라를 다른 방향에 두면
+한쪽에서 가려진 칸을 다른 쪽에서 볼 수 있다.
+
+- CameraView: 카메라마다 FrameHub + 보정(주 카메라는 cv_manager 코너, 보조 카메라는
+  board_calibration 프로필 "cam1"과 자체 DriftMonitor)
+- 카메라별 와핑은 각 허브의 WarpStage(remap 맵 캐시, 같은 프레임이면 웹 UI 등과 결과 공유)로
+  카메라당 읽기 스레드에서 병렬로 (cv2.remap은 GIL을 놓는다). 원본 프레임을 프로세스로 피클링하지 않는다.
+  무거운 ML 추론만 aicv.inference_worker(공유 메모리 프로세스)가 맡는다
+- 카메라마다 보드를 보는 방향이 다르므로 (코너는 화면 위치로 정렬된다) 칸 확률을 np.rot90으로
+  주 카메라 방향에 맞춘 뒤 합친다. 보조 카메라 방향은 보정 프로필 rotation에 저장하고,
+  없으면 첫 융합 때 예상 보드와 가장 잘 맞는 회전으로 정해 프로필에 기록한다
+- 칸별 가시성 가중치 = 기하 가중치(보는 각도 cos * 화면 속 칸 크기) * 가림 가중치 * 모델 신뢰도.
+  가림은 예상 보드와 다른 칸이 한 수로 설명할 수 없을 만큼 크게 뭉친 덩어리(팔)로 판단하고
+  한 칸 팽창해서 가장자리까지 뺀다
+- fuse_probs(): 카메라별 칸 확률을 가중 평균. 어느 카메라도 못 보는 칸은 visible=False
+
+사용 예::
+
+    fusion = MultiCameraDetector([CameraView("main", hub), CameraView("cam1", hub2, monitor2)])
+    frames = fusion.capture_warped(n_frames=3)                      # 카메라별 와핑 프레임 목록
+    probs = [detector.predict_frames(f)[1] for f in frames]
+    result = fusion.fuse_probs(probs, expected_grid)                # FusedPrediction
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from cv.square_sampling import GRID, camera_position, default_camera_matrix
+
+SECONDARY_SOURCE_ENV = "CHESS_CAPTURE_SOURCE_2"
+SECONDARY_PROFILE = "cam1"
+WARP_SIZE = 400
+MAX_MOVE_SQUARES = 4            # 한 수로 바뀌는 칸 수 상한 (캐슬링 4칸). 이보다 큰 변화 덩어리는 가림
+MIN_VISIBLE_WEIGHT = 0.05       # 칸별 가중치 합이 이보다 작으면 어느 카메라도 못 본 칸
+MIN_ROTATION_MARGIN = 0.1       # 방향 추정: 1등과 2등 회전의 예상 보드 일치율 차이가 이보다 작으면 보류
+# predict_frames의 _to_chess_orientation(전치 + 상하 반전)은 np.rot90 한 번과 같다.
+# 와핑 이미지 격자로 계산한 기하 가중치를 체스 좌표 확률에 맞출 때 쓴다
+IMAGE_TO_CHESS_TURNS = 1
+
+
+def estimate_rotation(probs: np.ndarray, expected_grid: np.ndarray) -> Tuple[Optional[int], List[float]]:
+    """np.rot90(probs, k)가 예상 보드와 가장 잘 맞는 k (0~3)와 k별 일치율. 차이가 작으면 k는 None."""
+    grid = np.asarray(probs).argmax(axis=2)
+    expected_grid = np.asarray(expected_grid)
+    scores = [float((np.rot90(grid, k) == expected_grid).mean()) for k in range(4)]
+    order = np.argsort(scores)[::-1]
+    if scores[order[0]] - scores[order[1]] < MIN_ROTATION_MARGIN:
+        return None, scores
+    return int(order[0]), scores
+
+
+def geometry_weights(
+    corners, frame_size: Tuple[int, int], camera_matrix: Optional[np.ndarray] = None, dist_coeffs=None
+) -> np.ndarray:
+    """칸별 기하 가중치 (8, 8) in [0, 1]: 보는 각도의 cos * sqrt(화면 속 칸 넓이 / 가장 큰 칸 넓이)."""
+    corners = np.asarray(corners, dtype=np.float32).reshape(4, 2)
+    K = camera_matrix if camera_matrix is not None else default_camera_matrix(frame_size)
+    jj, ii = np.meshgrid(np.arange(GRID) + 0.5, np.arange(GRID) + 0.5)
+    camera = camera_position(corners, K, dist_coeffs)
+    if camera is None:
+        cos = np.ones((GRID, GRID))
+    else:
+        dx, dy, h = jj - camera[0], ii - camera[1], camera[2]
+        cos = h / np.sqrt(dx * dx + dy * dy + h * h)
+    # 보드 좌표(칸 단위) → 이미지 좌표로 칸 격자점을 투영해 칸별 화면 넓이를 구한다
+    src = np.array([[0, 0], [GRID, 0], [GRID, GRID], [0, GRID]], dtype=np.float32)
+    H = cv2.getPerspectiveTransform(src, corners)
+    gy, gx = np.mgrid[0:GRID + 1, 0:GRID + 1].astype(np.float32)
+    pts = cv2.perspectiveTransform(np.stack([gx, gy], axis=-1).reshape(-1, 1, 2), H).reshape(GRID + 1, GRID + 1, 2)
+    a, b, c, d = pts[:-1, :-1], pts[:-1, 1:], pts[1:, 1:], pts[1:, :-1]
+    area = 0.5 * np.abs(
+        (a[..., 0] * b[..., 1] - b[..., 0] * a[..., 1])
+        + (b[..., 0] * c[..., 1] - c[..., 0] * b[..., 1])
+        + (c[..., 0] * d[..., 1] - d[..., 0] * c[..., 1])
+        + (d[..., 0] * a[..., 1] - a[..., 0] * d[..., 1])
+    )
+    size = np.sqrt(area / max(float(area.max()), 1e-9))
+    return (cos * size).astype(np.float32)
+
+
+def occlusion_mask(changed: np.ndarray, max_move: int = MAX_MOVE_SQUARES) -> np.ndarray:
+    """예상과 다른 칸 (8, 8) bool에서 한 수로 설명되지 않는 큰 덩어리(+한 칸 팽창)를 가림으로 표시."""
+    changed = np.asarray(changed, dtype=np.uint8)
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(changed, connectivity=8)
+    big = [i for i in range(1, n) if stats[i, cv2.CC_STAT_AREA] > max_move]
+    if not big:
+        return np.zeros(changed.shape, dtype=bool)
+    mask = np.isin(labels, big).astype(np.uint8)
+    return cv2.dilate(mask, np.ones((3, 3), np.uint8)).astype(bool)
+
+
+@dataclass
+class FusedPrediction:
+    """카메라별 칸 확률을 가시성 가중치로 합친 결과."""
+
+    grid: np.ndarray            # (8, 8) 클래스
+    probs: np.ndarray           # (8, 8, K)
+    weight: np.ndarray          # (8, 8) 가중치 합
+    visible: np.ndarray         # (8, 8) bool
+    occluded: List[np.ndarray]  # 카메라별 가림 칸 (8, 8) bool
+
+    @property
+    def hidden_squares(self) -> int:
+        return int((~self.visible).sum())
+
+
+class CameraView:
+    """카메라 하나의 프레임 허브와 보정 정보.
+
+    monitor(board_calibration.DriftMonitor)가 있으면 그 프로필 코너/카메라 모델/방향을 쓰고
+    (재보정되면 자동으로 따라감), 없으면 cv_manager의 현재 코너를 쓴다 (주 카메라).
+    rotation은 이 카메라 칸 확률을 주 카메라 방향으로 맞추는 np.rot90 횟수 (주 카메라는 0,
+    None이면 융합 때 추정). monitor가 있으면 프로필 값을 쓴다.
+    """
+
+    def __init__(self, name: str, hub, monitor=None, rotation: Optional[int] = 0):
+        self.name = name
+        self.hub = hub
+        self.monitor = monitor
+        self._rotation = rotation
+        self._geometry: Optional[Tuple[bytes, np.ndarray]] = None
+        self._stages: Dict[int, object] = {}
+
+    def warp_stage(self, size: int = WARP_SIZE):
+        """이 카메라 코너로 와핑하는 WarpStage (주 카메라는 허브 공용 단계, 보조 카메라는 프로필 코너)."""
+        stage = self._stages.get(size)
+        if stage is None:
+            if self.monitor is None and hasattr(self.hub, "warp_stage"):
+                stage = self.hub.warp_stage(size)
+            else:
+                from cv.warp_stage import WarpStage
+
+                stage = WarpStage(self.hub, size, corners_fn=self.corners)
+            stage = self._stages.setdefault(size, stage)
+        return stage
+
+    @property
+    def rotation(self) -> Optional[int]:
+        if self.monitor is not None:
+            return getattr(self.monitor.profile, "rotation", None)
+        return self._rotation
+
+    def set_rotation(self, rotation: int) -> None:
+        """보드 방향을 정한다 (monitor가 있으면 프로필에 저장해서 다음 실행에도 쓴다)."""
+        rotation = int(rotation) % 4
+        if self.monitor is None:
+            self._rotation = rotation
+            return
+        profile = self.monitor.profile
+        profile.rotation = rotation
+        try:
+            profile.save(getattr(self.monitor, "directory", None))
+        except Exception as e:
+            print(f"[multi_cam] {self.name} 방향 저장 실패: {e}")
+
+    def corners(self) -> Optional[np.ndarray]:
+        if self.monitor is not None:
+            return np.asarray(self.monitor.profile.corners, dtype=np.float32)
+        from cv import cv_manager
+
+        return cv_manager.get_manual_corners()
+
+    def geometry(self, frame_size: Tuple[int, int]) -> np.ndarray:
+        """칸별 기하 가중치 (코너가 바뀔 때만 다시 계산)."""
+        corners = self.corners()
+        if corners is None:
+            return np.zeros((GRID, GRID), dtype=np.float32)
+        key = corners.tobytes() + bytes(str(frame_size), "ascii")
+        cached = self._geometry
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        profile = getattr(self.monitor, "profile", None)
+        K = getattr(profile, "camera_matrix", None)
+        dist = getattr(profile, "dist_coeffs", None)
+        try:
+            weights = geometry_weights(corners, frame_size, K, dist)
+        except cv2.error as e:
+            print(f"[multi_cam] {self.name} 기하 가중치 계산 실패, 균등 가중치 사용: {e}")
+            weights = np.ones((GRID, GRID), dtype=np.float32)
+        self._geometry = (key, weights)
+        return weights
+
+    def describe(self) -> Dict[str, object]:
+        from cv.capture_sources import describe_source
+
+        info: Dict[str, object] = {
+            "name": self.name,
+            "source": describe_source(getattr(self.hub, "capture", self.hub)),
+            "rotation": self.rotation,
+        }
+        if self.monitor is not None:
+            info["calibration"] = self.monitor.describe()
+        return info
+
+
+class MultiCameraDetector:
+    """여러 카메라 프레임을 카메라별 WarpStage로 병렬 와핑하고 칸별 예측을 가시성 가중치로 융합."""
+
+    def __init__(self, views: Sequence[CameraView], size: int = WARP_SIZE):
+        if not views:
+            raise ValueError("카메라가 하나 이상 필요합니다")
+        self.views = list(views)
+        self.size = size
+        self._frame_sizes: Dict[str, Tuple[int, int]] = {}
+        self._readers = ThreadPoolExecutor(max_workers=len(self.views), thread_name_prefix="multi-cam-read")
+
+    @property
+    def camera_count(self) -> int:
+        return len(self.views)
+
+    def close(self) -> None:
+        self._readers.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------------------------------------------
+    # 캡처
+    # ------------------------------------------------------------------
+    def _read_view(self, view: CameraView, n_frames: int, interval_sec: float) -> List[np.ndarray]:
+        """카메라 하나에서 n_frames개를 읽어 그 카메라 WarpStage로 와핑 (읽기 스레드에서 실행)."""
+        if view.corners() is None:
+            print(f"[multi_cam] {view.name}: 코너가 없어 건너뜀")
+            return []
+        warped: List[np.ndarray] = []
+        hub = view.hub
+        stage = view.warp_stage(self.size)
+        governor = getattr(hub, "governor", None)
+        with governor.active("detect") if governor is not None else nullcontext():
+            if governor is not None:
+                hub.wait_newer(hub.seq, hub.read_timeout)
+            for i in range(n_frames):
+                ret, wf = stage.read()
+                if ret and wf is not None:
+                    try:
+                        warped.append(wf.warp)
+                    except cv2.error as e:
+                        print(f"[multi_cam] {view.name} 와핑 실패: {e}")
+                    else:
+                        h, w = wf.image.shape[:2]
+                        self._frame_sizes[view.name] = (w, h)
+                if i < n_frames - 1 and interval_sec > 0:
+                    time.sleep(interval_sec)
+        return warped
+
+    def capture_warped(self, n_frames: int = 3, interval_sec: float = 0.1) -> List[List[np.ndarray]]:
+        """카메라마다 n_frames개를 동시에 읽고 와핑. 결과는 views 순서의 카메라별 목록 (공유 배열, 수정 금지)."""
+        reads = [self._readers.submit(self._read_view, v, n_frames, interval_sec) for v in self.views]
+        return [fut.result() for fut in reads]
+
+    # ------------------------------------------------------------------
+    # 융합
+    # ------------------------------------------------------------------
+    def align(self, view: CameraView, probs: np.ndarray, expected_grid: np.ndarray) -> Optional[np.ndarray]:
+        """카메라 칸 확률 (8, 8, K)을 주 카메라 방향으로 돌린다. 방향을 아직 모르고 정할 수도 없으면 None."""
+        rotation = view.rotation
+        if rotation is None:
+            rotation, scores = estimate_rotation(probs, expected_grid)
+            shown = [round(s, 2) for s in scores]
+            if rotation is None:
+                print(f"[multi_cam] {view.name}: 보드 방향을 정할 수 없어 이번 융합에서 제외 (일치율 {shown})")
+                return None
+            print(f"[multi_cam] {view.name}: 보드 방향 {rotation * 90}도로 설정 (일치율 {shown})")
+            view.set_rotation(rotation)
+        return np.rot90(probs, rotation, axes=(0, 1))
+
+    def visibility(self, view: CameraView, probs: np.ndarray, expected_grid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """카메라 하나의 칸별 가중치 (8, 8)와 가림 칸 (8, 8) bool. probs는 align()으로 맞춘 값."""
+        frame_size = self._frame_sizes.get(view.name)
+        geom = view.geometry(frame_size) if frame_size is not None else np.ones((GRID, GRID), np.float32)
+        # 기하 가중치는 와핑 이미지 격자 → 체스 좌표 → 주 카메라 방향 순서로 돌린다
+        geom = np.rot90(geom, IMAGE_TO_CHESS_TURNS + (view.rotation or 0))
+        occluded = occlusion_mask(probs.argmax(axis=2) != expected_grid)
+        weight = geom * probs.max(axis=2) * (~occluded)
+        return weight.astype(np.float32), occluded
+
+    def fuse_probs(
+        self, probs_list: Sequence[Optional[np.ndarray]], expected_grid: np.ndarray
+    ) -> FusedPrediction:
+        """카메라별 칸 확률 (8, 8, K)(없는 카메라는 None, 각 카메라 방향 그대로)을 융합.
+
+        각 확률은 align()으로 주 카메라 방향에 맞춘 뒤 합친다.
+        어느 카메라도 보지 못한 칸은 예상 보드 값을 그대로 두고 visible=False로 표시한다.
+        """
+        expected_grid = np.asarray(expected_grid)
+        total = None
+        weight_sum = np.zeros((GRID, GRID), dtype=np.float32)
+        occluded: List[np.ndarray] = []
+        for view, probs in zip(self.views, probs_list):
+            if probs is not None:
+                probs = self.align(view, np.asarray(probs, dtype=np.float32), expected_grid)
+            if probs is None:
+                occluded.append(np.ones((GRID, GRID), dtype=bool))
+                continue
+            weight, occ = self.visibility(view, probs, expected_grid)
+            occluded.append(occ)
+            contrib = probs * weight[..., None]
+            total = contrib if total is None else total + contrib
+            weight_sum += weight
+        if total is None:
+            raise ValueError("융합할 카메라 예측이 없습니다")
+        visible = weight_sum >= MIN_VISIBLE_WEIGHT
+        fused = total / np.maximum(weight_sum, 1e-6)[..., None]
+        grid = np.where(visible, fused.argmax(axis=2), expected_grid)
+        return FusedPrediction(grid=grid, probs=fused, weight=weight_sum, visible=visible, occluded=occluded)
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            "cameras": [v.describe() for v in self.views],
+            "warp_size": self.size,
+        }
@@ -1,9 +1,13 @@
 # warp_cam_picam2_stable_v2.py (혼합 버전)
 
-import time, collections
+import collections
 import numpy as np
 import cv2
 
+from cv.buffer_pool import get_pool
+from cv.capture_sources import Picamera2Source
+from cv.remap_warp import RemapWarper
+
 # ==== 기본 설정 ====
 Hmin, Hmax = 35, 85    # 초록 마커 HSV 범위
 Smin, Smax = 60, 255
@@ -78,19 +82,70 @@ class CornerStabilizer:
         return self.ema.astype(np.float32)
 
 # ---------------- Green Marker Detection ----------------
-def find_green_corners(frame):
-    hsv=cv2.cvtColor(frame,cv2.COLOR_BGR2HSV)
-    lower=np.array([Hmin,Smin,Vmin]); upper=np.array([Hmax,Smax,Vmax])
-    mask=cv2.inRange(hsv,lower,upper)
+# 마커는 큰 덩어리라 1/DETECT_SCALE 축소 영상에서 찾고, 원본 해상도의 작은 패치에서 중심을 다시 계산한다
+# (HSV 변환/윤곽 검출 픽셀 수가 1/16로 줄고 중심은 원본 윤곽 모멘트라 서브픽셀 정밀도 유지).
+# 축소/HSV/마스크 이미지는 매 프레임 같은 크기이므로 함수 안에서만 버퍼 풀 배열을 빌려 쓴다.
+DETECT_SCALE = 4
+MIN_MARKER_AREA = 200
 
-    contours,_=cv2.findContours(mask,cv2.RETR_EXTERNAL,cv2.CHAIN_APPROX_SIMPLE)
-    pts=[]
+def _refine_marker(frame, x0, y0, x1, y1, lower, upper):
+    """원본 해상도 패치에서 가장 큰 마커 윤곽의 (cx, cy, area). 없으면 None."""
+    patch = frame[y0:y1, x0:x1]
+    if patch.size == 0: return None
+    mask = cv2.inRange(cv2.cvtColor(patch, cv2.COLOR_BGR2HSV), lower, upper)
+    contours,_ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours: return None
+    c = max(contours, key=cv2.contourArea)
+    M = cv2.moments(c)
+    if M["m00"] == 0: return None
+    return x0 + M["m10"]/M["m00"], y0 + M["m01"]/M["m00"], cv2.contourArea(c)
+
+def find_green_marker_centers(frame, lower, upper, min_area=MIN_MARKER_AREA, scale=DETECT_SCALE):
+    """초록 마커 중심 [(cx, cy), ...] (원본 좌표, float).
+
+    축소 영상에서 4개 미만이면 작은 마커를 놓쳤을 수 있으므로 원본 해상도 전체 검출로 한 번 더 찾는다.
+    """
+    h, w = frame.shape[:2]
+    pool = get_pool()
+    if scale > 1 and w >= 8 * scale and h >= 8 * scale:
+        # INTER_AREA는 원본 픽셀을 모두 읽어 HSV 변환만큼 비싸다. 마커는 크므로 LINEAR 샘플링으로 충분
+        sh, sw = h // scale, w // scale
+        small_shape = (sh, sw) + frame.shape[2:]
+        with pool.borrow(small_shape, frame.dtype) as small, pool.borrow(small_shape, frame.dtype) as hsv, \
+                pool.borrow((sh, sw)) as mask:
+            small = cv2.resize(frame, (sw, sh), dst=small, interpolation=cv2.INTER_LINEAR)
+            hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV, dst=hsv)
+            mask = cv2.inRange(hsv, lower, upper, dst=mask)
+            contours,_ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # 축소 윤곽 면적은 경계 픽셀 손실이 크므로 절반까지 허용하고, 최종 판정은 원본 패치 면적으로
+        coarse_min = 0.5 * min_area / (scale * scale)
+        pad = 2 * scale
+        pts = []
+        for c in contours:
+            if cv2.contourArea(c) < coarse_min: continue
+            x, y, bw, bh = cv2.boundingRect(c)
+            r = _refine_marker(frame, max(0, x*scale - pad), max(0, y*scale - pad),
+                               min(w, (x+bw)*scale + pad), min(h, (y+bh)*scale + pad), lower, upper)
+            if r is not None and r[2] >= min_area:
+                pts.append([r[0], r[1]])
+        if len(pts) >= 4:
+            return pts
+
+    with pool.borrow_like(frame) as hsv, pool.borrow((h, w)) as mask:
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=hsv)
+        mask = cv2.inRange(hsv, lower, upper, dst=mask)
+        contours,_ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    pts = []
     for c in contours:
-        if cv2.contourArea(c)<200: continue
-        M=cv2.moments(c)
-        if M["m00"]==0: continue
-        cx=int(M["m10"]/M["m00"]); cy=int(M["m01"]/M["m00"])
-        pts.append([cx,cy])
+        if cv2.contourArea(c) < min_area: continue
+        M = cv2.moments(c)
+        if M["m00"] == 0: continue
+        pts.append([M["m10"]/M["m00"], M["m01"]/M["m00"]])
+    return pts
+
+def find_green_corners(frame, scale=DETECT_SCALE):
+    lower=np.array([Hmin,Smin,Vmin]); upper=np.array([Hmax,Smax,Vmax])
+    pts=find_green_marker_centers(frame, lower, upper, MIN_MARKER_AREA, scale)
 
     if len(pts)<4: return None
     pts=np.array(pts,dtype=np.float32)
@@ -169,13 +224,18 @@ def debug_draw_corners(frame, corners, color=(0,255,0)):
     return dbg
 
 # ---------------- Warp ----------------
+# 출력 크기별 remap 엔진: 같은 코너가 2번 연속 오면 remap 맵을 만들어 재사용
+# (프레임마다 조금씩 움직이는 자동 검출 코너는 맵을 만들지 않고 warpPerspective)
+_warpers={}
+
 def warp_chessboard(frame,corners,size=400):
     if corners is None: return None
     c=np.asarray(corners,dtype=np.float32)
     c=sort_corners_by_position(c)
-    dst=np.array([[0,0],[size-1,0],[size-1,size-1],[0,size-1]],dtype=np.float32)
-    M=cv2.getPerspectiveTransform(c,dst)
-    return cv2.warpPerspective(frame,M,(size,size))
+    warper=_warpers.get(size)
+    if warper is None:
+        warper=_warpers.setdefault(size,RemapWarper(size,min_repeats=2))
+    return warper.warp(frame,c)
 
 # ---------------- Warp Utils for Grid/Labels ----------------
 def compute_warp_transform(corners, size=600):
@@ -239,29 +299,8 @@ def warp_points_to_original(labeled_points_in_warp, Minv):
     return result
 
 # ---------------- Camera Wrapper ----------------
-class PiCam2Capture:
-    def __init__(self,size=(1280,720),fps=30,hflip=False,vflip=False):
-        from picamera2 import Picamera2
-        self.hflip=hflip; self.vflip=vflip
-        self.picam2=Picamera2()
-        cfg=self.picam2.create_preview_configuration(
-            main={"size":size,"format":"RGB888"},
-            controls={"FrameRate":fps}
-        )
-        self.picam2.configure(cfg)
-        self.picam2.start()
-        time.sleep(0.7)
-    def read(self):
-        rgb=self.picam2.capture_array()
-        bgr=cv2.cvtColor(rgb,cv2.COLOR_RGB2BGR)
-        if bgr.shape[0]>bgr.shape[1]:
-            bgr=cv2.rotate(bgr,cv2.ROTATE_90_CLOCKWISE)
-        if self.hflip: bgr=cv2.flip(bgr,1)
-        if self.vflip: bgr=cv2.flip(bgr,0)
-        return True,bgr
-    def release(self):
-        try: self.picam2.stop()
-        except Exception: pass
+# Picamera2 캡처는 cv.capture_sources로 통합 (기존 이름 유지)
+PiCam2Capture = Picamera2Source
 
 # ---------------- Overlay Utils ----------------
 def overlay_grid_and_dark_square_numbers(image, start_dark_top_left=True, draw_grid=True, font_scale=0.7, thickness=2, color=(0,255,0)):
@@ -9,6 +9,10 @@ import numpy as np
 import os
 from pathlib import Path
 
+from cv.capture_sources import Picamera2Source
+from cv.jpeg_codec import get_codec
+from cv.square_sampling import SquareSampler, cell_means
+
 # warp_cam_picam2_v2에서 필요한 함수들 import
 try:
     from warp_cam_picam2_v2 import (
@@ -67,6 +71,7 @@ except ImportError:
 GRID = 8
 WARP_SIZE = 400
 CELL_MARGIN_RATIO = 0.08
+JPEG_QUALITY = 80   # 스트리밍 JPEG 품질
 
 # 기본 설정값
 DEFAULT_THRESHOLD = 12.0
@@ -100,19 +105,18 @@ def coord_to_chess_notation(i, j):
     rank = str(8 - i)          # 행: 8, 7, 6, 5, 4, 3, 2, 1
     return file + rank
 
+_samplers = {}
+
 def compute_board_means_BGR(image_bgr, grid=GRID, margin_ratio=CELL_MARGIN_RATIO):
-    """BGR 평균값을 계산하여 반환 (8x8x3 float32)"""
-    H, W = image_bgr.shape[:2]
-    cs_h, cs_w, my, mx = _split_sizes(H, W, grid)
-    means = np.zeros((grid, grid, 3), np.float32)
-    
-    for i in range(grid):
-        for j in range(grid):
-            y1, y2, x1, x2 = _cell_region(i, j, cs_h, cs_w, my, mx, H, W)
-            cell = image_bgr[y1:y2, x1:x2]
-            means[i, j] = cell.reshape(-1, 3).mean(axis=0).astype(np.float32)
-    
-    return means
+    """BGR 평균값을 계산하여 반환 (8x8x3 float32)
+
+    _cell_region과 같은 마진 영역의 픽셀 인덱스를 크기별로 한 번만 만들어 두고 reduceat으로 평균한다.
+    """
+    key = (image_bgr.shape[:2], grid, margin_ratio)
+    sampler = _samplers.get(key)
+    if sampler is None:
+        sampler = _samplers.setdefault(key, SquareSampler(image_bgr.shape[:2], grid=grid, margin=margin_ratio))
+    return sampler.means(image_bgr)
 
 def initialize_board(cap, save_path='init_board_values.npy'):
     """
@@ -161,32 +165,7 @@ def initialize_board_with_picamera(save_path='/home/pi/Desktop/ChessRobot/brain/
     Picamera2를 사용하여 현재 체스판의 기준값을 캡처/저장하는 편의 함수
     """
     try:
-        from picamera2 import Picamera2
-        picam2 = Picamera2()
-        cfg = picam2.create_preview_configuration(
-            main={"size": (640, 480), "format": "RGB888"},
-            controls={"FrameRate": 30}
-        )
-        picam2.configure(cfg)
-        picam2.start()
-
-        class PicamWrapper:
-            def __init__(self, picam2_instance):
-                self.picam2 = picam2_instance
-            def read(self):
-                try:
-                    rgb = self.picam2.capture_array()
-                    frame = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
-                    return True, frame
-                except Exception:
-                    return False, None
-            def release(self):
-                try:
-                    self.picam2.stop()
-                except Exception:
-                    pass
-
-        cap = PicamWrapper(picam2)
+        cap = Picamera2Source(size=(640, 480), fps=30, rotate_portrait=False, warmup_sec=0)
         try:
             ok = initialize_board(cap, save_path=save_path)
             return ok
@@ -255,18 +234,8 @@ def detect_piece_changes(cap, base_board_path='init_board_values.npy', threshold
     warp = warp_chessboard(frame, corners, size=WARP_SIZE)
     
     # 변화 감지
-    H, W = warp.shape[:2]
-    cs_h, cs_w = H // GRID, W // GRID
-    diffs = np.zeros((GRID, GRID), np.float32)
-    
-    for i in range(GRID):
-        for j in range(GRID):
-            y1, y2 = i * cs_h, (i + 1) * cs_h
-            x1, x2 = j * cs_w, (j + 1) * cs_w
-            cell = warp[y1:y2, x1:x2]
-            mean_bgr = np.mean(cell.reshape(-1, 3), axis=0)
-            diff = np.linalg.norm(mean_bgr - base_board_values[i, j])
-            diffs[i, j] = diff
+    # 칸 평균은 cv2.integral 정수 누적으로, float는 8x8에서만
+    diffs = np.linalg.norm(cell_means(warp, GRID) - base_board_values, axis=2).astype(np.float32)
     
     # 상위 변화 칸들 찾기
     flat_diffs = diffs.flatten()
@@ -313,40 +282,10 @@ def detect_move_and_update(threshold=None, top_k=None, max_attempts=50):
     
     print("[DEBUG] Picamera2 초기화 중...")
     try:
-        from picamera2 import Picamera2
-        picam2 = Picamera2()
-        
-        # 설정
-        cfg = picam2.create_preview_configuration(
-            main={"size": (640, 480), "format": "RGB888"},
-            controls={"FrameRate": 30}
-        )
-        picam2.configure(cfg)
-        picam2.start()
+        cap = Picamera2Source(size=(640, 480), fps=30, rotate_portrait=False, warmup_sec=0)
         
         print("[DEBUG] Picamera2 초기화 완료")
-        
-        # 캡처 래퍼 클래스 생성
-        class PicamWrapper:
-            def __init__(self, picam2_instance):
-                self.picam2 = picam2_instance
-                
-            def read(self):
-                try:
-                    rgb = self.picam2.capture_array()
-                    frame = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
-                    return True, frame
-                except Exception as e:
-                    print(f"[DEBUG] 프레임 읽기 실패: {e}")
-                    return False, None
-                    
-            def release(self):
-                try:
-                    self.picam2.stop()
-                except Exception:
-                    pass
-        
-        cap = PicamWrapper(picam2)
+
         
         # 몇 프레임 테스트
         print("[DEBUG] Picamera2 프레임 테스트...")
@@ -473,17 +412,12 @@ def gen_edges_frames(cap, base_board_path='init_board_values.npy', threshold=Non
         if base_board_values is not None and base_board_values.shape == (GRID, GRID, 3):
             H, W = warp.shape[:2]
             cs_h, cs_w = H // GRID, W // GRID
-            diffs = np.zeros((GRID, GRID), np.float32)
-            
+            diffs = np.linalg.norm(cell_means(warp, GRID) - base_board_values, axis=2).astype(np.float32)
+
             for i in range(GRID):
                 for j in range(GRID):
-                    y1, y2 = i * cs_h, (i + 1) * cs_h
-                    x1, x2 = j * cs_w, (j + 1) * cs_w
-                    cell = warp[y1:y2, x1:x2]
-                    mean_bgr = np.mean(cell.reshape(-1, 3), axis=0)
-                    diff = np.linalg.norm(mean_bgr - base_board_values[i, j])
-                    diffs[i, j] = diff
-                    
+                    y1, x1 = i * cs_h, j * cs_w
+                    diff = diffs[i, j]
                     # 차이값 표시
                     cv2.putText(vis, str(int(diff)), (x1 + 2, y1 + cs_h // 2),
                                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1, cv2.LINE_AA)
@@ -529,9 +463,9 @@ def gen_edges_frames(cap, base_board_path='init_board_values.npy', threshold=Non
                         (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2, cv2.LINE_AA)
         
         # JPEG로 인코딩하여 MJPEG 스트리밍
-        _, buffer = cv2.imencode('.jpg', vis)
+        jpeg = get_codec().encode(vis, JPEG_QUALITY)
         frame_data = (b'--frame\r\n'
-                     b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+                     b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
         
         # 체스 좌표 문자열 생성
         if len(change_coords) >= 2:
@@ -0,0 +1,101 @@
+"""ML 예측 결과 캐시.
+
+대시보드는 1초마다 `/ml_prediction`을 폴링하지만 보드는 대부분의 시간 동안 변하지 않는다.
+와핑된 프레임의 저해상도 지문(그레이 축소 이미지)을 키로 삼아, 지문 차이
+(fingerprint_distance: 밝기 평균 변화를 뺀 픽셀별 최대 절대 차이)가 change_threshold 이하이고 TTL이 지나지 않았다면 모델을 다시 돌리지 않고 캐시된 그리드를 돌려준다.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+DEFAULT_TTL_SEC = 30.0
+DEFAULT_CHANGE_THRESHOLD = 12.0  # 밝기 보정 후 지문 픽셀의 최대 절대 차이 (0~255)
+DEFAULT_FINGERPRINT_SIZE = 32  # 한 칸당 4x4 픽셀
+
+
+def frame_fingerprint(img: np.ndarray, size: int = DEFAULT_FINGERPRINT_SIZE) -> np.ndarray:
+    """이미지를 size x size 그레이로 축소한 지문을 반환 (INTER_AREA로 노이즈 평균)."""
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(img, (size, size), interpolation=cv2.INTER_AREA)
+
+
+def fingerprint_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """두 지문의 최대 절대 차이.
+
+    기물 하나가 움직이면 몇 개의 지문 픽셀만 크게 바뀌므로 평균 대신 최대값을 쓰고,
+    조명으로 인한 전체 밝기 변화는 평균 차이를 빼서 무시한다.
+    """
+    diff = a.astype(np.int16) - b.astype(np.int16)
+    return float(np.abs(diff - diff.mean()).max())
+
+
+class PredictionCache:
+    """지문 기반 예측 캐시 (스레드 안전)."""
+
+    def __init__(
+        self,
+        ttl_sec: float = DEFAULT_TTL_SEC,
+        change_threshold: float = DEFAULT_CHANGE_THRESHOLD,
+        fingerprint_size: int = DEFAULT_FINGERPRINT_SIZE,
+        max_entries: int = 4,
+    ):
+        self.ttl_sec = ttl_sec
+        self.change_threshold = change_threshold
+        self.fingerprint_size = fingerprint_size
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, float, Any]]" = OrderedDict()
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, img: np.ndarray) -> np.ndarray:
+        return frame_fingerprint(img, self.fingerprint_size)
+
+    def lookup(self, fingerprint: np.ndarray) -> Optional[Any]:
+        """지문과 충분히 가깝고 만료되지 않은 캐시 값을 반환. 없으면 None."""
+        now = time.time()
+        with self._lock:
+            best_key, best_dist = None, None
+            for key, (fp, stamp, _) in list(self._entries.items()):
+                if now - stamp > self.ttl_sec:
+                    del self._entries[key]
+                    continue
+                dist = fingerprint_distance(fp, fingerprint)
+                if dist <= self.change_threshold and (best_dist is None or dist < best_dist):
+                    best_key, best_dist = key, dist
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key][2]
+
+    def store(self, fingerprint: np.ndarray, value: Any) -> None:
+        with self._lock:
+            self._entries[self._next_key] = (fingerprint, time.time(), value)
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "entries": len(self._entries),
+            }
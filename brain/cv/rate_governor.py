@@ -0,0 +1,160 @@
+"""캡처 루프 공용 프레임 속도 조절기.
+
+게임 대부분의 시간은 플레이어가 생각하는 동안이라 아무도 프레임을 보지 않는다. 그동안에도
+캡처 스레드가 최대 속도로 read()하면 Pi의 CPU/발열이 올라가 엔진 계산이 느려진다.
+
+RateGovernor는 "활성" 상태일 때만 최대 속도(active_fps)로, 그 외에는 idle_fps로 캡처하게 한다.
+- touch(): 프레임 소비가 있었음을 알림 (FrameHub의 latest/wait_newer/read가 자동 호출).
+  마지막 touch 후 linger_sec 동안 활성 유지.
+- hold(reason, seconds): 일정 시간 활성 유지 (타이머 버튼, 웹 클라이언트 접속 등 이벤트).
+- active(reason): with 블록 동안 활성 유지 (수 감지처럼 길게 프레임이 필요한 작업).
+유휴 → 활성 전환 시 조건 변수로 캡처 스레드를 바로 깨우므로 유휴 간격만큼 기다리지 않는다.
+
+사용 예::
+
+    governor = get_governor()
+    hub = FrameHub(cap, governor=governor)
+    with governor.active("detect"):
+        frames = [hub.read()[1] for _ in range(5)]
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+DEFAULT_IDLE_FPS = 2.0
+DEFAULT_LINGER_SEC = 3.0
+
+
+class RateGovernor:
+    """활성/유휴 상태에 따라 캡처 간격을 정하는 조절기 (스레드 안전)."""
+
+    def __init__(
+        self,
+        idle_fps: float = DEFAULT_IDLE_FPS,
+        active_fps: Optional[float] = None,
+        linger_sec: float = DEFAULT_LINGER_SEC,
+    ):
+        self.idle_fps = idle_fps
+        self.active_fps = active_fps  # None이면 제한 없음 (장치 속도)
+        self.linger_sec = linger_sec
+        self._cond = threading.Condition()
+        self._active_until = 0.0
+        self._holds: Dict[int, str] = {}
+        self._next_token = 0
+        self.wakeups = 0
+
+    # ------------------------------------------------------------------
+    # 활성 요청
+    # ------------------------------------------------------------------
+    def _extend(self, seconds: float) -> None:
+        with self._cond:
+            was_active = self._is_active_locked()
+            self._active_until = max(self._active_until, time.monotonic() + seconds)
+            if not was_active:
+                self.wakeups += 1
+                self._cond.notify_all()
+
+    def touch(self) -> None:
+        """프레임 소비가 있었음을 알린다 (linger_sec 동안 활성)."""
+        # 이미 활성 구간 안쪽이면 락 없이 빠르게 반환 (매 프레임 호출되므로)
+        if time.monotonic() + self.linger_sec * 0.5 < self._active_until:
+            return
+        self._extend(self.linger_sec)
+
+    def hold(self, reason: str, seconds: float) -> None:
+        """이벤트(버튼 입력, 클라이언트 접속 등)로 seconds 동안 활성 유지."""
+        if not self.is_active:
+            print(f"[governor] 활성 전환: {reason}")
+        self._extend(seconds)
+
+    def acquire(self, reason: str) -> int:
+        """release(token)할 때까지 활성 유지."""
+        with self._cond:
+            was_active = self._is_active_locked()
+            self._next_token += 1
+            token = self._next_token
+            self._holds[token] = reason
+            if not was_active:
+                self.wakeups += 1
+                self._cond.notify_all()
+        return token
+
+    def release(self, token: int) -> None:
+        with self._cond:
+            self._holds.pop(token, None)
+            # 작업이 끝난 직후 결과 확인용 프레임을 위해 linger 구간은 유지
+            self._active_until = max(self._active_until, time.monotonic() + self.linger_sec)
+
+    @contextmanager
+    def active(self, reason: str) -> Iterator[None]:
+        token = self.acquire(reason)
+        try:
+            yield
+        finally:
+            self.release(token)
+
+    # ------------------------------------------------------------------
+    # 캡처 루프용
+    # ------------------------------------------------------------------
+    def _is_active_locked(self) -> bool:
+        return bool(self._holds) or time.monotonic() < self._active_until
+
+    @property
+    def is_active(self) -> bool:
+        with self._cond:
+            return self._is_active_locked()
+
+    def interval(self) -> float:
+        """현재 상태의 최소 캡처 간격 (초)."""
+        if self.is_active:
+            return 1.0 / self.active_fps if self.active_fps else 0.0
+        return 1.0 / self.idle_fps if self.idle_fps > 0 else 0.0
+
+    def throttle(self, last_capture: float) -> bool:
+        """last_capture(time.monotonic) 이후 현재 간격이 지날 때까지 대기.
+
+        유휴 대기 중에 활성 요청이 오면 바로 반환한다. 유휴 대기에서 깨어났으면 True
+        (호출자는 장치 버퍼에 남은 오래된 프레임을 버릴 수 있다).
+        """
+        woke_from_idle = False
+        with self._cond:
+            while True:
+                active = self._is_active_locked()
+                if active:
+                    iv = 1.0 / self.active_fps if self.active_fps else 0.0
+                else:
+                    iv = 1.0 / self.idle_fps if self.idle_fps > 0 else 0.0
+                remaining = last_capture + iv - time.monotonic()
+                if remaining <= 0:
+                    return woke_from_idle
+                self._cond.wait(remaining)
+                if not active and self._is_active_locked():
+                    woke_from_idle = True
+
+    def describe(self) -> Dict[str, object]:
+        with self._cond:
+            return {
+                "active": self._is_active_locked(),
+                "holds": sorted(set(self._holds.values())),
+                "idle_fps": self.idle_fps,
+                "active_fps": self.active_fps,
+                "wakeups": self.wakeups,
+            }
+
+
+_governor: Optional[RateGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> RateGovernor:
+    """프로세스 공용 조절기."""
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = RateGovernor()
+    return _governor
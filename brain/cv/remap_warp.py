@@ -0,0 +1,169 @@
+"""미리 계산한 remap 테이블로 체스판 와핑.
+
+코너가 고정되어 있으면 출력 픽셀 → 입력 픽셀 대응은 매 프레임 같으므로,
+코너 세트(호모그래피)마다 한 번만 cv2.remap용 맵을 만들고 고정소수점 CV_16SC2 형태로
+변환해 둔다. 선택적으로 캡처 단계의 180도 회전 보정(예: USBCapture.read)과 렌즈 왜곡 보정도 같은 맵에
+합쳐서, 회전 + 왜곡 보정 + 와핑을 프레임마다 remap 한 번으로 처리한다.
+
+- corners/M은 "보정된" 프레임(회전/왜곡 보정 후, 사용자가 화면에서 보는 좌표) 기준이다.
+- rotate_180 / camera_matrix, dist_coeffs를 주면 입력 프레임은 보정 전 원본(raw)이어야 한다.
+
+사용 예::
+
+    warper = RemapWarper(size=400)
+    warp = warper.warp(frame, corners)            # 코너가 같으면 맵 재사용
+
+    raw_warper = RemapWarper(size=400, rotate_180=True,
+                             camera_matrix=K, dist_coeffs=D)
+    warp = raw_warper.warp(raw_frame, corners)    # 회전/왜곡 보정까지 한 번에
+
+출력은 호출자가 소유하는 새 배열이다 (맵 없는 경로의 보정/회전 중간 이미지만 공용 버퍼 풀에서 빌린다).
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import ExitStack
+from typing import Hashable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from cv.buffer_pool import get_pool
+
+Maps = Tuple[np.ndarray, np.ndarray]
+
+
+def _dst_square(size: int) -> np.ndarray:
+    return np.array([[0, 0], [size - 1, 0], [size - 1, size - 1], [0, size - 1]], dtype=np.float32)
+
+
+def build_warp_maps(
+    M: np.ndarray,
+    size: int,
+    src_shape: Tuple[int, ...],
+    *,
+    rotate_180: bool = False,
+    camera_matrix: Optional[np.ndarray] = None,
+    dist_coeffs: Optional[np.ndarray] = None,
+) -> Maps:
+    """호모그래피 M(보정된 프레임 → size x size)에 대한 CV_16SC2 remap 맵을 만든다."""
+    h, w = src_shape[:2]
+    Minv = np.linalg.inv(np.asarray(M, dtype=np.float64))
+
+    # 출력 픽셀 격자를 보정된 프레임 좌표로 역투영 (warpPerspective와 같은 계산)
+    ys, xs = np.mgrid[0:size, 0:size].astype(np.float64)
+    denom = Minv[2, 0] * xs + Minv[2, 1] * ys + Minv[2, 2]
+    map_x = (Minv[0, 0] * xs + Minv[0, 1] * ys + Minv[0, 2]) / denom
+    map_y = (Minv[1, 0] * xs + Minv[1, 1] * ys + Minv[1, 2]) / denom
+
+    # 180도 회전 보정 되돌리기: 보정된 (x, y) ↔ 원본 (w-1-x, h-1-y)
+    if rotate_180:
+        map_x = (w - 1) - map_x
+        map_y = (h - 1) - map_y
+
+    # 왜곡 보정 되돌리기: 보정된(이상적인) 픽셀 → 렌즈 왜곡이 있는 원본 픽셀
+    if camera_matrix is not None and dist_coeffs is not None:
+        K = np.asarray(camera_matrix, dtype=np.float64)
+        pts = np.stack(
+            [(map_x - K[0, 2]) / K[0, 0], (map_y - K[1, 2]) / K[1, 1], np.ones_like(map_x)],
+            axis=-1,
+        ).reshape(-1, 1, 3)
+        projected, _ = cv2.projectPoints(
+            pts, np.zeros(3), np.zeros(3), K, np.asarray(dist_coeffs, dtype=np.float64)
+        )
+        projected = projected.reshape(size, size, 2)
+        map_x, map_y = projected[..., 0], projected[..., 1]
+
+    return cv2.convertMaps(map_x.astype(np.float32), map_y.astype(np.float32), cv2.CV_16SC2)
+
+
+class RemapWarper:
+    """코너 세트(또는 호모그래피)별로 remap 맵을 캐시하는 와핑 엔진 (스레드 안전).
+
+    min_repeats: 같은 코너가 연속으로 이 횟수만큼 요청되어야 맵을 만든다.
+    매 프레임 조금씩 움직이는 자동 검출 코너에서는 맵을 다시 만드는 비용이 warpPerspective보다
+    크므로, 그동안은 warpPerspective로 처리한다.
+    """
+
+    def __init__(
+        self,
+        size: int = 400,
+        *,
+        rotate_180: bool = False,
+        camera_matrix: Optional[np.ndarray] = None,
+        dist_coeffs: Optional[np.ndarray] = None,
+        interpolation: int = cv2.INTER_LINEAR,
+        min_repeats: int = 1,
+    ):
+        self.size = size
+        self.rotate_180 = rotate_180
+        self.camera_matrix = camera_matrix
+        self.dist_coeffs = dist_coeffs
+        self.interpolation = interpolation
+        self.min_repeats = max(1, min_repeats)
+        self._lock = threading.Lock()
+        self._maps: Optional[Maps] = None
+        self._maps_key: Hashable = None
+        self._pending_key: Hashable = None
+        self._pending_count = 0
+        self.builds = 0
+
+    @property
+    def folds_correction(self) -> bool:
+        """회전/왜곡 보정을 맵에 합쳐서 원본(raw) 프레임을 입력으로 받는지 여부."""
+        return self.rotate_180 or (self.camera_matrix is not None and self.dist_coeffs is not None)
+
+    def matrix_for(self, corners) -> np.ndarray:
+        """TL, TR, BR, BL 순서 코너에 대한 호모그래피."""
+        return cv2.getPerspectiveTransform(np.asarray(corners, dtype=np.float32), _dst_square(self.size))
+
+    def warp(self, frame: np.ndarray, corners) -> np.ndarray:
+        """TL, TR, BR, BL 순서 코너로 frame을 size x size로 와핑."""
+        c = np.asarray(corners, dtype=np.float32).reshape(4, 2)
+        return self._warp(frame, c.tobytes(), lambda: self.matrix_for(c))
+
+    def warp_with_matrix(self, frame: np.ndarray, M: np.ndarray) -> np.ndarray:
+        """호모그래피 M으로 frame을 size x size로 와핑."""
+        M = np.asarray(M, dtype=np.float64)
+        return self._warp(frame, M.tobytes(), lambda: M)
+
+    def _warp(self, frame: np.ndarray, corner_key: bytes, matrix_fn) -> np.ndarray:
+        key = (corner_key, frame.shape[:2])
+        with self._lock:
+            maps = self._maps if key == self._maps_key else None
+            if maps is None:
+                if key == self._pending_key:
+                    self._pending_count += 1
+                else:
+                    self._pending_key, self._pending_count = key, 1
+                if self._pending_count >= self.min_repeats:
+                    maps = build_warp_maps(
+                        matrix_fn(), self.size, frame.shape,
+                        rotate_180=self.rotate_180,
+                        camera_matrix=self.camera_matrix,
+                        dist_coeffs=self.dist_coeffs,
+                    )
+                    self._maps, self._maps_key = maps, key
+                    self.builds += 1
+        if maps is not None:
+            return cv2.remap(frame, maps[0], maps[1], self.interpolation)
+        return self._warp_direct(frame, matrix_fn())
+
+    def _warp_direct(self, frame: np.ndarray, M: np.ndarray) -> np.ndarray:
+        """맵 없이 (보정 → warpPerspective) 순서로 처리. 결과는 remap 경로와 같다."""
+        pool = get_pool()
+        with ExitStack() as borrowed:   # 보정/회전 중간 이미지는 풀에서 빌려 쓰고 와핑 뒤 돌려준다
+            if self.camera_matrix is not None and self.dist_coeffs is not None:
+                frame = cv2.undistort(frame, self.camera_matrix, self.dist_coeffs,
+                                      dst=borrowed.enter_context(pool.borrow_like(frame)))
+            if self.rotate_180:
+                frame = cv2.rotate(frame, cv2.ROTATE_180, dst=borrowed.enter_context(pool.borrow_like(frame)))
+            return cv2.warpPerspective(frame, M, (self.size, self.size), flags=self.interpolation)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._maps = None
+            self._maps_key = None
+            self._pending_key = None
+            self._pending_count = 0
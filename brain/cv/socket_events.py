@@ -0,0 +1,67 @@
+"""game.event_bus → Socket.IO 중계.
+
+브라우저는 WebSocket 하나로 접속해서
+- "snapshot": 접속 직후 전체 상태 ({"seq", "state": {토픽: {...}}})
+- "state": 이후 변경분 ({"topic", "data": 바뀐 키만, "seq", "ts"})
+을 받는다. flask-socketio가 없으면 attach_socketio()는 None을 반환하고, 대시보드는 기존처럼
+JSON 라우트 폴링으로 동작한다.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Optional
+
+from cv.rate_governor import get_governor
+from game.event_bus import EventBus, get_event_bus
+
+SOCKETIO_CLIENT_URL = "https://cdn.socket.io/4.7.5/socket.io.min.js"
+# 클라이언트 접속 시 캡처를 최대 속도로 깨워 두는 시간 (첫 화면/예측이 바로 뜨도록)
+CONNECT_WAKE_SEC = 5.0
+
+
+class SocketBridge:
+    """SocketIO 인스턴스와 접속 클라이언트 수 (백그라운드 발행 작업을 클라이언트가 있을 때만 돌리기 위함)."""
+
+    def __init__(self, socketio, bus: EventBus):
+        self.socketio = socketio
+        self.bus = bus
+        self._lock = threading.Lock()
+        self.clients = 0
+        self._unsubscribe = bus.subscribe(self._forward)
+
+    def _forward(self, event) -> None:
+        self.socketio.emit("state", event)
+
+    def _connected(self, delta: int) -> None:
+        with self._lock:
+            self.clients = max(0, self.clients + delta)
+
+    def close(self) -> None:
+        self._unsubscribe()
+
+
+def attach_socketio(app, bus: Optional[EventBus] = None, async_mode: str = "threading") -> Optional[SocketBridge]:
+    """Flask 앱에 Socket.IO를 붙이고 이벤트 버스를 중계한다. flask-socketio가 없으면 None."""
+    try:
+        from flask_socketio import SocketIO, emit
+    except ImportError:
+        print("[socket] flask-socketio가 설치되지 않아 실시간 푸시 없이 폴링으로 동작합니다")
+        return None
+
+    bus = bus or get_event_bus()
+    socketio = SocketIO(app, async_mode=async_mode, cors_allowed_origins="*", logger=False, engineio_logger=False)
+    bridge = SocketBridge(socketio, bus)
+
+    @socketio.on("connect")
+    def on_connect():
+        bridge._connected(+1)
+        get_governor().hold("client", CONNECT_WAKE_SEC)
+        emit("snapshot", bus.snapshot())
+
+    @socketio.on("disconnect")
+    def on_disconnect(*_args):
+        bridge._connected(-1)
+
+    print(f"[socket] Socket.IO 이벤트 채널 활성화 (async_mode={async_mode})")
+    return bridge
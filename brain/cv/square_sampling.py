@@ -0,0 +1,189 @@
+"""칸별 샘플링 마스크.
+
+칸 통계(칸별 평균 BGR/LAB)는 지금까지 와핑 이미지를 h//8 x w//8 칸으로 잘라 칸 전체를 평균했다.
+카메라가 비스듬히 보므로 키 큰 기물은 카메라 반대쪽으로 기울어 옆 칸 위로 넘어가고,
+그 칸의 평균이 옆 칸 기물 때문에 바뀌어 가짜 변화가 된다.
+
+SquareSampler는 코너/카메라 자세가 정해질 때 한 번만 각 칸을 대표하는 픽셀 인덱스를 계산해 둔다.
+
+- 칸 가장자리 margin(piece_detector CELL_MARGIN_RATIO와 같은 규칙)은 제외
+- 보드 평면 호모그래피 + 카메라 내부 파라미터로 solvePnP(IPPE) 해서 카메라 위치를 구하고,
+  높이 piece_height(칸 폭 단위)인 기물이 화면에서 기울어지는 벡터를 칸마다 계산한다.
+  옆 칸 기물(반지름 piece_radius)이 기울어 덮는 캡슐 영역은 제외
+- uint8 이미지는 샘플링 마스크로 bitwise_and 한 뒤 cv2.integral 한 번으로 칸 합을 구한다 (정수 누적,
+  float는 마지막 8x8에서만). 그 밖의 dtype은 칸 순서로 정렬한 인덱스로 np.take + np.add.reduceat
+- cell_sums()/cell_means(): 마스크 없이 칸 전체 합/평균 (split_cells().mean()의 정수 버전)
+- 마스크 적용 이미지와 적분 이미지는 공용 버퍼 풀(cv.buffer_pool)에서 빌려 쓰고 함수 안에서 돌려준다
+
+사용 예::
+
+    sampler = SquareSampler.from_corners(corners, frame_size, size=400)   # 보정 시 한 번
+    means = sampler.means(warp)                                           # (8, 8, C) float32
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from cv.buffer_pool import get_pool
+from cv.picam_stable import sort_corners_by_position
+
+GRID = 8
+SAMPLE_MARGIN_RATIO = 0.08      # piece_detector.CELL_MARGIN_RATIO와 같음
+PIECE_HEIGHT_SQUARES = 1.0      # 기울기 계산용 기물 높이 (칸 폭 단위)
+PIECE_RADIUS_SQUARES = 0.3      # 기물 밑면 반지름 (칸 폭 단위)
+MIN_KEEP_FRACTION = 0.25        # 기울기 제외 후 남은 픽셀이 이보다 적은 칸은 margin 영역 전체를 쓴다
+
+
+def cell_sums(img: np.ndarray, grid: int = GRID) -> np.ndarray:
+    """칸별 픽셀 합 (grid, grid, C). uint8이면 cv2.integral int32 누적 (나머지 픽셀은 버림)."""
+    h, w = img.shape[:2]
+    ch, cw = h // grid, w // grid
+    exact = img.dtype == np.uint8 and h * w * 255 < 2 ** 31
+    with get_pool().borrow((h + 1, w + 1) + img.shape[2:], np.int32 if exact else np.float64) as buf:
+        ii = cv2.integral(img, sum=buf, sdepth=cv2.CV_32S if exact else cv2.CV_64F)
+        g = ii[(np.arange(grid + 1) * ch)[:, None], np.arange(grid + 1) * cw]   # fancy indexing은 복사본
+    sums = g[1:, 1:] - g[:-1, 1:] - g[1:, :-1] + g[:-1, :-1]
+    return sums if sums.ndim == 3 else sums[..., None]
+
+
+def cell_means(img: np.ndarray, grid: int = GRID) -> np.ndarray:
+    """칸별 평균 (grid, grid, C) float32 (split_cells(img).mean(axis=(2, 3))과 같은 값)."""
+    h, w = img.shape[:2]
+    return (cell_sums(img, grid) / float((h // grid) * (w // grid))).astype(np.float32)
+
+
+def default_camera_matrix(frame_size: Tuple[int, int]) -> np.ndarray:
+    """내부 파라미터를 모를 때 쓰는 근사 핀홀 행렬 (초점거리 = 폭, 주점 = 중심)."""
+    w, h = frame_size
+    return np.array([[w, 0, w / 2.0], [0, w, h / 2.0], [0, 0, 1]], dtype=np.float64)
+
+
+def camera_position(corners, camera_matrix: np.ndarray, dist_coeffs=None, grid: int = GRID) -> Optional[np.ndarray]:
+    """보드 좌표(칸 단위, TL=(0,0), TR=(grid,0))에서 카메라 중심 (x, y, 높이). 실패하면 None."""
+    img = sort_corners_by_position(np.asarray(corners, dtype=np.float32)).astype(np.float64)
+    obj = np.array([[0, 0, 0], [grid, 0, 0], [grid, grid, 0], [0, grid, 0]], dtype=np.float64)
+    ok, rvec, tvec = cv2.solvePnP(obj, img, camera_matrix, dist_coeffs, flags=cv2.SOLVEPNP_IPPE)
+    if not ok:
+        return None
+    R, _ = cv2.Rodrigues(rvec)
+    c = (-R.T @ tvec).reshape(3)
+    # 보드 좌표계는 x 오른쪽, y 아래라 z는 보드 안쪽을 향한다 → 카메라 높이는 |z|
+    return np.array([c[0], c[1], abs(c[2])], dtype=np.float64)
+
+
+def piece_lean(
+    camera: np.ndarray, piece_height: float = PIECE_HEIGHT_SQUARES, grid: int = GRID
+) -> np.ndarray:
+    """칸 중심에 선 기물 꼭대기가 보드 평면에서 보이는 위치까지의 이동 (grid, grid, 2), 칸 단위 (x, y)."""
+    cx, cy, height = camera
+    height = max(height, 1.5 * piece_height)   # 카메라가 기물보다 낮으면 기울기가 발산
+    jj, ii = np.meshgrid(np.arange(grid) + 0.5, np.arange(grid) + 0.5)
+    scale = piece_height / (height - piece_height)
+    return np.stack([(jj - cx) * scale, (ii - cy) * scale], axis=-1)
+
+
+class SquareSampler:
+    """칸별 대표 픽셀 인덱스를 미리 계산해 두고 gather + reduceat으로 칸 통계를 구한다."""
+
+    def __init__(
+        self,
+        shape: Tuple[int, int],
+        grid: int = GRID,
+        margin: float = SAMPLE_MARGIN_RATIO,
+        lean: Optional[np.ndarray] = None,
+        piece_radius: float = PIECE_RADIUS_SQUARES,
+    ):
+        h, w = shape
+        ch, cw = h // grid, w // grid
+        self.shape = (h, w)
+        self.grid = grid
+        ys, xs = np.mgrid[0:ch * grid, 0:cw * grid]
+        row, col = ys // ch, xs // cw
+        my, mx = int(ch * margin), int(cw * margin)
+        ly, lx = ys - row * ch, xs - col * cw
+        inside = (ly >= my) & (ly < ch - my) & (lx >= mx) & (lx < cw - mx)
+        keep = inside
+        if lean is not None:
+            # 옆 칸 기물(칸 중심 반지름 piece_radius 원기둥)이 기울어 지나가는 캡슐 안의 픽셀은 제외
+            lean = np.asarray(lean, dtype=np.float32)
+            u, v = (xs + 0.5) / cw, (ys + 0.5) / ch          # 칸 단위 좌표
+            clean = np.ones_like(inside)
+            for di in (-1, 0, 1):
+                for dj in (-1, 0, 1):
+                    if di == 0 and dj == 0:
+                        continue
+                    nr, nc = row + di, col + dj
+                    valid = (nr >= 0) & (nr < grid) & (nc >= 0) & (nc < grid)
+                    nr, nc = np.clip(nr, 0, grid - 1), np.clip(nc, 0, grid - 1)
+                    ax, ay = lean[nr, nc, 0], lean[nr, nc, 1]
+                    px, py = u - (nc + 0.5), v - (nr + 0.5)      # 옆 칸 중심 기준
+                    seg = np.clip((px * ax + py * ay) / np.maximum(ax * ax + ay * ay, 1e-9), 0.0, 1.0)
+                    dist2 = (px - seg * ax) ** 2 + (py - seg * ay) ** 2
+                    clean &= ~(valid & (dist2 < piece_radius * piece_radius))
+            keep = inside & clean
+            label = row * grid + col
+            kept = np.bincount(label[keep], minlength=grid * grid)
+            total = np.bincount(label[inside], minlength=grid * grid)
+            sparse = kept < MIN_KEEP_FRACTION * total
+            if sparse.any():
+                keep = keep | (inside & sparse[label])
+        self._mask = np.zeros((h, w), dtype=np.uint8)
+        self._mask[: ch * grid, : cw * grid][keep] = 255
+        self._masks: dict = {}
+        label = (row * grid + col)[keep]
+        flat = (ys * w + xs)[keep]
+        order = np.argsort(label, kind="stable")
+        self.index = flat[order].astype(np.intp)
+        self.counts = np.bincount(label, minlength=grid * grid).astype(np.float32)
+        self.starts = np.concatenate([[0], np.cumsum(self.counts[:-1])]).astype(np.intp)
+
+    @classmethod
+    def from_corners(
+        cls,
+        corners,
+        frame_size: Tuple[int, int],
+        size: int,
+        camera_matrix: Optional[np.ndarray] = None,
+        dist_coeffs=None,
+        piece_height: float = PIECE_HEIGHT_SQUARES,
+        piece_radius: float = PIECE_RADIUS_SQUARES,
+        margin: float = SAMPLE_MARGIN_RATIO,
+    ) -> "SquareSampler":
+        """이미지 코너와 카메라 모델로 기울기를 반영한 size x size 와핑용 샘플러."""
+        K = camera_matrix if camera_matrix is not None else default_camera_matrix(frame_size)
+        camera = camera_position(corners, K, dist_coeffs)
+        lean = None if camera is None else piece_lean(camera, piece_height)
+        return cls((size, size), margin=margin, lean=lean, piece_radius=piece_radius)
+
+    def mask(self) -> np.ndarray:
+        """샘플링되는 픽셀 (h, w) bool (디버그 오버레이용)."""
+        return self._mask > 0
+
+    def _channel_mask(self, img: np.ndarray) -> np.ndarray:
+        shape = img.shape
+        mask = self._masks.get(shape)
+        if mask is None:
+            mask = self._mask if len(shape) == 2 else np.repeat(self._mask[:, :, None], shape[2], axis=2)
+            self._masks[shape] = mask
+        return mask
+
+    def means(self, img: np.ndarray) -> np.ndarray:
+        """칸별 평균 (grid, grid, C) float32."""
+        if img.shape[:2] != self.shape:
+            raise ValueError(f"샘플러 크기 {self.shape}와 이미지 크기 {img.shape[:2]}가 다릅니다")
+        if img.dtype == np.uint8:
+            # 샘플링 픽셀은 모두 자기 칸 안에 있으므로 마스크 밖을 0으로 만든 뒤 칸 박스 합 = 샘플 합
+            # mask= 인자는 마스크 밖 dst 픽셀을 그대로 두므로 (재사용 버퍼면 이전 값이 남는다)
+            # 채널 수만큼 펼친 0/255 마스크와 전체 AND 한다
+            with get_pool().borrow_like(img) as buf:
+                sums = cell_sums(cv2.bitwise_and(img, self._channel_mask(img), dst=buf), self.grid)
+            return (sums.reshape(self.grid * self.grid, -1) / self.counts[:, None]).astype(np.float32).reshape(
+                self.grid, self.grid, -1)
+        flat = img.reshape(self.shape[0] * self.shape[1], -1)
+        # np.take는 같은 gather라도 fancy indexing보다 몇 배 빠르다
+        sums = np.add.reduceat(np.take(flat, self.index, axis=0), self.starts, axis=0, dtype=np.float64)
+        return (sums / self.counts[:, None]).astype(np.float32).reshape(self.grid, self.grid, -1)
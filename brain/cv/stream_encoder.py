@@ -0,0 +1,275 @@
+"""프레임 허브용 공용 JPEG 인코더와 MJPEG(multipart/x-mixed-replace) 스트림 생성기.
+
+대시보드가 1초마다 스냅샷을 폴링하면 요청마다 캡처/와핑/인코딩이 반복되고, 탭이 늘수록
+인코딩 CPU도 늘어난다. SharedEncoder는 (소스, 최대 폭, 품질) 변형마다 프레임 시퀀스당
+한 번만 인코딩하고, 같은 프레임을 요청하는 모든 클라이언트가 결과 바이트를 공유한다.
+
+기본 소스 (register_source로 추가 가능):
+- "original": 허브 원본 프레임. 회전 보정이 필요 없고 크기 변경이 없으면 카메라 JPEG을
+  디코딩/재인코딩 없이 그대로 전달한다.
+- "board": 공용 와핑 단계(FrameHub.warp_stage)의 와핑 이미지.
+
+인코딩은 cv.jpeg_codec(PyTurboJPEG이 있으면 libjpeg-turbo)을 쓰고, stream()에 AdaptiveRate를
+주면 클라이언트별로 측정한 전송 시간에 맞춰 품질/크기 사다리(build_ladder)를 오르내린다.
+같은 단에 있는 클라이언트들은 인코딩 결과를 공유한다.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from cv.frame_hub import Frame, FrameHub
+from cv.jpeg_codec import DEFAULT_SUBSAMPLING, get_codec
+
+BOUNDARY = "frame"
+MJPEG_MIMETYPE = f"multipart/x-mixed-replace; boundary={BOUNDARY}"
+DEFAULT_STREAM_FPS = 10.0
+BOARD_WARP_SIZE = 400
+
+Renderer = Callable[[Frame], Optional[np.ndarray]]
+
+
+def _call_direct(fn: Callable[..., Any], *args: Any) -> Any:
+    return fn(*args)
+
+
+@dataclass(frozen=True)
+class StreamVariant:
+    source: str = "original"  # "original" | "board" | register_source로 등록한 이름
+    max_width: Optional[int] = None
+    quality: int = 60
+    subsampling: str = DEFAULT_SUBSAMPLING
+
+
+def encode_jpeg(img: np.ndarray, quality: int = 60, subsampling: str = DEFAULT_SUBSAMPLING) -> bytes:
+    return get_codec().encode(img, quality, subsampling)
+
+
+def resize_to_width(img: np.ndarray, max_width: Optional[int]) -> np.ndarray:
+    if max_width is None or img is None or img.size == 0:
+        return img
+    h, w = img.shape[:2]
+    if w <= max_width:
+        return img
+    scale = max_width / float(w)
+    return cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+
+@dataclass(frozen=True)
+class Rung:
+    """품질/크기 사다리의 한 단 (max_width=None이면 원본 크기)."""
+
+    max_width: Optional[int]
+    quality: int
+
+
+def build_ladder(base: StreamVariant, full_width: Optional[int] = None) -> List[Rung]:
+    """base 변형을 가운데(인덱스 2)에 두는 품질/크기 사다리. 앞쪽일수록 고화질.
+
+    full_width: base.max_width가 None일 때 축소 단에서 기준으로 쓸 폭 (없으면 640).
+    """
+    q = base.quality
+    w = base.max_width
+    ref = w or full_width or 640
+    return [
+        Rung(w, min(q + 15, 85)),
+        Rung(w, min(q + 8, 85)),
+        Rung(w, q),
+        Rung(w, max(q - 10, 30)),
+        Rung(int(ref * 0.75), max(q - 10, 30)),
+        Rung(int(ref * 0.5), max(q - 15, 25)),
+    ]
+
+
+class AdaptiveRate:
+    """클라이언트 하나의 사다리 위치를 측정 전송 시간에 맞춰 조정.
+
+    파트 하나를 소켓에 쓰는 데 프레임 간격(1/target_fps)의 down_ratio 이상 걸리면 즉시 한 단
+    내려가고, up_ratio 미만으로 up_after번 연속 여유가 있으면 한 단 올라간다.
+    """
+
+    def __init__(
+        self,
+        ladder: Sequence[Rung],
+        target_fps: float = DEFAULT_STREAM_FPS,
+        start: int = 2,
+        down_ratio: float = 0.8,
+        up_ratio: float = 0.25,
+        up_after: int = 20,
+        alpha: float = 0.2,
+    ):
+        self.ladder = list(ladder)
+        self.index = max(0, min(start, len(self.ladder) - 1))
+        self.interval = 1.0 / target_fps if target_fps and target_fps > 0 else 0.1
+        self.down_ratio = down_ratio
+        self.up_ratio = up_ratio
+        self.up_after = up_after
+        self.alpha = alpha
+        self.throughput: Optional[float] = None  # bytes/s EMA
+        self.bytes_sent = 0
+        self._good = 0
+
+    @property
+    def rung(self) -> Rung:
+        return self.ladder[self.index]
+
+    def apply(self, variant: StreamVariant) -> StreamVariant:
+        rung = self.rung
+        return replace(variant, max_width=rung.max_width, quality=rung.quality)
+
+    def observe(self, nbytes: int, send_sec: float) -> None:
+        """파트 하나(nbytes)를 보내는 데 걸린 시간(send_sec)을 반영."""
+        self.bytes_sent += nbytes
+        rate = nbytes / max(send_sec, 1e-4)
+        self.throughput = rate if self.throughput is None else \
+            (1 - self.alpha) * self.throughput + self.alpha * rate
+        if send_sec > self.down_ratio * self.interval:
+            self._good = 0
+            if self.index < len(self.ladder) - 1:
+                self.index += 1
+        elif send_sec < self.up_ratio * self.interval:
+            self._good += 1
+            if self._good >= self.up_after and self.index > 0:
+                self.index -= 1
+                self._good = 0
+        else:
+            self._good = 0
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "rung": self.index,
+            "max_width": self.rung.max_width,
+            "quality": self.rung.quality,
+            "throughput_kbps": None if self.throughput is None else round(self.throughput * 8 / 1000, 1),
+            "bytes_sent": self.bytes_sent,
+        }
+
+
+class SharedEncoder:
+    """변형별로 마지막 (시퀀스, JPEG)를 캐시해서 프레임당 한 번만 인코딩 (스레드 안전)."""
+
+    def __init__(self, hub: FrameHub, board_size: int = BOARD_WARP_SIZE):
+        self.hub = hub
+        self.board_size = board_size
+        self._lock = threading.Lock()
+        self._variant_locks: Dict[StreamVariant, threading.Lock] = {}
+        self._cache: Dict[StreamVariant, Tuple[int, bytes]] = {}
+        self._sources: Dict[str, Renderer] = {
+            "original": lambda frame: frame.image,
+            "board": lambda frame: self.hub.warp_stage(self.board_size).process(frame).warp,
+        }
+        self.encodes = 0
+        self.passthrough = 0
+        self.dropped = 0
+
+    def register_source(self, name: str, render: Renderer) -> None:
+        """프레임 → BGR 이미지 렌더러를 소스 이름으로 등록 (같은 프레임에는 변형당 한 번만 호출)."""
+        self._sources[name] = render
+
+    def _variant_lock(self, variant: StreamVariant) -> threading.Lock:
+        with self._lock:
+            lock = self._variant_locks.get(variant)
+            if lock is None:
+                lock = self._variant_locks[variant] = threading.Lock()
+            return lock
+
+    def _render(self, frame: Frame, variant: StreamVariant) -> Optional[bytes]:
+        if variant.source == "original":
+            # 회전 보정/크기 변경이 필요 없으면 카메라 JPEG을 그대로 전달
+            if frame.jpeg is not None and frame.jpeg_rotation == 0 and variant.max_width is None:
+                self.passthrough += 1
+                return frame.jpeg
+        render = self._sources.get(variant.source)
+        if render is None:
+            raise KeyError(f"알 수 없는 스트림 소스: {variant.source}")
+        img = render(frame)
+        if img is None:
+            return None
+        self.encodes += 1
+        return encode_jpeg(resize_to_width(img, variant.max_width), variant.quality, variant.subsampling)
+
+    def encode(self, frame: Frame, variant: StreamVariant) -> Optional[bytes]:
+        """frame의 variant 인코딩 결과. 같은 프레임이면 캐시된 바이트를 돌려준다."""
+        cached = self._cache.get(variant)
+        if cached is not None and cached[0] == frame.seq:
+            return cached[1]
+        with self._variant_lock(variant):
+            cached = self._cache.get(variant)
+            if cached is not None and cached[0] >= frame.seq:
+                return cached[1]
+            data = self._render(frame, variant)
+            if data is not None:
+                self._cache[variant] = (frame.seq, data)
+            return data
+
+    def latest(self, variant: StreamVariant, timeout: Optional[float] = None) -> Optional[bytes]:
+        """허브 최신 프레임의 인코딩 결과 (단일 스냅샷 응답용)."""
+        frame = self.hub.latest()
+        if frame is None:
+            frame = self.hub.wait_newer(0, self.hub.read_timeout if timeout is None else timeout)
+        return None if frame is None else self.encode(frame, variant)
+
+    def stream(
+        self,
+        variant: StreamVariant,
+        max_fps: float = DEFAULT_STREAM_FPS,
+        idle_timeout: float = 5.0,
+        *,
+        call: Callable[..., Any] = _call_direct,
+        sleep: Callable[[float], None] = time.sleep,
+        rate: Optional[AdaptiveRate] = None,
+    ) -> Iterator[bytes]:
+        """multipart/x-mixed-replace 파트들을 생성. 새 프레임이 올 때만 보내고 max_fps로 제한.
+
+        다음 파트는 이전 파트가 소켓에 다 쓰인 뒤에 최신 프레임으로 만들므로, 느린 클라이언트는
+        중간 프레임을 건너뛸 뿐 큐가 쌓이지 않는다. self.dropped에는 max_fps로 일부러 건너뛴 프레임은
+        빼고, 보낼 차례가 된 뒤 이전 파트를 쓰는 동안 새 프레임에 덮어쓰인 프레임만 누적한다.
+        idle_timeout 동안 새 프레임이 없으면 마지막 파트를 다시 보내고 계속 기다린다. 응답을 닫으면
+        대시보드 <img>는 다시 연결하지 않고 멈추므로, 생성기는 허브가 해제될 때만 끝난다.
+        call/sleep: 블로킹 대기/인코딩을 실행할 함수 (eventlet에서는 tpool.execute, eventlet.sleep).
+        rate: 주면 파트마다 rate.apply(variant)로 품질/크기를 고르고, 전송 시간을 rate.observe로 알린다.
+        """
+        min_interval = 1.0 / max_fps if max_fps and max_fps > 0 else 0.0
+        seq = 0
+        last_sent = 0.0
+        due = 0.0   # 다음 프레임을 보낼 수 있게 되는 시각 (time.time() 기준, 허브 프레임 timestamp와 비교)
+        last_part: Optional[bytes] = None
+        while True:
+            if min_interval:
+                wait = last_sent + min_interval - time.monotonic()
+                if wait > 0:
+                    sleep(wait)
+            frame = call(self.hub.wait_newer, seq, idle_timeout)
+            if frame is None:
+                if not self.hub.running:
+                    return
+                # 연결 유지용 재전송 (끊긴 클라이언트는 이 쓰기에서 실패해 정리된다)
+                if last_part is not None:
+                    yield last_part
+                continue
+            if seq and frame.seq > seq + 1:
+                first = self.hub.first_seq_after(due)
+                if first is not None and first < frame.seq:
+                    with self._lock:
+                        self.dropped += frame.seq - max(first, seq + 1)
+            seq = frame.seq
+            data = call(self.encode, frame, variant if rate is None else rate.apply(variant))
+            if data is None:
+                continue
+            last_sent = time.monotonic()
+            due = time.time() + min_interval
+            # WSGI 서버는 이 파트를 소켓에 다 쓴 뒤에 다음 파트를 요청하므로, 재개까지 걸린 시간이 전송 시간
+            last_part = (
+                f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(data)}\r\n\r\n".encode()
+                + data
+                + b"\r\n"
+            )
+            yield last_part
+            if rate is not None:
+                rate.observe(len(data), time.monotonic() - last_sent)
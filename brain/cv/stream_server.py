@@ -0,0 +1,445 @@
+"""단일 캡처 파이프라인 기반 통합 스트리밍 서비스.
+
+mjpg/main.py, CV/main.py, cv_web.py는 각자 frame_reader 스레드로 cap.read()를 폴링하고
+각자 코너 처리/인코딩을 했다. 이 모듈은 모든 뷰를 하나의 파이프라인에서 제공한다.
+
+    FrameHub (캡처 스레드 1개) → WarpStage (프레임당 와핑 1회, cv_manager 수동 코너)
+        → 뷰 렌더러 (original / warp / piece / edges / base) → SharedEncoder (뷰·프레임당 인코딩 1회)
+
+- 라우트별 FPS 상한: StreamView.max_fps. 클라이언트는 ?fps=N으로 더 낮출 수만 있다.
+- 백프레셔: 각 클라이언트는 이전 파트를 다 보낸 뒤 최신 프레임을 받으므로, 느린 클라이언트는
+  프레임을 건너뛰고 큐는 쌓이지 않는다.
+- 적응형 품질: adaptive 뷰는 클라이언트마다 전송 시간을 재서 품질/크기 사다리를 오르내린다
+  (?adaptive=0이면 고정 품질).
+- eventlet이 설치되어 있으면 run_wsgi()가 eventlet WSGI 서버로 실행하고, 블로킹 대기/인코딩은
+  tpool 스레드에서 처리한다. 없으면 Flask(werkzeug) 스레드 서버로 실행한다.
+
+cv_web.build_app()이 이 서비스의 블루프린트를 등록하므로 /stream/<view>, /snapshot/<view>,
+/streams는 cv_web 서버에서 바로 사용할 수 있다. mjpg/main.py, CV/main.py 단독 서버도 같은 서비스로
+예전 라우트(/warp, /piece, ...)를 제공한다. 단독 실행: ``python -m cv.stream_server`` (brain 폴더에서).
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+from cv.buffer_pool import get_pool
+from cv.frame_hub import Frame, FrameHub
+from cv.jpeg_codec import DEFAULT_SUBSAMPLING, get_codec
+from cv.lighting import equalize
+from cv.rate_governor import get_governor
+from cv.stream_encoder import (
+    DEFAULT_STREAM_FPS,
+    MJPEG_MIMETYPE,
+    AdaptiveRate,
+    Renderer,
+    SharedEncoder,
+    StreamVariant,
+    build_ladder,
+)
+from cv.warp_stage import WarpedFrame
+
+ReferenceFn = Callable[[], Optional[np.ndarray]]
+PiecesFn = Callable[[], Optional[list]]
+
+GRID = 8
+DIFF_TOP_K = 2
+
+# 예전 뷰 이름 → 현재 뷰 이름 (/stream/board, /snapshot/board는 warp 뷰)
+VIEW_ALIASES = {"board": "warp"}
+
+@dataclass(frozen=True)
+class StreamView:
+    """스트림 뷰 하나. render=None이면 인코더의 기본 소스(original/board)를 그대로 쓴다."""
+
+    name: str
+    render: Optional[Renderer] = None
+    source: Optional[str] = None
+    max_fps: float = DEFAULT_STREAM_FPS
+    quality: int = 60
+    max_width: Optional[int] = None
+    description: str = ""
+    adaptive: bool = True
+    subsampling: str = DEFAULT_SUBSAMPLING
+
+    @property
+    def variant(self) -> StreamVariant:
+        return StreamVariant(self.source or self.name, self.max_width, self.quality, self.subsampling)
+
+
+# ----------------------------------------------------------------------
+# 뷰 렌더러 (와핑 결과는 WarpedFrame에서 공유)
+# ----------------------------------------------------------------------
+def _draw_grid(img: np.ndarray, color=(100, 100, 100)) -> None:
+    h, w = img.shape[:2]
+    cs_h, cs_w = h // GRID, w // GRID
+    for k in range(1, GRID):
+        cv2.line(img, (k * cs_w, 0), (k * cs_w, h), color, 1, cv2.LINE_AA)
+        cv2.line(img, (0, k * cs_h), (w, k * cs_h), color, 1, cv2.LINE_AA)
+
+
+def _cell_rect(i: int, j: int, size: int):
+    ch = cw = size // GRID
+    return (j * cw, i * ch), ((j + 1) * cw, (i + 1) * ch)
+
+
+def diff_norms(wf: WarpedFrame, reference: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """칸별 평균 BGR과 기준 보드(init_board_values, (8, 8, 3) BGR) 차이의 크기 (8, 8).
+
+    현재 칸 평균은 WarpStage 기준 보드로 조명 gain/offset을 보정한 값(wf.normalized_bgr_means,
+    프레임당 한 번 계산해 뷰끼리 공유)을 쓴다. 스테이지에 기준이 없으면 보정 없이 비교한다.
+    """
+    if reference is None:
+        return None
+    ref = np.asarray(reference, dtype=np.float32)
+    if ref.shape != (GRID, GRID, 3):
+        return None
+    means = wf.normalized_bgr_means
+    if means is None:
+        means = wf.bgr_means
+    return np.linalg.norm(means - ref, axis=2)
+
+
+def top_cells(norms: np.ndarray, k: int = DIFF_TOP_K) -> List[tuple]:
+    order = np.argsort(-norms, axis=None)[:k]
+    return [divmod(int(idx), GRID) for idx in order]
+
+
+def render_piece_diff(wf: WarpedFrame, reference: Optional[np.ndarray], top_k: int = DIFF_TOP_K) -> np.ndarray:
+    """와핑 이미지에 기준 대비 변화가 큰 칸 top_k개를 빨간 박스로 표시 (mjpg /piece)."""
+    vis = wf.warp.copy()   # 공유 와핑 배열은 수정하지 않고 복사본에 그린다
+    norms = diff_norms(wf, reference)
+    if norms is not None:
+        for i, j in top_cells(norms, top_k):
+            p1, p2 = _cell_rect(i, j, wf.size)
+            cv2.rectangle(vis, p1, p2, (0, 0, 255), 3)
+    return vis
+
+
+def render_edges(wf: WarpedFrame) -> np.ndarray:
+    """CLAHE 후 적응 임계값 Canny 에지 + 격자 (mjpg /edges, _edge_density_map과 같은 임계값 규칙)."""
+    pool = get_pool()
+    # 그레이/평활화 이미지는 중간 결과라 풀에서 빌리고, 내보내는 에지 이미지는 새 배열
+    with pool.borrow(wf.warp.shape[:2]) as gray, pool.borrow(wf.warp.shape[:2]) as eq:
+        gray = cv2.cvtColor(wf.warp, cv2.COLOR_BGR2GRAY, dst=gray)
+        eq = equalize(gray, dst=eq)
+        # np.var는 전체 픽셀을 float64로 바꾼다. meanStdDev는 uint8을 바로 누적
+        std = float(cv2.meanStdDev(eq)[1][0, 0])
+        lower = max(10, min(80, int(0.33 * max(1.0, std))))
+        vis = cv2.Canny(eq, lower, int(lower * 2.5))
+    # 1채널 그대로 두면 그레이 JPEG으로 인코딩된다 (크로마 평면 없음)
+    _draw_grid(vis, 128)
+    return vis
+
+
+def render_base(
+    wf: Optional[WarpedFrame],
+    pieces: Optional[list],
+    reference: Optional[np.ndarray],
+    size: int = 400,
+    top_k: int = DIFF_TOP_K,
+) -> np.ndarray:
+    """기물 배열(chess_pieces) 보드 그림 + 칸별 diff 값 + 변화 상위 칸 표시 (mjpg /base_board_img)."""
+    if not (isinstance(pieces, list) and len(pieces) == GRID
+            and all(isinstance(row, list) and len(row) == GRID for row in pieces)):
+        pieces = [[""] * GRID for _ in range(GRID)]
+    cell = size // GRID
+    img = np.full((size, size, 3), 220, np.uint8)
+    for i in range(GRID):
+        for j in range(GRID):
+            p1, p2 = _cell_rect(i, j, size)
+            cv2.rectangle(img, p1, p2, (180, 180, 180) if (i + j) % 2 == 0 else (240, 240, 240), -1)
+            piece = pieces[i][j]
+            if piece:
+                color = (255, 255, 255) if piece[0] == "W" else (0, 0, 0) if piece[0] == "B" else (0, 0, 255)
+                cv2.putText(img, piece, (p1[0] + 8, p1[1] + cell // 2 + 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2, cv2.LINE_AA)
+
+    norms = None if wf is None else diff_norms(wf, reference)
+    if norms is not None:
+        for i in range(GRID):
+            for j in range(GRID):
+                cv2.putText(img, f"{int(norms[i, j])}", (j * cell + 4, i * cell + cell // 2 + 6),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 200), 2, cv2.LINE_AA)
+        for i, j in top_cells(norms, top_k):
+            p1, p2 = _cell_rect(i, j, size)
+            cv2.rectangle(img, p1, p2, (0, 0, 255), 3)
+    return img
+
+
+# ----------------------------------------------------------------------
+# 서비스
+# ----------------------------------------------------------------------
+def _eventlet_helpers():
+    """eventlet이 있으면 (tpool.execute, eventlet.sleep), 없으면 None."""
+    try:
+        import eventlet
+        from eventlet import tpool
+    except ImportError:
+        return None
+    return tpool.execute, eventlet.sleep
+
+
+class StreamService:
+    """FrameHub 하나로 모든 스트림 뷰를 제공하는 서비스."""
+
+    def __init__(
+        self,
+        hub: FrameHub,
+        *,
+        reference_fn: Optional[ReferenceFn] = None,
+        pieces_fn: Optional[PiecesFn] = None,
+        warp_size: int = 400,
+        encoder: Optional[SharedEncoder] = None,
+    ):
+        self.hub = hub
+        self.warp_size = warp_size
+        self.encoder = encoder or SharedEncoder(hub, board_size=warp_size)
+        self._reference_fn = reference_fn or (lambda: None)
+        self._pieces_fn = pieces_fn or (lambda: None)
+        self._green: Optional[tuple] = None
+        self._clients_lock = threading.Lock()
+        self._clients: Dict[int, tuple] = {}
+        self.views: Dict[str, StreamView] = {}
+        for view in self._default_views():
+            self.add_view(view)
+
+    def _warped(self, frame: Frame) -> WarpedFrame:
+        stage = self.hub.warp_stage(self.warp_size)
+        reference = self._reference_fn()
+        if reference is not None:
+            # 턴 전환과 같은 기준/기물 배열이면 no-op (조명 보정 결과를 프레임 단위로 공유)
+            stage.set_reference(reference, self._pieces_fn())
+        return stage.process(frame)
+
+    def _default_views(self) -> List[StreamView]:
+        return [
+            StreamView("original", source="original", max_width=480, quality=45,
+                       description="원본 미리보기 (?manual=1이면 원본 크기)"),
+            StreamView("warp", source="board", quality=55, description="수동 코너 와핑"),
+            StreamView("piece", lambda f: render_piece_diff(self._warped(f), self._reference_fn()),
+                       max_fps=5.0, description="기준 대비 변화 상위 칸"),
+            StreamView("edges", lambda f: render_edges(self._warped(f)),
+                       max_fps=5.0, description="에지 디버그", subsampling="gray"),
+            StreamView("base", lambda f: render_base(
+                self._warped(f), self._pieces_fn(), self._reference_fn(), self.warp_size),
+                max_fps=2.0, quality=70, description="기물 배열 + 칸별 diff",
+                adaptive=False, subsampling="444"),
+        ]
+
+    def add_view(self, view: StreamView) -> None:
+        if view.render is not None:
+            self.encoder.register_source(view.source or view.name, view.render)
+        self.views[view.name] = view
+
+    def resolve(self, name: str) -> str:
+        """별칭(VIEW_ALIASES)을 실제 뷰 이름으로 바꾼다."""
+        return VIEW_ALIASES.get(name, name)
+
+    def variant(self, name: str, manual: bool = False) -> StreamVariant:
+        view = self.views[self.resolve(name)]
+        if manual and view.name == "original":
+            return StreamVariant("original", quality=60, subsampling=view.subsampling)
+        return view.variant
+
+    def snapshot(self, name: str, manual: bool = False) -> Optional[bytes]:
+        """뷰의 최신 프레임 JPEG (다른 클라이언트와 인코딩 결과 공유)."""
+        return self.encoder.latest(self.variant(name, manual))
+
+    def stream(self, name: str, fps: Optional[float] = None, manual: bool = False,
+               adaptive: Optional[bool] = None) -> Iterator[bytes]:
+        """뷰의 multipart 스트림. fps는 뷰의 max_fps를 넘을 수 없다.
+
+        adaptive(기본: 뷰 설정)이면 이 클라이언트 전용 AdaptiveRate로 품질/크기를 조정한다.
+        """
+        name = self.resolve(name)
+        view = self.views[name]
+        max_fps = view.max_fps if fps is None or fps <= 0 else min(fps, view.max_fps)
+        variant = self.variant(name, manual)
+        rate = None
+        if view.adaptive if adaptive is None else adaptive:
+            full_width = None if variant.source == "original" else self.warp_size
+            rate = AdaptiveRate(build_ladder(variant, full_width), target_fps=max_fps)
+        kwargs: Dict[str, Any] = {"max_fps": max_fps, "rate": rate}
+        if self._green is not None:
+            kwargs["call"], kwargs["sleep"] = self._green
+        parts = self.encoder.stream(variant, **kwargs)
+
+        def tracked() -> Iterator[bytes]:
+            key = id(parts)
+            with self._clients_lock:
+                self._clients[key] = (name, rate)
+            try:
+                yield from parts
+            finally:
+                with self._clients_lock:
+                    self._clients.pop(key, None)
+
+        return tracked()
+
+    def clients(self) -> List[Dict[str, Any]]:
+        """현재 스트림 클라이언트별 뷰와 사다리 상태."""
+        with self._clients_lock:
+            active = list(self._clients.values())
+        return [dict({"view": name}, **(rate.describe() if rate is not None else {})) for name, rate in active]
+
+    def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """블로킹 함수 실행 (eventlet 모드면 tpool 스레드에서)."""
+        if self._green is not None:
+            return self._green[0](fn, *args)
+        return fn(*args)
+
+    def use_eventlet(self) -> bool:
+        """eventlet 서버에서 실행할 때 호출. 블로킹 단계를 tpool로 보낸다."""
+        self._green = _eventlet_helpers()
+        return self._green is not None
+
+    def blueprint(self):
+        """/stream/<view>, /snapshot/<view>, /streams 라우트를 가진 Flask 블루프린트."""
+        from flask import Blueprint, Response, jsonify, request
+
+        bp = Blueprint("streams", __name__)
+
+        def _fps_arg() -> Optional[float]:
+            try:
+                return float(request.args["fps"]) if "fps" in request.args else None
+            except ValueError:
+                return None
+
+        @bp.route("/stream/<name>")
+        def stream_view(name: str):
+            if self.resolve(name) not in self.views:
+                return "알 수 없는 스트림", 404
+            manual = request.args.get("manual") == "1"
+            adaptive = None if "adaptive" not in request.args else request.args.get("adaptive") != "0"
+            return Response(self.stream(name, _fps_arg(), manual, adaptive), mimetype=MJPEG_MIMETYPE)
+
+        @bp.route("/snapshot/<name>")
+        def snapshot_view(name: str):
+            if self.resolve(name) not in self.views:
+                return "알 수 없는 스트림", 404
+            data = self.snapshot(name, request.args.get("manual") == "1")
+            if data is None:
+                return "카메라 프레임 없음", 500
+            return Response(data, mimetype="image/jpeg")
+
+        @bp.route("/streams")
+        def list_streams():
+            governor = getattr(self.hub, "governor", None)
+            return jsonify({
+                "views": [
+                    {"name": v.name, "max_fps": v.max_fps, "quality": v.quality, "description": v.description}
+                    for v in self.views.values()
+                ],
+                "encodes": self.encoder.encodes,
+                "passthrough": self.encoder.passthrough,
+                "dropped": self.encoder.dropped,
+                "codec": get_codec().backend,
+                "clients": self.clients(),
+                "governor": governor.describe() if governor is not None else None,
+                "buffer_pool": get_pool().describe(),
+            })
+
+        return bp
+
+
+def resolve_async_mode(async_mode: str = "auto") -> str:
+    """"auto"를 실제 모드("eventlet" 또는 "threading")로 바꾼다."""
+    if async_mode == "auto":
+        return "eventlet" if _eventlet_helpers() is not None else "threading"
+    return async_mode
+
+
+def run_wsgi(app, host: str = "0.0.0.0", port: int = 5001, service: Optional[StreamService] = None,
+             async_mode: str = "auto", socketio=None) -> None:
+    """Flask 앱 실행. async_mode: "auto"(eventlet 있으면 사용) | "eventlet" | "threading".
+
+    socketio(flask_socketio.SocketIO)를 주면 socketio.run()으로 실행한다. 이때 async_mode는
+    SocketIO를 만들 때 쓴 모드와 같아야 한다.
+    """
+    mode = resolve_async_mode(async_mode)
+    if mode == "eventlet" and service is not None:
+        service.use_eventlet()
+    if socketio is not None:
+        print(f"[stream] Socket.IO 서버 실행 ({mode}): http://{host}:{port}")
+        if mode == "eventlet":
+            socketio.run(app, host=host, port=port, debug=False, use_reloader=False, log_output=False)
+        else:
+            socketio.run(app, host=host, port=port, debug=False, use_reloader=False,
+                         log_output=False, allow_unsafe_werkzeug=True)
+        return
+    if mode == "eventlet":
+        import eventlet
+        import eventlet.wsgi
+
+        print(f"[stream] eventlet WSGI 서버 실행: http://{host}:{port}")
+        eventlet.wsgi.server(eventlet.listen((host, port)), app, log_output=False)
+        return
+    app.run(host=host, port=port, debug=False, use_reloader=False, threaded=True)
+
+
+def _index_html(service: StreamService) -> str:
+    imgs = "\n".join(
+        f'<div style="display:inline-block; margin:6px; vertical-align:top;">'
+        f"<div><b>{v.name}</b> <small>{v.description} (최대 {v.max_fps:g}fps)</small></div>"
+        f'<img src="/stream/{v.name}" style="max-width:420px; border:1px solid #ccc" /></div>'
+        for v in service.views.values()
+    )
+    return f"<h1>체스판 스트림</h1>\n{imgs}"
+
+
+def main(host: str = "0.0.0.0", port: int = 5002, async_mode: str = "auto") -> None:
+    """스트림 뷰만 제공하는 단독 서버 (대시보드/수동 코너 설정은 cv_web 사용)."""
+    import pickle
+    from pathlib import Path
+
+    from flask import Flask
+
+    from cv.capture_sources import open_capture
+    from cv.cv_web import BASE_DIR
+
+    def file_loader(path: Path, load: Callable[[Path], Any]) -> Callable[[], Any]:
+        # cv_web에서 기준 보드/기물 배열을 다시 저장하면 파일 변경 시각으로 감지해 다시 로드
+        cached: Dict[str, Any] = {"mtime": None, "value": None}
+
+        def get():
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                return None
+            if mtime != cached["mtime"]:
+                try:
+                    cached["value"] = load(path)
+                except Exception as e:
+                    print(f"[stream] {path.name} 로드 실패: {e}")
+                    cached["value"] = None
+                cached["mtime"] = mtime
+            return cached["value"]
+
+        return get
+
+    def load_pickle(path: Path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    reference_fn = file_loader(BASE_DIR / "init_board_values.npy", np.load)
+    pieces_fn = file_loader(BASE_DIR / "chess_pieces.pkl", load_pickle)
+
+    hub = FrameHub(open_capture(), governor=get_governor())
+    service = StreamService(hub, reference_fn=reference_fn, pieces_fn=pieces_fn)
+    app = Flask(__name__)
+    app.register_blueprint(service.blueprint())
+    app.add_url_rule("/", "index", lambda: _index_html(service))
+    try:
+        run_wsgi(app, host, port, service, async_mode)
+    finally:
+        hub.release()
+
+
+if __name__ == "__main__":
+    main()
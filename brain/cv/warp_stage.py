@@ -0,0 +1,297 @@
+"""프레임 허브에 붙는 공용 와핑 단계.
+
+게임 경로, `/snapshot_board`, `/ml_prediction`, 데이터셋 수집기가 같은 프레임을 각자
+getPerspectiveTransform + warpPerspective 하던 것을 한 곳으로 모은다.
+
+- HomographyCache: 코너가 바뀔 때만 호모그래피를 다시 계산한다.
+  실제 와핑은 호모그래피별로 만든 remap 맵(cv.remap_warp)으로 수행한다.
+- WarpStage: 캡처된 프레임(시퀀스 번호)마다 와핑을 한 번만 수행하고 결과를 소비자들이 공유한다.
+- WarpedFrame: 와핑 이미지와 LAB 이미지, 8x8 칸 그리드, 칸별 평균 같은 파생 결과를
+  처음 요청될 때 계산해 캐시한다. 칸별 평균은 샘플러(cv.square_sampling)가 있으면 기물 기울기를
+  제외한 칸 영역만 평균한다. 와핑/LAB 이미지는 소비자들이 얼마나 오래 들고 있을지 모르므로
+  공용 버퍼 풀에서 빌리지 않고 프레임마다 새 배열에 쓴다.
+  WarpStage.set_reference()로 기준 보드를 붙이면 조명 보정한 칸 평균(normalized_*_means)도
+  프레임당 한 번만 계산해 /piece, /base_board_img, 턴 전환이 같이 쓴다.
+
+사용 예::
+
+    stage = hub.warp_stage(400)          # cv_manager 수동 코너 사용
+    wf = stage.latest()                  # 가장 최근 프레임의 WarpedFrame
+    wf.warp, wf.lab_means, wf.cells      # 필요할 때 계산 (한 번만)
+    stage.set_reference(init_board_values, chess_pieces)
+    wf.normalized_lab_means              # 기준 조명으로 되돌린 칸 평균 (기준이 없으면 None)
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from cv.frame_hub import Frame, FrameHub
+from cv.lighting import BoardReference, LightingGain, reference_key
+from cv.picam_stable import sort_corners_by_position
+from cv.remap_warp import RemapWarper
+from cv.square_sampling import cell_means
+
+CornersFn = Callable[[], Optional[np.ndarray]]
+VersionFn = Callable[[], Hashable]
+SamplerFn = Callable[[Tuple[int, int], int], Optional[object]]   # (원본 (w, h), 와핑 크기) → SquareSampler
+ReferenceFn = Callable[[], Optional[BoardReference]]
+
+_CACHE_FRAMES = 4
+
+
+def compute_homography(corners, size: int) -> np.ndarray:
+    """picam_stable.warp_chessboard와 같은 코너 정렬/목표점으로 호모그래피를 계산."""
+    c = sort_corners_by_position(np.asarray(corners, dtype=np.float32))
+    dst = np.array([[0, 0], [size - 1, 0], [size - 1, size - 1], [0, size - 1]], dtype=np.float32)
+    return cv2.getPerspectiveTransform(c, dst)
+
+
+class HomographyCache:
+    """코너 버전(또는 코너 값)과 출력 크기별 호모그래피 캐시."""
+
+    def __init__(self, corners_fn: CornersFn, version_fn: Optional[VersionFn] = None):
+        self._corners_fn = corners_fn
+        self._version_fn = version_fn
+        self._lock = threading.Lock()
+        self._cache: dict = {}
+        self._cache_version: Hashable = None
+        self.generation = 0  # 코너가 바뀔 때마다 증가
+
+    def lookup(self, size: int) -> Tuple[int, Optional[np.ndarray]]:
+        """(generation, 행렬). 코너가 없거나 잘못되었으면 행렬은 None."""
+        corners = self._corners_fn()
+        if corners is not None:
+            corners = np.asarray(corners, dtype=np.float32)
+            if corners.shape != (4, 2):
+                corners = None
+        if corners is None:
+            version: Hashable = None
+        else:
+            version = self._version_fn() if self._version_fn is not None else corners.tobytes()
+        with self._lock:
+            if version != self._cache_version:
+                self._cache.clear()
+                self._cache_version = version
+                self.generation += 1
+            if corners is None:
+                return self.generation, None
+            M = self._cache.get(size)
+            if M is None:
+                M = compute_homography(corners, size)
+                self._cache[size] = M
+            return self.generation, M
+
+    def matrix(self, size: int) -> Optional[np.ndarray]:
+        """현재 코너에 대한 size x size 와핑 행렬. 코너가 없거나 잘못되었으면 None."""
+        return self.lookup(size)[1]
+
+
+def warp_frame(
+    frame: np.ndarray,
+    M: Optional[np.ndarray],
+    size: int,
+    warper: Optional[RemapWarper] = None,
+) -> np.ndarray:
+    """M이 있으면 와핑, 없으면 size x size로 리사이즈 (warp_with_manual_corners와 같은 규칙).
+
+    warper를 주면 호모그래피별로 캐시된 remap 맵을 사용한다.
+    """
+    if M is not None:
+        if warper is not None:
+            return warper.warp_with_matrix(frame, M)
+        return cv2.warpPerspective(frame, M, (size, size))
+    return cv2.resize(frame, (size, size))
+
+
+def split_cells(img: np.ndarray, grid: int = 8) -> np.ndarray:
+    """(H, W, C) 이미지를 (grid, grid, cell_h, cell_w, C) 칸 뷰로 나눈다 (나머지 픽셀은 버림)."""
+    h, w = img.shape[:2]
+    ch, cw = h // grid, w // grid
+    cropped = img[: ch * grid, : cw * grid]
+    return cropped.reshape(grid, ch, grid, cw, -1).swapaxes(1, 2)
+
+
+class WarpedFrame:
+    """프레임 하나의 와핑 결과와 지연 계산되는 파생 결과들."""
+
+    def __init__(
+        self,
+        frame: Frame,
+        M: Optional[np.ndarray],
+        size: int,
+        warper: Optional[RemapWarper] = None,
+        sampler_fn: Optional[SamplerFn] = None,
+        reference_fn: Optional[ReferenceFn] = None,
+    ):
+        self.seq = frame.seq
+        self.timestamp = frame.timestamp
+        self.image = frame.image
+        self.size = size
+        self.matrix = M
+        self._warper = warper
+        self._sampler_fn = sampler_fn
+        self._reference_fn = reference_fn
+        self._lock = threading.RLock()  # 파생 결과가 다른 파생 결과를 요청하므로 재진입 가능
+        self._cache: dict = {}
+
+    def _get(self, key: Hashable, compute: Callable[[], object]):
+        value = self._cache.get(key)
+        if value is None:
+            with self._lock:
+                value = self._cache.get(key)
+                if value is None:
+                    value = compute()
+                    self._cache[key] = value
+        return value
+
+    @property
+    def warp(self) -> np.ndarray:
+        """size x size BGR 와핑 이미지 (공유 배열이므로 수정하려면 copy())."""
+        return self._get("warp", lambda: warp_frame(self.image, self.matrix, self.size, self._warper))
+
+    @property
+    def lab(self) -> np.ndarray:
+        return self._get("lab", lambda: cv2.cvtColor(self.warp, cv2.COLOR_BGR2LAB))
+
+    @property
+    def cells(self) -> np.ndarray:
+        """와핑 이미지의 (8, 8, cell_h, cell_w, 3) 칸 뷰."""
+        return self._get("cells", lambda: split_cells(self.warp))
+
+    def _means(self, img: np.ndarray) -> np.ndarray:
+        sampler = None
+        if self._sampler_fn is not None and self.matrix is not None:
+            h, w = self.image.shape[:2]
+            sampler = self._sampler_fn((w, h), self.size)
+        if sampler is not None:
+            return sampler.means(img)
+        return cell_means(img)
+
+    @property
+    def lab_means(self) -> np.ndarray:
+        """칸별 LAB 평균 (8, 8, 3) float32 - cv_manager._mean_lab_board_from_warp와 동일."""
+        return self._get("lab_means", lambda: self._means(self.lab))
+
+    @property
+    def bgr_means(self) -> np.ndarray:
+        """칸별 BGR 평균 (8, 8, 3) float32 - cv_manager.compute_board_means_bgr와 동일."""
+        return self._get("bgr_means", lambda: self._means(self.warp))
+
+    def _normalized(self, space: str) -> Optional[Tuple[LightingGain, np.ndarray]]:
+        ref = self._reference_fn() if self._reference_fn is not None else None
+        if ref is None:
+            return None
+
+        def compute():
+            normalizer, means = (ref.lab, self.lab_means) if space == "lab" else (ref.bgr, self.bgr_means)
+            gain = normalizer.estimate(means)
+            return gain, gain.apply(means)
+
+        # 기준이 바뀌면 세대가 달라지므로 같은 프레임도 다시 보정
+        return self._get((space, ref.generation), compute)
+
+    @property
+    def normalized_lab_means(self) -> Optional[np.ndarray]:
+        """기준 보드 조명으로 되돌린 칸별 LAB 평균 (L은 gain + offset, a/b는 offset). 기준이 없으면 None."""
+        result = self._normalized("lab")
+        return None if result is None else result[1]
+
+    @property
+    def normalized_bgr_means(self) -> Optional[np.ndarray]:
+        """기준 보드 조명으로 되돌린 칸별 BGR 평균. 기준이 없으면 None."""
+        result = self._normalized("bgr")
+        return None if result is None else result[1]
+
+    def lighting_gain(self, space: str = "lab") -> Optional[LightingGain]:
+        """normalized_{space}_means에 쓴 gain/offset (기준이 없으면 None)."""
+        result = self._normalized(space)
+        return None if result is None else result[0]
+
+
+class WarpStage:
+    """FrameHub의 프레임을 시퀀스 번호당 한 번만 와핑해서 공유하는 단계."""
+
+    def __init__(
+        self,
+        hub: FrameHub,
+        size: int = 400,
+        corners_fn: Optional[CornersFn] = None,
+        version_fn: Optional[VersionFn] = None,
+        sampler_fn: Optional[SamplerFn] = None,
+    ):
+        if corners_fn is None:
+            # 기본값: cv_manager의 수동 코너 (코너 버전이 바뀔 때만 호모그래피/칸 샘플러 재계산)
+            from cv import cv_manager
+
+            corners_fn = lambda: cv_manager.get_manual_corners(copy=False)
+            version_fn = cv_manager.get_corners_version
+            if sampler_fn is None:
+                sampler_fn = lambda frame_size, size: cv_manager.get_square_sampler(size, frame_size)
+        self.sampler_fn = sampler_fn
+        self.hub = hub
+        self.size = size
+        self.homography = HomographyCache(corners_fn, version_fn)
+        self.warper = RemapWarper(size)
+        self._lock = threading.Lock()
+        self._frames: "OrderedDict[Tuple[int, int], WarpedFrame]" = OrderedDict()
+        self._local = threading.local()
+        self._reference: Optional[BoardReference] = None
+        self._reference_generation = 0
+
+    def set_reference(self, reference: Optional[np.ndarray], pieces=None) -> None:
+        """조명 보정 기준 보드 (칸별 BGR 평균 (8, 8, 3))와 기물 배열 (빈 칸으로 gain을 맞춤).
+
+        같은 기준/빈 칸이면 아무것도 하지 않는다. None이나 모양이 다른 값이면 기준을 지운다.
+        """
+        if reference is None or np.shape(reference) != (8, 8, 3):
+            self._reference = None
+            return
+        current = self._reference
+        if current is not None and current.key == reference_key(reference, pieces):
+            return
+        with self._lock:
+            self._reference_generation += 1
+            self._reference = BoardReference(reference, pieces, self._reference_generation)
+
+    @property
+    def reference(self) -> Optional[BoardReference]:
+        return self._reference
+
+    def process(self, frame: Frame) -> WarpedFrame:
+        """프레임의 WarpedFrame을 반환 (같은 프레임/같은 호모그래피면 캐시 재사용)."""
+        generation, M = self.homography.lookup(self.size)
+        key = (frame.seq, generation)
+        with self._lock:
+            wf = self._frames.get(key)
+            if wf is None:
+                wf = WarpedFrame(frame, M, self.size, self.warper, self.sampler_fn, lambda: self._reference)
+                self._frames[key] = wf
+                while len(self._frames) > _CACHE_FRAMES:
+                    self._frames.popitem(last=False)
+            return wf
+
+    def latest(self, timeout: Optional[float] = None) -> Optional[WarpedFrame]:
+        """허브의 최신 프레임을 와핑한 결과. 아직 프레임이 없으면 timeout까지 첫 프레임을 기다린다."""
+        frame = self.hub.latest()
+        if frame is None:
+            frame = self.hub.wait_newer(0, self.hub.read_timeout if timeout is None else timeout)
+        return None if frame is None else self.process(frame)
+
+    def wait_newer(self, seq: int = 0, timeout: Optional[float] = None) -> Optional[WarpedFrame]:
+        frame = self.hub.wait_newer(seq, timeout)
+        return None if frame is None else self.process(frame)
+
+    def read(self) -> Tuple[bool, Optional[WarpedFrame]]:
+        """FrameHub.read()처럼 같은 스레드에서 연속 호출 시 매번 새 프레임의 WarpedFrame을 반환."""
+        last_seq = getattr(self._local, "seq", 0)
+        wf = self.wait_newer(last_seq, self.hub.read_timeout)
+        if wf is None:
+            return False, None
+        self._local.seq = wf.seq
+        return True, wf
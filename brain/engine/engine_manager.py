@@ -13,6 +13,9 @@ import time
 import threading
 import chess
 import chess.engine
+
+from game import event_bus
+
 STOCKFISH_PATH = '/usr/games/stockfish'
 #STOCKFISH_PATH = '/opt/homebrew/bin/stockfish'
 
@@ -148,7 +151,7 @@ class _EngineManager:
                 # 움직임의 종류 분석
                 move_type = self._analyze_move_type(board, bestmove)
 
-            return {
+            result = {
                 'cp': cp,
                 'mate': mate,
                 'win_prob_white': win_prob_white,
@@ -156,6 +159,14 @@ class _EngineManager:
                 'best_move_san': san,
                 'move_type': move_type,
             }
+            # move_type에는 chess.Piece 객체가 들어 있어 JSON으로 보낼 수 없으므로 제외
+            event_bus.publish(
+                event_bus.EVAL,
+                {k: v for k, v in result.items() if k != 'move_type'},
+                depth=depth,
+                fen=board.fen(),
+            )
+            return result
         except Exception as e:
             print(f"[!] 평가 실패: {e}")
             return None
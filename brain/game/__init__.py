@@ -2,6 +2,7 @@
 
 __all__ = [
     "board_display",
+    "event_bus",
     "game_flow",
     "game_state",
     "game_utils",
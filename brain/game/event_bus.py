@@ -0,0 +1,112 @@
+"""게임 상태 이벤트 버스.
+
+수 감지, 보드 FEN, 엔진 평가, 타이머, 로봇 상태, ML 그리드, 코너 같은 상태를 토픽별로
+보관하고, 값이 바뀔 때 바뀐 키만 구독자에게 전달한다. 웹 대시보드는 cv.socket_events가
+이 버스를 Socket.IO 이벤트로 중계하므로 JSON 라우트를 폴링할 필요가 없다.
+
+구독자가 없으면 publish()는 딕셔너리 갱신만 하므로 게임 루프/시리얼 스레드에서 호출해도 싸다.
+구독자 콜백은 publish를 호출한 스레드에서 실행되므로 오래 블로킹하면 안 된다.
+
+사용 예::
+
+    from game import event_bus
+
+    event_bus.publish("timer", white=300, black=295, active="black")
+    unsubscribe = event_bus.subscribe(lambda ev: print(ev["topic"], ev["data"]))
+    event_bus.snapshot()   # {"timer": {...}, ...} 전체 상태 (새로 접속한 클라이언트용)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+Event = Dict[str, Any]
+Subscriber = Callable[[Event], None]
+
+# 토픽 이름 (publish에는 임의의 문자열도 쓸 수 있다)
+BOARD = "board"
+MOVE = "move"
+EVAL = "eval"
+TIMER = "timer"
+ROBOT = "robot"
+ML_GRID = "ml_grid"
+CORNERS = "corners"
+TURN = "turn"
+
+
+class EventBus:
+    """토픽별 최신 상태 + 변경분(diff) 팬아웃 (스레드 안전)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._subscribers: List[Subscriber] = []
+        self._seq = 0
+
+    def publish(self, topic: str, data: Optional[Dict[str, Any]] = None, **fields: Any) -> Optional[Event]:
+        """토픽 상태를 갱신하고 바뀐 키가 있으면 구독자에게 {"topic", "data", "seq", "ts"}를 보낸다.
+
+        data의 값은 JSON으로 직렬화 가능해야 한다. 바뀐 것이 없으면 None을 반환하고 아무것도 보내지 않는다.
+        """
+        update = dict(data or {}, **fields)
+        with self._lock:
+            current = self._state.setdefault(topic, {})
+            diff = {k: v for k, v in update.items() if k not in current or current[k] != v}
+            if not diff:
+                return None
+            current.update(diff)
+            self._seq += 1
+            event = {"topic": topic, "data": diff, "seq": self._seq, "ts": time.time()}
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as exc:
+                print(f"[event_bus] 구독자 오류 ({topic}): {exc}")
+        return event
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """구독 등록. 반환된 함수를 호출하면 구독 해제."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def snapshot(self) -> Dict[str, Any]:
+        """전체 상태 사본과 현재 시퀀스 번호 ({"seq": n, "state": {...}})."""
+        with self._lock:
+            return {"seq": self._seq, "state": {t: dict(v) for t, v in self._state.items()}}
+
+    def get(self, topic: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._state.get(topic, {}))
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+
+_bus = EventBus()
+
+
+def get_event_bus() -> EventBus:
+    return _bus
+
+
+def publish(topic: str, data: Optional[Dict[str, Any]] = None, **fields: Any) -> Optional[Event]:
+    return _bus.publish(topic, data, **fields)
+
+
+def subscribe(callback: Subscriber) -> Callable[[], None]:
+    return _bus.subscribe(callback)
+
+
+def snapshot() -> Dict[str, Any]:
+    return _bus.snapshot()
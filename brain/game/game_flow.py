@@ -8,7 +8,7 @@ from typing import Optional
 
 import chess
 
-from game import game_state
+from game import event_bus, game_state
 from game.board_display import display_board
 from cv.cv_detection import (
     detect_move_via_cv,
@@ -18,8 +18,14 @@ from cv.cv_detection import (
 )
 from cv.cv_manager import save_initial_board_from_capture
 
+from cv.board_calibration import DriftMonitor, calibrate_at_startup
+from cv.corner_state import get_corner_service
 from cv.player_input import get_move_from_user
-from cv.cv_web import USBCapture, ThreadSafeCapture, start_cv_web_server
+from cv.capture_sources import describe_source, open_capture
+from cv.cv_web import start_cv_web_server
+from cv.frame_hub import FrameHub
+from cv.multi_camera import SECONDARY_PROFILE, SECONDARY_SOURCE_ENV, CameraView, MultiCameraDetector
+from cv.rate_governor import get_governor
 from engine.engine_control import get_stockfish_response_move, make_stockfish_move
 from engine.engine_manager import init_engine, shutdown_engine, start_ponder, stop_ponder
 from game.game_utils import describe_game_end
@@ -29,9 +35,9 @@ from robot_arm.robot_arm_controller import (
     get_robot_status,
     init_robot_arm,
     move_robot_to_zero_position,
-    test_robot_connection,
 )
 from robot_arm.robot_control import perform_robot_move, wait_until_robot_idle
+from startup.parallel_init import ParallelInitializer, Stage
 from timer.timer_control import (
     check_time_over,
     press_timer_button,
@@ -41,6 +47,7 @@ from timer.timer_control import (
 from timer.timer_manager import (
     check_timer_button,
     get_chess_timer_status,
+    get_timer_fileno,
     get_timer_manager,
     init_chess_timer,
     send_timer_start,
@@ -48,6 +55,28 @@ from timer.timer_manager import (
     send_timer_black,
 )
 
+# ML 추론을 별도 프로세스(aicv.inference_worker)에서 수행할지 여부
+ML_USE_INFERENCE_WORKER = True
+# 게임 시작 시 백그라운드 초기화(로봇팔/타이머/ML/웹 서버)를 기다리는 최대 시간
+INIT_BACKGROUND_TIMEOUT_SEC = 15.0
+# 입력 대기: 타이머 시리얼을 select할 수 있으면 길게 블로킹, 아니면 짧은 주기로 폴링
+INPUT_BLOCK_SEC = 1.0
+INPUT_POLL_SEC = 0.1
+# 버튼/엔터 입력 후 캡처를 최대 속도로 유지하는 시간 (수 감지 준비)
+INPUT_WAKE_SEC = 5.0
+
+
+def publish_board_state() -> None:
+    """현재 보드 FEN/차례를 이벤트 버스(board 토픽)에 발행."""
+    board = game_state.current_board
+    event_bus.publish(
+        event_bus.BOARD,
+        fen=board.fen(),
+        turn="white" if board.turn == chess.WHITE else "black",
+        move_count=game_state.move_count,
+        game_over=board.is_game_over(),
+    )
+
 
 def reset_board_reference() -> bool:
     """현재 카메라 상태를 초기 기준값으로 재설정합니다."""
@@ -71,81 +100,137 @@ def reset_board_reference() -> bool:
         return False
 
 
-def initialize_game(stockfish_path: str) -> bool:
-    """엔진/로봇/타이머/CV 초기화 및 웹 모니터링 시작."""
-    print("♔ 터미널 체스 게임 시작 ♔")
-    print("=" * 50)
-
-    if not os.path.exists(stockfish_path):
-        print(f"[!] Stockfish를 찾을 수 없습니다: {stockfish_path}")
-        print("[!] 체스 엔진 기능이 제한됩니다.")
-        return False
-
-    init_engine()
-
+def _init_robot_stage() -> bool:
     print("[→] 로봇팔 초기화 중...")
     # 포트는 robot_arm_controller.py에서 설정된 기본값 사용
     init_robot_arm(enabled=True, baudrate=9600)
+    # 연결 테스트(열고 닫기) 후 다시 연결하던 것을 한 번의 연결로 대체
+    if not connect_robot_arm():
+        print("[!] 로봇팔 연결 실패 - 명령 전송 없이 진행")
+        return False
+    print("[✓] 로봇팔 연결 완료")
+    print("[→] 로봇팔을 제로 포지션으로 이동 중...")
+    move_robot_to_zero_position()
+    return True
 
-    if test_robot_connection():
-        print("[✓] 로봇팔 연결 테스트 성공")
-        if connect_robot_arm():
-            print("[✓] 로봇팔 연결 완료")
-            # 로봇팔을 제로 포지션으로 이동
-            print("[→] 로봇팔을 제로 포지션으로 이동 중...")
-            move_robot_to_zero_position()
-        else:
-            print("[!] 로봇팔 연결 실패 - 명령 전송 없이 진행")
-    else:
-        print("[!] 로봇팔 연결 테스트 실패 - 명령 전송 없이 진행")
 
+def _init_timer_stage() -> bool:
     print("[→] 아두이노 타이머 연결 시도 중...")
     if not init_chess_timer():
         print("[!] 아두이노 타이머 연결 실패 - 타이머 없이 진행")
-    else:
-        print("[✓] 아두이노 타이머 연결 및 모니터링 시작 완료")
-        status = get_chess_timer_status()
-        print(f"[→] 타이머 상태: {status}")
-        # 타이머가 0이면 초기화
-        timer_manager = get_timer_manager()
-        if timer_manager.black_timer <= 0 or timer_manager.white_timer <= 0:
-            print("[→] 타이머가 0이므로 초기화합니다...")
-            timer_manager.reset_timers()
+        return False
+    print("[✓] 아두이노 타이머 연결 및 모니터링 시작 완료")
+    status = get_chess_timer_status()
+    print(f"[→] 타이머 상태: {status}")
+    # 타이머가 0이면 초기화
+    timer_manager = get_timer_manager()
+    if timer_manager.black_timer <= 0 or timer_manager.white_timer <= 0:
+        print("[→] 타이머가 0이므로 초기화합니다...")
+        timer_manager.reset_timers()
+    return True
 
-    game_state.chess_pieces_state = load_chess_pieces()
-    game_state.cv_turn_color = "white"
 
+def _init_camera_stage() -> bool:
     try:
-        # USB 카메라 기준 캡처 초기화 (자동으로 사용 가능한 장치를 탐색)
-        game_state.cv_capture = USBCapture(rotate_90_cw=False, rotate_90_ccw=False, rotate_180=True)
-        game_state.cv_capture_wrapper = ThreadSafeCapture(game_state.cv_capture)
-        print(f"[✓] USB 카메라 캡처 초기화 완료 (/dev/video{game_state.cv_capture.index})")
+        # 기본은 USB 카메라 (자동으로 사용 가능한 장치를 탐색, MJPG 원본을 받아 두고 필요할 때만 디코딩).
+        # CHESS_CAPTURE_SOURCE 환경 변수로 녹화 재생/가상 보드 등 다른 소스를 쓸 수 있다.
+        game_state.cv_capture = open_capture()
+        # 캡처 스레드 하나가 장치를 소유하고 게임 루프/웹 UI/ML이 최신 프레임을 공유
+        game_state.cv_capture_wrapper = FrameHub(game_state.cv_capture, governor=get_governor())
+        print(f"[✓] 카메라 캡처 초기화 완료 ({describe_source(game_state.cv_capture)})")
     except Exception as exc:
         game_state.cv_capture = None
         game_state.cv_capture_wrapper = None
         print(f"[!] USB 카메라 초기화 실패: {exc}")
+        return False
+    _init_aux_camera()
+    return True
 
-    if game_state.cv_capture_wrapper is not None:
-        print("[→] 체스판 기준값 초기화(CV) 중...")
-        initialize_board_reference()
-        
-        # ML 기물 인식 모델 초기화
-        try:
-            from aicv.ml_piece_detector import ChessPieceMLDetector
-            model_path = str(game_state.BASE_DIR.parent / "aicv" / "models" / "chess_piece_model.pt")
-            if os.path.exists(model_path):
-                game_state.ml_detector = ChessPieceMLDetector(model_path)
-                print(f"[✓] ML 기물 인식 모델 로드 완료: {model_path}")
+
+def _init_aux_camera() -> None:
+    """CHESS_CAPTURE_SOURCE_2가 있으면 보조 카메라를 연다 (실패해도 주 카메라만으로 진행)."""
+    spec = os.environ.get(SECONDARY_SOURCE_ENV)
+    if not spec:
+        return
+    try:
+        cap = open_capture(spec)
+        game_state.cv_capture_aux = FrameHub(cap, governor=get_governor())
+        print(f"[✓] 보조 카메라 초기화 완료 ({describe_source(cap)})")
+    except Exception as exc:
+        game_state.cv_capture_aux = None
+        print(f"[!] 보조 카메라 초기화 실패 - 카메라 하나로 진행: {exc}")
+
+
+def _init_calibration_stage() -> bool:
+    """저장된 보정 프로필을 검증/재보정해 보드 코너를 적용하고 드리프트 감시를 시작."""
+    print("[→] 체스판 위치 보정 중...")
+    profile = calibrate_at_startup(game_state.cv_capture_wrapper)
+    if profile is None:
+        print("[!] 체스판 위치 보정 실패 - 웹 UI에서 코너를 지정하세요")
+        # 코너가 지정될 때까지 공용 코너 상태를 초록 마커 자동 추적으로 채운다
+        get_corner_service().start(game_state.cv_capture_wrapper)
+        return False
+    game_state.board_calibration = DriftMonitor(game_state.cv_capture_wrapper, profile).start()
+    print(f"[✓] 체스판 위치 보정 완료 ({profile.method})")
+    return True
+
+
+def _init_multi_camera_stage() -> bool:
+    """보조 카메라를 자체 프로필로 보정하고 두 카메라 융합 감지기를 만든다."""
+    if game_state.cv_capture_aux is None:
+        return True
+    print("[→] 보조 카메라 위치 보정 중...")
+    profile = calibrate_at_startup(game_state.cv_capture_aux, SECONDARY_PROFILE, apply=False)
+    if profile is None:
+        print("[!] 보조 카메라 보정 실패 - 카메라 하나로 진행")
+        return False
+    monitor = DriftMonitor(game_state.cv_capture_aux, profile, apply=False).start()
+    views = [
+        CameraView("main", game_state.cv_capture_wrapper),
+        CameraView(SECONDARY_PROFILE, game_state.cv_capture_aux, monitor),
+    ]
+    try:
+        game_state.multi_camera = MultiCameraDetector(views)
+    except Exception as exc:
+        monitor.stop()
+        print(f"[!] 다중 카메라 감지기 생성 실패: {exc}")
+        return False
+    print(f"[✓] 다중 카메라 융합 준비 완료 ({profile.method})")
+    return True
+
+
+def _init_board_reference_stage() -> bool:
+    print("[→] 체스판 기준값 초기화(CV) 중...")
+    return initialize_board_reference() is not None
+
+
+def _init_ml_stage() -> bool:
+    """ML 기물 인식 모델 초기화 (가능하면 별도 추론 워커 프로세스에서 로드)."""
+    try:
+        model_path = str(game_state.BASE_DIR.parent / "aicv" / "models" / "chess_piece_model.pt")
+        if not os.path.exists(model_path):
+            print(f"[!] ML 모델 파일을 찾을 수 없습니다: {model_path}")
+            return False
+        if ML_USE_INFERENCE_WORKER:
+            from aicv.inference_worker import start_inference_worker
+            game_state.ml_detector = start_inference_worker(model_path)
+            if game_state.ml_detector is not None:
+                print(f"[✓] ML 추론 워커 프로세스 시작 완료: {model_path}")
             else:
-                print(f"[!] ML 모델 파일을 찾을 수 없습니다: {model_path}")
-        except ImportError:
-            print("[!] PyTorch가 설치되지 않아 ML 기물 인식을 사용할 수 없습니다.")
-        except Exception as exc:
-            print(f"[!] ML 모델 초기화 실패: {exc}")
-    else:
-        print("[!] 캡처 장치가 없어 체스판 기준값을 초기화할 수 없습니다")
+                print("[!] ML 추론 워커 시작 실패 - 인라인 추론으로 대체")
+        if game_state.ml_detector is None:
+            from aicv.ml_piece_detector import ChessPieceMLDetector
+            game_state.ml_detector = ChessPieceMLDetector(model_path)
+            print(f"[✓] ML 기물 인식 모델 로드 완료: {model_path}")
+        return True
+    except ImportError:
+        print("[!] PyTorch가 설치되지 않아 ML 기물 인식을 사용할 수 없습니다.")
+    except Exception as exc:
+        print(f"[!] ML 모델 초기화 실패: {exc}")
+    return False
+
 
-    import time
+def _init_web_server_stage() -> bool:
     server_start_time = time.time()
     print("[→] CV 웹 서버 초기화 시작...")
     try:
@@ -158,12 +243,57 @@ def initialize_game(stockfish_path: str) -> bool:
         )
         elapsed = (time.time() - server_start_time) * 1000
         print(f"[✓] CV 웹 모니터링 서버 시작 완료 (http://0.0.0.0:5003) - 총 {elapsed:.1f}ms")
+        return True
     except Exception as exc:
         elapsed = (time.time() - server_start_time) * 1000
         print(f"[!] CV 웹 서버 시작 실패 ({elapsed:.1f}ms): {exc}")
+        return False
+
+
+def build_init_stages() -> list[Stage]:
+    """초기화 단계 DAG. 엔진과 카메라(+기준값) 경로만 critical."""
+    return [
+        Stage("engine", init_engine, critical=True),
+        Stage("camera", _init_camera_stage, critical=True),
+        Stage("calibration", _init_calibration_stage, deps=("camera",)),
+        # 보정이 실패해도 기존 수동 코너로 기준값을 잡을 수 있으므로 끝나기만 기다린다
+        Stage("board_reference", _init_board_reference_stage, deps=("camera",), after=("calibration",), critical=True),
+        Stage("multi_camera", _init_multi_camera_stage, deps=("camera",), after=("calibration",)),
+        Stage("robot_arm", _init_robot_stage),
+        Stage("timer", _init_timer_stage),
+        Stage("ml_model", _init_ml_stage),
+        # 웹 서버는 카메라 성공 여부와 관계없이 띄우되(cap=None 허용) 카메라 탐색 뒤에 시작
+        Stage("web_server", _init_web_server_stage, after=("camera",)),
+    ]
+
+
+def initialize_game(stockfish_path: str) -> bool:
+    """엔진/로봇/타이머/CV 초기화 및 웹 모니터링 시작.
+
+    단계들은 startup.parallel_init으로 병렬 실행되고, 엔진과 카메라 경로가 준비되면
+    바로 반환한다. 나머지 단계는 finish_initialization()에서 마무리한다.
+    """
+    print("♔ 터미널 체스 게임 시작 ♔")
+    print("=" * 50)
+
+    if not os.path.exists(stockfish_path):
+        print(f"[!] Stockfish를 찾을 수 없습니다: {stockfish_path}")
+        print("[!] 체스 엔진 기능이 제한됩니다.")
+        return False
+
+    game_state.chess_pieces_state = load_chess_pieces()
+    game_state.cv_turn_color = "white"
+
+    game_state.initializer = ParallelInitializer(build_init_stages()).start()
+    if not game_state.initializer.wait_critical():
+        print("[!] 일부 필수 초기화 단계(엔진/카메라)가 실패했습니다 - 제한된 기능으로 진행")
+    pending = game_state.initializer.pending()
+    if pending:
+        print(f"[→] 백그라운드 초기화 진행 중: {', '.join(pending)}")
 
     game_state.player_color = "white"
     print("[→] 플레이어 색상: white (고정)")
+    publish_board_state()
 
     print(f"게임 설정: {game_state.player_color} 플레이어")
     print("[→] 초기 보드 상태 확인 중...")
@@ -173,6 +303,18 @@ def initialize_game(stockfish_path: str) -> bool:
     return True
 
 
+def finish_initialization(timeout: Optional[float] = INIT_BACKGROUND_TIMEOUT_SEC) -> None:
+    """남은 백그라운드 초기화 단계를 기다리고 단계별 시간 보고를 출력."""
+    initializer = game_state.initializer
+    if initializer is None:
+        return
+    if not initializer.wait_all(timeout):
+        print(f"[!] 초기화 단계가 아직 끝나지 않았습니다: {', '.join(initializer.pending())}")
+    print("[startup] 초기화 단계별 시간 (* = critical)")
+    for line in initializer.format_report():
+        print(f"[startup]   {line}")
+
+
 def game_loop() -> None:
     """메인 게임 루프."""
     game_state.difficulty = 10
@@ -184,7 +326,10 @@ def game_loop() -> None:
     print("🎮 게임을 시작하려면 엔터 키를 누르세요...")
     print("=" * 50)
     input()
-    
+
+    # 백그라운드 초기화(타이머 연결 등)가 남아 있으면 마무리
+    finish_initialization()
+
     # 타이머 시작 신호 전송
     print("🚀 게임 시작!")
     send_timer_start()
@@ -291,24 +436,13 @@ def handle_player_turn() -> None:
         # CV 방식 - ML 기반 기물 인식 사용 (흰색/검은색 모두)
         move = None
         if game_state.ml_detector is not None:
-            # 최대 3번 시도
-            max_attempts = 3
-            for attempt in range(1, max_attempts + 1):
-                print(f"\n[CV] ML 감지 시도 {attempt}/{max_attempts}")
-                move = detect_move_via_ml_capture()
-                if move is not None:
-                    print(f"[CV] ✅ ML 감지 성공 (시도 {attempt}회)")
-                    break
-                else:
-                    if attempt < max_attempts:
-                        print(f"[CV] ⚠️ ML 감지 실패 - 재시도 중... ({attempt}/{max_attempts})")
-                        print("[CV] 기물을 정확한 위치에 놓고 잠시 후 자동으로 재시도합니다...")
-                        time.sleep(1)  # 1초 대기 후 재시도
-                    else:
-                        print(f"[CV] ❌ ML 감지 실패 ({max_attempts}회 시도) - 수동 입력으로 전환")
-            
-            # 3번 시도 후에도 실패하면 수동 입력
-            if move is None:
+            # 최근 여러 프레임을 한 번에 배치 추론 (칸별 softmax 평균)
+            print("\n[CV] ML 배치 감지 시작")
+            move = detect_move_via_ml_capture()
+            if move is not None:
+                print("[CV] ✅ ML 감지 성공")
+            else:
+                print("[CV] ❌ ML 감지 실패 - 수동 입력으로 전환")
                 move = get_move_from_user()
         else:
             # ML detector가 없으면 기존 CV 방식 또는 사용자 입력 사용
@@ -348,7 +482,9 @@ def handle_player_turn() -> None:
     print("🤖 로봇팔 이동 완료")
     
     # 로봇이 완전히 멈추고 안정화될 때까지 추가 대기
-    time.sleep(1.0)  # 1초 대기
+    # (다중 카메라면 팔이 가린 칸을 다른 카메라가 보므로 기다리지 않는다)
+    if game_state.multi_camera is None:
+        time.sleep(1.0)  # 1초 대기
     
     # 로봇이 수를 두고 나서 타이머에 black 신호 전송
     send_timer_black()
@@ -420,6 +556,9 @@ def apply_detected_move(move: chess.Move) -> None:
             move_type_str = f" (프로모션: {move.promotion})"
         
         print(f"✅ CV 감지된 이동 적용: {move.uci()} (SAN: {san_move}){move_type_str}")
+        event_bus.publish(event_bus.MOVE, uci=move.uci(), san=san_move, special=move_type_str.strip(" ()") or None,
+                          ply=game_state.move_count)
+        publish_board_state()
         
         # 캐슬링인 경우 추가 확인
         if is_castling_before:
@@ -486,12 +625,36 @@ def cleanup_game() -> None:
 
     shutdown_engine()
 
+    if game_state.board_calibration is not None:
+        game_state.board_calibration.stop()
+    get_corner_service().stop()
+
+    if game_state.multi_camera is not None:
+        for view in game_state.multi_camera.views:
+            if view.monitor is not None:
+                view.monitor.stop()
+        game_state.multi_camera.close()
+
+    if game_state.cv_capture_aux is not None:
+        try:
+            game_state.cv_capture_aux.release()
+        except Exception:
+            pass
+
     if game_state.cv_capture_wrapper is not None:
         try:
             game_state.cv_capture_wrapper.release()
         except Exception:
             pass
 
+    stop_worker = getattr(game_state.ml_detector, "stop", None)
+    if stop_worker is not None:
+        try:
+            stop_worker()
+            print("ML 추론 워커를 종료했습니다.")
+        except Exception:
+            pass
+
 
 def _poll_timer_button() -> Optional[str]:
     """타이머 버튼 입력을 감지하고 의미있는 이벤트로 변환."""
@@ -521,18 +684,23 @@ def _wait_for_input_or_timer() -> Optional[str]:
         None - 에러 발생
     """
     print("   입력 대기 중... (타이머 버튼 또는 엔터 키 입력)")
-    
+
     while True:
-        # 타이머 입력 체크
+        # 타이머 입력 체크 (select 전에 이미 버퍼에 들어온 줄이 있을 수 있음)
         timer_input = _poll_timer_button()
         if timer_input:
+            # 버튼 직후 수 감지가 시작되므로 캡처를 미리 최대 속도로 깨운다
+            get_governor().hold("button", INPUT_WAKE_SEC)
             return f"timer:{timer_input}"
-        
-        # 키보드 입력 체크 (논블로킹)
-        if select.select([sys.stdin], [], [], 0.1)[0]:
+
+        # 키보드와 타이머 시리얼을 함께 select로 대기 (입력이 오면 바로 깨어남).
+        # 시리얼 fd를 쓸 수 없으면 기존처럼 짧은 주기로 타이머를 폴링한다.
+        serial_fd = get_timer_fileno()
+        fds = [sys.stdin] if serial_fd is None else [sys.stdin, serial_fd]
+        timeout = INPUT_POLL_SEC if serial_fd is None else INPUT_BLOCK_SEC
+        readable = select.select(fds, [], [], timeout)[0]
+        if sys.stdin in readable:
             user_input = sys.stdin.readline().strip().lower()
+            get_governor().hold("input", INPUT_WAKE_SEC)
             return f"input:{user_input}"
-        
-        # 짧은 대기 (CPU 사용률 감소)
-        time.sleep(0.05)
 
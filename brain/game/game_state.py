@@ -26,12 +26,23 @@ chess_pieces_state: Optional[list[list[str]]] = None
 ml_previous_grid: Optional[np.ndarray] = None
 ml_detector: Optional[object] = None
 
+# 체스판 보정 드리프트 감시 (cv.board_calibration.DriftMonitor)
+board_calibration: Optional[object] = None
+
+# 보조 카메라 (CHESS_CAPTURE_SOURCE_2) 프레임 허브와 다중 카메라 융합 (cv.multi_camera.MultiCameraDetector)
+cv_capture_aux: Optional[object] = None
+multi_camera: Optional[object] = None
+
+# 병렬 초기화 실행기 (startup.parallel_init.ParallelInitializer)
+initializer: Optional[object] = None
+
 
 def reset_game_state() -> None:
     """게임 전역 상태를 초기값으로 재설정."""
     global current_board, player_color, difficulty, game_over, move_count
     global init_board_values, cv_capture, cv_capture_wrapper, cv_turn_color
-    global chess_pieces_state, ml_previous_grid, ml_detector
+    global chess_pieces_state, ml_previous_grid, ml_detector, board_calibration, initializer
+    global cv_capture_aux, multi_camera
 
     current_board = chess.Board()
     player_color = "white"
@@ -46,4 +57,8 @@ def reset_game_state() -> None:
     chess_pieces_state = None
     ml_previous_grid = None
     ml_detector = None
+    board_calibration = None
+    cv_capture_aux = None
+    multi_camera = None
+    initializer = None
 
@@ -11,6 +11,8 @@ import serial
 import time
 from typing import Dict, Optional, Tuple, List
 
+from game import event_bus
+
 class RobotArmController:
     """로봇팔 제어 클래스"""
     
@@ -56,6 +58,8 @@ class RobotArmController:
             print(f"❌ 로봇팔 연결 실패: {e}")
             self.is_connected = False
             return False
+        finally:
+            self.publish_status()
     
     def disconnect(self):
         """시리얼 연결 해제"""
@@ -64,6 +68,7 @@ class RobotArmController:
         self.is_connected = False
         self.is_moving = False
         print("🔌 로봇팔 연결 해제됨")
+        self.publish_status()
     
     def _generate_move_commands(self, move_type: Dict, move_uci: str) -> List[str]:
         """움직임 타입에 따라 명령 리스트 생성.
@@ -242,6 +247,7 @@ class RobotArmController:
         # 로봇팔 움직임 시작
         self.is_moving = True
         print("🤖 로봇이 움직이는 중...")
+        self.publish_status(move=move_uci)
         
         try:
             # 명령들을 순차적으로 실행
@@ -274,6 +280,7 @@ class RobotArmController:
             return False
         finally:
             self.is_moving = False
+            self.publish_status()
     
     def get_move_description(self, move_type: Dict, move_uci: str) -> str:
         """움직임에 대한 설명 반환"""
@@ -317,6 +324,10 @@ class RobotArmController:
             'status': 'moving' if self.is_moving else 'idle'
         }
     
+    def publish_status(self, move: Optional[str] = None):
+        """현재 상태를 이벤트 버스(robot 토픽)에 발행"""
+        event_bus.publish(event_bus.ROBOT, self.get_status(), move=move)
+
     def test_connection(self) -> bool:
         """연결 테스트"""
         if not self.enabled:
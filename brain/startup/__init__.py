@@ -0,0 +1,7 @@
+"""게임 시작(import/초기화) 최적화 하위 모듈 패키지."""
+
+__all__ = [
+    "import_profile",
+    "lazy_imports",
+    "parallel_init",
+]
@@ -0,0 +1,141 @@
+"""import 시간 프로파일링과 시작 시간 벤치마크.
+
+`python -X importtime`의 출력을 모듈별로 요약하고, 콜드 프로세스에서
+엔트리 포인트를 import하는 데 걸리는 시간을 여러 번 측정한다.
+
+brain 디렉토리에서 실행::
+
+    python -m startup.import_profile                  # terminal_chess import 시간 요약
+    python -m startup.import_profile --top 30
+    python -m startup.import_profile --bench 5        # 콜드 import 시간 5회 측정
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+BRAIN_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_TARGET = "terminal_chess"
+
+
+@dataclass
+class ImportTimeEntry:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportTimeEntry]:
+    """`-X importtime` 출력(stderr)을 파싱."""
+    entries: List[ImportTimeEntry] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue  # 헤더 줄
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped)) // 2
+        entries.append(ImportTimeEntry(stripped, self_us, cumulative_us, depth))
+    return entries
+
+
+def run_importtime(target: str = DEFAULT_TARGET, python: str = sys.executable) -> List[ImportTimeEntry]:
+    """새 인터프리터에서 target을 import하며 `-X importtime` 결과를 수집."""
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {target}"],
+        cwd=str(BRAIN_DIR),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return parse_importtime(proc.stderr)
+
+
+def summarize_importtime(entries: Sequence[ImportTimeEntry], top: int = 15) -> List[str]:
+    """최상위 패키지별 누적 시간과 가장 느린 모듈 top개를 사람이 읽기 쉬운 줄로 만든다."""
+    lines: List[str] = []
+    if not entries:
+        return ["(importtime 결과 없음)"]
+
+    total_us = sum(e.self_us for e in entries)
+    lines.append(f"전체 import 시간: {total_us / 1000:.0f}ms ({len(entries)}개 모듈)")
+
+    by_package: dict = {}
+    for e in entries:
+        pkg = e.module.split(".")[0]
+        by_package[pkg] = by_package.get(pkg, 0) + e.self_us
+    lines.append("")
+    lines.append("[최상위 패키지별 self 시간 합계]")
+    for pkg, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]:
+        lines.append(f"  {us / 1000:8.1f}ms  {pkg}")
+
+    lines.append("")
+    lines.append("[누적 시간이 큰 모듈]")
+    for e in sorted(entries, key=lambda e: -e.cumulative_us)[:top]:
+        lines.append(f"  {e.cumulative_us / 1000:8.1f}ms  {'  ' * e.depth}{e.module}")
+    return lines
+
+
+def benchmark_startup(
+    target: str = DEFAULT_TARGET,
+    repeat: int = 5,
+    python: str = sys.executable,
+    statement: Optional[str] = None,
+) -> dict:
+    """콜드 프로세스에서 target import(또는 statement 실행)에 걸리는 wall time을 repeat회 측정."""
+    code = statement or f"import {target}"
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([python, "-c", code], cwd=str(BRAIN_DIR),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        samples.append(time.perf_counter() - start)
+    return {
+        "target": target,
+        "repeat": repeat,
+        "min_sec": min(samples),
+        "median_sec": statistics.median(samples),
+        "max_sec": max(samples),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="import 시간 프로파일링 / 시작 시간 벤치마크")
+    parser.add_argument("--target", default=DEFAULT_TARGET, help="import할 모듈 (기본값: terminal_chess)")
+    parser.add_argument("--top", type=int, default=15, help="요약에 표시할 항목 수")
+    parser.add_argument("--bench", type=int, default=0, help="콜드 import 시간 측정 반복 횟수 (0이면 생략)")
+    args = parser.parse_args(argv)
+
+    print(f"[import_profile] python -X importtime -c 'import {args.target}'")
+    for line in summarize_importtime(run_importtime(args.target), top=args.top):
+        print(line)
+
+    if args.bench > 0:
+        result = benchmark_startup(args.target, repeat=args.bench)
+        print("")
+        print(
+            f"[startup bench] import {result['target']} x{result['repeat']}: "
+            f"min {result['min_sec'] * 1000:.0f}ms / "
+            f"median {result['median_sec'] * 1000:.0f}ms / "
+            f"max {result['max_sec'] * 1000:.0f}ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""무거운 모듈(torch, torchvision, pandas, flask, picamera2)의 지연/백그라운드 import.
+
+`lazy_import("torch")`는 실제 import 없이 프록시 모듈을 돌려주고, 처음 속성에
+접근할 때 import한다. `preload([...])`는 같은 모듈들을 데몬 스레드에서 미리 import해서
+시리얼/카메라 초기화가 진행되는 동안 import 비용을 숨긴다.
+이미 백그라운드 import가 진행 중이면 첫 접근은 그 스레드가 끝나기를 기다린다.
+
+사용 예::
+
+    from startup.lazy_imports import is_available, lazy_import, preload
+
+    torch = lazy_import("torch")          # 여기서는 import하지 않음
+    preload(["torch", "flask"])           # 백그라운드 스레드에서 import 시작
+    ...
+    torch.zeros(3)                        # 첫 접근 시 (필요하면 대기 후) 실제 모듈 사용
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+import types
+from typing import Dict, Iterable, List, Optional
+
+HEAVY_MODULES = ("torch", "torchvision", "pandas", "flask", "picamera2")
+
+_lock = threading.Lock()
+_lazy_modules: Dict[str, "LazyModule"] = {}
+_import_events: Dict[str, threading.Event] = {}
+_import_times: Dict[str, float] = {}
+_import_errors: Dict[str, BaseException] = {}
+
+
+def is_available(name: str) -> bool:
+    """모듈을 import하지 않고 설치 여부만 확인 (find_spec)."""
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _import_once(name: str) -> types.ModuleType:
+    """모듈을 한 번만 import하고 소요 시간을 기록. 다른 스레드가 import 중이면 대기."""
+    module = sys.modules.get(name)
+    spec = getattr(module, "__spec__", None)
+    if module is not None and name not in _import_events and not getattr(spec, "_initializing", False):
+        return module
+
+    with _lock:
+        event = _import_events.get(name)
+        owner = event is None
+        if owner:
+            event = threading.Event()
+            _import_events[name] = event
+
+    if not owner:
+        event.wait()
+        if name in _import_errors:
+            raise ImportError(f"{name} import 실패: {_import_errors[name]}") from _import_errors[name]
+        return sys.modules[name]
+
+    start = time.perf_counter()
+    try:
+        module = importlib.import_module(name)
+    except BaseException as exc:
+        _import_errors[name] = exc
+        raise
+    finally:
+        _import_times[name] = time.perf_counter() - start
+        event.set()
+    return module
+
+
+class LazyModule(types.ModuleType):
+    """첫 속성 접근 시 실제 모듈을 import하는 프록시."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+
+    def _load(self) -> types.ModuleType:
+        target = self.__dict__["_lazy_target"]
+        if target is None:
+            target = _import_once(self.__name__)
+            self.__dict__["_lazy_target"] = target
+        return target
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_target"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """모듈 이름에 대한 지연 import 프록시를 반환 (같은 이름이면 같은 객체)."""
+    with _lock:
+        proxy = _lazy_modules.get(name)
+        if proxy is None:
+            proxy = LazyModule(name)
+            _lazy_modules[name] = proxy
+    return proxy
+
+
+def is_loaded(name: str) -> bool:
+    """모듈 import가 끝났는지 여부."""
+    event = _import_events.get(name)
+    if event is not None:
+        return event.is_set() and name not in _import_errors
+    return name in sys.modules
+
+
+def preload(names: Iterable[str], *, background: bool = True) -> Optional[threading.Thread]:
+    """설치된 모듈들을 (기본적으로 데몬 스레드에서) 순서대로 미리 import."""
+    pending = [n for n in names if not is_loaded(n) and is_available(n)]
+    if not pending:
+        return None
+
+    def _run() -> None:
+        for name in pending:
+            try:
+                _import_once(name)
+            except BaseException as exc:
+                print(f"[lazy_imports] {name} 미리 import 실패: {exc}")
+
+    if not background:
+        _run()
+        return None
+    t = threading.Thread(target=_run, name="preload-" + "+".join(pending), daemon=True)
+    t.start()
+    return t
+
+
+def wait_for(name: str, timeout: Optional[float] = None) -> Optional[types.ModuleType]:
+    """백그라운드 import가 끝날 때까지 기다린 뒤 모듈을 반환 (시간 초과/실패 시 None)."""
+    event = _import_events.get(name)
+    if event is not None and not event.wait(timeout):
+        return None
+    if name in _import_errors:
+        return None
+    return sys.modules.get(name)
+
+
+def import_times() -> Dict[str, float]:
+    """이 모듈을 통해 import된 모듈별 소요 시간(초)."""
+    return dict(_import_times)
+
+
+def format_import_times() -> List[str]:
+    return [
+        f"{name}: {seconds * 1000:.0f}ms" + (" (실패)" if name in _import_errors else "")
+        for name, seconds in sorted(_import_times.items(), key=lambda kv: -kv[1])
+    ]
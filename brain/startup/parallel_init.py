@@ -0,0 +1,247 @@
+"""의존성 기반 병렬 초기화 실행기.
+
+엔진/로봇팔/타이머/카메라/ML 모델/웹 서버 초기화는 대부분 시리얼 타임아웃이나
+장치 탐색에서 블로킹되므로, 서로 의존하지 않는 단계는 스레드 풀에서 동시에 실행한다.
+각 단계는 의존 단계가 모두 성공하면 시작되고, 실패(예외 또는 False 반환)하면
+그 단계에 의존하는 단계들은 건너뛴다. critical=True 단계만 기다린 뒤 게임을 시작하고
+나머지는 백그라운드에서 계속 진행할 수 있다.
+
+사용 예::
+
+    init = ParallelInitializer([
+        Stage("engine", init_engine, critical=True),
+        Stage("camera", open_camera, critical=True),
+        Stage("board_reference", capture_baseline, deps=("camera",), critical=True),
+        Stage("timer", init_chess_timer),
+    ]).start()
+    init.wait_critical()      # 엔진 + 카메라 경로만 대기
+    ...
+    init.wait_all(timeout=5)  # 나머지 단계 마무리
+    for line in init.format_report():
+        print(line)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+PENDING = "pending"
+RUNNING = "running"
+OK = "ok"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+_DONE_STATES = (OK, FAILED, SKIPPED)
+
+
+@dataclass
+class Stage:
+    """초기화 단계 하나. fn이 예외를 던지거나 False를 반환하면 실패로 본다.
+
+    deps는 성공해야 하는 단계, after는 성공 여부와 관계없이 끝나기만 하면 되는 단계.
+    """
+
+    name: str
+    fn: Callable[[], Any]
+    deps: Tuple[str, ...] = ()
+    critical: bool = False
+    after: Tuple[str, ...] = ()
+
+    @property
+    def waits_on(self) -> Tuple[str, ...]:
+        return tuple(self.deps) + tuple(self.after)
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str = PENDING
+    value: Any = None
+    error: Optional[BaseException] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def elapsed_sec(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class ParallelInitializer:
+    """Stage DAG를 스레드 풀에서 실행 (의존 단계가 끝나는 즉시 다음 단계 제출)."""
+
+    def __init__(self, stages: Sequence[Stage], max_workers: Optional[int] = None):
+        names = [s.name for s in stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"중복된 단계 이름: {names}")
+        for s in stages:
+            unknown = [d for d in s.waits_on if d not in names]
+            if unknown:
+                raise ValueError(f"{s.name}: 알 수 없는 의존 단계 {unknown}")
+        self._check_acyclic(stages)
+
+        self.stages: Dict[str, Stage] = {s.name: s for s in stages}
+        self.results: Dict[str, StageResult] = {s.name: StageResult(s.name) for s in stages}
+        self._max_workers = max_workers or len(stages) or 1
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._all_done = threading.Event()
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    @staticmethod
+    def _check_acyclic(stages: Sequence[Stage]) -> None:
+        deps = {s.name: set(s.waits_on) for s in stages}
+        resolved: set = set()
+        while deps:
+            ready = [n for n, d in deps.items() if d <= resolved]
+            if not ready:
+                raise ValueError(f"순환 의존성: {sorted(deps)}")
+            for n in ready:
+                resolved.add(n)
+                del deps[n]
+
+    # ------------------------------------------------------------------
+    # 실행
+    # ------------------------------------------------------------------
+    def start(self) -> "ParallelInitializer":
+        if self._executor is not None:
+            return self
+        self._started_at = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="init")
+        if not self.stages:
+            self._mark_all_done()
+            return self
+        self._schedule_ready()
+        return self
+
+    def _schedule_ready(self) -> None:
+        """의존 단계가 모두 끝난 PENDING 단계를 제출하거나 건너뛴다."""
+        to_submit: List[Stage] = []
+        to_skip: List[Tuple[str, List[str]]] = []
+        with self._lock:
+            for name, stage in self.stages.items():
+                result = self.results[name]
+                if result.status != PENDING:
+                    continue
+                dep_states = [self.results[d].status for d in stage.waits_on]
+                if any(st not in _DONE_STATES for st in dep_states):
+                    continue
+                failed = [d for d in stage.deps if self.results[d].status != OK]
+                if failed:
+                    result.status = SKIPPED
+                    result.started_at = result.finished_at = time.perf_counter()
+                    to_skip.append((name, failed))
+                else:
+                    result.status = RUNNING
+                    to_submit.append(stage)
+
+        for name, failed in to_skip:
+            print(f"[init] {name} 건너뜀 (의존 단계 실패: {', '.join(failed)})")
+            self.results[name].done.set()
+        for stage in to_submit:
+            self._executor.submit(self._run_stage, stage)
+        if to_skip:
+            # 건너뛴 단계에 의존하는 단계도 연쇄적으로 처리
+            self._schedule_ready()
+        self._check_all_done()
+
+    def _run_stage(self, stage: Stage) -> None:
+        result = self.results[stage.name]
+        result.started_at = time.perf_counter()
+        try:
+            value = stage.fn()
+            result.value = value
+            result.status = FAILED if value is False else OK
+        except BaseException as exc:
+            result.error = exc
+            result.status = FAILED
+            print(f"[init] {stage.name} 실패: {exc}")
+        finally:
+            result.finished_at = time.perf_counter()
+            result.done.set()
+        self._schedule_ready()
+
+    def _check_all_done(self) -> None:
+        with self._lock:
+            if self._all_done.is_set():
+                return
+            if all(r.status in _DONE_STATES for r in self.results.values()):
+                self._mark_all_done()
+
+    def _mark_all_done(self) -> None:
+        self._finished_at = time.perf_counter()
+        self._all_done.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    # ------------------------------------------------------------------
+    # 대기 / 조회
+    # ------------------------------------------------------------------
+    def wait_for(self, names: Iterable[str], timeout: Optional[float] = None) -> bool:
+        """지정한 단계들이 끝날 때까지 대기. 모두 성공했으면 True."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        names = list(names)
+        for name in names:
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            if not self.results[name].done.wait(remaining):
+                return False
+        return all(self.results[n].status == OK for n in names)
+
+    def wait_critical(self, timeout: Optional[float] = None) -> bool:
+        """critical 단계가 끝날 때까지 대기. 모두 성공했으면 True."""
+        return self.wait_for([n for n, s in self.stages.items() if s.critical], timeout)
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """모든 단계가 끝날 때까지 대기. 시간 안에 끝났으면 True (성공 여부와 무관)."""
+        return self._all_done.wait(timeout)
+
+    def ok(self, name: str) -> bool:
+        return self.results[name].status == OK
+
+    def pending(self) -> List[str]:
+        return [n for n, r in self.results.items() if r.status not in _DONE_STATES]
+
+    def critical_path_sec(self) -> float:
+        """의존 체인별 단계 시간 합 중 최대값 (이론상 최소 초기화 시간)."""
+        memo: Dict[str, float] = {}
+
+        def chain(name: str) -> float:
+            if name not in memo:
+                own = self.results[name].elapsed_sec or 0.0
+                memo[name] = own + max((chain(d) for d in self.stages[name].waits_on), default=0.0)
+            return memo[name]
+
+        return max((chain(n) for n in self.stages), default=0.0)
+
+    def format_report(self) -> List[str]:
+        """단계별 상태/시간과 직렬 실행 대비 총 소요 시간 요약."""
+        lines: List[str] = []
+        serial_sec = 0.0
+        ordered = sorted(
+            self.results.values(),
+            key=lambda r: r.started_at if r.started_at is not None else float("inf"),
+        )
+        for r in ordered:
+            elapsed = r.elapsed_sec
+            if elapsed is not None and r.status != SKIPPED:
+                serial_sec += elapsed
+            offset = "" if r.started_at is None or self._started_at is None \
+                else f" (+{(r.started_at - self._started_at) * 1000:.0f}ms 시작)"
+            took = "진행 중" if elapsed is None else f"{elapsed * 1000:.0f}ms"
+            crit = " *" if self.stages[r.name].critical else ""
+            lines.append(f"{r.name:<16} {r.status:<8} {took}{offset}{crit}")
+
+        end = self._finished_at if self._finished_at is not None else time.perf_counter()
+        if self._started_at is not None:
+            lines.append(
+                f"총 {(end - self._started_at) * 1000:.0f}ms "
+                f"(직렬 합계 {serial_sec * 1000:.0f}ms, 최장 체인 {self.critical_path_sec() * 1000:.0f}ms)"
+            )
+        return lines
@@ -7,8 +7,9 @@ from __future__ import annotations
 다른 모듈에 분산된 기능을 초기화하고 메인 루프를 실행한다.
 """
 
-from game.game_flow import cleanup_game, game_loop, initialize_game
+from game.game_flow import ML_USE_INFERENCE_WORKER, cleanup_game, game_loop, initialize_game
 from game.game_state import reset_game_state
+from startup.lazy_imports import format_import_times, preload
 
 STOCKFISH_PATH = "/usr/games/stockfish"
 # STOCKFISH_PATH = "/opt/homebrew/bin/stockfish"
@@ -16,12 +17,19 @@ STOCKFISH_PATH = "/usr/games/stockfish"
 MONITOR_SERVER_URL = "http://localhost:5002"
 ENABLE_MONITORING = True 
 
+# 하드웨어 초기화와 병렬로 백그라운드에서 미리 import할 무거운 모듈
+# (추론 워커를 쓰면 torch는 워커 프로세스에서만 import됨)
+PRELOAD_MODULES = ("flask",) if ML_USE_INFERENCE_WORKER else ("torch", "torchvision", "flask")
+
 
 def main() -> None:
     reset_game_state()
+    preload(PRELOAD_MODULES)
     try:
         if not initialize_game(STOCKFISH_PATH):
             return
+        for line in format_import_times():
+            print(f"[startup] 백그라운드 import {line}")
         game_loop()
     except KeyboardInterrupt:
         print("\n\n게임이 중단되었습니다.")
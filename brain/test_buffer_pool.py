@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+버퍼 풀(cv.buffer_pool) 테스트
+
+빌린 버퍼는 반납 전까지 다시 나가지 않고, 반납한 뒤에만 재사용되는지,
+풀 버퍼를 쓰는 함수들이 풀 배열을 밖으로 내보내지 않는지 확인한다.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+
+import numpy as np
+
+from cv.buffer_pool import BufferPool
+
+
+def test_borrowed_buffer_is_not_lent_twice():
+    pool = BufferPool(slots=2, enabled=True)
+    with pool.borrow((4, 4)) as a:
+        with pool.borrow((4, 4)) as b:
+            assert a is not b
+        with pool.borrow((4, 4)) as c:
+            assert c is b
+    with pool.borrow((4, 4)) as d:
+        assert d is a or d is b
+    assert pool.stats["allocations"] == 2 and pool.stats["reuses"] == 2
+
+
+def test_release_keeps_at_most_slots():
+    pool = BufferPool(slots=1, enabled=True)
+    bufs = [pool.acquire((2, 2), np.float32) for _ in range(3)]
+    for buf in bufs:
+        pool.release(buf)
+    assert pool.stats["overflow"] == 2
+    assert pool.describe()["buffers"] == 1
+
+
+def test_buffer_returned_on_error():
+    pool = BufferPool(enabled=True)
+    try:
+        with pool.borrow((3,)) as buf:
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert pool.acquire((3,)) is buf
+
+
+def test_disabled_pool_always_allocates():
+    pool = BufferPool(enabled=False)
+    with pool.borrow((2,)) as a:
+        pass
+    with pool.borrow((2,)) as b:
+        assert a is not b
+
+
+def test_helpers_return_owned_arrays():
+    from cv.square_sampling import cell_sums
+    from cv.stream_encoder import resize_to_width
+
+    img = np.random.default_rng(0).integers(0, 256, (64, 96, 3), dtype=np.uint8)
+    first = cell_sums(img, 8)
+    again = cell_sums(img[::-1].copy(), 8)
+    assert not np.shares_memory(first, again)
+    assert np.array_equal(first, cell_sums(img, 8))
+    small = resize_to_width(img, 48)
+    assert not np.shares_memory(small, resize_to_width(img, 48))
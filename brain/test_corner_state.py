@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+코너 상태 서비스(cv.corner_state) 테스트
+
+자동 추적 코너의 신뢰도가 추적기 상태(원시/안정화 코너 차이, 놓친 프레임)를 따라 움직이는지,
+set_tracker_factory()로 바꾼 추적기를 쓰는지 확인한다.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+
+import numpy as np
+
+from cv.capture_sources import SyntheticBoardSource
+from cv.corner_state import HOLD_DECAY, SOURCE_TRACKER, CornerStateService
+from cv.corner_tracker import corner_confidence
+
+
+def _observe(service, source, seqs):
+    est = None
+    for seq in seqs:
+        _, frame = source.read()
+        est = service.observe(frame, seq)
+    return est
+
+
+def test_confidence_drops_while_board_moves():
+    source = SyntheticBoardSource(realtime=False)
+    service = CornerStateService()
+    steady = _observe(service, source, range(1, 10))
+    assert steady.valid and steady.source == SOURCE_TRACKER
+    assert 0.8 < steady.confidence <= 1.0
+
+    moved = SyntheticBoardSource(realtime=False, corners=source.corners + np.float32([6, 4]))
+    moving = _observe(service, moved, [10])
+    assert moving.confidence < 0.5 * steady.confidence
+
+
+def test_held_corners_decay():
+    source = SyntheticBoardSource(realtime=False)
+    service = CornerStateService()
+    steady = _observe(service, source, range(1, 6))
+    held = service.observe(np.zeros_like(source.read()[1]), 6)
+    assert held.held == 1 and held.version == steady.version
+    assert np.isclose(held.confidence, steady.confidence * HOLD_DECAY)
+
+
+def test_corner_confidence():
+    pts = np.float32([[0, 0], [10, 0], [10, 10], [0, 10]])
+    assert corner_confidence(pts, pts) == 1.0
+    assert corner_confidence(pts, pts, occluded=True) == 0.5
+    assert corner_confidence(None, pts) == 0.0
+    assert corner_confidence(pts + np.float32([2, 0]), pts) == 0.5
+
+
+class _FixedTracker:
+    confidence = 0.25
+
+    def update(self, frame):
+        return np.float32([[1, 1], [9, 1], [9, 9], [1, 9]])
+
+    def reset(self):
+        pass
+
+
+def test_set_tracker_factory():
+    service = CornerStateService()
+    service.set_tracker_factory(_FixedTracker)
+    est = service.observe(np.zeros((10, 10, 3), np.uint8), 1)
+    assert est.valid and est.confidence == 0.25
+    assert service.observe(np.zeros((10, 10, 3), np.uint8), 1) is est
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+다중 카메라 융합(cv.multi_camera) 테스트
+
+보조 카메라가 다른 방향(90도/180도)에 있을 때 칸 확률을 주 카메라 방향으로 돌려서 합치는지,
+방향을 모를 때 예상 보드로 정하는지 확인한다.
+"""
+
+from __future__ import annotations
+
+import sys
+import types
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+
+import numpy as np
+import pytest
+
+from cv.multi_camera import CameraView, MultiCameraDetector, estimate_rotation
+
+EMPTY, WHITE, BLACK = 0, 1, 2
+
+
+def _start_grid() -> np.ndarray:
+    grid = np.full((8, 8), EMPTY)
+    grid[:2] = BLACK
+    grid[6:] = WHITE
+    return grid
+
+
+def _after_e4() -> np.ndarray:
+    grid = _start_grid()
+    grid[6, 4] = EMPTY
+    grid[4, 4] = WHITE
+    return grid
+
+
+def _probs(grid: np.ndarray, confidence: float = 0.9) -> np.ndarray:
+    probs = np.full(grid.shape + (3,), (1.0 - confidence) / 2, dtype=np.float32)
+    np.put_along_axis(probs, grid[..., None], confidence, axis=2)
+    return probs
+
+
+def _monitor(rotation):
+    profile = types.SimpleNamespace(rotation=rotation, corners=None, save=lambda directory=None: None)
+    return types.SimpleNamespace(profile=profile, directory=None)
+
+
+def _fusion(*views) -> MultiCameraDetector:
+    return MultiCameraDetector(list(views))
+
+
+def test_estimate_rotation_finds_turns():
+    expected = _start_grid()
+    for k in range(4):
+        rotation, scores = estimate_rotation(np.rot90(_probs(expected), -k, axes=(0, 1)), expected)
+        assert rotation == k
+        assert scores[k] == 1.0
+
+
+def test_estimate_rotation_ambiguous_board():
+    empty = np.full((8, 8), EMPTY)
+    rotation, _ = estimate_rotation(_probs(empty), empty)
+    assert rotation is None
+
+
+@pytest.mark.parametrize("turns", [1, 2, 3])
+def test_fuse_rotated_secondary_with_profile_rotation(turns):
+    truth = _after_e4()
+    fusion = _fusion(CameraView("main", None), CameraView("cam1", None, _monitor(turns)))
+    try:
+        cam1 = np.rot90(_probs(truth), -turns, axes=(0, 1))     # 돌아간 방향에서 본 예측
+        result = fusion.fuse_probs([_probs(truth), cam1], _start_grid())
+    finally:
+        fusion.close()
+    assert np.array_equal(result.grid, truth)
+    assert result.visible.all()
+    assert not result.occluded[1].any()
+
+
+def test_fuse_derives_unknown_rotation_and_stores_it():
+    truth = _after_e4()
+    monitor = _monitor(None)
+    fusion = _fusion(CameraView("main", None), CameraView("cam1", None, monitor))
+    try:
+        cam1 = np.rot90(_probs(truth), -1, axes=(0, 1))
+        result = fusion.fuse_probs([_probs(truth), cam1], _start_grid())
+    finally:
+        fusion.close()
+    assert monitor.profile.rotation == 1
+    assert np.array_equal(result.grid, truth)
+
+
+def test_rotated_secondary_covers_main_occlusion():
+    truth = _after_e4()
+    expected = _start_grid()
+    # 주 카메라는 팔에 가려 아래쪽 두 줄을 검은 기물로 잘못 본다 (큰 덩어리 → 가림)
+    main = truth.copy()
+    main[6:] = BLACK
+    fusion = _fusion(CameraView("main", None), CameraView("cam1", None, _monitor(2)))
+    try:
+        cam1 = np.rot90(_probs(truth), -2, axes=(0, 1))
+        result = fusion.fuse_probs([_probs(main), cam1], expected)
+    finally:
+        fusion.close()
+    assert result.occluded[0][6:].all()
+    assert not result.occluded[1].any()
+    assert np.array_equal(result.grid, truth)
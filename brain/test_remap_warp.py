@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RemapWarper(고정소수점 remap 맵) 결과가 cv2.warpPerspective와 같은지 확인하는 테스트
+
+맵 캐시/보정 합치기를 바꿔도 와핑 결과가 밀리지 않도록 픽셀 차이 1 이내를 고정한다.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+
+import cv2
+import numpy as np
+
+from cv.remap_warp import RemapWarper
+
+SIZE = 400
+CORNERS = np.array([[143, 48], [497, 61], [512, 432], [128, 419]], dtype=np.float32)
+
+
+def _frame(h: int = 480, w: int = 640) -> np.ndarray:
+    """카메라 영상처럼 이웃 픽셀이 이어지는 테스트 프레임 (흐린 잡음 + 체스판 무늬)."""
+    rng = np.random.default_rng(0)
+    noise = cv2.GaussianBlur(rng.integers(0, 256, (h, w, 3), dtype=np.uint8), (0, 0), 3)
+    ys, xs = np.mgrid[0:h, 0:w]
+    board = (((xs // 48) + (ys // 48)) % 2 * 120).astype(np.uint8)
+    return cv2.GaussianBlur(cv2.add(noise, board[..., None].repeat(3, axis=2)), (0, 0), 1.5)
+
+
+def _reference(frame: np.ndarray) -> np.ndarray:
+    dst = np.array([[0, 0], [SIZE - 1, 0], [SIZE - 1, SIZE - 1], [0, SIZE - 1]], dtype=np.float32)
+    M = cv2.getPerspectiveTransform(CORNERS, dst)
+    return cv2.warpPerspective(frame, M, (SIZE, SIZE))
+
+
+def _max_diff(a: np.ndarray, b: np.ndarray) -> int:
+    return int(np.abs(a.astype(np.int16) - b.astype(np.int16)).max())
+
+
+def test_remap_matches_warp_perspective():
+    frame = _frame()
+    warper = RemapWarper(SIZE)
+    out = warper.warp(frame, CORNERS)
+    assert warper.builds == 1
+    assert out.shape == (SIZE, SIZE, 3)
+    assert _max_diff(out, _reference(frame)) <= 1
+
+
+def test_remap_reuses_maps_for_same_corners():
+    frame = _frame()
+    warper = RemapWarper(SIZE, min_repeats=2)
+    first = warper.warp(frame, CORNERS).copy()     # 첫 요청은 warpPerspective
+    assert warper.builds == 0
+    second = warper.warp(frame, CORNERS)           # 두 번째부터 맵
+    assert warper.builds == 1
+    assert _max_diff(first, second) <= 1
+    warper.warp(frame, CORNERS)
+    assert warper.builds == 1
+
+
+def test_rotate_180_fold_matches_rotate_then_warp():
+    frame = _frame()
+    raw = cv2.rotate(frame, cv2.ROTATE_180)          # 카메라 원본 (보정 전)
+    warper = RemapWarper(SIZE, rotate_180=True)
+    assert warper.folds_correction
+    out = warper.warp(raw, CORNERS)
+    assert _max_diff(out, _reference(frame)) <= 1
+
+
+def test_warp_with_matrix_matches_corners():
+    frame = _frame()
+    warper = RemapWarper(SIZE)
+    M = warper.matrix_for(CORNERS)
+    assert _max_diff(warper.warp_with_matrix(frame, M), _reference(frame)) <= 1
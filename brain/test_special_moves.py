@@ -22,7 +22,8 @@ import numpy as np
 from game import game_state
 from game.board_display import _print_board
 from cv.cv_detection import board_to_grid, detect_move_via_ml, detect_move_via_ml_capture
-from cv.cv_web import USBCapture, ThreadSafeCapture
+from cv.cv_web import USBCapture
+from cv.frame_hub import FrameHub
 
 
 def print_grid(grid, title="그리드"):
@@ -667,7 +668,7 @@ def initialize_camera_and_ml():
         try:
             print("[→] USB 카메라 초기화 중...")
             game_state.cv_capture = USBCapture(rotate_90_cw=False, rotate_90_ccw=False, rotate_180=True)
-            game_state.cv_capture_wrapper = ThreadSafeCapture(game_state.cv_capture)
+            game_state.cv_capture_wrapper = FrameHub(game_state.cv_capture)
             print(f"[✓] USB 카메라 캡처 초기화 완료 (/dev/video{game_state.cv_capture.index})")
         except Exception as exc:
             game_state.cv_capture = None
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+칸 샘플링(cv.square_sampling) 수치 테스트
+
+1. margin만 쓰는 SquareSampler가 예전 _cell_region 64칸 루프와 같은 평균을 내는지
+2. 알려진 카메라 자세에서 기울기 마스크가 카메라 반대쪽으로 넘어오는 옆 칸 기물 영역을 빼는지
+3. uint8 적분 경로와 gather(reduceat) 경로, cell_sums의 int32 넘침 방지
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+
+import cv2
+import numpy as np
+import pytest
+
+from cv.piece_detector import CELL_MARGIN_RATIO, _cell_region, _split_sizes
+from cv.square_sampling import (
+    GRID,
+    SquareSampler,
+    camera_position,
+    cell_means,
+    cell_sums,
+    default_camera_matrix,
+    piece_lean,
+)
+
+FRAME_SIZE = (640, 480)
+CAMERA = np.array([4.0, 14.0, 10.0])    # 보드 좌표(칸 단위): 가운데 열, 아래 모서리 앞 6칸, 높이 10칸
+
+
+def _image(shape, dtype=np.uint8, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, shape).astype(dtype)
+
+
+def _loop_means(img):
+    """예전 방식: 칸마다 _cell_region 슬라이스 평균."""
+    H, W = img.shape[:2]
+    cs_h, cs_w, my, mx = _split_sizes(H, W, GRID)
+    out = np.zeros((GRID, GRID, img.shape[2]), np.float64)
+    for i in range(GRID):
+        for j in range(GRID):
+            y1, y2, x1, x2 = _cell_region(i, j, cs_h, cs_w, my, mx, H, W)
+            out[i, j] = img[y1:y2, x1:x2].reshape(-1, img.shape[2]).mean(axis=0)
+    return out
+
+
+def _projected_corners():
+    """CAMERA에서 보드 가운데를 내려다볼 때 화면 속 보드 꼭짓점 (TL, TR, BR, BL)."""
+    target = np.array([4.0, 4.0, 0.0])
+    center = np.array([CAMERA[0], CAMERA[1], -CAMERA[2]])   # 보드 좌표계 z는 보드 안쪽 → 위쪽은 음수
+    z = (target - center) / np.linalg.norm(target - center)
+    x = np.array([1.0, 0.0, 0.0])
+    y = np.cross(z, x)
+    R = np.stack([x, y, z])
+    rvec, _ = cv2.Rodrigues(R)
+    obj = np.array([[0, 0, 0], [GRID, 0, 0], [GRID, GRID, 0], [0, GRID, 0]], dtype=np.float64)
+    pts, _ = cv2.projectPoints(obj, rvec, -R @ center, default_camera_matrix(FRAME_SIZE), None)
+    return pts.reshape(4, 2).astype(np.float32)
+
+
+@pytest.mark.parametrize("shape", [(400, 400), (480, 640), (403, 397)])
+def test_margin_sampler_matches_cell_region_loop(shape):
+    img = _image(shape + (3,))
+    sampler = SquareSampler(shape, margin=CELL_MARGIN_RATIO)
+    expected = _loop_means(img)
+    # uint8 적분 경로와 float gather 경로 모두 예전 루프와 같아야 한다
+    assert np.abs(sampler.means(img) - expected).max() < 1e-3
+    assert np.abs(sampler.means(img.astype(np.float32)) - expected).max() < 1e-3
+
+
+def test_camera_position_recovers_pose():
+    camera = camera_position(_projected_corners(), default_camera_matrix(FRAME_SIZE))
+    assert camera is not None
+    assert np.allclose(camera, CAMERA, atol=0.05)
+
+
+def test_lean_mask_drops_neighbour_piece_side():
+    corners = _projected_corners()
+    lean = piece_lean(camera_position(corners, default_camera_matrix(FRAME_SIZE)))
+    # 카메라가 보드 아래쪽 앞에 있으므로 모든 칸의 기물이 화면 위쪽(-y)으로 기운다
+    assert (lean[..., 1] < 0).all()
+
+    size = 400
+    leaned = SquareSampler.from_corners(corners, FRAME_SIZE, size)
+    plain = SquareSampler((size, size))
+    mask, margin = leaned.mask(), plain.mask()
+    assert not (mask & ~margin).any()              # 마진 영역 안에서만 뺀다
+    assert leaned.counts.sum() < plain.counts.sum()
+
+    # 가운데 칸: 아래 칸 기물이 위로 기울어 덮는 아래쪽 띠가 위쪽 띠보다 많이 빠진다
+    cell = size // GRID
+    y0, x0 = 4 * cell, 4 * cell
+    box = mask[y0:y0 + cell, x0:x0 + cell]
+    third = cell // 3
+    assert box[-third:].mean() < box[:third].mean()
+
+
+def test_uint8_integral_path_matches_gather_path():
+    corners = _projected_corners()
+    sampler = SquareSampler.from_corners(corners, FRAME_SIZE, 400)
+    img = _image((400, 400, 3), seed=1)
+    fast = sampler.means(img)                       # bitwise_and + cv2.integral
+    gather = sampler.means(img.astype(np.float64))  # np.take + np.add.reduceat
+    assert np.abs(fast - gather).max() < 1e-3
+
+    gray = img[..., 0]
+    assert np.abs(sampler.means(gray) - sampler.means(gray.astype(np.float32))).max() < 1e-3
+
+
+def test_cell_sums_exact_and_overflow_guard():
+    img = _image((403, 397, 3), seed=2)
+    assert np.array_equal(cell_sums(img), cell_sums(img.astype(np.float64)))
+    assert np.allclose(cell_means(img), img[: 400, : 392].reshape(8, 50, 8, 49, 3).mean(axis=(1, 3)), atol=1e-3)
+
+    # 255 * 픽셀 수가 int32를 넘는 크기는 float64로 누적해야 한다
+    big = np.full((3000, 3000), 255, np.uint8)
+    sums = cell_sums(big)
+    assert sums.shape == (GRID, GRID, 1)
+    assert np.all(sums == 255 * 375 * 375)
@@ -10,6 +10,8 @@ import time
 import threading
 from datetime import datetime
 
+from game import event_bus
+
 class TimerManager:
     """아두이노 타이머 관리 클래스"""
     
@@ -136,6 +138,15 @@ class TimerManager:
         
         return None
     
+    def fileno(self):
+        """시리얼 포트 파일 디스크립터 (select 대기용). 연결되지 않았거나 지원하지 않으면 None"""
+        if not self.is_connected or not self.serial or not self.serial.is_open:
+            return None
+        try:
+            return self.serial.fileno()
+        except Exception:
+            return None
+
     def read_timer_data(self):
         """아두이노에서 타이머 데이터 읽기"""
         if not self.is_connected or not self.serial or not self.serial.is_open:
@@ -279,6 +290,13 @@ class TimerManager:
                     if new_active:
                         self._active_side = new_active
 
+                    event_bus.publish(
+                        event_bus.TIMER,
+                        white=self.white_timer,
+                        black=self.black_timer,
+                        active=self._active_side,
+                    )
+
                     # print(f"[✓] 타이머 업데이트: 흰색 {self.format_time(self.white_timer)}, 검은색 {self.format_time(self.black_timer)}")
                     return True
                     
@@ -399,6 +417,10 @@ def check_timer_button():
     """타이머 버튼 입력 확인 (편의 함수)"""
     return timer_manager.check_button_press()
 
+def get_timer_fileno():
+    """타이머 시리얼 포트 파일 디스크립터 반환 (편의 함수)"""
+    return timer_manager.fileno()
+
 def send_timer_start():
     """타이머 시작 신호 전송 (편의 함수)"""
     return timer_manager.send_start()
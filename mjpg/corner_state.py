@@ -0,0 +1,104 @@
+# corner_state.py — 레거시 스트림 공용 코너 상태
+# 코너 상태(유지/버전/신뢰도)는 brain/cv/corner_state.py의 프로세스 공용 CornerStateService 하나가 들고,
+# 여기에는 그 서비스가 쓸 베이지칸 추적기(BeigeSquareTracker)만 둔다.
+# 코너를 잡은 뒤에는 직전 코너 사각형 + 여백 창 안에서만 베이지칸을 찾고, 못 찾을 때만 전체 화면을 본다
+# (brain/cv/corner_tracker.py의 창 추적과 같은 방식, 이 검출기는 초록 마커가 아니라 밝은 칸 기준).
+import itertools
+import threading
+
+import numpy as np
+
+import brain_path  # noqa: F401  (brain/cv 패키지 경로)
+from cv.corner_state import get_corner_service
+from cv.corner_tracker import corner_confidence
+
+from warp_cam_picam2_stable_v2 import (
+    find_chessboard_by_first_last_squares as find_corners,
+    is_valid_quad,
+    CornerStabilizer,
+    MIN_QUAD_AREA, AR_MIN, AR_MAX
+)
+
+WHITE_THRESHOLD = 180
+WINDOW_MARGIN = 48               # 창 추적 여백 (픽셀, 0이면 매번 전체 화면 검출)
+
+
+class BeigeSquareTracker:
+    """베이지칸 검출 + 창 추적 + 안정화. CornerStateService 추적기 (update/reset/confidence)."""
+
+    def __init__(self, white_threshold=WHITE_THRESHOLD, window_margin=WINDOW_MARGIN):
+        self.white_threshold = white_threshold
+        self.window_margin = window_margin
+        self.stats = {"full": 0, "window": 0}
+        self.stabilizer = None
+        self.confidence = 0.0
+        self._corners = None   # 마지막 원시 코너 (창 기준)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """창 기준 코너와 안정화 이력을 버린다."""
+        self.stabilizer = CornerStabilizer(hist_len=7, ema_alpha=0.35, max_jump=60.0, need_good=3)
+        self.confidence = 0.0
+        self._corners = None
+
+    def _find(self, img):
+        raw = find_corners(img, white_threshold=self.white_threshold)
+        if raw is not None:
+            ok, _ = is_valid_quad(raw, MIN_QUAD_AREA, AR_MIN, AR_MAX)
+            if not ok:
+                raw = None
+        return raw
+
+    def _find_in_window(self, frame):
+        """직전 코너를 감싼 창에서 검출 (창이 화면 전체만 하거나 못 찾으면 None)."""
+        h, w = frame.shape[:2]
+        x0, y0 = np.floor(self._corners.min(axis=0)).astype(int) - self.window_margin
+        x1, y1 = np.ceil(self._corners.max(axis=0)).astype(int) + self.window_margin
+        x0, y0, x1, y1 = max(0, x0), max(0, y0), min(w, x1), min(h, y1)
+        if x1 <= x0 or y1 <= y0 or (x1 - x0) * (y1 - y0) >= w * h:
+            return None
+        raw = self._find(frame[y0:y1, x0:x1])
+        if raw is None:
+            return None
+        return np.asarray(raw, dtype=np.float32) + np.float32([x0, y0])
+
+    def update(self, frame):
+        """프레임 하나를 처리하고 안정화된 코너 (4, 2) 또는 None을 반환."""
+        if frame is None:
+            return None
+        with self._lock:
+            raw = None
+            if self._corners is not None and self.window_margin > 0:
+                raw = self._find_in_window(frame)
+                if raw is not None:
+                    self.stats["window"] += 1
+            if raw is None:
+                self.stats["full"] += 1
+                raw = self._find(frame)
+            self._corners = None if raw is None else np.asarray(raw, dtype=np.float32).reshape(4, 2)
+            stable = self.stabilizer.update(self._corners)
+            self.confidence = corner_confidence(self._corners, stable)
+            return stable
+
+
+_seq = itertools.count(1)
+
+
+def corner_service():
+    """베이지칸 추적기를 쓰는 프로세스 공용 CornerStateService."""
+    service = get_corner_service()
+    service.set_tracker_factory(BeigeSquareTracker)
+    return service
+
+
+def track(cap, frame):
+    """cap에서 읽은 프레임을 공용 서비스에 넘기고 현재 코너를 반환.
+
+    cap이 FrameHub면 허브 시퀀스 번호를 써서 여러 스트림이 같은 프레임을 한 번만 검출한다
+    (일반 캡처는 호출 순서 번호).
+    """
+    seq = getattr(cap, "seq", None)
+    if seq is None:
+        seq = next(_seq)
+    return corner_service().observe(frame, seq).corners
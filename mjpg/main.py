@@ -1,24 +1,25 @@
 # main.py
+# 단독 분석 서버. 캡처/와핑/스트림 인코딩은 brain/cv의 FrameHub + StreamService를 그대로 쓴다
+# (캡처 스레드 1개, 프레임당 와핑 1회, 뷰·프레임당 인코딩 1회 - cv_web 서버와 같은 파이프라인).
+# 예전 라우트(/warp, /original, /piece, /edges, /base_board_img)는 서비스 뷰로 연결하고,
+# /stream/<view>, /snapshot/<view>, /streams도 함께 제공한다.
 from flask import Flask, Response, render_template_string, request, jsonify
 import cv2
-import threading
 import numpy as np
 import os
-import time
 import pickle
-import math
 from pathlib import Path
 
-# 내부 모듈
-from video_streams import gen_original_frames, gen_edges_frames
-from piece_auto_update import update_chess_pieces
+import brain_path  # noqa: F401  (brain/cv 패키지 경로)
 
-# ▶▶ 변경: stable 버전 함수/클래스 사용
-#   - 초록마커(find_green_corners) 대신 베이지칸 기반 + 안정화
-from warp_cam_picam2_stable_v2 import (
-    warp_chessboard,
-)
+from cv import cv_manager
+from cv.capture_sources import CAPTURE_SOURCE_ENV, open_capture
+from cv.frame_hub import FrameHub
+from cv.rate_governor import get_governor
+from cv.stream_encoder import MJPEG_MIMETYPE, encode_jpeg
+from cv.stream_server import StreamService, run_wsgi
 
+from corner_state import corner_service
 # ▶▶ 추가: 쌍 매칭(pairing)로 이동칸 추정
 from piece_recognition import _pair_moves
 
@@ -27,64 +28,35 @@ BASE_DIR = Path(__file__).resolve().parent
 NPPATH = str(BASE_DIR / "init_board_values.npy")
 PKLPATH = str(BASE_DIR / "chess_pieces.pkl")
 
+WARP_SIZE = 400
+
 # =======================
 # 전역 상태
 # =======================
 USE_PICAM2 = True  # CSI 카메라(PiCam2)면 True, USB 웹캠이면 False
 
-if USE_PICAM2:
-    # Picamera2를 VideoCapture처럼 쓰기 위한 간단 래퍼
-    class PiCam2Capture:
-        def __init__(self, size=(1280, 720), fps=30, hflip=False, vflip=False):
-            from picamera2 import Picamera2
-            self.hflip = hflip
-            self.vflip = vflip
-            self.picam2 = Picamera2()
-            cfg = self.picam2.create_preview_configuration(
-                main={"size": size, "format": "RGB888"},
-                controls={"FrameRate": fps}
-            )
-            self.picam2.configure(cfg)
-            self.picam2.start()
-
-        def read(self):
-            import cv2
-            rgb = self.picam2.capture_array()
-            bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
-            if self.hflip:
-                bgr = cv2.flip(bgr, 1)
-            if self.vflip:
-                bgr = cv2.flip(bgr, 0)
-            return True, bgr
-
-        def release(self):
-            try:
-                self.picam2.stop()
-            except Exception:
-                pass
-
-    cap = PiCam2Capture()  # <-- CSI 카메라
-else:
-    import cv2
-    cap = cv2.VideoCapture(0, cv2.CAP_V4L2)  # <-- USB 웹캠
-    # 필요 시 해상도/FPS 세팅
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-    cap.set(cv2.CAP_PROP_FPS, 30)
-
-latest_frame = None
-# 수동 와핑 모드 상태
-manual_mode = False
-manual_corners = None  # np.float32 (4,2) in TL,TR,BR,BL order
-
-# 자동 코너/안정화는 사용하지 않음 (수동 와핑 전용)
+
+def _open_camera():
+    """CHESS_CAPTURE_SOURCE가 있으면 그 소스, 없으면 USE_PICAM2에 따라 CSI/USB 카메라 (회전 없음)."""
+    spec = os.environ.get(CAPTURE_SOURCE_ENV)
+    if spec:
+        return open_capture(spec)
+    if USE_PICAM2:
+        return open_capture("picam", rotate_portrait=False)
+    return open_capture("usb", rotate_180=False)
+
+
+# 캡처는 FrameHub 스레드 하나가 소유하고, 라우트는 허브의 최신 프레임/공용 WarpStage만 본다.
+# 보는 클라이언트가 없으면 governor가 캡처를 유휴 속도로 낮춘다 (턴 전환 동안은 최대 속도).
+governor = get_governor()
+hub = FrameHub(_open_camera(), start=False, governor=governor)
+
+# 수동 와핑 전용: 코너는 /set_corners로 지정한 값만 사용 (cv_manager 코너 상태에 두고 파일로 저장하지 않음)
 
 # 기준/턴/보드 상태
 init_board_values = None
-reload_base_board = False
 turn_color = 'white'
 prev_turn_color = 'white'
-player_color = None   # 'white' or 'black' (카메라 아랫변 쪽 플레이어)
 
 # 체스 기물 배열 (행: 0~7, 열: 0~7)
 chess_pieces = [
@@ -98,172 +70,15 @@ chess_pieces = [
     ['WR', 'WN', 'WB', 'WQ', 'WK', 'WB', 'WN', 'WR'],
 ]
 
-prev_board_values = None
-prev_warp = None
 move_history = []
 
-def _order_corners_tl_tr_br_bl(pts):
-    import numpy as np
-    pts = np.array(pts, dtype=np.float32).reshape(4, 2)
-    s = pts.sum(axis=1)
-    d = np.diff(pts, axis=1)
-    tl = pts[np.argmin(s)]
-    br = pts[np.argmax(s)]
-    tr = pts[np.argmin(d)]
-    bl = pts[np.argmax(d)]
-    ordered = np.array([tl, tr, br, bl], dtype=np.float32)
-    return ordered
-
-def _set_manual_corners(points):
-    """points: list/ndarray shape (4,2), in any order. We will order TL,TR,BR,BL."""
-    global manual_corners, manual_mode
-    import numpy as np
-    arr = np.array(points, dtype=np.float32).reshape(4, 2)
-    ordered = _order_corners_tl_tr_br_bl(arr)
-    manual_corners = ordered
-    manual_mode = True
-
-def _clear_manual_corners():
-    global manual_corners, manual_mode
-    manual_corners = None
-    manual_mode = False
-
-def _get_corners_for_frame(frame):
-    """수동 코너만 사용. 없으면 None."""
-    return manual_corners
-
-class WarpedCapture:
-    """원본 cap을 감싸 수동 코너가 설정된 경우 항상 와핑된 프레임을 반환하는 래퍼.
-    piece_recognition, video_streams 등의 기존 제너레이터에 투명하게 전달 가능.
-    """
-    def __init__(self, cap, size=400):
-        self._cap = cap
-        self._size = size
-
-    def read(self):
-        ret, frame = self._cap.read()
-        if not ret:
-            return ret, frame
-        corners = _get_corners_for_frame(frame)
-        if corners is not None and len(corners) == 4:
-            warped = warp_chessboard(frame, corners, size=self._size)
-            return True, warped
-        # 코너가 없으면 안전하게 리사이즈
-        try:
-            return True, cv2.resize(frame, (self._size, self._size))
-        except Exception:
-            return True, frame
-
-    def release(self):
-        try:
-            self._cap.release()
-        except Exception:
-            pass
-
-# =======================
-# 유틸: 좌표 표기/색 판별
-# =======================
-def coord_to_chess_notation(i, j):
-    file = chr(ord('a') + j)
-    rank = str(8 - i)
-    return file + rank
-
-def piece_to_fen(piece):
-    if not piece or len(piece) < 2:
-        return ''
-    color, kind = piece[0], piece[1]
-    kind_map = {'K': 'K', 'Q': 'Q', 'R': 'R', 'B': 'B', 'N': 'N', 'P': 'P'}
-    fen = kind_map.get(kind.upper(), '?')
-    return fen.upper() if color == 'W' else fen.lower() if color == 'B' else '?'
-
-def _is_color_piece(code, color):
-    return bool(code) and ((color == 'white' and code[0] == 'W') or (color == 'black' and code[0] == 'B'))
-
-# =======================
-# 노이즈 억제 도우미 (LAB + 다중 프레임 평균)
-# =======================
-def _mean_lab_board_from_warp(warp):
-    h, w = warp.shape[:2]
-    cell_h = h // 8
-    cell_w = w // 8
-    lab = cv2.cvtColor(warp, cv2.COLOR_BGR2LAB)
-    out = np.zeros((8, 8, 3), np.float32)
-    for i in range(8):
-        for j in range(8):
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-            cell = lab[y1:y2, x1:x2]
-            out[i, j] = cell.reshape(-1, 3).mean(axis=0)
-    return out
-
-# 자동 코너 탐지는 제거됨
-
-def _capture_avg_lab_board(cap, n_frames=8, sleep_sec=0.02):
-    acc = np.zeros((8, 8, 3), np.float32)
-    cnt = 0
-    last_warp = None
-
-    for _ in range(n_frames):
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        corners = _get_corners_for_frame(frame)
-        if corners is not None and len(corners) == 4:
-            warp = warp_chessboard(frame, corners, size=400)
-        else:
-            warp = cv2.resize(frame, (400, 400))
-
-        last_warp = warp
-        acc += _mean_lab_board_from_warp(warp)
-        cnt += 1
-        time.sleep(sleep_sec)
-
-    if cnt == 0:
-        return None, None
-    return acc / cnt, last_warp
-
-# =======================
-# 견고성 향상: 에지/텍스처 맵 (원본 유지 - /base_board_img용)
-# =======================
-def _edge_density_map(warp_img):
-    try:
-        gray = cv2.cvtColor(warp_img, cv2.COLOR_BGR2GRAY)
-    except Exception:
-        gray = warp_img if len(warp_img.shape) == 2 else cv2.cvtColor(warp_img, cv2.COLOR_BGR2GRAY)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    eq = clahe.apply(gray)
-    v = np.var(eq)
-    lower = max(10, min(80, int(0.33 * np.sqrt(max(1.0, v)))))
-    upper = int(lower * 2.5)
-    edges = cv2.Canny(eq, lower, upper)
-    h, w = edges.shape[:2]
-    cell_h, cell_w = h // 8, w // 8
-    out = np.zeros((8, 8), np.float32)
-    for i in range(8):
-        for j in range(8):
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-            cell = edges[y1:y2, x1:x2]
-            total = cell.size
-            out[i, j] = 0.0 if total == 0 else float(np.count_nonzero(cell)) / float(total)
-    return out
-
-def _l_variance_map(warp_img):
-    lab = cv2.cvtColor(warp_img, cv2.COLOR_BGR2LAB)
-    L = lab[:, :, 0]
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    L_eq = clahe.apply(L)
-    h, w = L_eq.shape[:2]
-    cell_h, cell_w = h // 8, w // 8
-    out = np.zeros((8, 8), np.float32)
-    for i in range(8):
-        for j in range(8):
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-            cell = L_eq[y1:y2, x1:x2]
-            out[i, j] = float(np.var(cell))
-    return out
+# 모든 스트림 뷰를 한 파이프라인에서 (piece/base 뷰는 현재 기준/기물 배열을 읽는다)
+service = StreamService(
+    hub,
+    reference_fn=lambda: init_board_values,
+    pieces_fn=lambda: chess_pieces,
+    warp_size=WARP_SIZE,
+)
 
 # =======================
 # 부팅 시 보드/기준 로드
@@ -299,35 +114,11 @@ def _startup_load_state():
         except Exception as e:
             print(f'[BOOT] chess_pieces.pkl 생성 실패: {e}')
 
-# =======================
-# 프레임 읽기 스레드
-# =======================
-def frame_reader():
-    global latest_frame
-    while True:
-        ret, frame = cap.read()
-        if ret:
-            latest_frame = frame
-        time.sleep(0.01)
-
 # =======================
 # Flask 앱
 # =======================
 app = Flask(__name__)
-hsv_values_global = []
-
-def gen_original_frames_with_hsv():
-    global hsv_values_global
-    # 항상 수동 와핑된 프레임을 기준으로 동작
-    local_cap = WarpedCapture(cap)
-    for frame_bytes, hsv_values in gen_original_frames(local_cap):
-        hsv_values_global = hsv_values
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-
-def _encode_jpeg(img):
-    ret, buf = cv2.imencode('.jpg', img)
-    return buf.tobytes() if ret else b''
+app.register_blueprint(service.blueprint())
 
 def _draw_corners_on_image(img, corners, color=(0, 255, 255)):
     out = img.copy()
@@ -338,85 +129,28 @@ def _draw_corners_on_image(img, corners, color=(0, 255, 255)):
         cv2.polylines(out, [pts], isClosed=True, color=(0, 200, 255), thickness=2)
     return out
 
-def gen_warped_frames_manual(cap, size=400):
-    """수동 코너가 설정되었을 때 사용하는 와핑 스트림 제네레이터."""
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            time.sleep(0.01)
-            continue
-        corners = _get_corners_for_frame(frame)
-        warp = warp_chessboard(frame, corners, size=size) if corners is not None else cv2.resize(frame, (size, size))
-        frame_bytes = _encode_jpeg(warp)
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-
-# ---------- 스트림 라우트 ----------
+def _jpeg_response(data):
+    if data is None:
+        return '프레임 없음', 500
+    return Response(data, mimetype='image/jpeg')
+
+# ---------- 스트림 라우트 (서비스 뷰) ----------
 @app.route('/warp')
 def warp_feed():
-    # 항상 수동 코너 기반 와핑 제네레이터 사용
-    return Response(gen_warped_frames_manual(cap), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return Response(service.stream('warp'), mimetype=MJPEG_MIMETYPE)
 
 @app.route('/original')
 def original_feed():
-    return Response(gen_original_frames_with_hsv(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return Response(service.stream('original'), mimetype=MJPEG_MIMETYPE)
 
 @app.route('/edges')
 def edges_feed():
-    # 항상 WarpedCapture 사용
-    local_cap = WarpedCapture(cap)
-    return Response(gen_edges_frames(local_cap), mimetype='multipart/x-mixed-replace; boundary=frame')
-
-# 차이 시각화
-def _draw_piece_diff(warp_img, top_k=2):
-    # warp_img: 400x400 기준 가정
-    h, w = warp_img.shape[:2]
-    cell_h, cell_w = h // 8, w // 8
-    canvas = warp_img.copy()
-    if init_board_values is None:
-        return canvas
-    diffs = []
-    for i in range(8):
-        for j in range(8):
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-            cell = warp_img[y1:y2, x1:x2]
-            mean_bgr = np.mean(cell.reshape(-1, 3), axis=0)
-            diff = float(np.linalg.norm(mean_bgr - init_board_values[i, j]))
-            diffs.append((diff, i, j))
-    diffs.sort(reverse=True)
-    k = max(0, min(top_k, len(diffs)))
-    for n in range(k):
-        _, i, j = diffs[n]
-        y1, y2 = i * cell_h, (i + 1) * cell_h
-        x1, x2 = j * cell_w, (j + 1) * cell_w
-        cv2.rectangle(canvas, (x1, y1), (x2, y2), (0, 0, 255), 3)
-    return canvas
-
-def gen_piece_frames_local(cap, size=400, top_k=2):
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            time.sleep(0.01)
-            continue
-        # cap은 WarpedCapture이므로 frame 자체가 이미 와핑된 보드
-        warp = frame
-        try:
-            if warp.shape[0] != size or warp.shape[1] != size:
-                warp = cv2.resize(warp, (size, size))
-        except Exception:
-            pass
-        vis = _draw_piece_diff(warp, top_k=top_k)
-        frame_bytes = _encode_jpeg(vis)
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+    return Response(service.stream('edges'), mimetype=MJPEG_MIMETYPE)
 
 @app.route('/piece')
 def piece_feed():
-    # 로컬 제너레이터로 교체하여 400x400 기준으로만 렌더링 (검정 여백 방지)
-    local_cap = WarpedCapture(cap)
-    return Response(gen_piece_frames_local(local_cap, size=400, top_k=2),
-                    mimetype='multipart/x-mixed-replace; boundary=frame')
+    # 기준 대비 변화 상위 2칸 (400x400 와핑 기준)
+    return Response(service.stream('piece'), mimetype=MJPEG_MIMETYPE)
 
 # ---------- 상태 라우트 ----------
 @app.route('/turn_status')
@@ -426,272 +160,72 @@ def turn_status():
 # ---------- 보드/기준 시각화 ----------
 @app.route('/base_board_img')
 def base_board_img():
-    global latest_frame, init_board_values, chess_pieces
-    h, w = 400, 400
-    cell_h = h // 8
-    cell_w = w // 8
-
-    if not (isinstance(chess_pieces, list) and len(chess_pieces) == 8 and all(isinstance(row, list) and len(row) == 8 for row in chess_pieces)):
-        print('chess_pieces가 8x8 배열이 아님! 기본값으로 대체')
-        chess_pieces = [[''] * 8 for _ in range(8)]
-
-    base_img = np.ones((h, w, 3), dtype=np.uint8) * 220
-    for i in range(8):
-        for j in range(8):
-            chess_i = i
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-
-            if (i + j) % 2 == 0:
-                cv2.rectangle(base_img, (x1, y1), (x2, y2), (180, 180, 180), -1)
-            else:
-                cv2.rectangle(base_img, (x1, y1), (x2, y2), (240, 240, 240), -1)
-
-            piece = chess_pieces[chess_i][j]
-            if piece:
-                color = (255, 255, 255) if piece[0] == 'W' else (0, 0, 0) if piece[0] == 'B' else (0, 0, 255)
-                cv2.putText(base_img, piece, (x1 + 8, y1 + cell_h // 2 + 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2, cv2.LINE_AA)
-
-    if latest_frame is not None and init_board_values is not None:
-        frame = latest_frame.copy()
-        corners = _get_corners_for_frame(frame)
-        if corners is not None and len(corners) == 4:
-            warp = warp_chessboard(frame, corners, size=400)
-        else:
-            warp = cv2.resize(frame, (400, 400))
-
-        diff_vals = np.zeros((8, 8), dtype=np.float32)
-        diff_list = []
-        for i in range(8):
-            for j in range(8):
-                y1, y2 = i * cell_h, (i + 1) * cell_h
-                x1, x2 = j * cell_w, (j + 1) * cell_w
-                cell = warp[y1:y2, x1:x2]
-                mean_bgr = np.mean(cell.reshape(-1, 3), axis=0)
-                diff = np.linalg.norm(mean_bgr - init_board_values[i, j])
-                diff_vals[i, j] = diff
-                diff_list.append((diff, i, j))
-
-        for i in range(8):
-            for j in range(8):
-                y1 = i * cell_h
-                x1 = j * cell_w
-                text = f"{int(diff_vals[i, j])}"
-                cv2.putText(base_img, text, (x1 + 4, y1 + cell_h // 2 + 6),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 200), 2, cv2.LINE_AA)
-
-        diff_list.sort(reverse=True)
-        shown = 0
-        used = set()
-        for diff, i, j in diff_list:
-            if (i, j) in used:
-                continue
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-            cv2.rectangle(base_img, (x1, y1), (x2, y2), (0, 0, 255), 3)
-            used.add((i, j))
-            shown += 1
-            if shown == 2:
-                break
-
-    _, buffer = cv2.imencode('.jpg', base_img)
-    return Response(buffer.tobytes(), mimetype='image/jpeg')
+    return _jpeg_response(service.snapshot('base'))
 
 # ---------- 디버그: 코너/와프 확인 ----------
 @app.route('/debug_original')
 def debug_original():
-    global latest_frame
-    if latest_frame is None:
-        ret, frame = cap.read()
-        if not ret:
-            return '프레임 없음', 500
-        latest_frame = frame
-    frame = latest_frame.copy()
-    corners = _get_corners_for_frame(frame)
-    dbg = _draw_corners_on_image(frame, corners)
-    return Response(_encode_jpeg(dbg), mimetype='image/jpeg')
+    frame = service.call(hub.latest_image)
+    if frame is None:
+        return '프레임 없음', 500
+    dbg = _draw_corners_on_image(frame, cv_manager.get_manual_corners())
+    return Response(encode_jpeg(dbg, quality=80), mimetype='image/jpeg')
 
 @app.route('/debug_warp')
 def debug_warp():
-    global latest_frame
-    if latest_frame is None:
-        ret, frame = cap.read()
-        if not ret:
-            return '프레임 없음', 500
-        latest_frame = frame
-    frame = latest_frame.copy()
-    corners = _get_corners_for_frame(frame)
-    warp = warp_chessboard(frame, corners, size=400) if corners is not None else cv2.resize(frame, (400, 400))
-    return Response(_encode_jpeg(warp), mimetype='image/jpeg')
+    return _jpeg_response(service.snapshot('warp'))
 
 # ---------- 스냅샷(원본) 제공 ----------
 @app.route('/snapshot_original')
 def snapshot_original():
-    global latest_frame
-    if latest_frame is None:
-        ret, frame = cap.read()
-        if not ret:
-            return '프레임 없음', 500
-        latest_frame = frame
     # 원본 해상도/비율 그대로 반환
-    img = latest_frame.copy()
-    _, buf = cv2.imencode('.jpg', img)
-    return Response(buf.tobytes(), mimetype='image/jpeg')
+    return _jpeg_response(service.snapshot('original', manual=True))
 
 # ---------- 기준값 저장 ----------
 @app.route('/set_init_board', methods=['POST'])
 def set_init_board():
     """현재 프레임을 와핑 후 8x8 평균 BGR을 기준으로 저장"""
-    global init_board_values, latest_frame
+    global init_board_values
 
-    if latest_frame is None:
+    wf = service.call(hub.warp_stage(WARP_SIZE).latest)
+    if wf is None:
         return '프레임 없음', 400
 
-    frame = latest_frame.copy()
-    corners = _get_corners_for_frame(frame)
-    frame = latest_frame.copy()
-    corners = _get_corners_for_frame(frame)
-    warp = warp_chessboard(frame, corners, size=400) if corners is not None else cv2.resize(frame, (400, 400))
-
-    h, w = warp.shape[:2]
-    cell_h = h // 8
-    cell_w = w // 8
-    board_vals = np.zeros((8, 8, 3), dtype=np.float32)
-    for i in range(8):
-        for j in range(8):
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-            cell = warp[y1:y2, x1:x2]
-            board_vals[i, j] = np.mean(cell.reshape(-1, 3), axis=0)
-
+    board_vals = wf.bgr_means.copy()
     np.save(NPPATH, board_vals)
     init_board_values = board_vals
     print(f"완전 초기상태 저장: {NPPATH}")
     return '초기상태 저장 완료', 200
 
 # ---------- 턴 전환(이동 추정 + 새 기준 저장) ----------
+def _turn_transition():
+    with governor.active("detect"):
+        return cv_manager.process_turn_transition(
+            hub, NPPATH, PKLPATH, chess_pieces, turn_color,
+            pair_moves_fn=_pair_moves, threshold=9.0, n_frames=8, sleep_sec=0.02, warp_size=WARP_SIZE,
+        )
+
 @app.route('/next_turn', methods=['POST'])
 def next_turn():
     """
-    ▶ 패치: LAB 델타 + 디트렌딩 + _pair_moves 로 (출발, 도착) 추정
-    + 턴 전환 + 새 기준 저장 (나머지 로직은 기존 유지)
+    LAB 다중 프레임 평균 + 조명 보정 + _pair_moves 로 (출발, 도착) 추정
+    + 턴 전환 + 새 기준 저장 (cv_manager.process_turn_transition)
     """
-    global init_board_values, latest_frame, reload_base_board, turn_color, prev_turn_color
-    global prev_board_values, prev_warp, chess_pieces, move_history
-
-    prev_turn_color = turn_color
-    turn_color = 'black' if turn_color == 'white' else 'white'
-    print(f"이전 턴: {prev_turn_color}, 현재 턴: {turn_color}")
+    global init_board_values, turn_color, prev_turn_color, chess_pieces
 
     try:
-        with open(PKLPATH, 'wb') as f:
-            pickle.dump(chess_pieces, f)
-    except Exception as e:
-        print(f'[WARN] chess_pieces.pkl 저장 실패(사전): {e}')
-
-    if latest_frame is None:
-        return '프레임 없음', 400
-
-    prev_board_values = np.load(NPPATH) if os.path.exists(NPPATH) else None
-
-    # --- 현재 보드 LAB 평균 (다중 프레임 평균) ---
-    curr_lab, warp = _capture_avg_lab_board(cap, n_frames=8, sleep_sec=0.02)
-    if curr_lab is None:
+        result = service.call(_turn_transition)
+    except RuntimeError as e:
+        print(f'[WARN] 턴 전환 실패: {e}')
         return '현재 보드 캡처 실패', 500
-    prev_warp = warp.copy()
-
-    # --- 이전 기준 BGR -> LAB ---
-    if prev_board_values is not None:
-        prev_lab = np.zeros((8, 8, 3), np.float32)
-        for i in range(8):
-            for j in range(8):
-                bgr = np.array(prev_board_values[i, j], dtype=np.uint8)[None, None, :]
-                lab = cv2.cvtColor(bgr, cv2.COLOR_BGR2LAB).astype(np.float32)
-                prev_lab[i, j] = lab[0, 0]
-    else:
-        prev_lab = curr_lab.copy()
-
-    # --- 델타 + 디트렌딩 ---
-    deltas = curr_lab - prev_lab
-    mean_shift = deltas.reshape(-1, 3).mean(axis=0, dtype=np.float32)
-    deltas = deltas - mean_shift
-    norms = np.linalg.norm(deltas, axis=2).astype(np.float32)
-
-    # --- 쌍 매칭으로 src/dst 추정 ---
-    pairs = _pair_moves(deltas.reshape(-1, 3), norms.reshape(-1), threshold=9.0)
-    if pairs:
-        a, b = pairs[0]
-        src = (a // 8, a % 8)
-        dst = (b // 8, b % 8)
-        print(f"[DEBUG] pair pick src={src}, dst={dst}")
-    else:
-        # 폴백: 상위 두 칸
-        flat = norms.flatten()
-        order = np.argsort(-flat)
-        src = (order[0] // 8, order[0] % 8)
-        dst = (order[1] // 8, order[1] % 8)
-        print(f"[WARN] pair 없음 → fallback src/dst={src}->{dst}")
-
-    # --- 다음 턴 기준 저장용 BGR 평균 ---
-    h, w = warp.shape[:2]
-    cell_h = h // 8
-    cell_w = w // 8
-    board_vals = np.zeros((8, 8, 3), np.float32)
-    for i in range(8):
-        for j in range(8):
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-            cell = warp[y1:y2, x1:x2]
-            board_vals[i, j] = cell.reshape(-1, 3).mean(axis=0)
-
-    # ---- 이동 반영 ----
-    try:
-        with open(PKLPATH, 'rb') as f:
-            chess_pieces = pickle.load(f)
-    except Exception:
-        pass
-
-    before = [row[:] for row in chess_pieces]
-    chess_pieces = update_chess_pieces(chess_pieces, src, dst)
-
-    # 기보 기록
-    piece_src = before[src[0]][src[1]]
-    piece_dst = before[dst[0]][dst[1]]
-    if piece_src and not piece_dst:
-        move_str = f"{piece_to_fen(piece_src)} {coord_to_chess_notation(src[0], src[1])}-{coord_to_chess_notation(dst[0], dst[1])}"
-    elif piece_dst and not piece_src:
-        move_str = f"{piece_to_fen(piece_dst)} {coord_to_chess_notation(dst[0], dst[1])}-{coord_to_chess_notation(src[0], src[1])}"
-    else:
-        move_str = f"? {coord_to_chess_notation(src[0], src[1])}<->{coord_to_chess_notation(dst[0], dst[1])}"
-    print(f"[DEBUG] move: {move_str}")
-    move_history.append(move_str)
-
-    try:
-        with open(PKLPATH, 'wb') as f:
-            pickle.dump(chess_pieces, f)
-    except Exception as e:
-        print(f'[WARN] chess_pieces.pkl 저장 실패(사후): {e}')
-
-    # 기존 기준 삭제 후 새 기준 저장
-    if os.path.exists(NPPATH):
-        try:
-            os.remove(NPPATH)
-            print(f"삭제 성공: {NPPATH}")
-        except Exception as e:
-            print(f"삭제 중 예외 발생: {e}")
-    else:
-        print(f"삭제할 파일이 없음: {NPPATH}")
 
-    np.save(NPPATH, board_vals)
-    try:
-        init_board_values = np.load(NPPATH)
-    except Exception as e:
-        init_board_values = board_vals
-        print(f'[WARN] 새 기준 재로드 실패: {e}')
+    turn_color = result['turn_color']
+    prev_turn_color = result['prev_turn_color']
+    chess_pieces = result['chess_pieces']
+    init_board_values = result['init_board_values']
+    move_history.append(result['move_str'])
+    print(f"이전 턴: {prev_turn_color}, 현재 턴: {turn_color}")
     print(f"새 기준값 저장: {NPPATH}")
-    reload_base_board = True
-
     return '턴 기록 및 전환 완료', 200
 
 # ---------- 수동 코너 설정 API ----------
@@ -706,22 +240,23 @@ def set_corners_api():
         if not pts or len(pts) != 4:
             return jsonify({'ok': False, 'error': 'points must be length 4'}), 400
         # 좌표는 원본 해상도 기준으로 전달된다고 가정하고 그대로 사용
-        _set_manual_corners(pts)
+        cv_manager.set_manual_corners(pts, persist=False)
         return jsonify({'ok': True, 'manual_mode': True}), 200
     except Exception as e:
         return jsonify({'ok': False, 'error': str(e)}), 400
 
 @app.route('/clear_corners', methods=['POST'])
 def clear_corners_api():
-    _clear_manual_corners()
+    # brain/cv/manual_corners.npy는 cv_web 것이므로 지우지 않고 코너 상태만 해제
+    corner_service().clear()
     return jsonify({'ok': True, 'manual_mode': False}), 200
 
 @app.route('/get_corners', methods=['GET'])
 def get_corners_api():
-    if manual_corners is None:
-        return jsonify({'manual_mode': manual_mode, 'points': None})
-    pts = manual_corners.astype(float).tolist()
-    return jsonify({'manual_mode': manual_mode, 'points': pts})
+    corners = cv_manager.get_manual_corners()
+    if corners is None:
+        return jsonify({'manual_mode': False, 'points': None})
+    return jsonify({'manual_mode': True, 'points': corners.astype(float).tolist()})
 
 # ---------- 메인 UI ----------
 @app.route('/')
@@ -972,5 +507,10 @@ def manual_page():
 # =======================
 if __name__ == '__main__':
     _startup_load_state()
-    threading.Thread(target=frame_reader, daemon=True).start()
-    app.run(host='0.0.0.0', port=5001, debug=False, use_reloader=False)
+    # cv_manager가 임포트 시 읽어 온 brain 쪽 저장 코너는 쓰지 않는다 (/manual에서 다시 지정)
+    corner_service().clear()
+    hub.start()
+    try:
+        run_wsgi(app, host='0.0.0.0', port=5001, service=service)
+    finally:
+        hub.release()
@@ -5,6 +5,9 @@
 - 기하학적 검증 (사각형 형태, 크기, 비율)
 - 색상 일관성 검증
 - 위치 안정성 검증
+
+레거시 단독 도구. 캡처 파이프라인에서 쓰는 라이브러리 버전은 brain/cv/marker_validator.py
+(벡터화 검사 + 누적 통계, CornerTracker 게이트, 단독 실행: brain 폴더에서 python -m cv.marker_validator).
 """
 
 import cv2
@@ -3,50 +3,22 @@ import cv2
 import numpy as np
 import os
 
+import brain_path  # noqa: F401  (brain/cv 패키지 경로)
+from cv.jpeg_codec import get_codec
+from cv.square_sampling import cell_means
+
 from warp_cam_picam2_stable_v2 import (
-    find_chessboard_by_first_last_squares as find_corners,
     warp_chessboard,
     is_valid_quad,
-    CornerStabilizer,
     MIN_QUAD_AREA, AR_MIN, AR_MAX
 )
+from corner_state import track as _track_corners
 
-# ==== Corner 안정화 ====
-_corner_stabilizer = CornerStabilizer(hist_len=7, ema_alpha=0.35, max_jump=60.0, need_good=3)
-_last_good_corners = None
-_hold_counter = 0
-_HOLD_LAST_N_FRAMES = 20
-
-def _safe_find_corners(frame):
-    global _last_good_corners, _hold_counter
-    raw = find_corners(frame, white_threshold=170)
-    if raw is not None:
-        ok, _ = is_valid_quad(raw, MIN_QUAD_AREA, AR_MIN, AR_MAX)
-        if not ok:
-            raw = None
-    stable = _corner_stabilizer.update(raw)
-    use = None
-    if stable is not None:
-        use = stable
-        _last_good_corners = use
-        _hold_counter = 0
-    elif _last_good_corners is not None and _hold_counter < _HOLD_LAST_N_FRAMES:
-        use = _last_good_corners
-        _hold_counter += 1
-    return use
+JPEG_QUALITY = 80  # 스트리밍 JPEG 품질
 
 # ==== 이동 감지 도우미 ====
 def _compute_lab_means(warp, grid=8):
-    h, w = warp.shape[:2]
-    cell_h, cell_w = h // grid, w // grid
-    lab = cv2.cvtColor(warp, cv2.COLOR_BGR2LAB)
-    out = np.zeros((grid, grid, 3), np.float32)
-    for i in range(grid):
-        for j in range(grid):
-            y1,y2 = i*cell_h,(i+1)*cell_h
-            x1,x2 = j*cell_w,(j+1)*cell_w
-            out[i,j] = lab[y1:y2,x1:x2].reshape(-1,3).mean(axis=0)
-    return out
+    return cell_means(cv2.cvtColor(warp, cv2.COLOR_BGR2LAB), grid)
 
 def _detrend_deltas(deltas):
     mean_shift = deltas.reshape(-1, 3).mean(axis=0, dtype=np.float32)
@@ -75,8 +47,8 @@ def gen_edges_frames(cap, base_board_path, threshold=9.0, top_k=2):
             ret, frame = cap.read()
             if not ret:
                 continue
-            _, jpeg = cv2.imencode('.jpg', frame)
-            yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
+            jpeg = get_codec().encode(frame, JPEG_QUALITY)
+            yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
         return
 
     base_bgr = np.load(base_board_path)
@@ -88,7 +60,7 @@ def gen_edges_frames(cap, base_board_path, threshold=9.0, top_k=2):
         ret, frame = cap.read()
         if not ret:
             continue
-        corners_candidate = _safe_find_corners(frame)
+        corners_candidate = _track_corners(cap, frame)
 
         # 새 코너는 유효 사각형 + 이전 코너와의 이동량 제한(침입 물체로 인한 급변 방지)
         chosen_corners = last_corners
@@ -126,5 +98,5 @@ def gen_edges_frames(cap, base_board_path, threshold=9.0, top_k=2):
                 x2,y2 = (j+1)*cs_w,(i+1)*cs_h
                 cv2.rectangle(vis, (x1,y1),(x2,y2), (0,0,255), 2)
 
-        _, jpeg = cv2.imencode('.jpg', vis)
-        yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
+        jpeg = get_codec().encode(vis, JPEG_QUALITY)
+        yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
@@ -4,34 +4,43 @@ import cv2
 import numpy as np
 import os, time
 
+import brain_path  # noqa: F401  (brain/cv 패키지 경로)
+from cv.jpeg_codec import get_codec
+
 # v2 모듈에서 혼합 corner 검출/warp 재사용
 from warp_cam_picam2_stable_v2 import (
-    find_chessboard_by_first_last_squares as find_corners,
     warp_chessboard,
     Hmin, Hmax, Smin, Smax, Vmin, Vmax,
-    is_valid_quad, CornerStabilizer, MIN_QUAD_AREA, AR_MIN, AR_MAX
 )
+from corner_state import track as track_corners
 
 GRID = 8
 WARP_SIZE = 400
 JPEG_QUALITY = 80
 
-def _jpeg_bytes_from_rgb(img_rgb):
-    bgr = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
-    ok, buf = cv2.imencode('.jpg', bgr, [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY])
-    if not ok:
-        ok, buf = cv2.imencode('.jpg', bgr)
-    return buf.tobytes()
+# 예전에는 BGR → RGB로 바꿔 그린 뒤 인코딩 직전에 다시 RGB → BGR로 바꿨다 (프레임당 변환 2번 + 배열 2개).
+# 지금은 BGR 그대로 그리고 인코딩한다 (색은 BGR 순서로 적는다). 오버레이용 배열은 제너레이터마다
+# _reuse()로 한 번 만든 것을 계속 쓴다.
+
+def _jpeg_bytes(img_bgr):
+    # brain/cv 공용 코덱 (TurboJPEG이 있으면 사용, 없으면 OpenCV)
+    return get_codec().encode(img_bgr, JPEG_QUALITY)
+
+def _reuse(buf, shape, dtype=np.uint8):
+    """buf가 shape/dtype과 같으면 그대로, 아니면 새 배열 (제너레이터별 프레임 버퍼 재사용)"""
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        return np.empty(shape, dtype)
+    return buf
 
-def _draw_grid(vis_rgb):
-    h, w = vis_rgb.shape[:2]
+def _draw_grid(vis):
+    h, w = vis.shape[:2]
     cs_h, cs_w = h // GRID, w // GRID
     for j in range(1, GRID):
         x = j * cs_w
-        cv2.line(vis_rgb, (x, 0), (x, h), (100, 100, 100), 1, cv2.LINE_AA)
+        cv2.line(vis, (x, 0), (x, h), (100, 100, 100), 1, cv2.LINE_AA)
     for i in range(1, GRID):
         y = i * cs_h
-        cv2.line(vis_rgb, (0, y), (w, y), (100, 100, 100), 1, cv2.LINE_AA)
+        cv2.line(vis, (0, y), (w, y), (100, 100, 100), 1, cv2.LINE_AA)
 
 def gen_original_frames(cap):
     """원본 스트림"""
@@ -40,50 +49,20 @@ def gen_original_frames(cap):
         if not ret:
             time.sleep(0.01)
             continue
-        frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-        yield _jpeg_bytes_from_rgb(frame_rgb), []
+        yield _jpeg_bytes(frame_bgr), []
 
 def gen_warped_frames(cap):
     """체스판 와핑 스트림"""
-    prev_warp = None
-    # 안정화된 코너 보정기 (스트림 생명주기 내 유지)
-    _corner_stabilizer = CornerStabilizer(hist_len=7, ema_alpha=0.35, max_jump=60.0, need_good=3)
-    _last_good_corners = None
-    _hold_counter = 0
-    _HOLD_LAST_N_FRAMES = 20
-
-    def _safe_find_corners(frame_bgr):
-        nonlocal _last_good_corners, _hold_counter
-        raw = find_corners(frame_bgr, white_threshold=180)
-        if raw is not None:
-            ok, _ = is_valid_quad(raw, MIN_QUAD_AREA, AR_MIN, AR_MAX)
-            if not ok:
-                raw = None
-        stable = _corner_stabilizer.update(raw)
-        if stable is not None:
-            _last_good_corners = stable
-            _hold_counter = 0
-            return stable
-        if _last_good_corners is not None and _hold_counter < _HOLD_LAST_N_FRAMES:
-            _hold_counter += 1
-            return _last_good_corners
-        return None
+    prev_warp = None   # 마지막 와핑 결과 (오버레이 없음)
+    vis = None         # 그릴 배열 (프레임마다 재사용)
     while True:
         ret, frame_bgr = cap.read()
         if not ret:
             time.sleep(0.01)
             continue
 
-        frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-
-        # --- 코너 검출 (안정화) ---
-        corners = _safe_find_corners(frame_bgr)
-
-        # --- 디버그: 원본에 코너 점 찍기 ---
-        debug_rgb = frame_rgb.copy()
-        if corners is not None:
-            for (x, y) in corners.astype(int):
-                cv2.circle(debug_rgb, (x, y), 10, (255, 0, 0), -1)
+        # --- 코너 검출 (안정화, 공용 코너 서비스) ---
+        corners = track_corners(cap, frame_bgr)
 
         # --- 와핑 ---
         warped = None
@@ -91,24 +70,31 @@ def gen_warped_frames(cap):
             warped = warp_chessboard(frame_bgr, corners, size=WARP_SIZE)
 
         if warped is not None:
-            vis = cv2.cvtColor(warped, cv2.COLOR_BGR2RGB)
+            prev_warp = _reuse(prev_warp, warped.shape)
+            np.copyto(prev_warp, warped)
+            src = warped
             status = "Warp OK"
-            prev_warp = vis.copy()
+        elif prev_warp is not None:
+            src = prev_warp
+            status = "No corners - showing previous warp"
         else:
-            if prev_warp is not None:
-                vis = prev_warp.copy()
-                status = "No corners - showing previous warp"
-            else:
-                vis = debug_rgb.copy()
-                status = "No warp - showing original"
+            src = frame_bgr
+            status = "No warp - showing original"
+        vis = _reuse(vis, src.shape)
+        np.copyto(vis, src)
+
+        # --- 디버그: 원본을 보여줄 때 코너 점 찍기 ---
+        if src is frame_bgr and corners is not None:
+            for (x, y) in corners.astype(int):
+                cv2.circle(vis, (x, y), 10, (0, 0, 255), -1)
 
         _draw_grid(vis)
         h, w = vis.shape[:2]
         cv2.putText(vis, status, (10, h - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2, cv2.LINE_AA)
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2, cv2.LINE_AA)
 
         yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + _jpeg_bytes_from_rgb(vis) + b'\r\n')
+               b'Content-Type: image/jpeg\r\n\r\n' + _jpeg_bytes(vis) + b'\r\n')
 
 def gen_edges_frames(cap):
     """디버그 스트림 (piece_recognition에서 가져옴)"""